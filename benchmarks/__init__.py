@@ -0,0 +1,7 @@
+"""
+Micro-benchmarks for the Gateway hot paths.
+
+Each module is runnable on its own from the repo root, e.g.:
+
+    python -m benchmarks.diary_snapshot
+"""
@@ -0,0 +1,105 @@
+"""
+Shared builders for benchmark inputs.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from medforce.gateway.diary import (
+    ClinicalDocument,
+    ClinicalQuestion,
+    ConversationEntry,
+    MonitoringEntry,
+    PatientDiary,
+    Phase,
+    RiskLevel,
+)
+
+
+def build_busy_diary(patient_id: str = "PT-BENCH") -> PatientDiary:
+    """A diary at the size a long-running monitored patient reaches."""
+    diary = PatientDiary.create_new(patient_id)
+    diary.header.current_phase = Phase.MONITORING
+    diary.header.risk_level = RiskLevel.MEDIUM
+    for field, value in (
+        ("name", "Benchmark Patient"), ("dob", "1970-01-01"),
+        ("nhs_number", "9434765919"), ("phone", "+447700900123"),
+        ("gp_name", "Dr Patel"), ("contact_preference", "sms"),
+    ):
+        diary.intake.mark_field_collected(field, value)
+    diary.clinical.chief_complaint = "Abnormal liver function tests"
+    diary.clinical.referral_narrative = "Referral narrative. " * 40
+    for i in range(30):
+        diary.clinical.questions_asked.append(ClinicalQuestion(
+            question=f"Clinical question {i} about symptoms and history?",
+            answer=f"Patient answer {i} with some detail about how they feel.",
+            answered_by="patient",
+        ))
+    for i in range(8):
+        diary.clinical.documents.append(ClinicalDocument(
+            type="lab_results", source="patient", file_ref=f"doc_{i}.pdf",
+            processed=True,
+            extracted_values={"bilirubin": 30 + i, "ALT": 80 + i, "albumin": 36},
+        ))
+    diary.monitoring.monitoring_active = True
+    diary.monitoring.appointment_date = "2026-01-01"
+    for i in range(50):
+        diary.monitoring.add_entry(MonitoringEntry(
+            date="2026-01-15", type="patient_message",
+            action="logged", detail=f"Monitoring entry {i}",
+            new_values={"bilirubin": 40 + i},
+        ))
+    for i in range(PatientDiary.MAX_CONVERSATION_LOG):
+        diary.add_conversation(ConversationEntry(
+            direction="PATIENT→AGENT" if i % 2 else "AGENT→PATIENT",
+            channel="websocket",
+            message=f"Conversation message number {i}, reasonably long text.",
+        ))
+    return diary
+
+
+SCENARIO_DUMPS = Path(__file__).resolve().parent.parent / "scenario_dumps"
+
+
+def load_scenario_diaries() -> list[PatientDiary]:
+    """
+    Diaries rebuilt from the recorded consultation in scenario_dumps/.
+
+    The dumps hold the transcript, the question list as it grew over the
+    consultation (questions/q0..q14) and the final report — not diaries
+    themselves — so each questions/qN snapshot becomes one diary at that
+    point of the conversation.
+    """
+    transcript = json.loads((SCENARIO_DUMPS / "transcript.json").read_text())
+    report = json.loads((SCENARIO_DUMPS / "report.json").read_text())
+    handover = report.get("clinical_handover", {})
+    snapshots = sorted(
+        (SCENARIO_DUMPS / "questions").glob("q*.json"),
+        key=lambda p: int(p.stem[1:]),
+    )
+
+    diaries = []
+    for n, path in enumerate(snapshots):
+        questions = json.loads(path.read_text())
+        diary = PatientDiary.create_new(f"PT-SCN-{n:02d}")
+        diary.header.current_phase = Phase.CLINICAL
+        diary.intake.mark_field_collected("name", "Marcus Thompson")
+        diary.clinical.chief_complaint = "Jaundice and fatigue"
+        diary.clinical.referral_narrative = handover.get("hpi_narrative", "")
+        for q in questions:
+            diary.clinical.questions_asked.append(ClinicalQuestion(
+                question=q.get("content", ""),
+                answer=q.get("answer") or None,
+                answered_by="patient" if q.get("answer") else None,
+            ))
+        turns = transcript[: max(2, len(transcript) * (n + 1) // len(snapshots))]
+        for turn in turns:
+            diary.add_conversation(ConversationEntry(
+                direction="PATIENT→AGENT" if turn["role"] == "Patient" else "AGENT→PATIENT",
+                channel="websocket",
+                message=turn["message"],
+            ))
+        diaries.append(diary)
+    return diaries
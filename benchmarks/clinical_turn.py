@@ -0,0 +1,190 @@
+"""
+Clinical turn latency: sequential vs concurrent LLM calls.
+
+Drives ClinicalAgent._handle_user_message with a stubbed LLM that sleeps
+a fixed ``delay`` per call and answers by prompt type, over a mix of
+turns:
+
+  plan_next     plan answer, no follow-up, next plan question ready
+                (extraction + follow-up evaluation)
+  followup      plan answer that earns a follow-up, plan exhausted
+                (extraction + follow-up evaluation; speculation discarded)
+  contextual    plan answer, no follow-up, plan exhausted
+                (extraction + follow-up evaluation + contextual question);
+                extraction finds nothing new — the best case
+  ctx_extract   as contextual, but extraction finds a medication that
+                the clinical summary lists, so the follow-up evaluation
+                and the speculative question are redone after it
+  ctx_narrative as ctx_extract, but the summary is a referral narrative
+                that doesn't list medications, so speculation is kept
+
+and prints p50 / p95 turn latency for each mode, plus how many LLM
+calls each turn made and how often the speculative question was
+discarded and regenerated.  Real turns usually extract something, so
+ctx_extract / ctx_narrative are closer to production than contextual.
+
+Run:  python -m benchmarks.clinical_turn [turns_per_kind] [delay_ms]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from unittest.mock import MagicMock
+
+from medforce.gateway.agents.clinical_agent import ClinicalAgent
+from medforce.gateway.diary import (
+    ClinicalQuestion,
+    ClinicalSubPhase,
+    PatientDiary,
+    Phase,
+)
+from medforce.gateway.events import EventEnvelope
+
+
+def _stub_client(
+    delay: float, followup: bool, extracted: dict, calls: Counter,
+) -> MagicMock:
+    async def generate_content(model, contents, **kwargs):
+        # Counted when issued: a call cancelled mid-flight is still paid for
+        if "clinical data extraction" in contents:
+            kind = "extract"
+        elif "follow-up is warranted" in contents:
+            kind = "followup"
+        else:
+            kind = "question"
+        calls[kind] += 1
+        await asyncio.sleep(delay)
+        response = MagicMock()
+        response.usage_metadata = None
+        if kind == "extract":
+            response.text = json.dumps(extracted)
+        elif kind == "followup":
+            response.text = json.dumps(
+                {"followup": True, "question": "When did that start?"}
+                if followup else {"followup": False}
+            )
+        else:
+            response.text = "How has your appetite been over the last month?"
+        return response
+
+    client = MagicMock()
+    client.aio.models.generate_content = generate_content
+    return client
+
+
+def _diary(with_plan: bool, narrative: bool = False) -> PatientDiary:
+    diary = PatientDiary.create_new("PT-BENCH")
+    diary.header.current_phase = Phase.CLINICAL
+    diary.clinical.sub_phase = ClinicalSubPhase.ASKING_QUESTIONS
+    diary.intake.name = "Benchmark Patient"
+    diary.intake.phone = "07700900000"
+    diary.intake.nhs_number = "9434765919"
+    diary.intake.dob = "1970-01-01"
+    diary.intake.gp_name = "Dr Patel"
+    diary.clinical.chief_complaint = "abdominal pain"
+    diary.clinical.meds_addressed = True
+    diary.clinical.allergies_addressed = True
+    diary.clinical.questions_asked.append(
+        ClinicalQuestion(question="Has the pain changed since your GP visit?")
+    )
+    diary.clinical.awaiting_followup = True
+    if narrative:
+        diary.clinical.referral_narrative = (
+            "GP referral: abdominal pain for 3 months, ALT 180, no jaundice."
+        )
+    if with_plan:
+        diary.clinical.generated_questions = ["Have you noticed any yellowing of your skin?"]
+    return diary
+
+
+_METFORMIN = {"current_medications": ["metformin 500mg"]}
+
+KINDS = {
+    "plan_next": {"with_plan": True, "followup": False},
+    "followup": {"with_plan": False, "followup": True},
+    "contextual": {"with_plan": False, "followup": False},
+    "ctx_extract": {"with_plan": False, "followup": False, "extracted": _METFORMIN},
+    "ctx_narrative": {
+        "with_plan": False, "followup": False, "extracted": _METFORMIN, "narrative": True,
+    },
+}
+
+
+async def run(
+    parallel: bool, turns: int, delay: float,
+) -> tuple[dict[str, list[float]], dict[str, Counter]]:
+    samples: dict[str, list[float]] = {}
+    calls: dict[str, Counter] = {}
+    event = EventEnvelope.user_message(
+        "PT-BENCH", "It has been getting a bit sharper in the evenings lately",
+    )
+    for kind, spec in KINDS.items():
+        counter = calls.setdefault(kind, Counter())
+        client = _stub_client(delay, spec["followup"], spec.get("extracted", {}), counter)
+        agent = ClinicalAgent(llm_client=client, parallel_turn=parallel)
+        times = samples.setdefault(kind, [])
+        for _ in range(turns):
+            diary = _diary(spec["with_plan"], spec.get("narrative", False))
+            t0 = time.perf_counter()
+            await agent._handle_user_message(event, diary)
+            times.append(time.perf_counter() - t0)
+    return samples, calls
+
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+
+def main() -> None:
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    delay = (float(sys.argv[2]) if len(sys.argv) > 2 else 200.0) / 1000
+
+    print(f"\n{turns} turns per kind, stub LLM delay {delay * 1000:.0f} ms")
+    print(
+        f"{'mode':<12}{'kind':<15}{'p50 ms':>8}{'p95 ms':>8}"
+        f"{'calls/turn':>12}{'discarded':>11}"
+    )
+    for parallel in (False, True):
+        mode = "concurrent" if parallel else "sequential"
+        samples, calls = asyncio.run(run(parallel, turns, delay))
+        everything = [t for times in samples.values() for t in times]
+        calls["all"] = sum(calls.values(), Counter())
+        for kind, times in [*samples.items(), ("all", everything)]:
+            counts, n = calls[kind], len(times)
+            print(
+                f"{mode:<12}{kind:<15}"
+                f"{_pct(times, 0.5):>8.0f}{_pct(times, 0.95):>8.0f}"
+                f"{sum(counts.values()) / n:>12.1f}"
+                f"{_discard_rate(kind, calls, n) if parallel else '-':>11}"
+            )
+
+
+def _discard_rate(kind: str, calls: dict[str, Counter], turns: int) -> str:
+    """Share of contextual turns whose speculative question was redone.
+
+    Each contextual turn keeps exactly one question, so question calls
+    beyond one per turn are discarded speculative drafts.  The ``all``
+    row counts contextual kinds only.
+    """
+    contextual = [
+        k for k, spec in KINDS.items()
+        if not spec["with_plan"] and not spec["followup"]
+    ]
+    if kind == "all":
+        turns = turns // len(KINDS)
+        kinds = contextual
+    elif kind in contextual:
+        kinds = [kind]
+    else:
+        return "-"
+    extra = sum(max(0, calls[k]["question"] - turns) for k in kinds)
+    return f"{extra / (turns * len(kinds)):.0%}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Cohort re-scoring throughput: in-process vs a process pool.
+
+Seeds a temporary SQLite diary store with ``patients`` busy diaries
+(labs spread across the bilirubin bands), then runs the re-scoring job
+with a tightened bilirubin threshold for each worker count and prints
+patients per second.  Extrapolate to a full population from the rate.
+
+Run:  python -m benchmarks.cohort_rescore [patients] [max_workers]
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+
+from benchmarks._fixtures import build_busy_diary
+from medforce.gateway.cohort_rescore import StoreSpec, run_rescore
+from medforce.gateway.diary import ClinicalDocument
+
+CANDIDATE = {"threshold_overrides": {"Bilirubin > 50 µmol/L (severe)": 35}}
+
+
+def seed(spec: StoreSpec, patients: int) -> None:
+    store = spec.open()
+    for i in range(patients):
+        diary = build_busy_diary(f"PT-{i}")
+        diary.clinical.documents.append(ClinicalDocument(
+            type="lab_results",
+            processed=True,
+            extracted_values={"bilirubin": 10 + i % 60, "ALT": 40 + i % 300},
+        ))
+        store.save(f"PT-{i}", diary)
+    store.backend.close()
+
+
+def main() -> None:
+    patients = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = StoreSpec(kind="sqlite", path=os.path.join(tmp, "diaries.sqlite3"))
+        seed(spec, patients)
+
+        print(f"\n{patients} patients")
+        print(f"{'workers':>8}{'seconds':>10}{'patients/s':>12}{'changed':>10}")
+        workers = 1
+        while workers <= max_workers:
+            report = run_rescore(CANDIDATE, store_spec=spec, workers=workers)
+            rate = report["scored"] / max(report["elapsed_s"], 1e-9)
+            print(
+                f"{workers:>8}{report['elapsed_s']:>10.2f}"
+                f"{rate:>12.0f}{report['changed']:>10}"
+            )
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
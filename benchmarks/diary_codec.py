@@ -0,0 +1,75 @@
+"""
+Diary encoding size and speed: legacy pretty JSON vs compact codecs.
+
+Diaries come from the recorded consultation in scenario_dumps/ (one per
+question-list snapshot) plus one long-running monitored diary.  For
+each codec the table shows the average blob size and encode/decode time
+per diary.  "legacy" is the old DiaryStore path: ``indent=2`` dump,
+``json.loads`` + ``model_validate`` on load.
+
+Run:  python -m benchmarks.diary_codec [repeats]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+
+from benchmarks._fixtures import build_busy_diary, load_scenario_diaries
+from medforce.gateway.diary import PatientDiary
+from medforce.gateway.diary_codec import available_codecs, decode, encode
+
+
+def _legacy_encode(diary):
+    return diary.model_dump_json(indent=2).encode("utf-8")
+
+
+def _legacy_decode(blob):
+    return PatientDiary.model_validate(json.loads(blob))
+
+
+def measure(diaries, enc, dec, repeats):
+    blobs = [enc(d) for d in diaries]
+    size = sum(len(b) for b in blobs) / len(blobs)
+
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        for d in diaries:
+            enc(d)
+    enc_us = (time.perf_counter() - t0) / (repeats * len(diaries)) * 1e6
+
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        for b in blobs:
+            dec(b)
+    dec_us = (time.perf_counter() - t0) / (repeats * len(diaries)) * 1e6
+    return size, enc_us, dec_us
+
+
+def report(title, diaries, repeats):
+    print(f"\n{title} ({len(diaries)} diaries, {repeats} repeats)")
+    print(f"{'codec':<16}{'avg bytes':>11}{'vs legacy':>11}{'encode µs':>12}{'decode µs':>12}")
+    base_size, enc_us, dec_us = measure(diaries, _legacy_encode, _legacy_decode, repeats)
+    print(f"{'legacy':<16}{base_size:>11.0f}{'1.00x':>11}{enc_us:>12.1f}{dec_us:>12.1f}")
+    for codec in available_codecs():
+        if codec == "json":
+            continue
+        size, enc_us, dec_us = measure(
+            diaries, lambda d, c=codec: encode(d, c), decode, repeats,
+        )
+        ratio = f"{base_size / size:.2f}x"
+        print(f"{codec:<16}{size:>11.0f}{ratio:>11}{enc_us:>12.1f}{dec_us:>12.1f}")
+
+
+def main() -> None:
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    report("scenario_dumps diaries", load_scenario_diaries(), repeats)
+    report("busy monitored diary", [build_busy_diary()], repeats)
+    missing = {"msgpack", "compact+zstd"} - set(available_codecs())
+    if missing:
+        print(f"\n(not installed here, skipped: {', '.join(sorted(missing))})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Per-event diary copy cost: repeated deep copies vs copy-on-write snapshots.
+
+Simulates what Gateway.process_event does to a cached diary for one
+USER_MESSAGE turn (agent appends a reply, nothing else changes):
+
+  before — cache read deep copy, step 6c deep copy, step 8 deep copy,
+           background-save deep copy (4 full copies)
+  after  — cache read deep copy, one snapshot() sharing unchanged
+           sections with the previous cached snapshot
+
+Run:  python -m benchmarks.diary_snapshot [events]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+
+from benchmarks._fixtures import build_busy_diary
+from medforce.gateway.diary import ConversationEntry
+
+
+def _turn(working, i):
+    working.add_conversation(ConversationEntry(message=f"patient says {i}"))
+    working.add_conversation(ConversationEntry(message=f"agent replies {i}"))
+
+
+def run_before(cached, events):
+    retained = []
+    for i in range(events):
+        working = cached.model_copy(deep=True)          # cache read
+        _turn(working, i)
+        cached = working.model_copy(deep=True)          # 6c
+        cached = working.model_copy(deep=True)          # 8
+        save_copy = working.model_copy(deep=True)       # bg save
+        retained = [cached, save_copy]
+    return retained
+
+
+def run_after(cached, events):
+    retained = []
+    for i in range(events):
+        working = cached.model_copy(deep=True)          # cache read
+        _turn(working, i)
+        cached = working.snapshot(cached)               # shared by cache + saver
+        retained = [cached]
+    return retained
+
+
+def measure(fn, events):
+    base = build_busy_diary().snapshot()
+    fn(base, 5)  # warm up
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start_mem, _ = tracemalloc.get_traced_memory()
+    t0 = time.perf_counter()
+    retained = fn(base, events)
+    elapsed = time.perf_counter() - t0
+    end_mem, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del retained
+    return {
+        "ms_per_event": elapsed / events * 1000,
+        "peak_kib": (peak - start_mem) / 1024,
+        "retained_kib": (end_mem - start_mem) / 1024,
+    }
+
+
+def main() -> None:
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"diary copy cost per event ({events} events, busy diary)")
+    print(f"{'mode':<8}{'ms/event':>10}{'peak KiB':>12}{'retained KiB':>15}")
+    for name, fn in (("before", run_before), ("after", run_after)):
+        r = measure(fn, events)
+        print(f"{name:<8}{r['ms_per_event']:>10.2f}{r['peak_kib']:>12.1f}{r['retained_kib']:>15.1f}")
+
+    # Snapshot alone, without the unavoidable working-copy deep copy
+    cached = build_busy_diary().snapshot()
+    working = cached.model_copy(deep=True)
+    _turn(working, 0)
+    n = 200
+    t0 = time.perf_counter()
+    for _ in range(n):
+        working.model_copy(deep=True)
+    deep_ms = (time.perf_counter() - t0) / n * 1000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        working.snapshot(cached)
+    snap_ms = (time.perf_counter() - t0) / n * 1000
+    print(f"\none deep copy: {deep_ms:.2f} ms   one snapshot: {snap_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Identity index startup cost: diary-scan rebuild vs the persisted log.
+
+N busy diaries (patient phone/email/NHS number, two helpers, a GP) are
+stored in a SQLite diary backend.  "rebuild" is what a cold start needs
+without a persisted index — list and load every diary, then
+``rebuild_from_diaries``; "snapshot" is ``IdentityResolver.load`` over a
+compacted snapshot; "snapshot+log" the same with the last quarter of the
+patients still in the entry log.  A save that changes no contacts is
+also timed (the per-turn cost of keeping the index current).
+
+Run:  python -m benchmarks.identity_index [patients]
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._fixtures import build_busy_diary
+from medforce.gateway.diary import DiaryStore, HelperEntry
+from medforce.gateway.diary_backends import SQLiteDiaryBackend
+from medforce.gateway.handlers.identity_resolver import IdentityResolver
+from medforce.gateway.identity_index import IdentityIndexLog
+
+
+def _diary(i):
+    diary = build_busy_diary(f"PT-{i:05d}")
+    diary.intake.mark_field_collected("phone", f"+4477{i:08d}")
+    diary.intake.mark_field_collected("email", f"patient{i}@example.com")
+    for h in range(2):
+        diary.helper_registry.add_helper(HelperEntry(
+            id=f"HELPER-{h}", name=f"Helper {h}", relationship="spouse",
+            channel="sms", contact=f"+4478{i:07d}{h}", permissions=["view_status"],
+        ))
+    diary.gp_channel.gp_name = "Dr Patel"
+    diary.gp_channel.gp_email = f"gp{i % 50}@nhs.uk"
+    return diary
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - t0) * 1000
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteDiaryBackend(str(Path(tmp) / "diaries.sqlite3"))
+        store = DiaryStore(backend=backend, patient_index=False)
+        diaries = {f"PT-{i:05d}": _diary(i) for i in range(n)}
+        for pid, diary in diaries.items():
+            store.save(pid, diary)
+
+        def rebuild():
+            resolver = IdentityResolver()
+            return resolver.rebuild_from_diaries(dict(store.iter_all_diaries()))
+
+        contacts, rebuild_ms = _timed(rebuild)
+
+        # Persist: first three quarters compacted, the rest left in the log
+        log = IdentityIndexLog(backend, compact_every=n * 10)
+        writer = IdentityResolver(log)
+        writer.load()
+        cut = n * 3 // 4
+        for pid in list(diaries)[:cut]:
+            writer.update_for_patient(pid, diaries[pid])
+        log.compact(writer._to_rows())
+        _, snapshot_ms = _timed(lambda: IdentityResolver(IdentityIndexLog(backend)).load())
+        for pid in list(diaries)[cut:]:
+            writer.update_for_patient(pid, diaries[pid])
+        loaded, log_ms = _timed(lambda: IdentityResolver(IdentityIndexLog(backend)).load())
+        assert loaded == contacts
+
+        unchanged = diaries["PT-00000"]
+        rounds = 2000
+        _, same_ms = _timed(
+            lambda: [writer.update_for_patient("PT-00000", unchanged) for _ in range(rounds)]
+        )
+
+    print(f"\n{n} patients, {contacts} contacts (sqlite backend)")
+    print(f"{'startup path':<16}{'ms':>10}")
+    print(f"{'rebuild':<16}{rebuild_ms:>10.1f}")
+    print(f"{'snapshot':<16}{snapshot_ms:>10.1f}")
+    print(f"{'snapshot+log':<16}{log_ms:>10.1f}   ({n - cut} log entries)")
+    print(f"\nunchanged save: {same_ms / rounds * 1000:.1f} µs (no write)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Lab value parse throughput: legacy inline parsing vs the shared module.
+
+Two workloads, each timed as items per second:
+
+  - document panels: one monitoring upload is read three times
+    (plausibility check, baseline comparison, absolute thresholds).
+    "legacy" is the old path — ``float()`` per value per pass with
+    per-call alias dicts; "lab_values" is ``normalize_lab_panel`` (cold:
+    caches cleared before every call; memo: the hit the second and
+    third passes get in production).  Both sides strip units; only
+    lab_values converts them, which is most of its cold cost
+  - chat messages: "legacy" builds and runs one regex per alias per
+    message; "lab_values" is the single precompiled pattern
+
+Run:  python -m benchmarks.lab_parse [panels]
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import time
+
+from medforce.gateway.agents import lab_values
+from medforce.gateway.agents.lab_values import extract_lab_values, normalize_lab_panel
+
+_LEGACY_TEXT_ALIASES = {
+    "bilirubin": "bilirubin", "bili": "bilirubin", "alt": "ALT",
+    "alanine transaminase": "ALT", "ast": "AST", "aspartate transaminase": "AST",
+    "albumin": "albumin", "inr": "INR", "platelets": "platelets", "plt": "platelets",
+    "creatinine": "creatinine", "sodium": "sodium", "potassium": "potassium",
+    "haemoglobin": "haemoglobin", "hemoglobin": "haemoglobin", "hb": "haemoglobin",
+    "wbc": "WBC", "white blood cell": "WBC", "crp": "CRP",
+}
+
+
+def _legacy_extract(text):
+    results = {}
+    text_lower = text.lower()
+    for alias, canonical in dict(_LEGACY_TEXT_ALIASES).items():
+        pattern = rf'\b{re.escape(alias)}\b[\s:=]*(?:is|was|of|at)?\s*(\d+(?:\.\d+)?)'
+        match = re.search(pattern, text_lower)
+        if match:
+            results[canonical] = float(match.group(1))
+    return results
+
+
+def _legacy_panel(values):
+    aliases = {"total_bilirubin": "bilirubin", "alt": "ALT", "ast": "AST"}
+    out = {}
+    for key, raw in values.items():
+        key = aliases.get(key.lower(), key)
+        try:
+            out[key] = float(raw)
+        except (ValueError, TypeError):
+            match = re.match(r"([\d.]+)", str(raw).lstrip("<> "))
+            if match:
+                out[key] = float(match.group(1))
+    return out
+
+
+def _panels(n):
+    return [
+        {
+            "bilirubin": f"{20 + i % 80} µmol/L",
+            "ALT": 40 + i % 500,
+            "AST": f"{30 + i % 300} U/L",
+            "albumin": f"{28 + i % 20} g/L",
+            "platelets": f"{90 + i % 200} × 10^9",
+            "INR": 1.0 + (i % 15) / 10,
+            "creatinine": f"{0.7 + (i % 30) / 10:.1f} mg/dL",
+            "note": "haemolysed sample" if i % 7 == 0 else "",
+        }
+        for i in range(n)
+    ]
+
+
+_MESSAGES = [
+    "my bilirubin was 8 and ALT 600",
+    "Got my results back today: hb 11.2, plt 95, INR 1.6",
+    "The nurse said creatinine 150 umol/L and albumin is 28",
+    "Feeling a bit better this week, no new symptoms",
+    "white blood cell 14 and crp 80, they want to repeat it",
+]
+
+
+def _clear_caches():
+    lab_values._normalize_items.cache_clear()
+    lab_values._parse_lab_string.cache_clear()
+
+
+def _rate(fn, items, passes):
+    """Items per second, each item handled *passes* times back to back."""
+    t0 = time.perf_counter()
+    for item in items:
+        for _ in range(passes):
+            fn(item)
+    return len(items) / (time.perf_counter() - t0)
+
+
+def _cold(panel):
+    _clear_caches()
+    normalize_lab_panel(panel, units="conventional")
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    panels = _panels(n)
+
+    print(f"\ndocument panels ({n} panels, 3 passes each)")
+    print(f"{'path':<22}{'panels/s':>12}")
+    print(f"{'legacy':<22}{_rate(_legacy_panel, panels, 3):>12.0f}")
+    print(f"{'lab_values (cold)':<22}{_rate(_cold, panels, 3):>12.0f}")
+    normalize = lambda p: normalize_lab_panel(p, units="conventional")  # noqa: E731
+    _clear_caches()
+    print(f"{'lab_values (memo)':<22}{_rate(normalize, panels, 3):>12.0f}")
+
+    messages = _MESSAGES * (n // len(_MESSAGES))
+    print(f"\nchat messages ({len(messages)} messages)")
+    print(f"{'path':<22}{'messages/s':>12}")
+    print(f"{'legacy':<22}{_rate(_legacy_extract, messages, 1):>12.0f}")
+    print(f"{'lab_values':<22}{_rate(extract_lab_values, messages, 1):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
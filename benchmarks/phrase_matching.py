@@ -0,0 +1,113 @@
+"""
+Keyword routing throughput: per-set substring scans vs the shared matcher.
+
+Messages are every turn of the recorded transcripts (scenario_dumps/
+transcript.json and the e2e result logs in tests/).  For each message
+the routing path asks every question a USER_MESSAGE can trigger: the
+Gateway's cross-phase check, the booking intents, the clinical sign-off
+and skip phrases, and the monitoring priority keywords and negation-
+aware concerning patterns.
+
+"legacy" is the old code — one ``any(kw in text)`` loop per list (and a
+25-character negation check per hit); "phrases" is one uncached scan of
+the shared matcher, which answers all of them; "phrases (memo)" is the
+cost of each later check of a message that has already been scanned.
+Rates are messages per second.
+
+Run:  python -m benchmarks.phrase_matching [repeats]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from pathlib import Path
+
+from benchmarks._fixtures import SCENARIO_DUMPS
+from medforce.gateway.agents.booking_agent import RESCHEDULE_KEYWORDS, SLOT_REJECTION_KEYWORDS
+from medforce.gateway.agents.clinical_agent import CLINICAL_PHRASE_SETS
+from medforce.gateway.agents.monitoring_agent import MonitoringAgent
+from medforce.gateway.gateway import Gateway
+from medforce.gateway.phrases import PHRASES
+
+TESTS_DIR = Path(__file__).resolve().parent.parent / "tests"
+
+_SUBSTRING_LISTS = [
+    Gateway.CLINICAL_KEYWORDS, Gateway.INTAKE_KEYWORDS,
+    RESCHEDULE_KEYWORDS, SLOT_REJECTION_KEYWORDS,
+    *CLINICAL_PHRASE_SETS.values(),
+    MonitoringAgent.PRIORITY_KEYWORDS,
+]
+_PATTERN_LISTS = [
+    MonitoringAgent.CONCERNING_PATTERNS["general"],
+    MonitoringAgent.CONCERNING_PATTERNS["liver"],
+]
+
+
+def load_messages() -> list[str]:
+    messages: list[str] = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if isinstance(node.get("message"), str):
+                messages.append(node["message"])
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    for path in (
+        SCENARIO_DUMPS / "transcript.json",
+        TESTS_DIR / "e2e_results.json",
+        TESTS_DIR / "e2e_resilience_results.json",
+    ):
+        walk(json.loads(path.read_text()))
+    return messages
+
+
+def _legacy_negated(text, pattern):
+    idx = text.find(pattern)
+    prefix = text[max(0, idx - 25):idx]
+    return any(neg in prefix for neg in MonitoringAgent.PATTERN_NEGATIONS)
+
+
+def legacy(text):
+    text_lower = text.lower()
+    for keywords in _SUBSTRING_LISTS:
+        any(kw in text_lower for kw in keywords)
+    for patterns in _PATTERN_LISTS:
+        [p for p in patterns if p in text_lower and not _legacy_negated(text_lower, p)]
+
+
+def shared(text):
+    PHRASES._scan(text)
+
+
+def memo(text):
+    PHRASES.has(text, "booking.reschedule")
+
+
+def rate(fn, messages, repeats):
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        for message in messages:
+            fn(message)
+    return repeats * len(messages) / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    messages = load_messages()
+    phrases = sum(len(s.phrases) for s in PHRASES.sets.values())
+    avg = sum(map(len, messages)) / len(messages)
+    print(f"\n{len(messages)} messages (avg {avg:.0f} chars), {phrases} phrases, {repeats} repeats")
+    print(f"{'path':<16}{'messages/s':>12}")
+    print(f"{'legacy':<16}{rate(legacy, messages, repeats):>12.0f}")
+    print(f"{'phrases':<16}{rate(shared, messages, repeats):>12.0f}")
+    print(f"{'phrases (memo)':<16}{rate(memo, messages, repeats):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
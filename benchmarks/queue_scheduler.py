@@ -0,0 +1,84 @@
+"""
+Queue schedulers: one task per patient vs a fixed worker pool.
+
+Simulates N patients (default 10,000) each sending a few events through
+PatientQueueManager with a processor that yields once (``sleep(0)``),
+so the numbers isolate scheduling overhead.  For each scheduler the
+table shows:
+
+  throughput   events/s from first enqueue until everything is processed
+  tasks        asyncio tasks alive afterwards (workers)
+  idle CPU     process CPU seconds burned while the system sits idle
+               for ``idle_seconds`` with every patient still "active"
+
+Run:  python -m benchmarks.queue_scheduler [patients] [events_per_patient] [idle_seconds]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from medforce.gateway.events import EventEnvelope
+from medforce.gateway.queue import PatientQueueManager
+
+
+async def _processor(event: EventEnvelope) -> None:
+    await asyncio.sleep(0)
+
+
+async def run(scheduler: str, patients: int, per_patient: int, idle_seconds: float) -> dict:
+    mgr = PatientQueueManager(
+        processor=_processor,
+        scheduler=scheduler,
+        max_in_flight=patients * per_patient + 1,
+        max_queue_depth=per_patient + 1,
+    )
+    await mgr.start()
+    events = [
+        EventEnvelope.user_message(f"PT-{p}", f"msg {i}")
+        for i in range(per_patient)
+        for p in range(patients)
+    ]
+
+    t0 = time.perf_counter()
+    for event in events:
+        await mgr.enqueue(event)
+    while mgr.in_flight:
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - t0
+    tasks = len(asyncio.all_tasks()) - 1
+
+    cpu0 = time.process_time()
+    await asyncio.sleep(idle_seconds)
+    idle_cpu = time.process_time() - cpu0
+
+    await mgr.stop()
+    return {
+        "throughput": len(events) / elapsed,
+        "tasks": tasks,
+        "idle_cpu": idle_cpu,
+    }
+
+
+def main() -> None:
+    patients = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    per_patient = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    idle_seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+
+    print(
+        f"\n{patients} patients x {per_patient} events, "
+        f"idle window {idle_seconds:.0f}s"
+    )
+    print(f"{'scheduler':<14}{'events/s':>12}{'tasks':>9}{'idle CPU s':>13}")
+    for scheduler in ("per_patient", "pool"):
+        result = asyncio.run(run(scheduler, patients, per_patient, idle_seconds))
+        print(
+            f"{scheduler:<14}{result['throughput']:>12.0f}"
+            f"{result['tasks']:>9}{result['idle_cpu']:>13.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,7 @@ from google import genai
 from google.genai import types
 import httpx
 from medforce.infrastructure.canvas_tools import CanvasTools
+from medforce.gateway.llm_gateway import get_llm_gateway
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -957,9 +958,7 @@ class ChatAgent:
             patient_id: Optional patient ID for context
             use_tools: Whether to enable tool execution
         """
-        self.client = genai.Client(
-            api_key=os.getenv("GOOGLE_API_KEY")
-        )
+        self.client = get_llm_gateway().client(MODEL)
         
         self.retriever = RAGRetriever(board_base_url=BOARD_BASE_URL)
         
@@ -1247,9 +1246,9 @@ When patient context is provided, use it to give personalized answers."""
                 config.tools = self.tool_executor.get_tool_declarations()
             
             # Make API call
-            response = await self.client.aio.models.generate_content(
-                model=MODEL,
-                contents=full_message,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                full_message,
                 config=config
             )
             
@@ -1271,9 +1270,9 @@ When patient context is provided, use it to give personalized answers."""
                         # Filter out None parts from the response content
                         model_parts = [p for p in response.candidates[0].content.parts if p is not None]
                         
-                        follow_up = await self.client.aio.models.generate_content(
-                            model=MODEL,
-                            contents=[
+                        follow_up = await get_llm_gateway().generate(
+                            MODEL,
+                            [
                                 full_message,
                                 types.Content(role="model", parts=model_parts),
                                 types.Part.from_function_response(
@@ -1358,9 +1357,9 @@ Board URL: https://clinic-os-v4-235758602997.europe-west1.run.app/board/{self.pa
                 config.tools = self.tool_executor.get_tool_declarations()
             
             # Get complete response (simulate streaming by chunking)
-            response = await self.client.aio.models.generate_content(
-                model=MODEL,
-                contents=full_message,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                full_message,
                 config=config
             )
             
@@ -1408,9 +1407,9 @@ Board URL: https://clinic-os-v4-235758602997.europe-west1.run.app/board/{self.pa
                         # Filter out None parts from the response content
                         model_parts = [p for p in response.candidates[0].content.parts if p is not None]
                         
-                        follow_up = await self.client.aio.models.generate_content(
-                            model=MODEL,
-                            contents=[
+                        follow_up = await get_llm_gateway().generate(
+                            MODEL,
+                            [
                                 full_message,
                                 types.Content(role="model", parts=model_parts),
                                 types.Part.from_function_response(
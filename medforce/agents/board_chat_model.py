@@ -12,6 +12,7 @@ import threading
 from dotenv import load_dotenv
 from medforce.agents import side_agent
 from medforce.infrastructure import canvas_ops
+from medforce.gateway.llm_gateway import get_llm_gateway
 load_dotenv()
 
 logger = logging.getLogger("chat-model")
@@ -33,9 +34,9 @@ def _get_model():
     if _cached_model is None:
         with open("system_prompts/chat_model_system.md", "r", encoding="utf-8") as f:
             system_prompt = f.read()
-        _cached_model = genai.GenerativeModel(
+        _cached_model = get_llm_gateway().legacy_model(
             "gemini-2.0-flash",  # Use faster model
-            system_instruction=system_prompt
+            system_prompt
         )
     return _cached_model
 
@@ -210,7 +211,7 @@ Context (Board Data):
 {context[:30000]}"""  # Increased context size to include sidebar data
 
     model = _get_model()
-    response = model.generate_content(prompt)
+    response = await get_llm_gateway().run_blocking(MODEL, model.generate_content, prompt)
     return response.text.strip()
 
 
@@ -318,7 +319,7 @@ async def chat_agent(chat_history: list[dict]) -> str:
             # Use AI to generate proper note content from the command + patient context
             try:
                 _ensure_genai_configured()
-                note_model = genai.GenerativeModel("gemini-2.0-flash")
+                note_model = get_llm_gateway().legacy_model(MODEL)
                 note_prompt = f"""Generate professional clinical notes based on the doctor's request and patient data.
 
 Doctor's request: "{query}"
@@ -338,7 +339,9 @@ Rules:
 - NEVER include the original command text - only the generated note content
 
 Output ONLY the note content:"""
-                note_response = note_model.generate_content(note_prompt)
+                note_response = await get_llm_gateway().run_blocking(
+                    MODEL, note_model.generate_content, note_prompt
+                )
                 content = note_response.text.strip()
                 # Clean up any markdown code block wrappers
                 if content.startswith('```'):
@@ -380,7 +383,7 @@ Output ONLY the note content:"""
             # Use AI to convert doctor's command into a patient-friendly message
             try:
                 _ensure_genai_configured()
-                rewrite_model = genai.GenerativeModel("gemini-2.0-flash")
+                rewrite_model = get_llm_gateway().legacy_model(MODEL)
                 rewrite_prompt = f"""Convert this doctor's instruction into a direct, professional message to the patient.
 The doctor said: "{query}"
 
@@ -402,7 +405,9 @@ Example inputs and outputs:
 - "draft a compassionate message about his condition" → "We understand this is a difficult time. Your recent labs show improvement, and we want to support your recovery. Please continue taking your medications as prescribed and avoid alcohol."
 
 Output ONLY the message:"""
-                rewrite_response = rewrite_model.generate_content(rewrite_prompt)
+                rewrite_response = await get_llm_gateway().run_blocking(
+                    MODEL, rewrite_model.generate_content, rewrite_prompt
+                )
                 message = rewrite_response.text.strip().strip('"').strip("'")
                 logger.info(f"💬 Rewrote message: {query[:50]}... → {message[:50]}...")
             except Exception as e:
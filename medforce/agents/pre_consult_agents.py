@@ -4,12 +4,14 @@ import base64
 import uuid
 import asyncio
 import logging
+from functools import partial
 from google import genai
 from google.genai import types
 from fastapi import WebSocket
 from PIL import Image
 from io import BytesIO
 from medforce.infrastructure import gcs as bucket_ops
+from medforce.gateway.llm_gateway import Priority, get_llm_gateway
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -30,9 +32,7 @@ class BaseLogicAgent:
     def client(self):
         """Lazy initialization of genai client"""
         if self._client is None:
-            self._client = genai.Client(
-                api_key=os.getenv("GOOGLE_API_KEY")
-            )
+            self._client = get_llm_gateway().client(MODEL)
         return self._client
 
 
@@ -66,9 +66,9 @@ class PatientManager(BaseLogicAgent):
 
         prompt_content = f"Please generate a patient profile based on these parameters:\n{json.dumps(input_criteria, indent=2)}"
 
-        response = await self.client.aio.models.generate_content(
-            model=MODEL, 
-            contents=prompt_content,
+        response = await get_llm_gateway().generate(
+            MODEL,
+            prompt_content,
             config=types.GenerateContentConfig(
                 response_mime_type="text/plain", # Returns raw text/markdown
                 system_instruction=system_instruction, 
@@ -98,9 +98,9 @@ class PatientManager(BaseLogicAgent):
         try:
             prompt_content = f"PATIENT PROFILE:\n{patient_profile_text}\n{json.dumps(self.args)}\nTASK: Extract the basic demographic and administrative info for this patient."
 
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
@@ -132,9 +132,9 @@ class PatientManager(BaseLogicAgent):
             f"Write the SYSTEM PROMPT for this patient."
         )
 
-        response = await self.client.aio.models.generate_content(
-            model=MODEL, 
-            contents=prompt_content,
+        response = await get_llm_gateway().generate(
+            MODEL,
+            prompt_content,
             config=types.GenerateContentConfig(
                 response_mime_type="text/plain", 
                 system_instruction=system_instruction, 
@@ -167,9 +167,9 @@ class PatientManager(BaseLogicAgent):
                 f"For each encounter, provide full SOAP notes (Subjective, Objective, Assessment, Plan)."
             )
 
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
                 config=types.GenerateContentConfig(
                     response_mime_type="text/plain", 
                     system_instruction=system_instruction, 
@@ -203,9 +203,9 @@ class PatientManager(BaseLogicAgent):
                 f"Format it strictly as a physical document text."
             )
 
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
                 config=types.GenerateContentConfig(
                     response_mime_type="text/plain", 
                     system_instruction=system_instruction, 
@@ -250,8 +250,9 @@ class PatientManager(BaseLogicAgent):
             try:
                 print(f"Generating image for referral letter using {model_name}...")
                 
-                response = self.client.models.generate_content(
-                    model=model_name,
+                response = await get_llm_gateway().run_blocking(
+                    model_name,
+                    partial(self.client.models.generate_content, model=model_name),
                     contents=[prompt],
                     config=types.GenerateContentConfig(
                         image_config=types.ImageConfig(
@@ -293,9 +294,9 @@ class PatientManager(BaseLogicAgent):
             # We explicitly ask for a list of encounters based on the profile
             prompt = f"Patient Profile:\n{patient_profile_text}\n\nEncounter Narrative:\n{encounter_narrative}\nTask: Generate the past medical encounters timeline for this patient as a JSON array."
             
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt,
                 config=types.GenerateContentConfig(
                     response_schema=response_schema, 
                     response_mime_type="application/json", 
@@ -332,9 +333,9 @@ class PatientManager(BaseLogicAgent):
                 f"Ensure the abnormal values align with the diagnosis described above."
             )
             
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
@@ -436,9 +437,9 @@ class PatientManager(BaseLogicAgent):
                 f"Format it as a clean, professional medical document."
             )
 
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
                 config=types.GenerateContentConfig(
                     response_mime_type="text/plain", 
                     system_instruction=system_instruction, 
@@ -472,9 +473,9 @@ class PatientManager(BaseLogicAgent):
                 f"TASK: Format this into a clean, fixed-width Laboratory Result Report."
             )
 
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
                 config=types.GenerateContentConfig(
                     response_mime_type="text/plain", 
                     system_instruction=system_instruction, 
@@ -500,9 +501,9 @@ class PatientManager(BaseLogicAgent):
             # We pass the raw JSON to the model
             prompt_content = f"Raw Encounter Data:\n{json.dumps(encounter_object, indent=2)}\n\nTask: Format this into a printable Medical Summary Report text."
 
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
                 config=types.GenerateContentConfig(
                     response_mime_type="text/plain", # We want formatted text, not JSON
                     system_instruction=system_instruction, 
@@ -542,8 +543,9 @@ class PatientManager(BaseLogicAgent):
             try:
                 print(f"Generating image for radiology report using {model_name}...")
                 
-                response = self.client.models.generate_content(
-                    model=model_name,
+                response = await get_llm_gateway().run_blocking(
+                    model_name,
+                    partial(self.client.models.generate_content, model=model_name),
                     contents=[prompt],
                     config=types.GenerateContentConfig(
                         image_config=types.ImageConfig(
@@ -602,8 +604,9 @@ class PatientManager(BaseLogicAgent):
             try:
                 print(f"Generating image for lab report using {model_name}...")
                 
-                response = self.client.models.generate_content(
-                    model=model_name,
+                response = await get_llm_gateway().run_blocking(
+                    model_name,
+                    partial(self.client.models.generate_content, model=model_name),
                     contents=[prompt],
                     config=types.GenerateContentConfig(
                         image_config=types.ImageConfig(
@@ -671,8 +674,9 @@ class PatientManager(BaseLogicAgent):
             try:
                 print(f"Generating image for radiology report using {model_name}...")
                 
-                response = self.client.models.generate_content(
-                    model=model_name,
+                response = await get_llm_gateway().run_blocking(
+                    model_name,
+                    partial(self.client.models.generate_content, model=model_name),
                     contents=[prompt],
                     config=types.GenerateContentConfig(
                         image_config=types.ImageConfig(
@@ -731,9 +735,9 @@ class PatientManager(BaseLogicAgent):
                 f"The Patient must answer according to their Persona (e.g., if anxious, sound anxious) and upload the files when asked."
             )
 
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
@@ -1082,9 +1086,10 @@ class PreConsulteAgent(BaseLogicAgent):
 
         try:
             # 5. Call LLM with JSON Schema
-            response = await self.client.aio.models.generate_content(
-                model=MODEL_PRE_CONSULT, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL_PRE_CONSULT,
+                prompt_content,
+                priority=Priority.HIGH,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema,
@@ -1160,9 +1165,10 @@ class RawDataProcessing(BaseLogicAgent):
             types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
         ]
 
-        response = await self.client.aio.models.generate_content(
-            model=MODEL, # Ensure this model supports Vision (e.g. gemini-1.5-flash)
-            contents=contents,
+        response = await get_llm_gateway().generate(
+            MODEL,  # Ensure this model supports Vision (e.g. gemini-1.5-flash)
+            contents,
+            cache=True,
             config=types.GenerateContentConfig(
                 response_mime_type="application/json", 
                 response_schema=response_schema, 
@@ -1415,9 +1421,10 @@ class RawDataProcessing(BaseLogicAgent):
             ]
 
             # 5. Call Model
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=contents,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                contents,
+                cache=True,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
@@ -1533,9 +1540,10 @@ class RawDataProcessing(BaseLogicAgent):
             ]
 
             # 5. Call Model
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=contents,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                contents,
+                cache=True,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
@@ -1590,9 +1598,10 @@ class RawDataProcessing(BaseLogicAgent):
                 f"4. **Problem List:** Include both chronic conditions and the acute symptoms they are complaining about now."
             )
 
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
+                cache=True,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
@@ -1646,9 +1655,10 @@ class RawDataProcessing(BaseLogicAgent):
             )
 
             # 5. Call Model
-            response = await self.client.aio.models.generate_content(
-                model=MODEL,
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
+                cache=True,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
@@ -1701,9 +1711,10 @@ class RawDataProcessing(BaseLogicAgent):
             )
 
             # 5. Call Model
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
+                cache=True,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
@@ -1756,9 +1767,10 @@ class RawDataProcessing(BaseLogicAgent):
             )
 
             # 5. Call Model
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
+                cache=True,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
@@ -1811,9 +1823,10 @@ class RawDataProcessing(BaseLogicAgent):
             )
 
             # 5. Call Model
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
+                cache=True,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
@@ -1871,9 +1884,10 @@ class RawDataProcessing(BaseLogicAgent):
             )
 
             # 5. Call Model
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
+                cache=True,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
@@ -1935,9 +1949,10 @@ class RawDataProcessing(BaseLogicAgent):
             )
 
             # 5. Call Model
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
+                cache=True,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
@@ -1990,9 +2005,10 @@ class RawDataProcessing(BaseLogicAgent):
             )
 
             # 5. Call Model
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
+                cache=True,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
@@ -2049,9 +2065,10 @@ class RawDataProcessing(BaseLogicAgent):
             )
 
             # 5. Call Model
-            response = await self.client.aio.models.generate_content(
-                model=MODEL, 
-                contents=prompt_content,
+            response = await get_llm_gateway().generate(
+                MODEL,
+                prompt_content,
+                cache=True,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json", 
                     response_schema=response_schema, 
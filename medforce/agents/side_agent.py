@@ -17,6 +17,7 @@ import requests
 import aiohttp
 from medforce import settings as config
 from medforce.infrastructure import canvas_ops
+from medforce.gateway.llm_gateway import get_llm_gateway
 load_dotenv()
 from medforce.agents import helper_model
 from medforce.managers.patient_state import patient_manager
@@ -50,9 +51,9 @@ def _get_model(system_prompt_file: str = None):
                     system_prompt = f.read()
             except:
                 pass
-        _cached_models[cache_key] = genai.GenerativeModel(
+        _cached_models[cache_key] = get_llm_gateway().legacy_model(
             "gemini-2.0-flash",  # Faster model
-            system_instruction=system_prompt if system_prompt else None
+            system_prompt if system_prompt else None
         )
     return _cached_models[cache_key]
 
@@ -292,7 +293,8 @@ async def resolve_object_id(query: str, context: str = ""):
     model = _get_model("system_prompts/objectid_parser.md")
     prompt = f"User query : '{query}'\n\nBoard items: {json.dumps(board_items[:30])}"  # Limit items for speed
     
-    response = model.generate_content(
+    response = await get_llm_gateway().run_blocking(
+        MODEL, model.generate_content,
         prompt,
         generation_config=genai.GenerationConfig(
             response_mime_type="application/json",
@@ -337,15 +339,15 @@ async def prepare_easl_query(question: str):
         ehr_data = await helper_model.load_ehr()
         
         # Generate clinical context
-        model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT_CONTEXT)
+        model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT_CONTEXT)
         prompt = f"Please generate context for: Question: {question}\n\nRaw data: {ehr_data}"
-        resp = model.generate_content(prompt)
+        resp = await get_llm_gateway().run_blocking(MODEL, model.generate_content, prompt)
         context_result = resp.text.replace("```markdown", " ").replace("```", "")
         
         # Generate refined question
-        model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT_QUESTION)
+        model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT_QUESTION)
         prompt = f"Please generate proper question: Question: {question}\n\nRaw data: {ehr_data}"
-        resp = model.generate_content(prompt)
+        resp = await get_llm_gateway().run_blocking(MODEL, model.generate_content, prompt)
         refined_question = resp.text.replace("```markdown", " ").replace("```", "")
         
         # Build the full query for EASL
@@ -399,9 +401,9 @@ async def trigger_easl(question):
         
         # Generate clinical context
         print("📝 Generating clinical context...")
-        model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT_CONTEXT)
+        model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT_CONTEXT)
         prompt = f"Please generate context for: Question: {question}\n\nRaw data: {ehr_data}"
-        resp = model.generate_content(prompt)
+        resp = await get_llm_gateway().run_blocking(MODEL, model.generate_content, prompt)
         context_result = resp.text.replace("```markdown", " ").replace("```", "")
         
         with open(f"{config.output_dir}/context.md", "w", encoding="utf-8") as f:
@@ -409,9 +411,9 @@ async def trigger_easl(question):
         
         # Generate refined question
         print("📝 Generating refined question...")
-        model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT_QUESTION)
+        model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT_QUESTION)
         prompt = f"Please generate proper question: Question: {question}\n\nRaw data: {ehr_data}"
-        resp = model.generate_content(prompt)
+        resp = await get_llm_gateway().run_blocking(MODEL, model.generate_content, prompt)
         q_gen_result = resp.text.replace("```markdown", " ").replace("```", "")
         
         with open(f"{config.output_dir}/question.md", "w", encoding="utf-8") as f:
@@ -501,8 +503,9 @@ async def generate_task_workflow(query: str):
     ehr_data = await load_ehr()
     prompt = f"User request:\n{query}\n\nPatient data: {ehr_data}\n\nGenerate the task workflow JSON."
 
-    model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT)
-    resp = model.generate_content(
+    model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT)
+    resp = await get_llm_gateway().run_blocking(
+        MODEL, model.generate_content,
         prompt,
         generation_config=genai.GenerationConfig(
             response_mime_type="application/json",
@@ -587,8 +590,9 @@ async def generate_todo(query: str):
     ehr_data = await load_ehr()
     prompt = f"User request:\n{query}\n\nPatient data: {ehr_data}\n\nGenerate the task workflow JSON."
 
-    model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT)
-    resp = model.generate_content(
+    model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT)
+    resp = await get_llm_gateway().run_blocking(
+        MODEL, model.generate_content,
         prompt,
         generation_config=genai.GenerationConfig(
             response_mime_type="application/json",
@@ -697,14 +701,14 @@ async def generate_response(todo_obj):
     with open("system_prompts/clinical_agent.md", "r", encoding="utf-8") as f:
         SYSTEM_PROMPT = f.read()
     
-    model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT)
+    model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT)
     ehr_data = await load_ehr()
     
     prompt = f"""Please execute this todo: {todo_obj}
 
 This is patient encounter data: {ehr_data}"""
 
-    resp = model.generate_content(prompt)
+    resp = await get_llm_gateway().run_blocking(MODEL, model.generate_content, prompt)
     
     with open(f"{config.output_dir}/generate_response.md", "w", encoding="utf-8") as f:
         f.write(resp.text)
@@ -742,7 +746,7 @@ async def generate_dili_diagnosis():
     with open("system_prompts/dili_diagnosis_prompt.md", "r", encoding="utf-8") as f:
         SYSTEM_PROMPT = f.read()
 
-    model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT)
+    model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT)
     ehr_data = await load_ehr()
 
     prompt = f"Generate DILI diagnosis based on patient data.\n\nPatient data: {ehr_data}"
@@ -752,7 +756,9 @@ async def generate_dili_diagnosis():
         temperature=0.7,
     )
     # Run synchronous generate_content in thread to avoid blocking event loop
-    resp = await asyncio.to_thread(model.generate_content, prompt, generation_config=gen_config)
+    resp = await get_llm_gateway().run_blocking(
+        MODEL, model.generate_content, prompt, generation_config=gen_config
+    )
 
     result = json.loads(resp.text)
     # AI sometimes returns a list instead of dict - handle gracefully
@@ -791,7 +797,7 @@ async def generate_patient_report():
     with open("system_prompts/patient_report_prompt.md", "r", encoding="utf-8") as f:
         SYSTEM_PROMPT = f.read()
 
-    model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT)
+    model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT)
     ehr_data = await load_ehr()
 
     prompt = f"Generate patient report based on patient data.\n\nPatient data: {ehr_data}"
@@ -801,7 +807,9 @@ async def generate_patient_report():
         temperature=0.7,
     )
     # Run synchronous generate_content in thread to avoid blocking event loop
-    resp = await asyncio.to_thread(model.generate_content, prompt, generation_config=gen_config)
+    resp = await get_llm_gateway().run_blocking(
+        MODEL, model.generate_content, prompt, generation_config=gen_config
+    )
 
     result = json.loads(resp.text)
     # AI sometimes returns a list instead of dict - handle gracefully
@@ -839,7 +847,7 @@ async def generate_legal_report():
     with open("system_prompts/legal_report_prompt.md", "r", encoding="utf-8") as f:
         SYSTEM_PROMPT = f.read()
 
-    model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT)
+    model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT)
     ehr_data = await load_ehr()
 
     prompt = f"Generate a legal compliance report based on patient data.\n\nPatient data: {ehr_data}"
@@ -849,7 +857,9 @@ async def generate_legal_report():
         temperature=0.7,
     )
     # Run synchronous generate_content in thread to avoid blocking event loop
-    resp = await asyncio.to_thread(model.generate_content, prompt, generation_config=gen_config)
+    resp = await get_llm_gateway().run_blocking(
+        MODEL, model.generate_content, prompt, generation_config=gen_config
+    )
 
     result = json.loads(resp.text)
     # AI sometimes returns a list instead of dict - handle gracefully
@@ -871,7 +881,7 @@ async def generate_ai_diagnosis():
     with open("system_prompts/ai_diagnosis_prompt.md", "r", encoding="utf-8") as f:
         SYSTEM_PROMPT = f.read()
 
-    model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT)
+    model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT)
     ehr_data = await load_ehr()
 
     prompt = f"Generate an AI clinical diagnosis based on patient data.\n\nPatient data: {ehr_data}"
@@ -881,7 +891,9 @@ async def generate_ai_diagnosis():
         temperature=0.7,
     )
     # Run synchronous generate_content in thread to avoid blocking event loop
-    resp = await asyncio.to_thread(model.generate_content, prompt, generation_config=gen_config)
+    resp = await get_llm_gateway().run_blocking(
+        MODEL, model.generate_content, prompt, generation_config=gen_config
+    )
 
     result = json.loads(resp.text)
     # AI sometimes returns a list instead of dict - handle gracefully
@@ -918,7 +930,7 @@ async def generate_ai_treatment_plan():
     with open("system_prompts/ai_treatment_plan_prompt.md", "r", encoding="utf-8") as f:
         SYSTEM_PROMPT = f.read()
 
-    model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT)
+    model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT)
     ehr_data = await load_ehr()
 
     prompt = f"Generate an AI treatment plan based on patient data.\n\nPatient data: {ehr_data}"
@@ -928,7 +940,9 @@ async def generate_ai_treatment_plan():
         temperature=0.7,
     )
     # Run synchronous generate_content in thread to avoid blocking event loop
-    resp = await asyncio.to_thread(model.generate_content, prompt, generation_config=gen_config)
+    resp = await get_llm_gateway().run_blocking(
+        MODEL, model.generate_content, prompt, generation_config=gen_config
+    )
 
     result = json.loads(resp.text)
     # AI sometimes returns a list instead of dict - handle gracefully
@@ -1032,7 +1046,7 @@ async def create_schedule(query: str, context: str = ""):
 Include realistic dates (format: YYYY-MM-DDTHH:mm:ss), provider names, clinic types, investigation details, and correspondence.
 Ensure all dates are in the future and wait times are realistic."""
         
-        model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT)
+        model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT)
         ehr_data = await load_ehr()
         
         prompt = f"""Create a scheduling panel for this request: {query}
@@ -1041,7 +1055,8 @@ Patient context: {context if context else ehr_data}
 
 Generate complete scheduling information including next available appointment slot, outstanding investigations, and booking confirmation."""
         
-        response = model.generate_content(
+        response = await get_llm_gateway().run_blocking(
+            MODEL, model.generate_content,
             prompt,
             generation_config=genai.GenerationConfig(
                 response_mime_type="application/json",
@@ -1153,7 +1168,7 @@ Trend should be:
 
 Value must be a string. Use patientId from context if available."""
 
-    model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT)
+    model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT)
     
     # Get today's date for default
     from datetime import datetime
@@ -1171,7 +1186,8 @@ Patient ID: {patient_id}
 Source: Chat input"""
 
     try:
-        response = model.generate_content(
+        response = await get_llm_gateway().run_blocking(
+            MODEL, model.generate_content,
             prompt,
             generation_config=genai.GenerationConfig(
                 response_mime_type="application/json",
@@ -1211,11 +1227,11 @@ async def generate_easl_diagnosis(ehr_data=None):
     if not ehr_data:
         ehr_data = await load_ehr()
 
-    model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT)
+    model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT)
     
     prompt = f"Please generate EASL diagnosis assessment.\n\nPatient encounter data: {ehr_data}"
 
-    resp = model.generate_content(prompt)
+    resp = await get_llm_gateway().run_blocking(MODEL, model.generate_content, prompt)
     
     with open(f"{config.output_dir}/generate_easl_diagnosis.md", "w", encoding="utf-8") as f:
         f.write(resp.text)
@@ -1275,8 +1291,9 @@ async def generate_task_obj(query):
     ehr_data = await load_ehr()
     prompt = f"User request: {query}\n\nPatient data: {ehr_data}"
 
-    model = genai.GenerativeModel(MODEL, system_instruction=SYSTEM_PROMPT)
-    resp = model.generate_content(
+    model = get_llm_gateway().legacy_model(MODEL, SYSTEM_PROMPT)
+    resp = await get_llm_gateway().run_blocking(
+        MODEL, model.generate_content,
         prompt,
         generation_config=genai.GenerationConfig(
             response_mime_type="application/json",
@@ -131,3 +131,14 @@ async def startup_event():
         logger.info("MedForce Gateway initialized")
     except Exception as e:
         logger.warning(f"Gateway failed to start — running without it: {e}")
+
+
+# ── 6. Shutdown event ──
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop Gateway background tasks and flush pending diary saves."""
+    try:
+        from medforce.gateway.setup import shutdown_gateway
+        await shutdown_gateway()
+    except Exception as e:
+        logger.warning(f"Gateway shutdown failed: {e}")
@@ -37,6 +37,8 @@ from medforce.gateway.diary import (
     SlotOption,
 )
 from medforce.gateway.events import EventEnvelope, EventType
+from medforce.gateway.llm_gateway import get_llm_gateway
+from medforce.gateway.phrases import PHRASES
 
 logger = logging.getLogger("gateway.agents.booking")
 
@@ -68,6 +70,9 @@ SLOT_REJECTION_KEYWORDS = [
     "busy on", "busy that", "not free", "unavailable",
 ]
 
+PHRASES.register("booking.reschedule", RESCHEDULE_KEYWORDS)
+PHRASES.register("booking.slot_rejection", SLOT_REJECTION_KEYWORDS)
+
 
 class BookingAgent(BaseAgent):
     """
@@ -94,8 +99,7 @@ class BookingAgent(BaseAgent):
     def client(self):
         if self._client is None:
             try:
-                from google import genai
-                self._client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+                self._client = get_llm_gateway().client(self._model_name)
             except Exception as exc:
                 logger.error("Failed to create Gemini client: %s", exc)
         return self._client
@@ -544,14 +548,12 @@ class BookingAgent(BaseAgent):
     @staticmethod
     def _is_reschedule_request(text: str) -> bool:
         """Check if the text indicates a reschedule request."""
-        text_lower = text.lower()
-        return any(kw in text_lower for kw in RESCHEDULE_KEYWORDS)
+        return PHRASES.has(text, "booking.reschedule")
 
     @staticmethod
     def _is_slot_rejection(text: str) -> bool:
         """Check if the patient is rejecting all offered slots."""
-        text_lower = text.lower()
-        return any(kw in text_lower for kw in SLOT_REJECTION_KEYWORDS)
+        return PHRASES.has(text, "booking.slot_rejection")
 
     async def _handle_slot_rejection(
         self, event: EventEnvelope, diary: PatientDiary, channel: str
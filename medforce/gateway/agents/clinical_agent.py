@@ -26,10 +26,29 @@ Can emit:
   - CLINICAL_COMPLETE: hand off to Booking Agent
 
 Uses deterministic RiskScorer — hard rules ALWAYS override LLM.
+
+Within a patient turn, independent LLM calls run concurrently: clinical
+extraction, follow-up evaluation and — when the question plan is
+exhausted — a speculative next contextual question all start together.
+The last two are prompted with the clinical summary and specialty as
+they stood before this turn's extraction was applied.  If applying it
+changes either (``_prompt_context``), both are redone from the updated
+diary, exactly as the sequential order would have prompted them, so a
+question never re-asks what the patient just said.  Extraction that
+only touches fields the prompts don't show (e.g. medications when a
+referral narrative is the summary) keeps the concurrent results.  The
+speculative question is also discarded if a follow-up or phase
+transition wins.  CLINICAL_PARALLEL_TURN=0 restores the sequential
+order.
+
+A contextual question is streamed to the patient while it is generated.
+The speculative one fills a detached ResponseStream that is only
+published once the turn decides to ask it.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
@@ -37,7 +56,11 @@ from typing import Any
 
 from medforce.gateway.agents.base_agent import AgentResult, BaseAgent
 from medforce.gateway.agents.risk_scorer import RiskScorer, RiskResult
-from medforce.gateway.channels import AgentResponse
+from medforce.gateway.channels import (
+    AgentResponse,
+    ResponseStream,
+    publish_response_stream,
+)
 from medforce.gateway.diary import (
     ClinicalDocument,
     ClinicalQuestion,
@@ -49,8 +72,14 @@ from medforce.gateway.diary import (
     Phase,
     RiskLevel,
 )
-from medforce.gateway.agents.llm_utils import is_response_complete, llm_generate
+from medforce.gateway.agents.llm_utils import (
+    is_response_complete,
+    llm_generate,
+    llm_generate_stream,
+)
 from medforce.gateway.events import EventEnvelope, EventType, SenderRole
+from medforce.gateway.llm_gateway import Priority, get_llm_gateway
+from medforce.gateway.phrases import PHRASES
 
 logger = logging.getLogger("gateway.agents.clinical")
 
@@ -61,6 +90,42 @@ MAX_CLINICAL_QUESTIONS = 12
 # Maximum number of adaptive question regeneration cycles
 MAX_ADAPTIVE_REGENERATIONS = 5
 
+# Phrase sets read from patient messages, registered as "clinical.<name>"
+# in the shared phrase matcher (matched as substrings, one pass per message)
+CLINICAL_PHRASE_SETS: dict[str, list[str]] = {
+    # Document collection: "skip" / "no documents" skips ALL remaining
+    # requests; "no" / "don't have" skips just the current one
+    "skip_all": ["skip", "no documents", "no more", "nothing else", "nothing"],
+    "skip_one": ["no", "none", "don't have", "i don't"],
+    # Patient has nothing more to add
+    "conclude": [
+        "nothing else to add", "nothing else", "that's all", "that's everything",
+        "that is all", "that is everything", "no more to add", "nothing more",
+        "no further information", "nothing to add", "i'm done", "im done",
+    ],
+    # Fallback extraction
+    "red_flags": [
+        "jaundice", "confusion", "bleeding", "ascites",
+        "encephalopathy", "hematemesis", "melena",
+    ],
+    "allergy_context": ["allerg", "allergic to", "reaction to"],
+    "alcohol": ["drink", "alcohol", "beer", "wine", "spirits", "units"],
+    "weight": ["weight", "kg", "stone", "bmi", "diet", "eat"],
+    "allergy": ["allerg", "allergic to", "no known allerg", "nkda", "no allerg"],
+    "no_allergy": ["no known", "nkda", "no allerg"],
+    "medication": [
+        "take", "taking", "prescribed", "medication", "medicine", "mg", "daily",
+        "no meds", "no med", "not on any",
+    ],
+    "no_medication": [
+        "no meds", "no med", "no medication", "not taking any",
+        "not on any", "don't take any", "dont take any",
+    ],
+    "history": ["diagnosed", "surgery", "operation", "condition", "disease"],
+}
+for _name, _phrases in CLINICAL_PHRASE_SETS.items():
+    PHRASES.register(f"clinical.{_name}", _phrases)
+
 # ── LLM Prompts ──
 
 REFERRAL_ANALYSIS_PROMPT = """\
@@ -387,18 +452,26 @@ class ClinicalAgent(BaseAgent):
     """
 
     agent_name = "clinical"
+    _parallel_turn = True
 
-    def __init__(self, llm_client=None, risk_scorer: RiskScorer | None = None) -> None:
+    def __init__(
+        self,
+        llm_client=None,
+        risk_scorer: RiskScorer | None = None,
+        parallel_turn: bool | None = None,
+    ) -> None:
         self._client = llm_client
         self._risk_scorer = risk_scorer or RiskScorer()
         self._model_name = os.getenv("CLINICAL_MODEL", "gemini-2.0-flash")
+        if parallel_turn is None:
+            parallel_turn = os.getenv("CLINICAL_PARALLEL_TURN", "1") != "0"
+        self._parallel_turn = parallel_turn
 
     @property
     def client(self):
         if self._client is None:
             try:
-                from google import genai
-                self._client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+                self._client = get_llm_gateway().client(self._model_name)
             except Exception as exc:
                 logger.error("Failed to create Gemini client: %s", exc)
         return self._client
@@ -555,10 +628,6 @@ class ClinicalAgent(BaseAgent):
             )
             return AgentResult(updated_diary=diary, responses=[response])
 
-        # ── Extract clinical data from the message ──
-        extracted = await self._extract_clinical_data(text)
-        self._apply_extracted_data(diary, extracted)
-
         # Record the Q&A if we had a pending question
         unanswered = [q for q in diary.clinical.questions_asked if q.answer is None]
         just_answered_q = None
@@ -573,29 +642,113 @@ class ClinicalAgent(BaseAgent):
             just_answered_q = q
 
         # ── Adaptive follow-up evaluation ──
+        # A follow-up answer never chains another follow-up; only a plan
+        # answer is evaluated.  Either way the pending flag is cleared.
+        evaluate_followup = False
         if just_answered_q and diary.clinical.awaiting_followup:
-            if just_answered_q.is_followup:
-                # Follow-up answer received — never chain another follow-up.
-                # Clear state and fall through to next plan question.
-                diary.clinical.awaiting_followup = False
-            else:
-                # Plan question answer received — evaluate if a follow-up is warranted
-                diary.clinical.awaiting_followup = False
-                followup_q = await self._evaluate_followup(
-                    diary, just_answered_q.question, text,
-                )
-                if followup_q:
-                    diary.clinical.questions_asked.append(
-                        ClinicalQuestion(question=followup_q, is_followup=True)
+            diary.clinical.awaiting_followup = False
+            evaluate_followup = not just_answered_q.is_followup
+
+        pending: list[asyncio.Future] = []
+        try:
+            if self._parallel_turn:
+                # Extraction, follow-up evaluation and (speculatively) the
+                # next contextual question are independent — start all three.
+                extract_task = asyncio.ensure_future(self._extract_clinical_data(text))
+                pending.append(extract_task)
+                prompted_with = self._prompt_context(diary)
+                followup_task = None
+                if evaluate_followup:
+                    followup_task = asyncio.ensure_future(self._evaluate_followup(
+                        diary, just_answered_q.question, text,
+                    ))
+                    pending.append(followup_task)
+                speculative_question = None
+                question_stream = None
+                if self._should_speculate_question(diary):
+                    # Not published until the turn decides to ask it
+                    question_stream = ResponseStream(
+                        "patient", channel, {"patient_id": event.patient_id},
                     )
-                    response = AgentResponse(
-                        recipient="patient",
-                        channel=channel,
-                        message=followup_q,
-                        metadata={"patient_id": event.patient_id},
+                    speculative_question = asyncio.ensure_future(
+                        self._generate_contextual_question(diary, question_stream)
                     )
-                    return AgentResult(updated_diary=diary, responses=[response])
+                    pending.append(speculative_question)
+
+                self._apply_extracted_data(diary, await extract_task)
+                if self._prompt_context(diary) != prompted_with:
+                    # Both prompts were built without what this message
+                    # told us — redo them from the updated diary
+                    if followup_task is not None:
+                        followup_task.cancel()
+                        followup_task = asyncio.ensure_future(self._evaluate_followup(
+                            diary, just_answered_q.question, text,
+                        ))
+                        pending.append(followup_task)
+                    if speculative_question is not None:
+                        speculative_question.cancel()
+                        speculative_question = None
+                        question_stream = None
+                        logger.debug(
+                            "Speculative question discarded — extraction changed its prompt",
+                        )
+                followup_q = await followup_task if followup_task else None
+            else:
+                extracted = await self._extract_clinical_data(text)
+                self._apply_extracted_data(diary, extracted)
+                followup_q = None
+                if evaluate_followup:
+                    followup_q = await self._evaluate_followup(
+                        diary, just_answered_q.question, text,
+                    )
+                speculative_question = None
+                question_stream = None
+
+            if followup_q:
+                diary.clinical.questions_asked.append(
+                    ClinicalQuestion(question=followup_q, is_followup=True)
+                )
+                response = AgentResponse(
+                    recipient="patient",
+                    channel=channel,
+                    message=followup_q,
+                    metadata={"patient_id": event.patient_id},
+                )
+                return AgentResult(updated_diary=diary, responses=[response])
 
+            return await self._decide_next_step(
+                event, diary, channel, text, speculative_question, question_stream,
+            )
+        finally:
+            # Speculative work the turn didn't use is discarded
+            for task in pending:
+                if not task.done():
+                    task.cancel()
+
+    def _prompt_context(self, diary: PatientDiary) -> tuple[str, str]:
+        """The diary-derived inputs of the follow-up and question prompts."""
+        return self._build_clinical_summary(diary), self._derive_specialty(diary)
+
+    def _should_speculate_question(self, diary: PatientDiary) -> bool:
+        """Is this turn likely to end in an LLM-generated contextual question?"""
+        return (
+            self.client is not None
+            and diary.clinical.sub_phase == ClinicalSubPhase.ASKING_QUESTIONS
+            and not diary.clinical.generated_questions
+            and len(diary.clinical.questions_asked) < MAX_CLINICAL_QUESTIONS
+            and not self._questions_sufficient(diary)
+        )
+
+    async def _decide_next_step(
+        self,
+        event: EventEnvelope,
+        diary: PatientDiary,
+        channel: str,
+        text: str,
+        speculative_question: asyncio.Future | None = None,
+        question_stream: ResponseStream | None = None,
+    ) -> AgentResult:
+        """After the answer is applied: backward loop, documents, scoring or next question."""
         # Check if we need to request missing intake data (backward loop)
         backward_event = self._check_backward_loop_needed(diary)
         if backward_event:
@@ -617,14 +770,9 @@ class ClinicalAgent(BaseAgent):
 
         # Handle document collection phase responses
         if diary.clinical.sub_phase == ClinicalSubPhase.COLLECTING_DOCUMENTS:
-            text_lower = text.lower().strip()
-            # "skip" or "no documents" skips ALL remaining document requests
-            skip_all_keywords = {"skip", "no documents", "no more", "nothing else", "nothing"}
-            # "no" / "don't have" skips just the current document, asks for next
-            skip_one_keywords = {"no", "none", "don't have", "i don't"}
-            if any(kw in text_lower for kw in skip_all_keywords):
+            if PHRASES.has(text, "clinical.skip_all"):
                 return await self._score_and_complete(event, diary, channel)
-            if any(kw in text_lower for kw in skip_one_keywords):
+            if PHRASES.has(text, "clinical.skip_one"):
                 remaining = [
                     d for d in diary.clinical.pending_document_requests
                     if d not in diary.clinical.documents_requested
@@ -636,13 +784,7 @@ class ClinicalAgent(BaseAgent):
         # ── Detect "conversation concluded" signals during questioning ──
         #    If the patient signals they have nothing more to add and we have
         #    enough clinical data, fast-track to document collection / scoring.
-        text_lower = text.lower().strip()
-        conclude_phrases = {
-            "nothing else to add", "nothing else", "that's all", "that's everything",
-            "that is all", "that is everything", "no more to add", "nothing more",
-            "no further information", "nothing to add", "i'm done", "im done",
-        }
-        if any(phrase in text_lower for phrase in conclude_phrases):
+        if PHRASES.has(text, "clinical.conclude"):
             if self._questions_sufficient(diary):
                 logger.info(
                     "Patient signalled conclusion for %s — fast-tracking to documents/scoring",
@@ -681,7 +823,11 @@ class ClinicalAgent(BaseAgent):
             return await self._score_and_complete(event, diary, channel)
 
         # Otherwise, ask the next adaptive question
-        return await self._ask_next_question(event, diary, channel)
+        return await self._ask_next_question(
+            event, diary, channel,
+            speculative_question=speculative_question,
+            question_stream=question_stream,
+        )
 
     async def _handle_document(
         self, event: EventEnvelope, diary: PatientDiary
@@ -1714,7 +1860,9 @@ class ClinicalAgent(BaseAgent):
                     has_referral="yes" if has_referral else "no",
                     condition=diary.clinical.condition_context or "not yet identified",
                 )
-                raw = await llm_generate(self.client, self._model_name, prompt)
+                raw = await llm_generate(
+                    self.client, self._model_name, prompt, priority=Priority.LOW,
+                )
                 if raw:
                     return raw.strip()
         except Exception as exc:
@@ -1734,7 +1882,9 @@ class ClinicalAgent(BaseAgent):
                     patient_message=patient_msg[:500],
                     next_question=next_question,
                 )
-                raw = await llm_generate(self.client, self._model_name, prompt)
+                raw = await llm_generate(
+                    self.client, self._model_name, prompt, priority=Priority.LOW,
+                )
                 if raw and is_response_complete(raw.strip()):
                     return raw.strip()
         except Exception as exc:
@@ -1824,12 +1974,19 @@ class ClinicalAgent(BaseAgent):
     # ── Adaptive Question Loop ──
 
     async def _ask_next_question(
-        self, event: EventEnvelope, diary: PatientDiary, channel: str
+        self,
+        event: EventEnvelope,
+        diary: PatientDiary,
+        channel: str,
+        speculative_question: asyncio.Future | None = None,
+        question_stream: ResponseStream | None = None,
     ) -> AgentResult:
         """
         Adaptive question selection:
           1. Use pre-generated question plan if available
-          2. Otherwise generate contextual question via LLM
+          2. Otherwise generate contextual question via LLM (or take the
+             one speculatively started earlier in the turn, together with
+             the stream it has been filling)
           3. Fallback to pattern-based questions
         """
         asked_lower = {q.question.lower().strip() for q in diary.clinical.questions_asked}
@@ -1914,8 +2071,16 @@ class ClinicalAgent(BaseAgent):
                 break
 
         # ── Fallback: generate contextual question via LLM ──
+        stream = None
         if not question_text:
-            question_text = await self._generate_contextual_question(diary)
+            stream = question_stream or ResponseStream(
+                "patient", channel, {"patient_id": event.patient_id},
+            )
+            publish_response_stream(stream)
+            if speculative_question is not None:
+                question_text = await speculative_question
+            else:
+                question_text = await self._generate_contextual_question(diary, stream)
 
         # Record the question
         diary.clinical.questions_asked.append(
@@ -1933,6 +2098,7 @@ class ClinicalAgent(BaseAgent):
             channel=channel,
             message=message_text,
             metadata={"patient_id": event.patient_id},
+            stream=stream,
         )
 
         return AgentResult(updated_diary=diary, responses=[response])
@@ -1985,8 +2151,13 @@ class ClinicalAgent(BaseAgent):
                 gaps.append("lifestyle_weight")
         return gaps
 
-    async def _generate_contextual_question(self, diary: PatientDiary) -> str:
-        """Generate the most important next question based on current clinical picture."""
+    async def _generate_contextual_question(
+        self, diary: PatientDiary, stream: ResponseStream | None = None
+    ) -> str:
+        """Generate the most important next question based on current clinical picture.
+
+        With a *stream*, the question is fed into it as the LLM writes it.
+        """
         try:
             if self.client is None:
                 return self._fallback_question(diary)
@@ -2005,7 +2176,7 @@ class ClinicalAgent(BaseAgent):
                 specialty=self._derive_specialty(diary),
             )
 
-            raw = await llm_generate(self.client, self._model_name, prompt)
+            raw = await llm_generate_stream(self.client, self._model_name, prompt, stream)
             if raw and is_response_complete(raw.strip()):
                 return raw.strip()
             if raw:
@@ -2550,23 +2721,17 @@ class ClinicalAgent(BaseAgent):
         """Pattern-based clinical extraction."""
         extracted: dict[str, Any] = {}
         text_lower = text.lower()
+        matched = PHRASES.scan(text)
 
         # Red flags
-        red_flag_keywords = [
-            "jaundice", "confusion", "bleeding", "ascites",
-            "encephalopathy", "hematemesis", "melena",
-        ]
-        flags = [kw for kw in red_flag_keywords if kw in text_lower]
+        flags = list(matched.get("clinical.red_flags", ()))
         if flags:
             extracted["red_flags"] = flags
 
         # Chief complaint — but NOT if the text is primarily about allergies
         # (e.g. "I'm allergic to penicillin, it causes rash and swelling"
         #  should not set chief complaint to "rash and swelling")
-        is_allergy_context = any(
-            kw in text_lower for kw in ["allerg", "allergic to", "reaction to"]
-        )
-        if not is_allergy_context:
+        if "clinical.allergy_context" not in matched:
             complaint_phrases = [
                 "i have", "i've been", "suffering from", "experiencing",
                 "my problem is", "referred for", "reason for visit",
@@ -2597,19 +2762,16 @@ class ClinicalAgent(BaseAgent):
                 extracted["pain_level"] = level
 
         # Lifestyle: alcohol
-        alcohol_phrases = ["drink", "alcohol", "beer", "wine", "spirits", "units"]
-        if any(phrase in text_lower for phrase in alcohol_phrases):
+        if "clinical.alcohol" in matched:
             extracted["lifestyle_alcohol"] = text[:200]
 
         # Lifestyle: weight/diet
-        weight_phrases = ["weight", "kg", "stone", "bmi", "diet", "eat"]
-        if any(phrase in text_lower for phrase in weight_phrases):
+        if "clinical.weight" in matched:
             extracted["lifestyle_weight"] = text[:200]
 
         # Allergies
-        allergy_phrases = ["allerg", "allergic to", "no known allerg", "nkda", "no allerg"]
-        if any(phrase in text_lower for phrase in allergy_phrases):
-            if "no known" in text_lower or "nkda" in text_lower or "no allerg" in text_lower:
+        if "clinical.allergy" in matched:
+            if "clinical.no_allergy" in matched:
                 extracted["allergies"] = ["NKDA"]
             else:
                 # Try "allergic to <substance>, causes/gives <reaction>" pattern first
@@ -2640,12 +2802,8 @@ class ClinicalAgent(BaseAgent):
                             extracted["allergies"] = [text[idx:idx+100].strip()]
 
         # Medications
-        med_keywords = ["take", "taking", "prescribed", "medication", "medicine", "mg", "daily",
-                        "no meds", "no med", "not on any"]
-        no_med_phrases = ["no meds", "no med", "no medication", "not taking any",
-                          "not on any", "don't take any", "dont take any"]
-        if any(kw in text_lower for kw in med_keywords):
-            if any(neg in text_lower for neg in no_med_phrases):
+        if "clinical.medication" in matched:
+            if "clinical.no_medication" in matched:
                 # Patient explicitly says no medications — mark as addressed
                 extracted["current_medications"] = []
             else:
@@ -2655,8 +2813,7 @@ class ClinicalAgent(BaseAgent):
                     extracted["current_medications"] = med_matches
 
         # Medical history
-        history_phrases = ["diagnosed", "surgery", "operation", "condition", "disease"]
-        if any(phrase in text_lower for phrase in history_phrases):
+        if "clinical.history" in matched:
             extracted["medical_history"] = [text[:200]]
 
         return extracted
@@ -38,6 +38,7 @@ from medforce.gateway.diary import (
 )
 from medforce.gateway.agents.llm_utils import is_response_complete, llm_generate
 from medforce.gateway.events import EventEnvelope, EventType, SenderRole
+from medforce.gateway.llm_gateway import Priority, get_llm_gateway
 
 logger = logging.getLogger("gateway.agents.intake")
 
@@ -145,8 +146,7 @@ class IntakeAgent(BaseAgent):
     def client(self):
         if self._client is None:
             try:
-                from google import genai
-                self._client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+                self._client = get_llm_gateway().client(self._model_name)
             except Exception as exc:
                 logger.error("Failed to create Gemini client: %s", exc)
         return self._client
@@ -211,9 +211,12 @@ class IntakeAgent(BaseAgent):
             )
 
             t_start = time.monotonic()
-            response = await self.client.aio.models.generate_content(
-                model=self._model_name,
-                contents=[pdf_part, REFERRAL_ANALYSIS_PROMPT],
+            response = await get_llm_gateway().generate(
+                self._model_name,
+                [pdf_part, REFERRAL_ANALYSIS_PROMPT],
+                priority=Priority.HIGH,
+                client=self.client,
+                cache=True,  # same PDF → same extraction
             )
             elapsed = time.monotonic() - t_start
             logger.info("  [timing] Referral PDF extraction: %.2fs", elapsed)
@@ -1177,7 +1180,9 @@ class IntakeAgent(BaseAgent):
             )
 
             t_llm = time.monotonic()
-            raw_response = await llm_generate(self.client, self._model_name, prompt)
+            raw_response = await llm_generate(
+                self.client, self._model_name, prompt, cache=True,
+            )
             logger.info("  [timing] LLM extraction call: %.2fs", time.monotonic() - t_llm)
 
             if raw_response is None:
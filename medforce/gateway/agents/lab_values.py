@@ -0,0 +1,372 @@
+"""
+Lab Values — shared lab parameter registry, parsing and unit conversion.
+
+Lab results reach the Gateway in several shapes: extracted document
+panels (``{"Total Bilirubin": "28 µmol/L", "ALT": 485}``), monitoring
+uploads in conventional units, and free-text chat ("my bilirubin was
+8").  RiskScorer (via the rule engine) and MonitoringAgent both read
+them through this module so a parameter means the same thing, in the
+same unit, everywhere:
+
+  - ``LAB_PARAMETERS`` — one ``LabParameter`` per canonical parameter
+    with its key aliases, free-text names, canonical unit and the unit
+    spellings it can be converted from
+  - ``canonical_lab_param`` — "ALT", "alt" and "Alanine transaminase"
+    all map to "alt"
+  - ``parse_lab_measurement`` / ``parse_lab_value`` — number (and unit,
+    if any) from 28, "28 µmol/L", ">500" or "1.4 × 10^6"
+  - ``normalize_lab_value`` / ``normalize_lab_panel`` — values expressed
+    in one unit system.  A value carrying a recognised unit is converted;
+    a bare number is taken to be in the requested system already, or
+    with ``bare_units="infer"`` in whichever system its size fits
+    (``bare_lab_units``)
+  - ``extract_lab_values`` — parameter/value pairs from free text, using
+    one precompiled pattern over every free-text name
+
+Canonical units are the ones UK referral letters use (µmol/L for
+bilirubin and creatinine, g/L for albumin, U/L for enzymes, x10^9/L for
+platelets).  The monitoring agent works in conventional units (mg/dL,
+g/dL); ``units="conventional"`` selects those.  Uploaded documents carry
+bare numbers in either system, so monitoring infers it per value: where
+a parameter's conventional range ends well below its canonical one
+(albumin 2.8 g/dL vs 28 g/L) a bare number above ``conventional_max`` is
+canonical, anything else conventional.
+
+Parsing is pure, so it is memoised: string values by content, and whole
+panels by their (key, value) items, so the validate → compare →
+threshold passes over one uploaded document parse it once.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+UNIT_SYSTEMS = ("canonical", "conventional")
+
+# Pseudo unit system for bare numbers: pick per value (bare_lab_units)
+INFER_UNITS = "infer"
+
+
+def _normalise_unit(unit: str) -> str:
+    return unit.strip().lower().replace(" ", "").replace("μ", "µ")
+
+
+@dataclass(frozen=True)
+class LabParameter:
+    """A canonical lab parameter and how it may be written."""
+
+    name: str  # canonical key, e.g. "alt"
+    label: str  # display name, e.g. "ALT"
+    unit: str = ""  # canonical unit
+    aliases: tuple[str, ...] = ()  # normalised document keys
+    text_aliases: tuple[str, ...] = ()  # names recognised in free text
+    # Normalised unit spelling → multiplier to the canonical unit
+    units: dict[str, float] = field(default_factory=dict)
+    conventional_unit: str = ""  # conventional unit, when it differs
+    # Largest plausible bare number in the conventional unit — above it
+    # a bare number is read as canonical (see bare_lab_units)
+    conventional_max: float | None = None
+
+    @property
+    def conventional_factor(self) -> float:
+        """Multiplier from the conventional unit to the canonical one."""
+        if not self.conventional_unit:
+            return 1.0
+        return self.units[_normalise_unit(self.conventional_unit)]
+
+
+_MICROMOLAR = {"µmol/l": 1.0, "umol/l": 1.0}
+
+LAB_PARAMETERS: dict[str, LabParameter] = {p.name: p for p in (
+    LabParameter(
+        "bilirubin", "bilirubin", "µmol/L",
+        aliases=("total_bilirubin", "bili"),
+        text_aliases=("bilirubin", "bili"),
+        units={**_MICROMOLAR, "mg/dl": 17.1},
+        conventional_unit="mg/dL",
+        conventional_max=20.0,
+    ),
+    LabParameter(
+        "alt", "ALT", "U/L",
+        aliases=("alanine_transaminase", "alanine_aminotransferase"),
+        text_aliases=("alt", "alanine transaminase"),
+    ),
+    LabParameter(
+        "ast", "AST", "U/L",
+        aliases=("aspartate_transaminase", "aspartate_aminotransferase"),
+        text_aliases=("ast", "aspartate transaminase"),
+    ),
+    LabParameter("alp", "ALP", "U/L", aliases=("alkaline_phosphatase",)),
+    LabParameter("ggt", "GGT", "U/L", aliases=("gamma_gt",)),
+    LabParameter(
+        "platelets", "platelets", "x10^9/L",
+        aliases=("platelet_count", "plt"),
+        text_aliases=("platelets", "plt"),
+    ),
+    LabParameter("inr", "INR", text_aliases=("inr",)),
+    LabParameter(
+        "creatinine", "creatinine", "µmol/L",
+        text_aliases=("creatinine",),
+        units={**_MICROMOLAR, "mg/dl": 88.4},
+        conventional_unit="mg/dL",
+        conventional_max=15.0,
+    ),
+    LabParameter(
+        "albumin", "albumin", "g/L",
+        text_aliases=("albumin",),
+        units={"g/l": 1.0, "g/dl": 10.0},
+        conventional_unit="g/dL",
+        conventional_max=7.0,
+    ),
+    LabParameter("afp", "AFP", "kU/L", aliases=("alpha_fetoprotein",)),
+    LabParameter("fib_4", "FIB-4", aliases=("fib4",)),
+    LabParameter("sodium", "sodium", "mmol/L", text_aliases=("sodium",)),
+    LabParameter("potassium", "potassium", "mmol/L", text_aliases=("potassium",)),
+    LabParameter(
+        "haemoglobin", "haemoglobin", "g/dL",
+        aliases=("hemoglobin", "hb"),
+        text_aliases=("haemoglobin", "hemoglobin", "hb"),
+    ),
+    LabParameter(
+        "wbc", "WBC", "x10^9/L",
+        aliases=("white_blood_cell", "white_cell_count"),
+        text_aliases=("wbc", "white blood cell"),
+    ),
+    LabParameter("crp", "CRP", "mg/L", text_aliases=("crp",)),
+    LabParameter("glucose", "glucose", "mg/dL"),
+)}
+
+# Normalised key → canonical parameter
+LAB_ALIASES: dict[str, str] = {
+    alias: p.name
+    for p in LAB_PARAMETERS.values()
+    for alias in (p.name, *p.aliases)
+}
+
+# Conventional (US) unit → canonical unit multipliers
+CONVENTIONAL_TO_CANONICAL: dict[str, float] = {
+    p.name: p.conventional_factor
+    for p in LAB_PARAMETERS.values()
+    if p.conventional_unit
+}
+
+
+@lru_cache(maxsize=4096)
+def canonical_lab_param(key: str) -> str:
+    """Canonical parameter name for a lab key ("Total Bilirubin" → "bilirubin")."""
+    norm = key.strip().lower().replace(" ", "_").replace("-", "_")
+    canonical = LAB_ALIASES.get(norm)
+    if canonical is not None:
+        return canonical
+    # Loose matches for keys with extra descriptors ("serum_bilirubin",
+    # "platelet_count_x10^9", "alpha_fetoprotein_level", "fib_4_score")
+    if "bilirubin" in norm and "direct" not in norm and "conjugated" not in norm:
+        return "bilirubin"
+    if "platelet" in norm:
+        return "platelets"
+    if "fetoprotein" in norm:
+        return "afp"
+    if "fib" in norm and "4" in norm:
+        return "fib_4"
+    return norm
+
+
+# ── Parsing ──
+
+_SCI_RE = re.compile(r"([<>]?\s*[\d.]+)\s*[×x]\s*10\^?(\d+)")
+_NUM_RE = re.compile(r"([\d.]+)")
+
+
+@lru_cache(maxsize=8192)
+def _parse_lab_string(s: str) -> tuple[float | None, str]:
+    s = s.strip()
+    if not s:
+        return None, ""
+
+    sci_match = _SCI_RE.match(s)
+    if sci_match:
+        try:
+            base = float(sci_match.group(1).lstrip("<> "))
+        except ValueError:
+            return None, ""
+        return base * (10 ** int(sci_match.group(2))), ""
+
+    # Strip leading < or > (take the value as-is for threshold comparison)
+    rest = s.lstrip("<> ")
+    num_match = _NUM_RE.match(rest)
+    if not num_match:
+        return None, ""
+    try:
+        value = float(num_match.group(1))
+    except ValueError:
+        return None, ""
+    return value, _normalise_unit(rest[num_match.end():])
+
+
+def parse_lab_measurement(value: Any) -> tuple[float | None, str]:
+    """Numeric value and normalised unit text ("" if none) of a lab result.
+
+    Handles formats like:
+      - 28              → (28.0, "")
+      - "28 µmol/L"    → (28.0, "µmol/l")
+      - ">500"         → (500.0, "")
+      - "1.4 × 10^6"  → (1400000.0, "")
+    """
+    if value is None or isinstance(value, bool):
+        return None, ""
+    if isinstance(value, (int, float)):
+        return float(value), ""
+    return _parse_lab_string(str(value))
+
+
+def parse_lab_value(value: Any) -> float | None:
+    """Numeric part of a lab result that may include units (see above)."""
+    return parse_lab_measurement(value)[0]
+
+
+# ── Unit conversion ──
+
+
+def bare_lab_units(param: str, value: float) -> str:
+    """Unit system a bare number for canonical *param* is most likely in.
+
+    Canonical if it is above the parameter's ``conventional_max``
+    (bilirubin 28 is µmol/L, not mg/dL), conventional otherwise.
+    """
+    spec = LAB_PARAMETERS.get(param)
+    if spec is None or spec.conventional_max is None:
+        return "conventional"
+    return "canonical" if value > spec.conventional_max else "conventional"
+
+
+def to_canonical(
+    param: str, value: float, unit: str = "", *, default_units: str = "canonical",
+) -> float:
+    """*value* of canonical *param* in its canonical unit.
+
+    A recognised *unit* decides the conversion; otherwise the value is
+    taken to be in *default_units* (``"infer"``: see bare_lab_units).
+    """
+    spec = LAB_PARAMETERS.get(param)
+    if spec is None:
+        return value
+    factor = spec.units.get(unit) if unit else None
+    if factor is None:
+        if default_units == INFER_UNITS:
+            default_units = bare_lab_units(param, value)
+        if default_units != "conventional" or not spec.conventional_unit:
+            return value
+        factor = spec.conventional_factor
+    return round(value * factor, 6)
+
+
+def from_canonical(param: str, value: float, units: str) -> float:
+    """Canonical-unit *value* of *param* expressed in *units*."""
+    spec = LAB_PARAMETERS.get(param)
+    if units != "conventional" or spec is None or not spec.conventional_unit:
+        return value
+    return round(value / spec.conventional_factor, 6)
+
+
+def normalize_lab_value(
+    key: str, raw: Any, *, units: str = "canonical", bare_units: str | None = None,
+) -> float | None:
+    """Numeric value of lab *key* expressed in *units* (None if not numeric).
+
+    Values with a unit the parameter recognises are converted; bare
+    numbers (or unknown units) are taken to be in *bare_units* —
+    *units* unless given, ``"infer"`` to decide per value.
+    """
+    value, unit = parse_lab_measurement(raw)
+    if value is None:
+        return None
+    param = canonical_lab_param(key)
+    spec = LAB_PARAMETERS.get(param)
+    if spec is None:
+        return value
+    if not unit or unit not in spec.units:
+        bare_units = bare_units or units
+        if bare_units == units:
+            return value
+        unit = ""
+    return from_canonical(
+        param, to_canonical(param, value, unit, default_units=bare_units), units,
+    )
+
+
+@lru_cache(maxsize=1024)
+def _normalize_items(
+    items: tuple[tuple[str, Any], ...], units: str, bare_units: str | None,
+) -> tuple[tuple[str, float], ...]:
+    normalized = []
+    for key, raw in items:
+        value = normalize_lab_value(key, raw, units=units, bare_units=bare_units)
+        if value is not None:
+            normalized.append((key, value))
+    return tuple(normalized)
+
+
+def normalize_lab_panel(
+    values: dict[str, Any], *, units: str = "canonical", bare_units: str | None = None,
+) -> dict[str, float]:
+    """Numeric entries of a lab panel, keyed as supplied, in *units*.
+
+    Bare numbers are read as in normalize_lab_value.  Non-numeric
+    entries are omitted.  Panels of hashable values are memoised by
+    content, so repeated passes over one document are free.
+    """
+    if units not in UNIT_SYSTEMS:
+        raise ValueError(f"Unknown unit system: {units!r}")
+    if bare_units not in (None, INFER_UNITS, *UNIT_SYSTEMS):
+        raise ValueError(f"Unknown unit system: {bare_units!r}")
+    # bool hashes like 1/0 but is never a lab value
+    items = tuple(
+        (key, None if isinstance(raw, bool) else raw) for key, raw in values.items()
+    )
+    try:
+        return dict(_normalize_items(items, units, bare_units))
+    except TypeError:  # unhashable value (list, dict) — parse uncached
+        return dict(_normalize_items.__wrapped__(items, units, bare_units))
+
+
+# ── Free text ──
+
+_TEXT_ALIASES: dict[str, str] = {
+    alias: p.name
+    for p in LAB_PARAMETERS.values()
+    for alias in p.text_aliases
+}
+_TEXT_UNITS = sorted(
+    {u for p in LAB_PARAMETERS.values() for u in p.units} | {"μmol/l"},
+    key=len, reverse=True,
+)
+# alias (optional ":"/"="/"is"/"was"/"of"/"at") number (optional unit)
+_TEXT_RE = re.compile(
+    r"\b(" + "|".join(re.escape(a) for a in sorted(_TEXT_ALIASES, key=len, reverse=True)) + r")\b"
+    r"[\s:=]*(?:is|was|of|at)?\s*(\d+(?:\.\d+)?)"
+    r"(?:\s*(" + "|".join(re.escape(u) for u in _TEXT_UNITS) + r")(?![a-z]))?"
+)
+
+
+def extract_lab_values(text: str, *, units: str = "canonical") -> dict[str, float]:
+    """Lab parameter labels and values mentioned in free text.
+
+    Handles "bilirubin 8", "ALT 600", "bilirubin is 8.0", "my bilirubin
+    was 8 and ALT 600" and "creatinine 150 umol/L".  The first mention
+    of a parameter wins; values are expressed in *units* (a stated unit
+    is converted, a bare number is assumed to be in *units*).
+    """
+    results: dict[str, float] = {}
+    for match in _TEXT_RE.finditer(text.lower()):
+        spec = LAB_PARAMETERS[_TEXT_ALIASES[match.group(1)]]
+        if spec.label in results:
+            continue
+        value = float(match.group(2))
+        unit = _normalise_unit(match.group(3) or "")
+        if unit in spec.units:
+            value = from_canonical(spec.name, to_canonical(spec.name, value, unit), units)
+        results[spec.label] = value
+    return results
@@ -1,7 +1,13 @@
 """
 LLM utility functions — truncation safety and retry wrapper.
 
-Shared by intake_agent, clinical_agent, and monitoring_agent.
+Shared by intake_agent, clinical_agent, and monitoring_agent.  Each
+attempt goes through the shared LLMGateway (llm_gateway.py), which
+applies the concurrency caps and priorities and records metrics.
+
+``llm_generate_stream`` is the variant for patient-facing replies: it
+feeds a ResponseStream (channels.py) chunk by chunk while the model is
+writing, and still returns the full text for the AgentResponse.
 """
 
 from __future__ import annotations
@@ -10,6 +16,9 @@ import asyncio
 import logging
 from typing import Any
 
+from medforce.gateway.channels import ResponseStream
+from medforce.gateway.llm_gateway import Priority, get_llm_gateway
+
 logger = logging.getLogger("gateway.agents.llm_utils")
 
 
@@ -60,6 +69,9 @@ async def llm_generate(
     contents: str,
     max_retries: int = 2,
     critical: bool = False,
+    priority: Priority | None = None,
+    cache: bool = False,
+    bypass_cache: bool = False,
 ) -> str | None:
     """
     Call the LLM with retry and exponential backoff.
@@ -70,18 +82,25 @@ async def llm_generate(
       for 3 retries (4 total attempts) with longer backoff
     - Exponential backoff: 0.5s, 1.0s, 2.0s (critical: 1.0s, 2.0s, 4.0s)
     - All callers have deterministic fallback logic for total failure
+    - priority defaults to CRITICAL for critical calls, NORMAL otherwise;
+      the permit is released during backoff sleeps
+    - cache=True for prompts that are pure functions of their inputs;
+      repeats are served from the gateway's response cache
 
     Returns the response text, or None if exhausted so callers
     use their existing fallback.
     """
     effective_retries = max_retries if not critical else max(max_retries, 3)
     base_backoff = 1.0 if critical else 0.5
+    if priority is None:
+        priority = Priority.CRITICAL if critical else Priority.NORMAL
+    gateway = get_llm_gateway()
 
     for attempt in range(effective_retries + 1):
         try:
-            response = await client.aio.models.generate_content(
-                model=model,
-                contents=contents,
+            response = await gateway.generate(
+                model, contents, priority=priority, client=client,
+                cache=cache, bypass_cache=bypass_cache,
             )
             text = response.text
             if isinstance(text, str) and text.strip():
@@ -104,3 +123,58 @@ async def llm_generate(
             effective_retries + 1,
         )
     return None
+
+
+async def llm_generate_stream(
+    client: Any,
+    model: str,
+    contents: str,
+    stream: ResponseStream | None,
+    max_retries: int = 2,
+    priority: Priority | None = None,
+) -> str | None:
+    """
+    Streaming variant of ``llm_generate`` for natural-language replies.
+
+    Chunks are fed into *stream* as they arrive and the stream is closed
+    when generation ends.  If streaming fails or yields nothing, the
+    remaining attempts go through ``llm_generate`` without streaming —
+    the returned text becomes the final message, which replaces any
+    partial draft on the client.  Clients without
+    ``generate_content_stream`` (and a None *stream*) fall straight back
+    to ``llm_generate``.
+
+    Returns the response text, or None if exhausted.
+    """
+    if priority is None:
+        priority = Priority.NORMAL
+    stream_fn = getattr(getattr(getattr(client, "aio", None), "models", None),
+                        "generate_content_stream", None)
+    if stream is None or not asyncio.iscoroutinefunction(stream_fn):
+        if stream is not None:
+            stream.close()
+        return await llm_generate(
+            client, model, contents, max_retries=max_retries, priority=priority,
+        )
+
+    parts: list[str] = []
+    try:
+        async for chunk in get_llm_gateway().generate_stream(
+            model, contents, priority=priority, client=client,
+        ):
+            parts.append(chunk)
+            stream.feed(chunk)
+        text = "".join(parts)
+        if text.strip():
+            return text
+        logger.warning("LLM stream returned empty response")
+    except Exception as exc:
+        logger.warning("LLM stream failed: %s — retrying without streaming", exc)
+    finally:
+        stream.close()
+
+    if max_retries <= 0:
+        return None
+    return await llm_generate(
+        client, model, contents, max_retries=max_retries - 1, priority=priority,
+    )
@@ -8,7 +8,8 @@ Cares for patients post-booking through an adaptive communication plan:
      - Rank questions by clinical importance, select top N
      - Schedule question delivery across the monitoring period
   2. On HEARTBEAT: Execute scheduled check-ins from the plan
-  3. On USER_MESSAGE: Reactive risk-aware responses
+  3. On USER_MESSAGE: Reactive risk-aware responses (the reply is
+     streamed to channels that support it)
   4. On DOCUMENT_UPLOADED: Compare new labs against baseline
 
 Can emit:
@@ -30,7 +31,11 @@ from datetime import datetime, timezone
 from typing import Any
 
 from medforce.gateway.agents.base_agent import AgentResult, BaseAgent
-from medforce.gateway.channels import AgentResponse
+from medforce.gateway.channels import (
+    AgentResponse,
+    ResponseStream,
+    open_response_stream,
+)
 from medforce.gateway.diary import (
     CommunicationPlan,
     DeteriorationAssessment,
@@ -41,8 +46,20 @@ from medforce.gateway.diary import (
     RiskLevel,
     ScheduledQuestion,
 )
-from medforce.gateway.agents.llm_utils import is_response_complete, llm_generate
+from medforce.gateway.agents.lab_values import (
+    canonical_lab_param,
+    extract_lab_values,
+    normalize_lab_panel,
+)
+from medforce.gateway.agents.risk_scorer import RULE_ENGINE
+from medforce.gateway.agents.llm_utils import (
+    is_response_complete,
+    llm_generate,
+    llm_generate_stream,
+)
 from medforce.gateway.events import EventEnvelope, EventType
+from medforce.gateway.llm_gateway import Priority, get_llm_gateway
+from medforce.gateway.phrases import PHRASES, PhraseSet, prefix_negation
 
 logger = logging.getLogger("gateway.agents.monitoring")
 
@@ -67,19 +84,15 @@ RISK_SCHEDULES: dict[str, dict[str, Any]] = {
     RiskLevel.NONE.value: {"total_messages": 2, "check_days": [30, 90]},
 }
 
-# Deterioration thresholds
+# Deterioration thresholds — % change from baseline, keyed by canonical
+# parameter (see lab_values.canonical_lab_param)
 DETERIORATION_THRESHOLDS: dict[str, float] = {
     "bilirubin": 50.0,
-    "total_bilirubin": 50.0,
-    "ALT": 100.0,
     "alt": 100.0,
-    "AST": 100.0,
     "ast": 100.0,
-    "INR": 30.0,
     "inr": 30.0,
     "creatinine": 50.0,
     "platelets": -30.0,
-    "platelet_count": -30.0,
     "albumin": -20.0,
 }
 
@@ -280,8 +293,7 @@ class MonitoringAgent(BaseAgent):
     def client(self):
         if self._client is None:
             try:
-                from google import genai
-                self._client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+                self._client = get_llm_gateway().client(self._model_name)
             except Exception as exc:
                 logger.error("Failed to create Gemini client: %s", exc)
         return self._client
@@ -801,8 +813,9 @@ class MonitoringAgent(BaseAgent):
         ))
 
         # If this was a reply to a scheduled check-in, give a tailored ack
+        stream = open_response_stream("patient", channel, {"patient_id": event.patient_id})
         response_msg = await self._generate_natural_response(
-            diary, text, is_checkin_reply=last_sent is not None
+            diary, text, is_checkin_reply=last_sent is not None, stream=stream,
         )
 
         response = AgentResponse(
@@ -810,6 +823,7 @@ class MonitoringAgent(BaseAgent):
             channel=channel,
             message=response_msg,
             metadata={"patient_id": event.patient_id},
+            stream=stream,
         )
 
         return AgentResult(updated_diary=diary, responses=[response])
@@ -817,22 +831,18 @@ class MonitoringAgent(BaseAgent):
     # ── P3: Lab Value Validation ──
 
     # Plausible ranges for common lab values — values outside these
-    # are likely extraction errors and should be flagged, not used
+    # are likely extraction errors and should be flagged, not used.
+    # Keyed by canonical parameter; values are compared in conventional
+    # units, bare numbers inferred per value (see lab_values.bare_lab_units)
     LAB_PLAUSIBLE_RANGES: dict[str, tuple[float, float]] = {
         "bilirubin": (0.0, 50.0),           # mg/dL
-        "total_bilirubin": (0.0, 50.0),
-        "ALT": (0.0, 5000.0),              # U/L
-        "alt": (0.0, 5000.0),
-        "AST": (0.0, 5000.0),              # U/L
-        "ast": (0.0, 5000.0),
-        "INR": (0.5, 10.0),                # ratio
-        "inr": (0.5, 10.0),
+        "alt": (0.0, 5000.0),              # U/L
+        "ast": (0.0, 5000.0),              # U/L
+        "inr": (0.5, 10.0),                # ratio
         "creatinine": (0.0, 30.0),         # mg/dL
         "platelets": (0.0, 1000.0),        # x10^9/L
-        "platelet_count": (0.0, 1000.0),
-        "albumin": (0.0, 60.0),            # g/L
-        "hemoglobin": (0.0, 25.0),         # g/dL
-        "hb": (0.0, 25.0),
+        "albumin": (0.0, 6.0),             # g/dL
+        "haemoglobin": (0.0, 25.0),        # g/dL
         "sodium": (100.0, 200.0),          # mEq/L
         "potassium": (1.0, 10.0),          # mEq/L
         "glucose": (0.0, 1000.0),          # mg/dL
@@ -850,15 +860,15 @@ class MonitoringAgent(BaseAgent):
         """
         validated: dict[str, Any] = {}
         warnings: list[str] = []
+        numeric = normalize_lab_panel(values, units="conventional", bare_units="infer")
 
         for param, val in values.items():
-            try:
-                num = float(val)
-            except (ValueError, TypeError):
+            num = numeric.get(param)
+            if num is None:
                 validated[param] = val  # Non-numeric values pass through
                 continue
 
-            bounds = self.LAB_PLAUSIBLE_RANGES.get(param)
+            bounds = self.LAB_PLAUSIBLE_RANGES.get(canonical_lab_param(param))
             if bounds is not None:
                 lo, hi = bounds
                 if num < lo or num > hi:
@@ -1018,7 +1028,9 @@ class MonitoringAgent(BaseAgent):
                 num_questions=num_questions,
             )
 
-            raw_response = await llm_generate(self.client, self._model_name, prompt)
+            raw_response = await llm_generate(
+                self.client, self._model_name, prompt, cache=True,
+            )
             if raw_response is None:
                 return self._fallback_monitoring_questions(diary, num_questions)
 
@@ -1397,6 +1409,29 @@ class MonitoringAgent(BaseAgent):
         ],
     }
 
+    # Keywords monitoring must handle itself — NOT suppressed by cross-phase
+    PRIORITY_KEYWORDS: list[str] = [
+        # True emergencies
+        "unconscious", "seizure", "collapse", "hematemesis",
+        "encephalopathy", "chest pain", "can't breathe",
+        "confusion", "confused", "bleeding", "blood", "jaundice",
+        "severe pain",
+        # Deterioration triggers (monitoring owns the assessment flow)
+        "worse", "worsening", "deteriorating", "fatigue", "tired",
+        "swelling", "numbness", "fainting", "fainted",
+        "breathless", "breathlessness", "palpitations",
+    ]
+
+    # A concerning pattern preceded (within 25 characters) by one of these
+    # is negated: "no dark urine", "haven't had any fever"
+    PATTERN_NEGATIONS: list[str] = [
+        "no ", "not ", "don't have ", "dont have ",
+        "haven't ", "havent ", "no sign of ", "without ",
+        "deny ", "denies ", "denied ", "never ",
+        "don't ", "doesn't ", "isn't ", "aren't ",
+        "no evidence of ", "negative for ", "absent ",
+    ]
+
     # ── Response Generation ──
 
     # ── Deterioration Assessment Flow ──
@@ -1404,22 +1439,7 @@ class MonitoringAgent(BaseAgent):
     @staticmethod
     def _has_monitoring_priority_keywords(text: str) -> bool:
         """Check for keywords that monitoring must handle — NOT suppressed by cross-phase."""
-        text_lower = text.lower()
-        # True emergencies
-        emergency_kws = [
-            "unconscious", "seizure", "collapse", "hematemesis",
-            "encephalopathy", "chest pain", "can't breathe",
-            "confusion", "confused", "bleeding", "blood", "jaundice",
-            "severe pain",
-        ]
-        # Deterioration triggers (monitoring owns the assessment flow)
-        deterioration_kws = [
-            "worse", "worsening", "deteriorating", "fatigue", "tired",
-            "swelling", "numbness", "fainting", "fainted",
-            "breathless", "breathlessness", "palpitations",
-        ]
-        all_kws = emergency_kws + deterioration_kws
-        return any(kw in text_lower for kw in all_kws)
+        return PHRASES.has(text, "monitoring.priority")
 
     def _check_concerning_patterns(
         self, text_lower: str, diary: PatientDiary
@@ -1432,34 +1452,17 @@ class MonitoringAgent(BaseAgent):
 
         Returns (is_concerning, list_of_detected_symptoms).
         """
-        detected: list[str] = []
         condition = (diary.clinical.condition_context or "").lower()
-
-        def _is_negated(text: str, pattern: str) -> bool:
-            idx = text.find(pattern)
-            if idx < 0:
-                return False
-            prefix = text[max(0, idx - 25):idx]
-            negation_phrases = [
-                "no ", "not ", "don't have ", "dont have ",
-                "haven't ", "havent ", "no sign of ", "without ",
-                "deny ", "denies ", "denied ", "never ",
-                "don't ", "doesn't ", "isn't ", "aren't ",
-                "no evidence of ", "negative for ", "absent ",
-            ]
-            return any(neg in prefix for neg in negation_phrases)
+        matched = PHRASES.scan(text_lower)
 
         # Always check general patterns
-        for pattern in self.CONCERNING_PATTERNS.get("general", []):
-            if pattern in text_lower and not _is_negated(text_lower, pattern):
-                detected.append(pattern)
+        detected: list[str] = list(matched.get("monitoring.general", ()))
 
         # Check condition-specific patterns
         if any(kw in condition for kw in ["cirrhosis", "liver", "hepat", "hep"]):
-            for pattern in self.CONCERNING_PATTERNS.get("liver", []):
-                if pattern in text_lower and not _is_negated(text_lower, pattern):
-                    if pattern not in detected:
-                        detected.append(pattern)
+            for pattern in matched.get("monitoring.liver", ()):
+                if pattern not in detected:
+                    detected.append(pattern)
 
         if detected:
             logger.info(
@@ -2071,7 +2074,9 @@ class MonitoringAgent(BaseAgent):
                     appointment_date=diary.monitoring.appointment_date or "upcoming",
                     question=question or "Just a general check-in — how are you feeling?",
                 )
-                raw = await llm_generate(self.client, self._model_name, prompt)
+                raw = await llm_generate(
+                    self.client, self._model_name, prompt, priority=Priority.LOW,
+                )
                 if raw:
                     return raw.strip()
         except Exception as exc:
@@ -2097,7 +2102,9 @@ class MonitoringAgent(BaseAgent):
                     total_messages=plan.total_messages,
                     condition=diary.clinical.condition_context or "your condition",
                 )
-                raw = await llm_generate(self.client, self._model_name, prompt)
+                raw = await llm_generate(
+                    self.client, self._model_name, prompt, priority=Priority.LOW,
+                )
                 if raw:
                     return raw.strip()
         except Exception as exc:
@@ -2105,9 +2112,16 @@ class MonitoringAgent(BaseAgent):
         return ""  # empty means caller uses the template
 
     async def _generate_natural_response(
-        self, diary: PatientDiary, patient_text: str, is_checkin_reply: bool
+        self,
+        diary: PatientDiary,
+        patient_text: str,
+        is_checkin_reply: bool,
+        stream: ResponseStream | None = None,
     ) -> str:
-        """Generate a natural LLM response with deterministic fallback."""
+        """Generate a natural LLM response with deterministic fallback.
+
+        With a *stream*, the reply is fed into it as the LLM writes it.
+        """
         try:
             if self.client is not None:
                 prompt = NATURAL_RESPONSE_PROMPT.format(
@@ -2117,7 +2131,9 @@ class MonitoringAgent(BaseAgent):
                     risk_level=diary.header.risk_level.value,
                     is_checkin_reply="yes" if is_checkin_reply else "no",
                 )
-                raw = await llm_generate(self.client, self._model_name, prompt)
+                raw = await llm_generate_stream(
+                    self.client, self._model_name, prompt, stream,
+                )
                 if raw and not raw.strip().lower().startswith("thank you for your message"):
                     return raw.strip()
         except Exception as exc:
@@ -2226,18 +2242,32 @@ class MonitoringAgent(BaseAgent):
         baseline: dict[str, Any],
         new_values: dict[str, Any],
     ) -> dict[str, Any]:
-        """Compare new lab values against baseline, calculate % changes."""
+        """Compare new lab values against baseline, calculate % changes.
+
+        Both sides are matched by canonical parameter ("ALT" vs "alt")
+        and compared in conventional units.  Baseline and upload are both
+        document extractions, so their bare numbers are read by the same
+        rule: each in the unit system its size fits (albumin 28 is g/L,
+        2.8 is g/dL — see lab_values.bare_lab_units).
+        """
         changes: list[dict[str, Any]] = []
         deteriorating: list[dict[str, Any]] = []
 
-        for param, new_val in new_values.items():
-            try:
-                new_num = float(new_val)
-            except (ValueError, TypeError):
-                continue
+        baseline_numeric = normalize_lab_panel(
+            baseline, units="conventional", bare_units="infer",
+        )
+        # canonical param → baseline number (None if present but non-numeric)
+        baseline_by_param: dict[str, float | None] = {}
+        for key, raw in baseline.items():
+            if raw is not None:
+                baseline_by_param.setdefault(
+                    canonical_lab_param(key), baseline_numeric.get(key)
+                )
 
-            baseline_val = baseline.get(param)
-            if baseline_val is None:
+        new_numeric = normalize_lab_panel(new_values, units="conventional", bare_units="infer")
+        for param, new_num in new_numeric.items():
+            canonical = canonical_lab_param(param)
+            if canonical not in baseline_by_param:
                 changes.append({
                     "param": param,
                     "baseline": None,
@@ -2247,9 +2277,8 @@ class MonitoringAgent(BaseAgent):
                 })
                 continue
 
-            try:
-                baseline_num = float(baseline_val)
-            except (ValueError, TypeError):
+            baseline_num = baseline_by_param[canonical]
+            if baseline_num is None:
                 continue
 
             if baseline_num == 0:
@@ -2258,7 +2287,7 @@ class MonitoringAgent(BaseAgent):
                 change_pct = ((new_num - baseline_num) / abs(baseline_num)) * 100
 
             status = "stable"
-            threshold = DETERIORATION_THRESHOLDS.get(param)
+            threshold = DETERIORATION_THRESHOLDS.get(canonical)
 
             if threshold is not None:
                 if threshold < 0:
@@ -2286,23 +2315,6 @@ class MonitoringAgent(BaseAgent):
             "total_compared": len(changes),
         }
 
-    # Absolute lab value thresholds — mirrors RiskScorer HARD_RULES
-    # (param, operator, threshold, description)
-    ABSOLUTE_LAB_THRESHOLDS: list[tuple[str, str, float, str]] = [
-        ("bilirubin", ">", 5.0, "Bilirubin > 5 mg/dL"),
-        ("total_bilirubin", ">", 5.0, "Total bilirubin > 5 mg/dL"),
-        ("ALT", ">", 500, "ALT > 500 U/L"),
-        ("alt", ">", 500, "ALT > 500 U/L"),
-        ("AST", ">", 500, "AST > 500 U/L"),
-        ("ast", ">", 500, "AST > 500 U/L"),
-        ("platelets", "<", 50, "Platelets < 50 x10^9/L"),
-        ("platelet_count", "<", 50, "Platelet count < 50 x10^9/L"),
-        ("INR", ">", 2.0, "INR > 2.0"),
-        ("inr", ">", 2.0, "INR > 2.0"),
-        ("creatinine", ">", 3.0, "Creatinine > 3.0 mg/dL"),
-        ("albumin", "<", 2.5, "Albumin < 2.5 g/dL"),
-    ]
-
     def _check_absolute_thresholds(
         self, new_values: dict[str, Any]
     ) -> list[dict[str, Any]]:
@@ -2311,39 +2323,28 @@ class MonitoringAgent(BaseAgent):
 
         This is a safety net for when baseline is empty or doesn't have
         matching parameters — critically abnormal values should ALWAYS
-        fire an alert regardless of baseline comparison.
+        fire an alert regardless of baseline comparison.  The thresholds
+        are the "monitoring" scope of the shared RiskScorer rule set;
+        monitoring values are in conventional units (mg/dL, g/dL), bare
+        numbers inferred per value like ``_compare_values``.
         """
         alerts: list[dict[str, Any]] = []
 
-        for param, operator, threshold, description in self.ABSOLUTE_LAB_THRESHOLDS:
-            raw_val = new_values.get(param)
-            if raw_val is None:
-                continue
-
-            try:
-                num_val = float(raw_val)
-            except (ValueError, TypeError):
-                continue
-
-            triggered = False
-            if operator == ">" and num_val > threshold:
-                triggered = True
-            elif operator == "<" and num_val < threshold:
-                triggered = True
-
-            if triggered:
-                alerts.append({
-                    "param": param,
-                    "baseline": None,
-                    "new": num_val,
-                    "change_pct": None,
-                    "status": "deteriorating",
-                    "reason": f"Absolute threshold exceeded: {description}",
-                })
-                logger.warning(
-                    "Absolute lab threshold triggered: %s=%.1f (%s)",
-                    param, num_val, description,
-                )
+        for hit in RULE_ENGINE.evaluate_labs(
+            new_values, scope="monitoring", units="conventional", bare_units="infer",
+        ):
+            alerts.append({
+                "param": hit.param,
+                "baseline": None,
+                "new": hit.value,
+                "change_pct": None,
+                "status": "deteriorating",
+                "reason": f"Absolute threshold exceeded: {hit.description}",
+            })
+            logger.warning(
+                "Absolute lab threshold triggered: %s=%.1f (%s)",
+                hit.param, hit.value, hit.description,
+            )
 
         return alerts
 
@@ -2354,44 +2355,17 @@ class MonitoringAgent(BaseAgent):
         Handles patterns like:
           - "bilirubin 8", "ALT 600", "bilirubin is 8.0"
           - "bilirubin 8 and ALT 600"
-          - "my bilirubin was 8"
-        """
-        import re
-
-        # Map of common lab name variants → canonical parameter name
-        lab_aliases: dict[str, str] = {
-            "bilirubin": "bilirubin",
-            "bili": "bilirubin",
-            "alt": "ALT",
-            "alanine transaminase": "ALT",
-            "ast": "AST",
-            "aspartate transaminase": "AST",
-            "albumin": "albumin",
-            "inr": "INR",
-            "platelets": "platelets",
-            "plt": "platelets",
-            "creatinine": "creatinine",
-            "sodium": "sodium",
-            "potassium": "potassium",
-            "haemoglobin": "haemoglobin",
-            "hemoglobin": "haemoglobin",
-            "hb": "haemoglobin",
-            "wbc": "WBC",
-            "white blood cell": "WBC",
-            "crp": "CRP",
-        }
+          - "my bilirubin was 8", "creatinine 150 umol/L"
 
-        results: dict[str, float] = {}
-        text_lower = text.lower()
+        Values are in conventional units, like the rest of monitoring.
+        """
+        return extract_lab_values(text, units="conventional")
 
-        for alias, canonical in lab_aliases.items():
-            # Match: alias (optional "is"/"was"/"of"/"="/":") number
-            pattern = rf'\b{re.escape(alias)}\b[\s:=]*(?:is|was|of|at)?\s*(\d+(?:\.\d+)?)'
-            match = re.search(pattern, text_lower)
-            if match:
-                try:
-                    results[canonical] = float(match.group(1))
-                except ValueError:
-                    continue
 
-        return results
+# Monitoring's keyword sets, matched in the shared one-pass phrase scan
+PHRASES.register("monitoring.priority", MonitoringAgent.PRIORITY_KEYWORDS)
+for _name in ("general", "liver"):
+    PHRASES.register(f"monitoring.{_name}", PhraseSet(
+        MonitoringAgent.CONCERNING_PATTERNS[_name],
+        negation=prefix_negation(MonitoringAgent.PATTERN_NEGATIONS),
+    ))
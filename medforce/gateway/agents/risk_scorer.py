@@ -16,8 +16,15 @@ from __future__ import annotations
 import logging
 import os
 from dataclasses import dataclass, field
-from typing import Any
-
+from typing import Any, Sequence
+
+from medforce.gateway.agents.rule_engine import (
+    RISK_RANK,
+    KeywordRule,
+    LabRule,
+    RuleEngine,
+    RuleHit,
+)
 from medforce.gateway.diary import ClinicalSection, RiskLevel
 
 logger = logging.getLogger("gateway.agents.risk_scorer")
@@ -35,111 +42,112 @@ class RiskResult:
 
 
 # ── Hard Rules: lab value thresholds ──
-# Values are UNIT-AGNOSTIC: the scorer extracts the numeric part from strings
-# like "28 µmol/L" or "485 kU/L".  Thresholds are set for the MOST COMMON
-# unit used in UK referral letters (µmol/L for bilirubin, U/L for enzymes,
+# Keyed by canonical parameter (see lab_values.canonical_lab_param — "ALT",
+# "alt" and "Alanine transaminase" all match "alt").  Values are
+# UNIT-AGNOSTIC: the scorer extracts the numeric part from strings like
+# "28 µmol/L" or "485 kU/L".  Thresholds are set for the MOST COMMON unit
+# used in UK referral letters (µmol/L for bilirubin, U/L for enzymes,
 # x10^9/L for platelets, g/L for albumin).
-# (parameter, operator, threshold, risk_level, human description)
-HARD_RULES: list[tuple[str, str, float, RiskLevel, str]] = [
+# Scopes: RISK = clinical risk scoring, MONITORING = the monitoring agent's
+# absolute critical thresholds (a lab result above one always alerts).
+RISK = frozenset({"risk"})
+MONITORING = frozenset({"monitoring"})
+BOTH = RISK | MONITORING
+
+HARD_RULES: list[LabRule] = [
     # ── HIGH risk (immediate clinical concern) ──
     # Bilirubin: ≥50 µmol/L is significantly elevated (3x upper normal)
-    ("bilirubin", ">", 50, RiskLevel.HIGH, "Bilirubin > 50 µmol/L (severe)"),
-    ("total_bilirubin", ">", 50, RiskLevel.HIGH, "Total bilirubin > 50 µmol/L"),
+    LabRule("bilirubin", ">", 50, RiskLevel.HIGH, "Bilirubin > 50 µmol/L (severe)", RISK),
     # Liver enzymes: >500 U/L indicates acute liver injury
-    ("ALT", ">", 500, RiskLevel.HIGH, "ALT > 500 U/L"),
-    ("alt", ">", 500, RiskLevel.HIGH, "ALT > 500 U/L"),
-    ("AST", ">", 500, RiskLevel.HIGH, "AST > 500 U/L"),
-    ("ast", ">", 500, RiskLevel.HIGH, "AST > 500 U/L"),
+    LabRule("alt", ">", 500, RiskLevel.HIGH, "ALT > 500 U/L", BOTH),
+    LabRule("ast", ">", 500, RiskLevel.HIGH, "AST > 500 U/L", BOTH),
     # Platelets: <50 indicates severe thrombocytopenia
-    ("platelets", "<", 50, RiskLevel.HIGH, "Platelets < 50 x10^9/L"),
-    ("platelet_count", "<", 50, RiskLevel.HIGH, "Platelet count < 50 x10^9/L"),
+    LabRule("platelets", "<", 50, RiskLevel.HIGH, "Platelets < 50 x10^9/L", BOTH),
     # Coagulation
-    ("INR", ">", 2.0, RiskLevel.HIGH, "INR > 2.0"),
-    ("inr", ">", 2.0, RiskLevel.HIGH, "INR > 2.0"),
+    LabRule("inr", ">", 2.0, RiskLevel.HIGH, "INR > 2.0", BOTH),
     # Renal
-    ("creatinine", ">", 300, RiskLevel.HIGH, "Creatinine > 300 µmol/L"),
+    LabRule("creatinine", ">", 300, RiskLevel.HIGH, "Creatinine > 300 µmol/L", RISK),
     # Albumin: <25 g/L is critically low
-    ("albumin", "<", 25, RiskLevel.HIGH, "Albumin < 25 g/L"),
+    LabRule("albumin", "<", 25, RiskLevel.HIGH, "Albumin < 25 g/L", BOTH),
     # Tumour markers: AFP >400 strongly suggests HCC
-    ("AFP", ">", 400, RiskLevel.HIGH, "AFP > 400 kU/L (HCC marker)"),
-    ("afp", ">", 400, RiskLevel.HIGH, "AFP > 400 kU/L (HCC marker)"),
-    ("alpha_fetoprotein", ">", 400, RiskLevel.HIGH, "AFP > 400 kU/L"),
+    LabRule("afp", ">", 400, RiskLevel.HIGH, "AFP > 400 kU/L (HCC marker)", RISK),
 
     # ── MEDIUM risk (needs timely attention) ──
     # Bilirubin: >20 µmol/L is above normal
-    ("bilirubin", ">", 20, RiskLevel.MEDIUM, "Bilirubin > 20 µmol/L (elevated)"),
-    ("total_bilirubin", ">", 20, RiskLevel.MEDIUM, "Total bilirubin > 20 µmol/L"),
+    LabRule("bilirubin", ">", 20, RiskLevel.MEDIUM, "Bilirubin > 20 µmol/L (elevated)", RISK),
     # Liver enzymes: >200 is significantly elevated
-    ("ALT", ">", 200, RiskLevel.MEDIUM, "ALT > 200 U/L"),
-    ("alt", ">", 200, RiskLevel.MEDIUM, "ALT > 200 U/L"),
-    ("AST", ">", 200, RiskLevel.MEDIUM, "AST > 200 U/L"),
-    ("ast", ">", 200, RiskLevel.MEDIUM, "AST > 200 U/L"),
+    LabRule("alt", ">", 200, RiskLevel.MEDIUM, "ALT > 200 U/L", RISK),
+    LabRule("ast", ">", 200, RiskLevel.MEDIUM, "AST > 200 U/L", RISK),
     # ALP: >300 is significantly elevated (e.g. cholestatic pattern)
-    ("ALP", ">", 300, RiskLevel.MEDIUM, "ALP > 300 U/L"),
-    ("alp", ">", 300, RiskLevel.MEDIUM, "ALP > 300 U/L"),
+    LabRule("alp", ">", 300, RiskLevel.MEDIUM, "ALP > 300 U/L", RISK),
     # GGT: >200 is significantly elevated
-    ("GGT", ">", 200, RiskLevel.MEDIUM, "GGT > 200 U/L"),
-    ("ggt", ">", 200, RiskLevel.MEDIUM, "GGT > 200 U/L"),
+    LabRule("ggt", ">", 200, RiskLevel.MEDIUM, "GGT > 200 U/L", RISK),
     # Platelets: <100 indicates moderate thrombocytopenia
-    ("platelets", "<", 100, RiskLevel.MEDIUM, "Platelets < 100 x10^9/L"),
+    LabRule("platelets", "<", 100, RiskLevel.MEDIUM, "Platelets < 100 x10^9/L", RISK),
     # Coagulation
-    ("INR", ">", 1.5, RiskLevel.MEDIUM, "INR > 1.5"),
-    ("inr", ">", 1.5, RiskLevel.MEDIUM, "INR > 1.5"),
+    LabRule("inr", ">", 1.5, RiskLevel.MEDIUM, "INR > 1.5", RISK),
     # Tumour markers: AFP >20 is elevated
-    ("AFP", ">", 20, RiskLevel.MEDIUM, "AFP > 20 kU/L (elevated)"),
-    ("afp", ">", 20, RiskLevel.MEDIUM, "AFP > 20 kU/L (elevated)"),
-    ("alpha_fetoprotein", ">", 20, RiskLevel.MEDIUM, "AFP > 20 kU/L"),
+    LabRule("afp", ">", 20, RiskLevel.MEDIUM, "AFP > 20 kU/L (elevated)", RISK),
     # FIB-4 score: >3.25 strongly suggests advanced fibrosis
-    ("FIB-4", ">", 3.25, RiskLevel.MEDIUM, "FIB-4 > 3.25 (advanced fibrosis)"),
-    ("fib_4", ">", 3.25, RiskLevel.MEDIUM, "FIB-4 > 3.25"),
-    ("fib4", ">", 3.25, RiskLevel.MEDIUM, "FIB-4 > 3.25"),
+    LabRule("fib_4", ">", 3.25, RiskLevel.MEDIUM, "FIB-4 > 3.25 (advanced fibrosis)", RISK),
+
+    # ── Monitoring-only critical thresholds ──
+    # Post-booking the bar for an unprompted alert is higher than the
+    # pre-consultation risk bands for these two parameters.
+    LabRule("bilirubin", ">", 85.5, RiskLevel.HIGH, "Bilirubin > 85.5 µmol/L (5 mg/dL)", MONITORING),
+    LabRule("creatinine", ">", 265.2, RiskLevel.HIGH, "Creatinine > 265.2 µmol/L (3 mg/dL)", MONITORING),
 ]
 
 # ── Keyword Rules: red-flag symptoms ──
-KEYWORD_RULES: list[tuple[str, RiskLevel, str]] = [
+# Matched as whole words (simple inflections allowed) and ignored when
+# negated in the same clause — see phrases.clause_negation.
+KEYWORD_RULES: list[KeywordRule] = [
     # HIGH — oncology / suspected cancer
-    ("carcinoma", RiskLevel.HIGH, "Suspected carcinoma"),
-    ("cancer", RiskLevel.HIGH, "Suspected cancer"),
-    ("malignancy", RiskLevel.HIGH, "Suspected malignancy"),
-    ("tumour", RiskLevel.HIGH, "Suspected tumour"),
-    ("tumor", RiskLevel.HIGH, "Suspected tumor"),
-    ("hcc", RiskLevel.HIGH, "Suspected hepatocellular carcinoma"),
-    ("mass", RiskLevel.HIGH, "Suspicious mass identified"),
-    ("2-week wait", RiskLevel.HIGH, "2-week wait pathway"),
-    ("two week wait", RiskLevel.HIGH, "2-week wait pathway"),
-    ("2ww", RiskLevel.HIGH, "2-week wait pathway"),
+    KeywordRule("carcinoma", RiskLevel.HIGH, "Suspected carcinoma"),
+    KeywordRule("cancer", RiskLevel.HIGH, "Suspected cancer"),
+    KeywordRule("malignancy", RiskLevel.HIGH, "Suspected malignancy"),
+    KeywordRule("tumour", RiskLevel.HIGH, "Suspected tumour"),
+    KeywordRule("tumor", RiskLevel.HIGH, "Suspected tumor"),
+    KeywordRule("hcc", RiskLevel.HIGH, "Suspected hepatocellular carcinoma"),
+    KeywordRule("mass", RiskLevel.HIGH, "Suspicious mass identified"),
+    KeywordRule("2-week wait", RiskLevel.HIGH, "2-week wait pathway"),
+    KeywordRule("two week wait", RiskLevel.HIGH, "2-week wait pathway"),
+    KeywordRule("2ww", RiskLevel.HIGH, "2-week wait pathway"),
     # HIGH — hepatic emergencies
-    ("jaundice", RiskLevel.HIGH, "Jaundice reported"),
-    ("icterus", RiskLevel.HIGH, "Icterus / jaundice"),
-    ("confusion", RiskLevel.HIGH, "Confusion / altered mental status"),
-    ("encephalopathy", RiskLevel.HIGH, "Encephalopathy"),
-    ("altered mental", RiskLevel.HIGH, "Altered mental status"),
-    ("gi_bleeding", RiskLevel.HIGH, "GI bleeding"),
-    ("gi bleeding", RiskLevel.HIGH, "GI bleeding"),
-    ("gastrointestinal bleeding", RiskLevel.HIGH, "GI bleeding"),
-    ("ascites", RiskLevel.HIGH, "Ascites"),
-    ("variceal", RiskLevel.HIGH, "Variceal bleeding"),
-    ("hematemesis", RiskLevel.HIGH, "Hematemesis"),
-    ("melena", RiskLevel.HIGH, "Melena"),
-    ("hepatic failure", RiskLevel.HIGH, "Hepatic failure"),
-    ("liver failure", RiskLevel.HIGH, "Liver failure"),
-    ("decompensated", RiskLevel.HIGH, "Decompensated liver disease"),
-    ("coagulopathy", RiskLevel.HIGH, "Coagulopathy"),
-    ("spider naevi", RiskLevel.HIGH, "Spider naevi (portal hypertension)"),
-    ("weight loss", RiskLevel.HIGH, "Unexplained weight loss"),
+    KeywordRule("jaundice", RiskLevel.HIGH, "Jaundice reported"),
+    KeywordRule("icterus", RiskLevel.HIGH, "Icterus / jaundice"),
+    KeywordRule("confusion", RiskLevel.HIGH, "Confusion / altered mental status"),
+    KeywordRule("encephalopathy", RiskLevel.HIGH, "Encephalopathy"),
+    KeywordRule("altered mental", RiskLevel.HIGH, "Altered mental status"),
+    KeywordRule("gi_bleeding", RiskLevel.HIGH, "GI bleeding"),
+    KeywordRule("gi bleeding", RiskLevel.HIGH, "GI bleeding"),
+    KeywordRule("gastrointestinal bleeding", RiskLevel.HIGH, "GI bleeding"),
+    KeywordRule("ascites", RiskLevel.HIGH, "Ascites"),
+    KeywordRule("variceal", RiskLevel.HIGH, "Variceal bleeding"),
+    KeywordRule("hematemesis", RiskLevel.HIGH, "Hematemesis"),
+    KeywordRule("melena", RiskLevel.HIGH, "Melena"),
+    KeywordRule("hepatic failure", RiskLevel.HIGH, "Hepatic failure"),
+    KeywordRule("liver failure", RiskLevel.HIGH, "Liver failure"),
+    KeywordRule("decompensated", RiskLevel.HIGH, "Decompensated liver disease"),
+    KeywordRule("coagulopathy", RiskLevel.HIGH, "Coagulopathy"),
+    KeywordRule("spider naevi", RiskLevel.HIGH, "Spider naevi (portal hypertension)"),
+    KeywordRule("weight loss", RiskLevel.HIGH, "Unexplained weight loss"),
     # MEDIUM
-    ("fatigue", RiskLevel.MEDIUM, "Significant fatigue"),
-    ("abdominal pain", RiskLevel.MEDIUM, "Abdominal pain"),
-    ("cirrhosis", RiskLevel.MEDIUM, "Cirrhosis"),
-    ("fibrosis", RiskLevel.MEDIUM, "Fibrosis"),
-    ("splenomegaly", RiskLevel.MEDIUM, "Splenomegaly"),
-    ("hepatomegaly", RiskLevel.MEDIUM, "Hepatomegaly"),
+    KeywordRule("fatigue", RiskLevel.MEDIUM, "Significant fatigue"),
+    KeywordRule("abdominal pain", RiskLevel.MEDIUM, "Abdominal pain"),
+    KeywordRule("cirrhosis", RiskLevel.MEDIUM, "Cirrhosis"),
+    KeywordRule("fibrosis", RiskLevel.MEDIUM, "Fibrosis"),
+    KeywordRule("splenomegaly", RiskLevel.MEDIUM, "Splenomegaly"),
+    KeywordRule("hepatomegaly", RiskLevel.MEDIUM, "Hepatomegaly"),
     # LOW
-    ("nausea", RiskLevel.LOW, "Nausea"),
-    ("itching", RiskLevel.LOW, "Pruritus / itching"),
-    ("pruritus", RiskLevel.LOW, "Pruritus"),
+    KeywordRule("nausea", RiskLevel.LOW, "Nausea"),
+    KeywordRule("itching", RiskLevel.LOW, "Pruritus / itching"),
+    KeywordRule("pruritus", RiskLevel.LOW, "Pruritus"),
 ]
 
+# Compiled once; shared by RiskScorer and MonitoringAgent
+RULE_ENGINE = RuleEngine(HARD_RULES, KEYWORD_RULES)
+
 
 class RiskScorer:
     """
@@ -148,11 +156,15 @@ class RiskScorer:
     Usage:
         scorer = RiskScorer()
         result = scorer.score(clinical_section, lab_values)
+
+    Pass ``rule_engine`` to score with a candidate rule set instead of
+    the shared one (cohort re-scoring).
     """
 
-    def __init__(self, llm_client=None) -> None:
+    def __init__(self, llm_client=None, rule_engine: RuleEngine | None = None) -> None:
         self._client = llm_client
         self._model_name = os.getenv("CLINICAL_MODEL", "gemini-2.0-flash")
+        self._rules = rule_engine or RULE_ENGINE
 
     def score(
         self,
@@ -169,65 +181,26 @@ class RiskScorer:
         Returns:
             RiskResult with the determined risk level and method
         """
-        labs = self._normalize_lab_keys(lab_values or {})
-        triggered: list[str] = []
-
-        # ── Tier 1: Deterministic hard rules ──
-        highest_risk = RiskLevel.NONE
-        method = ""
-
-        for param, op, threshold, risk, desc in HARD_RULES:
-            value = labs.get(param)
-            if value is None:
-                continue
-
-            numeric_value = self._parse_lab_value(value)
-            if numeric_value is None:
-                continue
-
-            if op == ">" and numeric_value > threshold:
-                triggered.append(desc)
-                if self._risk_rank(risk) > self._risk_rank(highest_risk):
-                    highest_risk = risk
-                    method = f"deterministic_rule: {desc}"
-            elif op == "<" and numeric_value < threshold:
-                triggered.append(desc)
-                if self._risk_rank(risk) > self._risk_rank(highest_risk):
-                    highest_risk = risk
-                    method = f"deterministic_rule: {desc}"
-
-        # ── Tier 2: Keyword rules (red-flag symptoms) ──
-        # ALWAYS check keywords — they can elevate risk above lab rules.
-        # E.g., MEDIUM from labs + HIGH from "jaundice" keyword → HIGH.
-        all_text = self._collect_clinical_text(clinical)
-
-        for keyword, risk, desc in KEYWORD_RULES:
-            if keyword.lower() in all_text:
-                triggered.append(desc)
-                if self._risk_rank(risk) > self._risk_rank(highest_risk):
-                    highest_risk = risk
-                    method = f"keyword: {desc}"
+        labs = lab_values or {}
+        return self._combine(clinical, labs, self._rules.evaluate_labs(labs))
 
-        if highest_risk != RiskLevel.NONE:
-            # Determine confidence: deterministic = 1.0, keyword = 0.9
-            confidence = 1.0 if "deterministic_rule" in method else 0.9
-            reasoning_parts = [r for r in triggered]
-
-            logger.info(
-                "Risk: %s (method: %s) — triggered: %s",
-                highest_risk.value, method, triggered,
-            )
-            return RiskResult(
-                risk_level=highest_risk,
-                method=method,
-                reasoning=f"Triggered: {', '.join(reasoning_parts)}",
-                triggered_rules=triggered,
-                confidence=confidence,
-            )
+    def score_batch(
+        self,
+        cases: Sequence[tuple[ClinicalSection, dict[str, Any] | None]],
+    ) -> list[RiskResult]:
+        """
+        Score many patients at once — same results as ``score`` per case.
 
-        # ── Tier 3: Heuristic assessment (gray zone only) ──
-        # Only reach here if NO deterministic or keyword rules fired
-        return self._llm_fallback(clinical, labs)
+        Lab rules are evaluated column-wise across the whole batch
+        (``RuleEngine.evaluate_labs_batch``); used for cohort re-scoring,
+        so individual results are not logged.
+        """
+        panels = [labs or {} for _, labs in cases]
+        lab_hits = self._rules.evaluate_labs_batch(panels)
+        return [
+            self._combine(clinical, labs, hits, log=False)
+            for (clinical, _), labs, hits in zip(cases, panels, lab_hits)
+        ]
 
     def score_from_extracted_values(
         self,
@@ -239,112 +212,79 @@ class RiskScorer:
         Collects all extracted_values from clinical documents and passes
         them through the standard scoring pipeline.
         """
+        return self.score(clinical, self.extracted_lab_values(clinical))
+
+    @staticmethod
+    def extracted_lab_values(clinical: ClinicalSection) -> dict[str, Any]:
+        """Lab values from every processed document (later documents win)."""
         lab_values: dict[str, Any] = {}
         for doc in clinical.documents:
             if doc.extracted_values:
                 lab_values.update(doc.extracted_values)
-        return self.score(clinical, lab_values)
+        return lab_values
 
     # ── Internal ──
 
-    @staticmethod
-    def _parse_lab_value(value: Any) -> float | None:
-        """Extract a numeric value from lab results that may include units.
-
-        Handles formats like:
-          - 28              → 28.0
-          - "28"            → 28.0
-          - "28 µmol/L"    → 28.0
-          - "485 kU/L"     → 485.0
-          - "1.6 mg/dL"    → 1.6
-          - ">500"         → 500.0
-          - "<50"          → 50.0
-          - "1.4 × 10^6"  → 1400000.0
-        """
-        if value is None:
-            return None
-
-        # Already numeric
-        if isinstance(value, (int, float)):
-            return float(value)
-
-        s = str(value).strip()
-        if not s:
-            return None
+    def _combine(
+        self,
+        clinical: ClinicalSection,
+        labs: dict[str, Any],
+        lab_hits: list[RuleHit],
+        *,
+        log: bool = True,
+    ) -> RiskResult:
+        triggered: list[str] = []
+        highest_risk = RiskLevel.NONE
+        method = ""
 
-        import re
+        # ── Tier 1: Deterministic hard rules ──
+        for hit in lab_hits:
+            triggered.append(hit.description)
+            if RISK_RANK[hit.risk] > RISK_RANK[highest_risk]:
+                highest_risk = hit.risk
+                method = f"deterministic_rule: {hit.description}"
 
-        # Handle scientific notation with ×: "1.4 × 10^6"
-        sci_match = re.match(r'([<>]?\s*[\d.]+)\s*[×x]\s*10\^?(\d+)', s)
-        if sci_match:
-            base = float(sci_match.group(1).lstrip('<> '))
-            exp = int(sci_match.group(2))
-            return base * (10 ** exp)
+        # ── Tier 2: Keyword rules (red-flag symptoms) ──
+        # ALWAYS check keywords — they can elevate risk above lab rules.
+        # E.g., MEDIUM from labs + HIGH from "jaundice" keyword → HIGH.
+        for hit in self._rules.match_keywords(self._clinical_texts(clinical)):
+            triggered.append(hit.description)
+            if RISK_RANK[hit.risk] > RISK_RANK[highest_risk]:
+                highest_risk = hit.risk
+                method = f"keyword: {hit.description}"
 
-        # Strip leading < or > (take the value as-is for threshold comparison)
-        s = s.lstrip('<> ')
+        if highest_risk != RiskLevel.NONE:
+            # Determine confidence: deterministic = 1.0, keyword = 0.9
+            confidence = 1.0 if "deterministic_rule" in method else 0.9
 
-        # Extract first numeric part (integer or decimal)
-        num_match = re.match(r'([\d.]+)', s)
-        if num_match:
-            try:
-                return float(num_match.group(1))
-            except ValueError:
-                return None
+            if log:
+                logger.info(
+                    "Risk: %s (method: %s) — triggered: %s",
+                    highest_risk.value, method, triggered,
+                )
+            return RiskResult(
+                risk_level=highest_risk,
+                method=method,
+                reasoning=f"Triggered: {', '.join(triggered)}",
+                triggered_rules=triggered,
+                confidence=confidence,
+            )
 
-        return None
+        # ── Tier 3: Heuristic assessment (gray zone only) ──
+        # Only reach here if NO deterministic or keyword rules fired
+        return self._llm_fallback(clinical, labs)
 
     @staticmethod
-    def _normalize_lab_keys(labs: dict[str, Any]) -> dict[str, Any]:
-        """Normalize lab parameter keys for consistent matching.
-
-        Handles variations like:
-          - "Total Bilirubin" → "total_bilirubin"
-          - "Platelet Count" → "platelet_count"
-          - "Alpha-fetoprotein" → "alpha_fetoprotein"
-          - "FIB-4 Score" → "fib_4"
-        """
-        normalized: dict[str, Any] = {}
-        for key, value in labs.items():
-            # Lowercase and replace spaces/hyphens with underscores
-            norm_key = key.lower().replace(" ", "_").replace("-", "_")
-            # Remove trailing descriptors like "_score", "_level", "_count"
-            # but keep specific compound keys
-            normalized[norm_key] = value
-            # Also store common aliases
-            if "bilirubin" in norm_key and "total" not in norm_key:
-                normalized["bilirubin"] = value
-            if "platelet" in norm_key:
-                normalized["platelets"] = value
-                normalized["platelet_count"] = value
-            if "fetoprotein" in norm_key or norm_key in ("afp", "alpha_fetoprotein"):
-                normalized["afp"] = value
-                normalized["AFP"] = value
-                normalized["alpha_fetoprotein"] = value
-            if "fib" in norm_key and "4" in norm_key:
-                normalized["fib_4"] = value
-                normalized["FIB-4"] = value
-                normalized["fib4"] = value
-        return normalized
-
-    def _collect_clinical_text(self, clinical: ClinicalSection) -> str:
-        """Build a searchable text corpus from clinical data."""
-        parts = []
-        if clinical.chief_complaint:
-            parts.append(clinical.chief_complaint)
-        if clinical.condition_context:
-            parts.append(clinical.condition_context)
+    def _clinical_texts(clinical: ClinicalSection) -> list[str]:
+        """The free-text fields keyword rules are matched against."""
+        parts = [clinical.chief_complaint, clinical.condition_context]
         parts.extend(clinical.medical_history)
         parts.extend(clinical.red_flags)
-        for q in clinical.questions_asked:
-            if q.answer:
-                parts.append(q.answer)
+        parts.extend(q.answer for q in clinical.questions_asked if q.answer)
         # Include referral analysis key_findings if available
         if clinical.referral_analysis:
-            findings = clinical.referral_analysis.get("key_findings", "")
-            if findings:
-                parts.append(findings)
-        return " ".join(parts).lower()
+            parts.append(str(clinical.referral_analysis.get("key_findings", "") or ""))
+        return [p for p in parts if p]
 
     def _llm_fallback(
         self,
@@ -437,10 +377,4 @@ class RiskScorer:
     @staticmethod
     def _risk_rank(level: RiskLevel) -> int:
         """Numeric rank for risk comparison."""
-        return {
-            RiskLevel.NONE: 0,
-            RiskLevel.LOW: 1,
-            RiskLevel.MEDIUM: 2,
-            RiskLevel.HIGH: 3,
-            RiskLevel.CRITICAL: 4,
-        }.get(level, 0)
+        return RISK_RANK.get(level, 0)
@@ -0,0 +1,230 @@
+"""
+Rule Engine — compiled form of the deterministic clinical rules.
+
+The rule tables (``HARD_RULES`` and ``KEYWORD_RULES`` in risk_scorer.py)
+are the single source of truth for both clinical risk scoring and the
+monitoring agent's absolute lab thresholds.  This module compiles them
+once into:
+
+  - lab rules indexed by canonical parameter ("ALT", "alt", "Alanine
+    transaminase" → "alt"), so scoring a lab panel touches only the rules
+    for the parameters present instead of walking the whole table
+  - one phrase automaton (phrases.PhraseMatcher) over every keyword, so
+    each clinical text is scanned once regardless of how many keywords
+    there are.  Matches must start on a word boundary and end on one
+    (allowing simple inflections: "jaundiced", "tumours"), and a keyword
+    preceded in the same clause by a negation cue ("no jaundice",
+    "denies confusion", "hasn't had any melena") does not fire
+
+Each lab rule lists the scopes that use it: "risk" (RiskScorer) and/or
+"monitoring" (MonitoringAgent critical thresholds).  Thresholds are in
+the units UK referral letters use (µmol/L, U/L, x10^9/L, g/L);
+monitoring values arrive in conventional units, which
+``units="conventional"`` converts before comparison (a value carrying
+its own unit, "28 µmol/L", is converted from that unit instead;
+``bare_units="infer"`` reads each bare number in the system its size
+fits).  Lab keys, values and units are read through lab_values.py.
+
+``RuleEngine.evaluate_labs_batch`` scores many lab panels at once
+column by column (one pass per parameter over all patients), which is
+what cohort re-scoring uses.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Sequence
+
+from medforce.gateway.agents.lab_values import (
+    canonical_lab_param,
+    parse_lab_measurement,
+    to_canonical,
+)
+from medforce.gateway.diary import RiskLevel
+from medforce.gateway.phrases import PhraseMatcher, PhraseSet, clause_negation
+
+RISK_RANK: dict[RiskLevel, int] = {
+    RiskLevel.NONE: 0,
+    RiskLevel.LOW: 1,
+    RiskLevel.MEDIUM: 2,
+    RiskLevel.HIGH: 3,
+    RiskLevel.CRITICAL: 4,
+}
+
+
+@dataclass(frozen=True)
+class LabRule:
+    """A threshold on one lab parameter (threshold in canonical units)."""
+
+    param: str
+    op: str  # ">" or "<"
+    threshold: float
+    risk: RiskLevel
+    description: str
+    scopes: frozenset[str] = frozenset({"risk", "monitoring"})
+
+    def fires(self, value: float) -> bool:
+        if self.op == ">":
+            return value > self.threshold
+        return value < self.threshold
+
+
+@dataclass(frozen=True)
+class KeywordRule:
+    """A red-flag phrase (lower case) and the risk it implies."""
+
+    keyword: str
+    risk: RiskLevel
+    description: str
+
+
+@dataclass
+class RuleHit:
+    """One fired rule; ``order`` is the rule's position in its table."""
+
+    order: int
+    risk: RiskLevel
+    description: str
+    param: str = ""  # lab key as supplied by the caller (lab rules only)
+    value: float | None = None
+
+
+# ── Engine ──
+
+
+class RuleEngine:
+    """
+    Compiled lab and keyword rules.
+
+    Usage:
+        engine = RuleEngine(HARD_RULES, KEYWORD_RULES)
+        hits = engine.evaluate_labs({"ALT": 600})
+        hits += engine.match_keywords(["I have jaundice"])
+    """
+
+    def __init__(
+        self,
+        lab_rules: Sequence[LabRule],
+        keyword_rules: Sequence[KeywordRule],
+    ) -> None:
+        self.lab_rules = tuple(lab_rules)
+        self.keyword_rules = tuple(keyword_rules)
+        # canonical param → [(table order, rule)]; highest risk first
+        self._by_param: dict[str, list[tuple[int, LabRule]]] = {}
+        for order, rule in enumerate(self.lab_rules):
+            param = canonical_lab_param(rule.param)
+            self._by_param.setdefault(param, []).append((order, rule))
+        for rules in self._by_param.values():
+            rules.sort(key=lambda item: (-RISK_RANK[item[1].risk], item[0]))
+        self._matcher = PhraseMatcher({
+            "keywords": PhraseSet(
+                (r.keyword for r in self.keyword_rules),
+                whole_words=True,
+                negation=clause_negation(),
+            ),
+        })
+        self._keyword_offset = len(self.lab_rules)
+
+    @property
+    def parameters(self) -> set[str]:
+        return set(self._by_param)
+
+    def rules_for(self, param: str, scope: str = "risk") -> list[LabRule]:
+        return [
+            rule for _, rule in self._by_param.get(canonical_lab_param(param), [])
+            if scope in rule.scopes
+        ]
+
+    # ── Labs ──
+
+    def evaluate_labs(
+        self,
+        labs: dict[str, Any],
+        *,
+        scope: str = "risk",
+        units: str = "canonical",
+        bare_units: str | None = None,
+    ) -> list[RuleHit]:
+        """Fired lab rules for one panel, in rule-table order."""
+        return self.evaluate_labs_batch(
+            [labs], scope=scope, units=units, bare_units=bare_units,
+        )[0]
+
+    def evaluate_labs_batch(
+        self,
+        panels: Sequence[dict[str, Any]],
+        *,
+        scope: str = "risk",
+        units: str = "canonical",
+        bare_units: str | None = None,
+    ) -> list[list[RuleHit]]:
+        """
+        Fired lab rules for many panels.
+
+        Values are grouped into one column per canonical parameter and
+        each rule is applied down its column, so per-rule work (scope
+        filtering, threshold lookup) is paid once per cohort rather than
+        once per patient.  Bare numbers are in *bare_units* (default
+        *units*; "infer" decides per value).  A canonical parameter
+        supplied under several keys in one panel ("bilirubin" and
+        "total_bilirubin") is judged by its worst value for each rule —
+        the highest against a ">" threshold, the lowest against "<" — so
+        the outcome never depends on key order.
+        """
+        bare_units = bare_units or units
+        columns: dict[str, list[tuple[int, str, float, float]]] = {}
+        for row, labs in enumerate(panels):
+            for key, raw in labs.items():
+                param = canonical_lab_param(key)
+                if param not in self._by_param:
+                    continue
+                value, unit = parse_lab_measurement(raw)
+                if value is None:
+                    continue
+                compared = to_canonical(param, value, unit, default_units=bare_units)
+                columns.setdefault(param, []).append((row, key, value, compared))
+
+        results: list[list[RuleHit]] = [[] for _ in panels]
+        for param, column in columns.items():
+            highest: dict[int, tuple[int, str, float, float]] = {}
+            lowest: dict[int, tuple[int, str, float, float]] = {}
+            for entry in column:
+                row, compared = entry[0], entry[3]
+                if row not in highest or compared > highest[row][3]:
+                    highest[row] = entry
+                if row not in lowest or compared < lowest[row][3]:
+                    lowest[row] = entry
+            for order, rule in self._by_param[param]:
+                if scope not in rule.scopes:
+                    continue
+                threshold = rule.threshold
+                above = rule.op == ">"
+                for row, key, value, compared in (highest if above else lowest).values():
+                    if (compared > threshold) if above else (compared < threshold):
+                        results[row].append(
+                            RuleHit(order, rule.risk, rule.description, key, value)
+                        )
+        for hits in results:
+            hits.sort(key=lambda hit: hit.order)
+        return results
+
+    # ── Keywords ──
+
+    def match_keywords(self, texts: Iterable[str]) -> list[RuleHit]:
+        """Fired keyword rules over *texts*, in rule-table order.
+
+        Each text is scanned on its own, so a negation in one field never
+        suppresses a keyword in another.
+        """
+        found: set[int] = set()
+        for text in texts:
+            if text:
+                found.update(self._matcher.indices(text, "keywords"))
+        return [
+            RuleHit(
+                self._keyword_offset + index,
+                self.keyword_rules[index].risk,
+                self.keyword_rules[index].description,
+            )
+            for index in sorted(found)
+        ]
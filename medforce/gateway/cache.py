@@ -0,0 +1,213 @@
+"""
+Bounded Cache — LRU + TTL map with approximate memory accounting.
+
+Used by the Gateway for per-patient state that previously lived in
+plain dicts and grew without limit (diary cache, idempotency window,
+rate-limiter timestamps).
+
+Eviction happens when any bound is exceeded:
+  - max_entries: count of keys
+  - max_bytes:   sum of ``sizeof(value)`` over all entries
+  - ttl_seconds: age since the entry was last written
+
+An ``on_evict(key, value, reason)`` hook runs for every eviction so the
+owner can flush dirty state before it is dropped.  Explicit ``pop()``
+does not fire the hook — the caller already holds the value.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Iterator, TypeVar
+
+logger = logging.getLogger("gateway.cache")
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class BoundedCache(Generic[K, V]):
+    """
+    Ordered map with LRU eviction, TTL expiry and a byte budget.
+
+    Supports the dict operations the Gateway (and admin routes) use:
+    ``get``, ``[]``, ``in``, ``pop``, ``setdefault``, ``len``, ``keys``.
+    Reads via ``get``/``[]`` refresh recency; ``in`` does not.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_entries: int = 10_000,
+        max_bytes: int | None = None,
+        ttl_seconds: float | None = None,
+        sizeof: Callable[[V], int] | None = None,
+        on_evict: Callable[[K, V, str], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl_seconds
+        self._sizeof = sizeof or (lambda _v: 0)
+        self._on_evict = on_evict
+        self._clock = clock
+
+        # key → (value, written_at, size)
+        self._data: OrderedDict[K, tuple[V, float, int]] = OrderedDict()
+        self._bytes = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    # ── Dict-like API ──
+
+    def get(self, key: K, default: Any = None) -> V | Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return default
+        value, written_at, _ = entry
+        if self._is_expired(written_at):
+            self._evict(key, "expired")
+            self._stats["misses"] += 1
+            return default
+        self._data.move_to_end(key)
+        self._stats["hits"] += 1
+        return value
+
+    def peek(self, key: K, default: Any = None) -> V | Any:
+        """Read without touching recency, expiry or hit/miss stats."""
+        entry = self._data.get(key)
+        return default if entry is None else entry[0]
+
+    def __getitem__(self, key: K) -> V:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self.set(key, value)
+
+    def set(self, key: K, value: V) -> None:
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= old[2]
+        size = self._sizeof(value)
+        self._data[key] = (value, self._clock(), size)
+        self._bytes += size
+        self._enforce_bounds(protect=key)
+
+    def setdefault(self, key: K, default: V) -> V:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            self.set(key, default)
+            return default
+        return value
+
+    def pop(self, key: K, default: Any = None) -> V | Any:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        self._bytes -= entry[2]
+        return entry[0]
+
+    def resize(self, key: K) -> None:
+        """Recompute the size of an entry mutated in place."""
+        entry = self._data.get(key)
+        if entry is None:
+            return
+        value, written_at, old_size = entry
+        size = self._sizeof(value)
+        self._data[key] = (value, written_at, size)
+        self._bytes += size - old_size
+        self._enforce_bounds(protect=key)
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._data.get(key)  # type: ignore[arg-type]
+        return entry is not None and not self._is_expired(entry[1])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(list(self._data.keys()))
+
+    def keys(self) -> list[K]:
+        return list(self._data.keys())
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    # ── Maintenance ──
+
+    def expire(self) -> int:
+        """Drop every expired entry.  Returns how many were removed."""
+        if self._ttl is None:
+            return 0
+        expired = [
+            k for k, (_, written_at, _) in self._data.items()
+            if self._is_expired(written_at)
+        ]
+        for key in expired:
+            self._evict(key, "expired")
+        return len(expired)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "entries": len(self._data),
+            "approx_bytes": self._bytes,
+            "max_entries": self._max_entries,
+            "max_bytes": self._max_bytes,
+            "ttl_seconds": self._ttl,
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+    # ── Internal ──
+
+    def _is_expired(self, written_at: float) -> bool:
+        return self._ttl is not None and self._clock() - written_at > self._ttl
+
+    def _enforce_bounds(self, protect: K | None = None) -> None:
+        # Opportunistically expire from the LRU end
+        while self._data and self._ttl is not None:
+            oldest_key = next(iter(self._data))
+            if oldest_key == protect or not self._is_expired(self._data[oldest_key][1]):
+                break
+            self._evict(oldest_key, "expired")
+
+        while len(self._data) > self._max_entries or (
+            self._max_bytes is not None and self._bytes > self._max_bytes
+        ):
+            victim = next(iter(self._data))
+            if victim == protect:
+                if len(self._data) == 1:
+                    break  # never evict the entry that was just written
+                victim = next(k for k in self._data if k != protect)
+            self._evict(victim, "capacity")
+
+    def _evict(self, key: K, reason: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[2]
+        self._stats["expirations" if reason == "expired" else "evictions"] += 1
+        if self._on_evict is not None:
+            try:
+                self._on_evict(key, entry[0], reason)
+            except Exception as exc:
+                logger.warning(
+                    "Cache %s eviction hook failed for %s: %s", self.name, key, exc,
+                )
@@ -8,18 +8,54 @@ channel.  Adding Dialogflow, WhatsApp, SMS, or email in Phase 6 is just:
   3. Add a webhook endpoint                  (~15 lines)
   4. Register the dispatcher in setup.py     (1 line)
 Zero changes to Gateway, agents, diary, or queue.
+
+Streaming: an agent that writes a reply with the LLM can attach a
+ResponseStream to its AgentResponse and feed it chunks while the model
+is still generating.  While the Gateway runs an agent it installs a
+stream sink (``DispatcherRegistry.streaming()``); a stream published
+into it starts flowing immediately to dispatchers that declare
+``supports_streaming`` (WebSocket, test harness).  The complete
+AgentResponse is still dispatched afterwards and its ``message`` is
+authoritative — streaming dispatchers use it to finalise the draft,
+everything else (SMS, email, WhatsApp) simply receives it, i.e. the
+stream is buffered for them automatically.
+
+Delivery: ``dispatch_all`` fans out concurrently — one lane per
+(channel, recipient) so a recipient's messages keep their order — with
+a concurrency cap per channel.  Failed sends are retried with jittered
+exponential backoff, and a per-channel circuit breaker stops hammering a
+provider that keeps failing.  Only provider/transport failures count:
+a result with ``retryable=False`` (a recipient or validation error) is
+returned at once without touching the breaker.
+
+Configuration (DispatcherRegistry.from_env):
+  DISPATCH_CHANNEL_CONCURRENCY  sends in flight per channel (default 8)
+  DISPATCH_MAX_ATTEMPTS         attempts per response (default 2)
+  DISPATCH_RETRY_BASE           first backoff in seconds (default 0.5)
+  DISPATCH_BREAKER_THRESHOLD    consecutive failures that open (default 5)
+  DISPATCH_BREAKER_COOLDOWN     seconds before a trial send (default 30)
+
+Outbox: when an Outbox is attached (``attach_outbox``), responses on its
+channels (SMS and email by default) are persisted and ``dispatch``
+returns a ``queued`` result at once; the outbox drains them in batches
+through ``send_bulk`` — see medforce/gateway/outbox.py.
 """
 
 from __future__ import annotations
 
 import asyncio
 import logging
+import os
+import random
+import time
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timezone
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
 from uuid import uuid4
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from medforce.gateway.events import (
     EventEnvelope,
@@ -35,15 +71,108 @@ logger = logging.getLogger("gateway.channels")
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
 
+class ResponseStream:
+    """
+    Text of one outbound message as it is being generated.
+
+    Agents ``feed()`` chunks and ``close()`` when the model is done;
+    dispatchers consume it with ``async for chunk in stream``.  Chunks
+    are kept, so a reader that starts late (or a stream published after
+    it was filled speculatively) replays from the beginning.
+    """
+
+    def __init__(
+        self,
+        recipient: str,
+        channel: str,
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        self.stream_id = uuid4().hex
+        self.recipient = recipient
+        self.channel = channel
+        self.metadata = dict(metadata or {})
+        self._chunks: list[str] = []
+        self._closed = False
+        self._changed = asyncio.Event()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> None:
+        if self._closed or not chunk:
+            return
+        self._chunks.append(chunk)
+        self._wake()
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._wake()
+
+    def _wake(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self._chunks):
+                yield self._chunks[index]
+                index += 1
+            if self._closed:
+                return
+            await changed.wait()
+
+    async def collect(self) -> str:
+        """Wait for the stream to close and return the full text."""
+        async for _ in self:
+            pass
+        return self.text
+
+
+# Installed by DispatcherRegistry.streaming() while an agent runs
+_stream_sink: ContextVar[Callable[[ResponseStream], None] | None] = ContextVar(
+    "response_stream_sink", default=None,
+)
+
+
+def publish_response_stream(stream: ResponseStream) -> None:
+    """Start delivering *stream* now, if a dispatcher can take it early."""
+    sink = _stream_sink.get()
+    if sink is not None:
+        sink(stream)
+
+
+def open_response_stream(
+    recipient: str, channel: str, metadata: dict[str, Any] | None = None,
+) -> ResponseStream:
+    """Create a ResponseStream and publish it straight away."""
+    stream = ResponseStream(recipient, channel, metadata)
+    publish_response_stream(stream)
+    return stream
+
+
 class AgentResponse(BaseModel):
     """A message an agent wants to send to a specific recipient."""
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     recipient: str          # "patient", "helper:HELPER-001", "gp:Dr.Patel"
     channel: str            # Must match a registered ChannelDispatcher.channel_name
     message: str = ""
     attachments: list[str] = Field(default_factory=list)
     metadata: dict[str, Any] = Field(default_factory=dict)
     # e.g. {"subject": "...", "template_id": "...", "proactive": True}
+    stream: Optional[ResponseStream] = Field(default=None, exclude=True, repr=False)
+    # Set when the message was streamed while being generated; ``message``
+    # still holds the final text
 
 
 class DeliveryResult(BaseModel):
@@ -53,6 +182,12 @@ class DeliveryResult(BaseModel):
     channel: str
     recipient: str
     error: Optional[str] = None
+    # Accepted by the outbox; the final outcome arrives as a receipt
+    queued: bool = False
+    # False for failures another attempt can't fix (no phone number,
+    # address rejected by the provider) — not retried, and not counted
+    # against the channel's circuit breaker
+    retryable: bool = True
     timestamp: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc)
     )
@@ -62,11 +197,29 @@ class ChannelDispatcher(ABC):
     """Abstract outbound channel — delivers AgentResponses to a channel."""
 
     channel_name: str = ""  # overridden by subclasses
+    supports_streaming: bool = False
 
     @abstractmethod
     async def send(self, response: AgentResponse) -> DeliveryResult:
         """Deliver a single response. Must not raise — return DeliveryResult."""
 
+    @property
+    def rate_limit_key(self) -> str:
+        """Provider account the outbox rate-limits on (default: the channel)."""
+        return self.channel_name
+
+    async def send_chunks(self, stream: ResponseStream) -> None:
+        """
+        Deliver a message's chunks while it is being generated.
+
+        Only called when ``supports_streaming`` is set.  The final text
+        arrives afterwards through ``send()`` with ``response.stream``
+        pointing at this stream.
+        """
+
+    async def cancel_stream(self, stream: ResponseStream) -> None:
+        """The agent published *stream* but never sent a final message."""
+
     async def send_bulk(self, responses: list[AgentResponse]) -> list[DeliveryResult]:
         """Deliver multiple responses.  Default: sequential send()."""
         results = []
@@ -75,6 +228,67 @@ class ChannelDispatcher(ABC):
         return results
 
 
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker for one channel.
+
+    closed     sends go through
+    open       after ``threshold`` failures in a row; sends are refused
+    half_open  ``cooldown`` seconds later one trial send is let through —
+               success closes the breaker, failure re-opens it
+    """
+
+    def __init__(
+        self,
+        threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._threshold = threshold
+        self._cooldown = cooldown
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at < self._cooldown:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open":
+            return False
+        # One trial at a time; a trial that never reported back (cancelled)
+        # is given up on after another cooldown.
+        now = self._clock()
+        if self._trial_at is not None and now - self._trial_at < self._cooldown:
+            return False
+        self._trial_at = now
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_at = None
+
+    def release(self) -> None:
+        """A send that never tested the provider — free the trial slot."""
+        self._trial_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_at = None
+        if self._opened_at is not None or self._failures >= self._threshold:
+            self._opened_at = self._clock()
+
+
 class DispatcherRegistry:
     """
     Registry of active ChannelDispatchers.
@@ -83,8 +297,42 @@ class DispatcherRegistry:
     talks to a specific channel directly.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        *,
+        channel_concurrency: int = 8,
+        max_attempts: int = 2,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 8.0,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         self._dispatchers: dict[str, ChannelDispatcher] = {}
+        # stream_id → task pumping chunks into a streaming dispatcher
+        self._stream_tasks: dict[str, asyncio.Task] = {}
+        self._channel_concurrency = max(1, channel_concurrency)
+        self._max_attempts = max(1, max_attempts)
+        self._retry_base_delay = retry_base_delay
+        self._retry_max_delay = retry_max_delay
+        self._breaker_threshold = breaker_threshold
+        self._breaker_cooldown = breaker_cooldown
+        self._clock = clock
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._in_flight: dict[str, int] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+        self._outbox: Any = None  # medforce.gateway.outbox.Outbox
+
+    @classmethod
+    def from_env(cls) -> "DispatcherRegistry":
+        return cls(
+            channel_concurrency=int(os.getenv("DISPATCH_CHANNEL_CONCURRENCY", "8")),
+            max_attempts=int(os.getenv("DISPATCH_MAX_ATTEMPTS", "2")),
+            retry_base_delay=float(os.getenv("DISPATCH_RETRY_BASE", "0.5")),
+            breaker_threshold=int(os.getenv("DISPATCH_BREAKER_THRESHOLD", "5")),
+            breaker_cooldown=float(os.getenv("DISPATCH_BREAKER_COOLDOWN", "30")),
+        )
 
     def register(self, dispatcher: ChannelDispatcher) -> None:
         name = dispatcher.channel_name
@@ -101,8 +349,91 @@ class DispatcherRegistry:
     def registered_channels(self) -> list[str]:
         return list(self._dispatchers.keys())
 
+    def attach_outbox(self, outbox: Any) -> None:
+        """Route the outbox's channels through it instead of sending inline."""
+        self._outbox = outbox
+
+    def queues(self, channel: str) -> bool:
+        """True if responses on *channel* go to the outbox."""
+        return self._outbox is not None and self._outbox.handles(channel)
+
+    # ── Streaming ──
+
+    @contextmanager
+    def streaming(self) -> Iterator[list[ResponseStream]]:
+        """
+        Scope in which published ResponseStreams start flowing at once.
+
+        Yields the list of streams published inside the scope; on exit
+        any that are still open are closed.  Pass the list to
+        ``release_streams()`` after dispatching the agent's responses.
+        """
+        published: list[ResponseStream] = []
+
+        def sink(stream: ResponseStream) -> None:
+            published.append(stream)
+            self._start_stream(stream)
+
+        token = _stream_sink.set(sink)
+        try:
+            yield published
+        finally:
+            _stream_sink.reset(token)
+            for stream in published:
+                stream.close()
+
+    def _start_stream(self, stream: ResponseStream) -> None:
+        dispatcher = self.get(stream.channel)
+        if dispatcher is None or not dispatcher.supports_streaming:
+            return  # buffered: the final message is sent as usual
+        if stream.stream_id in self._stream_tasks:
+            return
+        self._stream_tasks[stream.stream_id] = asyncio.create_task(
+            self._pump_stream(dispatcher, stream)
+        )
+
+    async def _pump_stream(
+        self, dispatcher: ChannelDispatcher, stream: ResponseStream
+    ) -> None:
+        try:
+            await dispatcher.send_chunks(stream)
+        except Exception as exc:
+            # Chunks are a preview — the final send() still delivers the text
+            logger.warning(
+                "Streaming to '%s' failed for %s: %s",
+                stream.channel, stream.recipient, exc,
+            )
+
+    async def _finish_stream(self, stream: ResponseStream) -> bool:
+        """Close *stream* and wait for its chunks to drain.  True if it was streaming."""
+        stream.close()
+        task = self._stream_tasks.pop(stream.stream_id, None)
+        if task is None:
+            return False
+        await task
+        return True
+
+    async def release_streams(self, streams: list[ResponseStream]) -> None:
+        """Cancel drafts of streams that never got a final message dispatched."""
+        for stream in streams:
+            if await self._finish_stream(stream):
+                dispatcher = self.get(stream.channel)
+                if dispatcher is None:
+                    continue
+                try:
+                    await dispatcher.cancel_stream(stream)
+                except Exception as exc:
+                    logger.warning(
+                        "Cancelling stream on '%s' failed: %s", stream.channel, exc,
+                    )
+
     async def dispatch(self, response: AgentResponse) -> DeliveryResult:
         """Route one response to the correct dispatcher (with single retry)."""
+        if response.stream is not None:
+            if await self._finish_stream(response.stream):
+                response.metadata.setdefault("stream_id", response.stream.stream_id)
+        if self.queues(response.channel):
+            return await self._outbox.enqueue(response)
         dispatcher = self.get(response.channel)
         if dispatcher is None:
             logger.warning(
@@ -115,50 +446,139 @@ class DispatcherRegistry:
                 recipient=response.recipient,
                 error=f"No dispatcher registered for channel '{response.channel}'",
             )
-        for attempt in range(2):
-            try:
-                result = await dispatcher.send(response)
-                if result.success or attempt == 1:
-                    return result
+        channel = response.channel
+        breaker = self._breaker(channel)
+        stats = self._channel_stats(channel)
+        result: DeliveryResult | None = None
+        for attempt in range(1, self._max_attempts + 1):
+            if not breaker.allow():
+                stats["short_circuited"] += 1
                 logger.warning(
-                    "Dispatch failed for %s on %s (attempt 1) — retrying",
-                    response.recipient, response.channel,
+                    "Circuit open for '%s' — not sending to %s",
+                    channel, response.recipient,
+                )
+                return DeliveryResult(
+                    success=False,
+                    channel=channel,
+                    recipient=response.recipient,
+                    error=f"Circuit open for channel '{channel}'",
                 )
-                await asyncio.sleep(0.5)
+            try:
+                async with self._semaphore(channel):
+                    self._in_flight[channel] = self._in_flight.get(channel, 0) + 1
+                    try:
+                        result = await dispatcher.send(response)
+                    finally:
+                        self._in_flight[channel] -= 1
             except Exception as exc:
-                if attempt == 0:
-                    logger.warning(
-                        "Dispatcher '%s' error (attempt 1): %s — retrying",
-                        response.channel, exc,
-                    )
-                    await asyncio.sleep(0.5)
-                else:
-                    logger.error(
-                        "Dispatcher '%s' error after retry: %s",
-                        response.channel, exc,
-                    )
-                    return DeliveryResult(
-                        success=False,
-                        channel=response.channel,
-                        recipient=response.recipient,
-                        error=str(exc),
-                    )
-        # Should not reach here, but handle gracefully
-        return DeliveryResult(
-            success=False,
-            channel=response.channel,
-            recipient=response.recipient,
-            error="Dispatch failed after retry",
+                logger.warning(
+                    "Dispatcher '%s' error (attempt %d/%d): %s",
+                    channel, attempt, self._max_attempts, exc,
+                )
+                result = DeliveryResult(
+                    success=False,
+                    channel=channel,
+                    recipient=response.recipient,
+                    error=str(exc),
+                )
+            if result.success:
+                breaker.record_success()
+                stats["sent"] += 1
+                return result
+            if not result.retryable:
+                # The recipient is the problem, not the provider
+                breaker.release()
+                stats["rejected"] += 1
+                logger.warning(
+                    "Dispatch to %s on '%s' rejected: %s",
+                    response.recipient, channel, result.error,
+                )
+                return result
+            breaker.record_failure()
+            if attempt < self._max_attempts:
+                stats["retries"] += 1
+                logger.warning(
+                    "Dispatch failed for %s on %s (attempt %d) — retrying",
+                    response.recipient, channel, attempt,
+                )
+                await asyncio.sleep(self._backoff(attempt))
+        stats["failed"] += 1
+        logger.error(
+            "Dispatch to %s on '%s' failed after %d attempts: %s",
+            response.recipient, channel, self._max_attempts, result.error,
         )
+        return result
 
     async def dispatch_all(
         self, responses: list[AgentResponse]
     ) -> list[DeliveryResult]:
-        """Dispatch every response in a result set."""
-        results: list[DeliveryResult] = []
-        for response in responses:
-            results.append(await self.dispatch(response))
-        return results
+        """
+        Dispatch every response in a result set, concurrently.
+
+        Responses to the same recipient on the same channel are sent in
+        order; separate (channel, recipient) lanes run side by side, so a
+        fan-out to patient, helpers and GP costs the slowest provider
+        rather than the sum.  Results keep the order of *responses*.
+        """
+        if len(responses) <= 1:
+            return [await self.dispatch(r) for r in responses]
+
+        lanes: dict[tuple[str, str], list[int]] = {}
+        for index, response in enumerate(responses):
+            lanes.setdefault((response.channel, response.recipient), []).append(index)
+        results: list[DeliveryResult | None] = [None] * len(responses)
+
+        async def run_lane(indices: list[int]) -> None:
+            for index in indices:
+                results[index] = await self.dispatch(responses[index])
+
+        await asyncio.gather(*(run_lane(indices) for indices in lanes.values()))
+        return results  # type: ignore[return-value]
+
+    # ── Retry / limits / breakers ──
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with jitter (50–150% of the nominal delay)."""
+        delay = min(self._retry_max_delay, self._retry_base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+    def _semaphore(self, channel: str) -> asyncio.Semaphore:
+        sem = self._semaphores.get(channel)
+        if sem is None:
+            sem = self._semaphores[channel] = asyncio.Semaphore(self._channel_concurrency)
+        return sem
+
+    def _breaker(self, channel: str) -> CircuitBreaker:
+        breaker = self._breakers.get(channel)
+        if breaker is None:
+            breaker = self._breakers[channel] = CircuitBreaker(
+                self._breaker_threshold, self._breaker_cooldown, self._clock,
+            )
+        return breaker
+
+    def _channel_stats(self, channel: str) -> dict[str, int]:
+        return self._stats.setdefault(
+            channel, {
+                "sent": 0, "failed": 0, "retries": 0, "rejected": 0,
+                "short_circuited": 0,
+            },
+        )
+
+    def get_metrics(self) -> dict[str, Any]:
+        """Per-channel delivery counters and breaker state."""
+        channels: dict[str, Any] = {}
+        for channel, stats in self._stats.items():
+            channels[channel] = {
+                **stats,
+                "breaker": self._breaker(channel).state,
+                "in_flight": self._in_flight.get(channel, 0),
+            }
+        return {
+            "channel_concurrency": self._channel_concurrency,
+            "max_attempts": self._max_attempts,
+            "channels": channels,
+            "outbox": self._outbox.get_stats() if self._outbox is not None else None,
+        }
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
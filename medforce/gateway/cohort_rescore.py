@@ -0,0 +1,389 @@
+"""
+Cohort Re-scoring — what a rule change would do to the existing population.
+
+Streams every diary in the DiaryStore, scores it with
+``RiskScorer.score_from_extracted_values`` under both the current rule
+set and a candidate one, and reports every patient whose risk level
+would change.
+
+    python -m medforce.gateway.cohort_rescore --rules candidate.json \\
+        --workers 8 --changes changes.jsonl --report report.json
+
+The same job backs POST /api/gateway/admin/rescore.
+
+Candidate rule set (JSON object, every key optional):
+  hard_rules          full replacement for risk_scorer.HARD_RULES —
+                      [{"param", "op", "threshold", "risk", "description",
+                        "scopes": ["risk", "monitoring"]}, ...]
+  keyword_rules       full replacement for KEYWORD_RULES —
+                      [{"keyword", "risk", "description"}, ...]
+  threshold_overrides {"<rule description>": new_threshold} applied to
+                      the hard rules (current ones unless replaced)
+
+Scale: patient IDs are split into chunks of ``chunk_size``; with
+``workers`` > 1 the chunks run in a process pool (each worker opens its
+own DiaryStore from a StoreSpec and compiles the candidate rules once),
+with at most two chunks per worker in flight.  Each chunk is loaded and
+scored with ``RiskScorer.score_batch``, and only changed rows come back
+to the parent, which streams them to ``changes_path`` and keeps a
+bounded sample for the report — memory stays flat however large the
+population is.  The in-memory diary backend can't be shared across
+processes, so it always runs in-process.
+
+Configuration: worker processes open the store described by the same
+variables as the gateway (DIARY_BACKEND, DIARY_BACKEND_PATH,
+DIARY_DELTA_LOG, DIARY_COMPACT_EVERY, DIARY_CODEC).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, replace
+from typing import Any, Iterator
+
+from medforce.gateway.agents.risk_scorer import HARD_RULES, KEYWORD_RULES, RiskScorer
+from medforce.gateway.agents.rule_engine import KeywordRule, LabRule, RuleEngine
+from medforce.gateway.diary import DiaryStore, RiskLevel
+
+logger = logging.getLogger("gateway.cohort_rescore")
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_SAMPLE_LIMIT = 200
+
+
+# ── Candidate rules ──
+
+
+def build_rule_engine(spec: dict[str, Any] | None) -> RuleEngine:
+    """Compile a candidate rule-set spec (see module docstring)."""
+    spec = spec or {}
+    unknown = set(spec) - {"hard_rules", "keyword_rules", "threshold_overrides"}
+    if unknown:
+        raise ValueError(f"Unknown rule-set keys: {sorted(unknown)}")
+
+    hard_rules = list(HARD_RULES)
+    if "hard_rules" in spec:
+        hard_rules = [
+            LabRule(
+                param=r["param"],
+                op=r["op"],
+                threshold=float(r["threshold"]),
+                risk=RiskLevel(r["risk"]),
+                description=r["description"],
+                scopes=frozenset(r.get("scopes", ["risk", "monitoring"])),
+            )
+            for r in spec["hard_rules"]
+        ]
+        bad_ops = {r.op for r in hard_rules} - {">", "<"}
+        if bad_ops:
+            raise ValueError(f"Unsupported operators: {sorted(bad_ops)}")
+
+    overrides = dict(spec.get("threshold_overrides", {}))
+    if overrides:
+        missing = set(overrides) - {r.description for r in hard_rules}
+        if missing:
+            raise ValueError(f"No hard rule with description: {sorted(missing)}")
+        hard_rules = [
+            replace(r, threshold=float(overrides[r.description]))
+            if r.description in overrides else r
+            for r in hard_rules
+        ]
+
+    keyword_rules = list(KEYWORD_RULES)
+    if "keyword_rules" in spec:
+        keyword_rules = [
+            KeywordRule(r["keyword"].lower(), RiskLevel(r["risk"]), r["description"])
+            for r in spec["keyword_rules"]
+        ]
+    return RuleEngine(hard_rules, keyword_rules)
+
+
+# ── Diary store for worker processes ──
+
+
+@dataclass(frozen=True)
+class StoreSpec:
+    """Picklable description of a DiaryStore, opened once per worker."""
+
+    kind: str = "gcs"
+    path: str = ""
+    delta_log: bool = False
+    compact_every: int | None = None
+    codec: str = "json"
+
+    @classmethod
+    def from_env(cls) -> "StoreSpec":
+        return cls(
+            kind=os.getenv("DIARY_BACKEND", "gcs").lower(),
+            path=os.getenv("DIARY_BACKEND_PATH", ""),
+            delta_log=os.getenv("DIARY_DELTA_LOG", "").lower() in ("1", "true", "yes"),
+            compact_every=int(os.getenv("DIARY_COMPACT_EVERY", "0")) or None,
+            codec=os.getenv("DIARY_CODEC", "json"),
+        )
+
+    @property
+    def shareable(self) -> bool:
+        """False for backends a second process can't see (memory)."""
+        return self.kind != "memory"
+
+    def open(self) -> DiaryStore:
+        from medforce.gateway.diary_backends import create_backend
+
+        gcs = None
+        if self.kind == "gcs":
+            from medforce.dependencies import get_gcs
+
+            gcs = get_gcs()
+        backend = create_backend(self.kind, gcs_bucket_manager=gcs, path=self.path)
+        # Read-only job — no index maintenance
+        return DiaryStore(
+            gcs, backend=backend, delta_log=self.delta_log,
+            compact_every=self.compact_every, codec=self.codec, patient_index=False,
+        )
+
+
+# ── Scoring ──
+
+
+def _score_chunk(
+    store: DiaryStore,
+    current: RiskScorer,
+    candidate: RiskScorer,
+    patient_ids: list[str],
+) -> dict[str, Any]:
+    """Load and score one chunk; returns counters plus changed rows only."""
+    loaded: list[tuple[str, Any]] = []
+    errors = 0
+    for pid in patient_ids:
+        try:
+            diary, _ = store.load(pid)
+        except Exception as exc:
+            logger.warning("Re-scoring skipped %s: %s", pid, exc)
+            errors += 1
+            continue
+        loaded.append((pid, diary))
+
+    cases = [
+        (diary.clinical, RiskScorer.extracted_lab_values(diary.clinical))
+        for _, diary in loaded
+    ]
+    before = current.score_batch(cases)
+    after = candidate.score_batch(cases)
+
+    transitions: Counter[str] = Counter()
+    current_levels: Counter[str] = Counter()
+    candidate_levels: Counter[str] = Counter()
+    changes: list[dict[str, Any]] = []
+    for (pid, diary), old, new in zip(loaded, before, after):
+        current_levels[old.risk_level.value] += 1
+        candidate_levels[new.risk_level.value] += 1
+        if old.risk_level == new.risk_level:
+            continue
+        transitions[f"{old.risk_level.value}->{new.risk_level.value}"] += 1
+        changes.append({
+            "patient_id": pid,
+            "stored": diary.clinical.risk_level.value,
+            "current": old.risk_level.value,
+            "candidate": new.risk_level.value,
+            "current_method": old.method,
+            "candidate_method": new.method,
+        })
+    return {
+        "scored": len(loaded),
+        "errors": errors,
+        "transitions": transitions,
+        "current_levels": current_levels,
+        "candidate_levels": candidate_levels,
+        "changes": changes,
+    }
+
+
+# Per-worker state, set by _init_worker
+_worker_store: DiaryStore | None = None
+_worker_scorers: tuple[RiskScorer, RiskScorer] | None = None
+
+
+def _init_worker(store_spec: StoreSpec, rules_spec: dict[str, Any] | None) -> None:
+    global _worker_store, _worker_scorers
+    _worker_store = store_spec.open()
+    _worker_scorers = (RiskScorer(), RiskScorer(rule_engine=build_rule_engine(rules_spec)))
+
+
+def _score_chunk_in_worker(patient_ids: list[str]) -> dict[str, Any]:
+    current, candidate = _worker_scorers
+    return _score_chunk(_worker_store, current, candidate, patient_ids)
+
+
+def _chunks(items: list[str], size: int) -> Iterator[list[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# ── Job ──
+
+
+class _Report:
+    """Accumulates chunk results; full change rows go to a file."""
+
+    def __init__(self, total: int, sample_limit: int, changes_path: str | None) -> None:
+        self.total = total
+        self.sample_limit = sample_limit
+        self.scored = 0
+        self.errors = 0
+        self.changed = 0
+        self.transitions: Counter[str] = Counter()
+        self.current_levels: Counter[str] = Counter()
+        self.candidate_levels: Counter[str] = Counter()
+        self.sample: list[dict[str, Any]] = []
+        self._changes_path = changes_path
+        self._changes_file = open(changes_path, "w", encoding="utf-8") if changes_path else None
+
+    def add(self, chunk: dict[str, Any]) -> None:
+        self.scored += chunk["scored"]
+        self.errors += chunk["errors"]
+        self.changed += len(chunk["changes"])
+        self.transitions.update(chunk["transitions"])
+        self.current_levels.update(chunk["current_levels"])
+        self.candidate_levels.update(chunk["candidate_levels"])
+        room = self.sample_limit - len(self.sample)
+        if room > 0:
+            self.sample.extend(chunk["changes"][:room])
+        if self._changes_file is not None:
+            for row in chunk["changes"]:
+                self._changes_file.write(json.dumps(row) + "\n")
+
+    def close(self) -> None:
+        if self._changes_file is not None:
+            self._changes_file.close()
+
+    def as_dict(self, elapsed: float, workers: int) -> dict[str, Any]:
+        return {
+            "patients": self.total,
+            "scored": self.scored,
+            "errors": self.errors,
+            "changed": self.changed,
+            "transitions": dict(self.transitions.most_common()),
+            "levels": {
+                "current": dict(self.current_levels),
+                "candidate": dict(self.candidate_levels),
+            },
+            "changes": self.sample,
+            "changes_path": self._changes_path,
+            "workers": workers,
+            "elapsed_s": round(elapsed, 2),
+        }
+
+
+def run_rescore(
+    rules_spec: dict[str, Any] | None,
+    *,
+    store: DiaryStore | None = None,
+    store_spec: StoreSpec | None = None,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    sample_limit: int = DEFAULT_SAMPLE_LIMIT,
+    changes_path: str | None = None,
+) -> dict[str, Any]:
+    """
+    Re-score every diary under *rules_spec* and report the differences.
+
+    In-process (``workers`` <= 1) the job reads through *store*; with a
+    process pool each worker opens *store_spec*.  Raises ValueError for
+    an invalid rule set before any diary is read.
+    """
+    candidate_engine = build_rule_engine(rules_spec)
+    store_spec = store_spec or StoreSpec.from_env()
+    if store is None:
+        store = store_spec.open()
+    if workers > 1 and not store_spec.shareable:
+        logger.warning("Diary backend '%s' is process-local — re-scoring in-process", store_spec.kind)
+        workers = 1
+    chunk_size = max(1, chunk_size)
+
+    t0 = time.monotonic()
+    patient_ids = store.list_all_patient_ids()
+    report = _Report(len(patient_ids), sample_limit, changes_path)
+    logger.info(
+        "Re-scoring %d patients (%d worker(s), chunks of %d)",
+        len(patient_ids), max(1, workers), chunk_size,
+    )
+    try:
+        if workers <= 1:
+            current = RiskScorer()
+            candidate = RiskScorer(rule_engine=candidate_engine)
+            for chunk in _chunks(patient_ids, chunk_size):
+                report.add(_score_chunk(store, current, candidate, chunk))
+        else:
+            # spawn: safe to start from a threaded server process
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(store_spec, rules_spec),
+            ) as pool:
+                chunks = _chunks(patient_ids, chunk_size)
+                pending: set[Future] = set()
+                for chunk in chunks:
+                    pending.add(pool.submit(_score_chunk_in_worker, chunk))
+                    if len(pending) >= workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            report.add(future.result())
+                for future in wait(pending).done:
+                    report.add(future.result())
+    finally:
+        report.close()
+
+    result = report.as_dict(time.monotonic() - t0, max(1, workers))
+    logger.info(
+        "Re-scored %d/%d patients in %.1fs — %d would change level",
+        result["scored"], result["patients"], result["elapsed_s"], result["changed"],
+    )
+    return result
+
+
+# ── CLI ──
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rules", help="candidate rule-set JSON file (default: current rules)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--sample-limit", type=int, default=DEFAULT_SAMPLE_LIMIT)
+    parser.add_argument("--changes", help="write every changed patient to this JSONL file")
+    parser.add_argument("--report", help="write the report JSON here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    rules_spec = None
+    if args.rules:
+        with open(args.rules, "r", encoding="utf-8") as f:
+            rules_spec = json.load(f)
+
+    report = run_rescore(
+        rules_spec,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        sample_limit=args.sample_limit,
+        changes_path=args.changes,
+    )
+    text = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,16 @@
 """
 Patient Diary — Single source of truth for a patient's clinical journey.
 
-One structured JSON document per patient, stored in GCS.  Every agent
-reads the diary before acting and writes to it after acting.
+One structured JSON document per patient, stored in GCS (or a local
+backend, see diary_backends.py).  Every agent reads the diary before
+acting and writes to it after acting.
 
 Storage path: gs://{bucket}/patient_diaries/patient_{id}/diary.json
 """
 
 from __future__ import annotations
 
-import json
+import copy
 import logging
 from datetime import datetime, timezone
 from enum import Enum
@@ -380,10 +381,38 @@ class ConversationEntry(BaseModel):
     direction: str = ""  # "AGENT→PATIENT", "PATIENT→AGENT", "SYSTEM", etc.
     channel: str = ""
     message: str = ""
-    delivery_status: str = "delivered"  # delivered, pending_channel, failed
+    delivery_status: str = "delivered"  # delivered, queued, pending_channel, failed
+    message_id: str = ""  # set for outbox messages; matched by delivery receipts
     chat_channel: str = "pre_consultation"  # "pre_consultation" or "monitoring"
 
 
+def _share_list_items(items: list, prev_items: list) -> list:
+    """
+    Copy ``items``, reusing equal elements from ``prev_items``.
+
+    Lists like conversation_log are append-only with front truncation,
+    so the new list is usually ``prev_items[k:] + new``.  Find ``k`` from
+    the first element, then walk both lists in step.
+    """
+    if not prev_items:
+        return [copy.deepcopy(item) for item in items]
+    shift = 0
+    if items:
+        first = items[0]
+        for k, prev in enumerate(prev_items):
+            if prev == first:
+                shift = k
+                break
+    shared = []
+    for i, item in enumerate(items):
+        j = i + shift
+        if j < len(prev_items) and prev_items[j] == item:
+            shared.append(prev_items[j])
+        else:
+            shared.append(copy.deepcopy(item))
+    return shared
+
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 #  Top-level Diary Model
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -420,6 +449,47 @@ class PatientDiary(BaseModel):
         """Update last_updated timestamp."""
         self.header.last_updated = datetime.now(timezone.utc)
 
+    # Sections compared and shared wholesale by snapshot()
+    _SNAPSHOT_SECTIONS: ClassVar[tuple[str, ...]] = (
+        "intake", "helper_registry", "gp_channel", "clinical",
+        "booking", "monitoring", "cross_phase_state",
+    )
+    # List fields shared element by element by snapshot()
+    _SNAPSHOT_LISTS: ClassVar[tuple[str, ...]] = (
+        "conversation_log", "cross_phase_extractions",
+    )
+
+    def snapshot(self, previous: PatientDiary | None = None) -> PatientDiary:
+        """
+        Return a read-only copy that shares unchanged parts with ``previous``.
+
+        Sections equal to the previous snapshot's are reused by reference
+        instead of deep-copied, and conversation entries are shared one by
+        one, so a turn that only appends a message copies the header and
+        that message.  Comparing is allocation-free, copying is not.
+
+        Snapshots are shared between the diary cache, the write-behind
+        saver and API readers — never mutate one.  Take
+        ``model_copy(deep=True)`` to get a working copy.  The header is
+        always copied so DiaryStore.save() stamping last_updated never
+        leaks into an older snapshot.
+        """
+        fields: dict[str, Any] = {"header": self.header.model_copy(deep=True)}
+        for name in self._SNAPSHOT_SECTIONS:
+            section = getattr(self, name)
+            prev_section = getattr(previous, name) if previous is not None else None
+            if prev_section is not None and prev_section == section:
+                fields[name] = prev_section
+            else:
+                fields[name] = section.model_copy(deep=True)
+        for name in self._SNAPSHOT_LISTS:
+            items = getattr(self, name)
+            prev_items = getattr(previous, name) if previous is not None else []
+            fields[name] = _share_list_items(items, prev_items)
+        return type(self).model_construct(
+            _fields_set=set(self.model_fields_set), **fields
+        )
+
     @classmethod
     def create_new(cls, patient_id: str, correlation_id: str | None = None) -> PatientDiary:
         """Factory for a fresh diary in the intake phase."""
@@ -432,7 +502,7 @@ class PatientDiary(BaseModel):
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-#  Diary Store — GCS persistence layer
+#  Diary Store — persistence layer
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
 
@@ -447,91 +517,177 @@ class DiaryConcurrencyError(Exception):
 
 class DiaryStore:
     """
-    Persists PatientDiary objects to GCS via GCSBucketManager.
+    Persists PatientDiary objects through a pluggable DiaryBackend.
 
-    Uses GCS generation-match for optimistic locking: when loading, we
+    Uses generation-match for optimistic locking: when loading, we
     capture the blob generation number.  When saving, we require that the
     generation hasn't changed — if it has, another process wrote first
     and we raise DiaryConcurrencyError.
+
+    The default backend is GCS (``DiaryStore(gcs_bucket_manager)``);
+    pass ``backend=`` to run against SQLite, local files or memory — see
+    medforce.gateway.diary_backends.
+
+    With ``delta_log=True`` each save appends only the changed sections
+    and new conversation entries, and the full diary is compacted every
+    ``compact_every`` versions — see medforce.gateway.diary_delta.  The
+    generation returned in that mode is the diary's delta version.
+
+    ``codec`` selects the full-diary encoding ("json", "compact",
+    "msgpack", optionally "+zlib"/"+zstd") — see
+    medforce.gateway.diary_codec.  Loads detect the encoding from the
+    blob header, so diaries written with any codec stay readable.  The
+    delta log keeps its own JSON delta format and ignores ``codec``.
+
+    Every save also updates a small secondary index (phase, risk,
+    monitoring flag, appointment date, pending GP queries) kept in one
+    blob, so listings read one blob instead of loading every diary —
+    see medforce.gateway.patient_index.  Pass ``patient_index=False``
+    to disable it.
+
+    ``add_save_observer(cb)`` registers ``cb(patient_id, diary)``, called
+    after every successful save and with ``diary=None`` after a delete
+    (the identity index keeps itself current this way).
     """
 
     DIARY_PREFIX = "patient_diaries"
-
-    def __init__(self, gcs_bucket_manager) -> None:
+    INDEX_PATH = f"{DIARY_PREFIX}/_index.json"
+
+    def __init__(
+        self,
+        gcs_bucket_manager=None,
+        *,
+        backend=None,
+        delta_log: bool = False,
+        compact_every: int | None = None,
+        codec: str = "json",
+        patient_index: bool = True,
+    ) -> None:
+        from medforce.gateway.diary_backends import GCSDiaryBackend
+        from medforce.gateway.diary_codec import validate_codec
+
+        if backend is None:
+            if gcs_bucket_manager is None:
+                raise ValueError("DiaryStore needs a GCS bucket manager or a backend")
+            backend = GCSDiaryBackend(gcs_bucket_manager)
+        # Kept for callers that write side files (chat history) to GCS.
+        # None when running on a local backend without GCS.
         self._gcs = gcs_bucket_manager
+        self._backend = backend
+        self._codec = validate_codec(codec)
 
-    def _blob_path(self, patient_id: str) -> str:
-        return f"{self.DIARY_PREFIX}/patient_{patient_id}/diary.json"
+        self._delta_log = None
+        if delta_log:
+            from medforce.gateway.diary_delta import DEFAULT_COMPACT_EVERY, DiaryDeltaLog
+
+            self._delta_log = DiaryDeltaLog(
+                backend,
+                self._folder_path,
+                compact_every=compact_every or DEFAULT_COMPACT_EVERY,
+            )
+
+        self._index = None
+        if patient_index:
+            from medforce.gateway.patient_index import PatientIndex
+
+            self._index = PatientIndex(
+                backend, self.INDEX_PATH, rebuild=self._scan_all_diaries,
+            )
+
+        self._save_observers: list = []
+
+    @property
+    def backend(self):
+        return self._backend
+
+    def add_save_observer(self, callback) -> None:
+        """Call ``callback(patient_id, diary)`` after each save (None on delete)."""
+        self._save_observers.append(callback)
+
+    def _notify_save(self, patient_id: str, diary: PatientDiary | None) -> None:
+        for callback in self._save_observers:
+            try:
+                callback(patient_id, diary)
+            except Exception as exc:
+                # The diary is saved — observers keep derived state only
+                logger.warning("Save observer failed for %s: %s", patient_id, exc)
 
-    # HTTP timeout for individual GCS operations (seconds)
-    GCS_TIMEOUT = 30
+    @property
+    def patient_index(self):
+        """The PatientIndex, or None when disabled."""
+        return self._index
+
+    def _folder_path(self, patient_id: str) -> str:
+        return f"{self.DIARY_PREFIX}/patient_{patient_id}"
+
+    def _blob_path(self, patient_id: str) -> str:
+        return f"{self._folder_path(patient_id)}/diary.json"
+
+    def get_stats(self) -> dict:
+        """Write-volume counters (delta-log mode only)."""
+        stats = {
+            "backend": getattr(self._backend, "name", type(self._backend).__name__),
+            "codec": self._codec,
+        }
+        if self._delta_log is not None:
+            stats["delta_log"] = self._delta_log.stats.as_dict()
+        if self._index is not None:
+            stats["patient_index"] = self._index.get_stats()
+        return stats
 
     def load(self, patient_id: str) -> tuple[PatientDiary, int]:
         """
-        Load a diary from GCS.
+        Load a diary from the backend.
 
         Returns (diary, generation) where generation is used for
         optimistic locking on save.
         """
-        path = self._blob_path(patient_id)
+        if self._delta_log is not None:
+            return self._delta_log.load(patient_id)
+        from medforce.gateway.diary_codec import decode
+
         try:
-            self._gcs._ensure_initialized()
-            blob = self._gcs.bucket.blob(path)
-            content = blob.download_as_text(timeout=self.GCS_TIMEOUT)
-            generation = blob.generation or 0
-            data = json.loads(content)
-            diary = PatientDiary.model_validate(data)
-            return diary, generation
-        except DiaryNotFoundError:
-            raise
-        except Exception as e:
-            err_type = type(e).__name__
-            err_msg = str(e).lower()
-            if "notfound" in err_type.lower() or "not found" in err_msg or "notfound" in err_msg:
-                raise DiaryNotFoundError(
-                    f"No diary found for patient {patient_id}"
-                ) from e
-            raise
+            content, generation = self._backend.read_bytes(self._blob_path(patient_id))
+        except DiaryNotFoundError as e:
+            raise DiaryNotFoundError(
+                f"No diary found for patient {patient_id}"
+            ) from e
+        return decode(content), generation
 
     def save(
         self, patient_id: str, diary: PatientDiary, generation: int | None = None
     ) -> int:
         """
-        Save diary to GCS.  Returns the new generation number.
+        Save diary to the backend.  Returns the new generation number.
 
-        If ``generation`` is provided, uses if_generation_match for
-        optimistic locking.  Pass None to force-write (e.g. on create).
+        If ``generation`` is provided, the write only succeeds if the
+        stored generation still matches.  Pass None to force-write
+        (e.g. on create).
         """
         diary.touch()
-        path = self._blob_path(patient_id)
-        content = diary.model_dump_json(indent=2)
-
         try:
-            self._gcs._ensure_initialized()
-            blob = self._gcs.bucket.blob(path)
-
-            if generation is not None:
-                blob.upload_from_string(
-                    content,
-                    content_type="application/json",
-                    if_generation_match=generation,
-                    timeout=self.GCS_TIMEOUT,
-                )
+            if self._delta_log is not None:
+                new_gen = self._delta_log.save(patient_id, diary, generation)
             else:
-                blob.upload_from_string(
-                    content,
-                    content_type="application/json",
-                    timeout=self.GCS_TIMEOUT,
+                from medforce.gateway.diary_codec import encode
+
+                content = encode(diary, self._codec)
+                new_gen = self._backend.write(
+                    self._blob_path(patient_id), content, generation
                 )
+        except DiaryConcurrencyError as e:
+            raise DiaryConcurrencyError(
+                f"Diary for {patient_id} was modified by another process"
+            ) from e
 
-            blob.reload(timeout=self.GCS_TIMEOUT)
-            return blob.generation or 0
-        except Exception as e:
-            if "conditionNotMet" in str(e) or "Precondition" in str(e):
-                raise DiaryConcurrencyError(
-                    f"Diary for {patient_id} was modified by another process"
-                ) from e
-            raise
+        if self._index is not None:
+            try:
+                self._index.update(patient_id, diary)
+            except Exception as exc:
+                # The diary is saved — a stale index only costs a rebuild
+                logger.warning("Patient index update failed for %s: %s", patient_id, exc)
+        self._notify_save(patient_id, diary)
+        return new_gen
 
     def create(self, patient_id: str, correlation_id: str | None = None) -> tuple[PatientDiary, int]:
         """Create a brand-new diary and persist it.  Returns (diary, generation)."""
@@ -541,22 +697,27 @@ class DiaryStore:
         return diary, gen
 
     def exists(self, patient_id: str) -> bool:
-        path = self._blob_path(patient_id)
-        try:
-            self._gcs._ensure_initialized()
-            blob = self._gcs.bucket.blob(path)
-            return blob.exists(timeout=self.GCS_TIMEOUT)
-        except Exception:
-            return False
+        if self._delta_log is not None:
+            return self._delta_log.exists(patient_id)
+        return self._backend.exists(self._blob_path(patient_id))
 
     def delete(self, patient_id: str) -> bool:
-        path = self._blob_path(patient_id)
-        return self._gcs.delete_file(path)
+        if self._delta_log is not None:
+            deleted = self._delta_log.delete(patient_id)
+        else:
+            deleted = self._backend.delete(self._blob_path(patient_id))
+        if self._index is not None:
+            try:
+                self._index.remove(patient_id)
+            except Exception as exc:
+                logger.warning("Patient index removal failed for %s: %s", patient_id, exc)
+        self._notify_save(patient_id, None)
+        return deleted
 
     def list_all_patient_ids(self) -> list[str]:
         """List all patient IDs that have diaries."""
         try:
-            files = self._gcs.list_files(self.DIARY_PREFIX)
+            files = self._backend.list_children(self.DIARY_PREFIX)
             patient_ids = []
             for f in files:
                 # Folder names look like "patient_PT-1234/"
@@ -574,16 +735,52 @@ class DiaryStore:
 
         Used by HeartbeatScheduler on startup to recover monitored patients.
         """
-        all_ids = self.list_all_patient_ids()
-        monitoring = []
-        for pid in all_ids:
+        return [e.patient_id for e in self.list_monitoring_entries()]
+
+    def list_monitoring_entries(self) -> list:
+        """Index entries (with appointment dates) for actively monitored patients."""
+        return self.list_index(phase=Phase.MONITORING.value, monitoring_active=True)
+
+    def list_index(
+        self,
+        phase: str | None = None,
+        monitoring_active: bool | None = None,
+        risk_level: str | None = None,
+    ) -> list:
+        """
+        Query the patient index (one blob read).
+
+        Without an index, falls back to loading every diary.
+        """
+        if self._index is not None:
+            self._index.refresh()
+            return self._index.query(
+                phase=phase, monitoring_active=monitoring_active, risk_level=risk_level,
+            )
+
+        from medforce.gateway.patient_index import PatientIndexEntry
+
+        entries = []
+        for pid, diary in self._scan_all_diaries():
+            entry = PatientIndexEntry.from_diary(pid, diary)
+            if phase is not None and entry.phase != phase:
+                continue
+            if monitoring_active is not None and entry.monitoring_active != monitoring_active:
+                continue
+            if risk_level is not None and entry.risk_level != risk_level:
+                continue
+            entries.append(entry)
+        return entries
+
+    def iter_all_diaries(self):
+        """Yield (patient_id, diary) for every stored diary — O(N) loads."""
+        return self._scan_all_diaries()
+
+    def _scan_all_diaries(self):
+        """Yield (patient_id, diary) for every stored diary — O(N) loads."""
+        for pid in self.list_all_patient_ids():
             try:
                 diary, _ = self.load(pid)
-                if (
-                    diary.header.current_phase == Phase.MONITORING
-                    and diary.monitoring.monitoring_active
-                ):
-                    monitoring.append(pid)
             except Exception:
                 continue
-        return monitoring
+            yield pid, diary
@@ -0,0 +1,467 @@
+"""
+Diary Backends — pluggable blob storage behind DiaryStore.
+
+A backend stores opaque blobs (text or bytes) keyed by a path-like string
+("patient_diaries/patient_PT-1/diary.json") and exposes the same
+generation-based optimistic locking that GCS gives us:
+
+  - every successful write bumps the blob's generation
+  - ``write(..., generation=N)`` only succeeds if the current generation
+    is still N (0 means "must not exist yet"), otherwise it raises
+    DiaryConcurrencyError
+  - ``write(..., generation=None)`` force-writes
+
+Backends:
+  GCSDiaryBackend       — production, wraps GCSBucketManager
+  SQLiteDiaryBackend    — single local file, survives restarts, no network
+  LocalFileDiaryBackend — one file per blob under a root directory
+  InMemoryDiaryBackend  — process-local dict, for tests and benchmarks
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+from medforce.gateway.diary import DiaryConcurrencyError, DiaryNotFoundError
+
+logger = logging.getLogger("gateway.diary_backends")
+
+
+class DiaryBackend(ABC):
+    """Abstract blob store with generation-match writes."""
+
+    name: str = "abstract"
+
+    @abstractmethod
+    def read(self, key: str) -> tuple[str, int]:
+        """Return (content, generation).  Raises DiaryNotFoundError."""
+
+    @abstractmethod
+    def read_bytes(self, key: str) -> tuple[bytes, int]:
+        """Like read(), but returns the raw stored bytes (binary diaries)."""
+
+    @abstractmethod
+    def write(self, key: str, content: str | bytes, generation: int | None = None) -> int:
+        """Write content and return the new generation.
+
+        Raises DiaryConcurrencyError if ``generation`` is given and no
+        longer matches the stored blob.
+        """
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def list_children(self, prefix: str) -> list[str]:
+        """List immediate children of ``prefix``.
+
+        Folders are returned with a trailing slash ("patient_PT-1/"),
+        leaf blobs without — the same shape GCSBucketManager.list_files
+        returns.
+        """
+
+    @staticmethod
+    def _children_from_keys(keys, prefix: str) -> list[str]:
+        if prefix and not prefix.endswith("/"):
+            prefix += "/"
+        children: set[str] = set()
+        for key in keys:
+            if not key.startswith(prefix):
+                continue
+            rest = key[len(prefix):]
+            if not rest:
+                continue
+            head, sep, _ = rest.partition("/")
+            children.add(head + "/" if sep else head)
+        return sorted(children)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  GCS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class GCSDiaryBackend(DiaryBackend):
+    """Blob storage on GCS using if_generation_match for locking."""
+
+    name = "gcs"
+
+    # HTTP timeout for individual GCS operations (seconds)
+    GCS_TIMEOUT = 30
+
+    def __init__(self, gcs_bucket_manager) -> None:
+        self._gcs = gcs_bucket_manager
+
+    def read(self, key: str) -> tuple[str, int]:
+        try:
+            self._gcs._ensure_initialized()
+            blob = self._gcs.bucket.blob(key)
+            content = blob.download_as_text(timeout=self.GCS_TIMEOUT)
+            return content, blob.generation or 0
+        except Exception as e:
+            self._raise_not_found(key, e)
+            raise
+
+    def read_bytes(self, key: str) -> tuple[bytes, int]:
+        try:
+            self._gcs._ensure_initialized()
+            blob = self._gcs.bucket.blob(key)
+            content = blob.download_as_bytes(timeout=self.GCS_TIMEOUT)
+            return content, blob.generation or 0
+        except Exception as e:
+            self._raise_not_found(key, e)
+            raise
+
+    @staticmethod
+    def _raise_not_found(key: str, e: Exception) -> None:
+        err_type = type(e).__name__
+        err_msg = str(e).lower()
+        if "notfound" in err_type.lower() or "not found" in err_msg or "notfound" in err_msg:
+            raise DiaryNotFoundError(f"No blob at {key}") from e
+
+    def write(self, key: str, content: str | bytes, generation: int | None = None) -> int:
+        content_type = (
+            "application/octet-stream" if isinstance(content, bytes)
+            else "application/json"
+        )
+        try:
+            self._gcs._ensure_initialized()
+            blob = self._gcs.bucket.blob(key)
+
+            if generation is not None:
+                blob.upload_from_string(
+                    content,
+                    content_type=content_type,
+                    if_generation_match=generation,
+                    timeout=self.GCS_TIMEOUT,
+                )
+            else:
+                blob.upload_from_string(
+                    content,
+                    content_type=content_type,
+                    timeout=self.GCS_TIMEOUT,
+                )
+
+            blob.reload(timeout=self.GCS_TIMEOUT)
+            return blob.generation or 0
+        except Exception as e:
+            if "conditionNotMet" in str(e) or "Precondition" in str(e):
+                raise DiaryConcurrencyError(
+                    f"{key} was modified by another process"
+                ) from e
+            raise
+
+    def exists(self, key: str) -> bool:
+        try:
+            self._gcs._ensure_initialized()
+            blob = self._gcs.bucket.blob(key)
+            return blob.exists(timeout=self.GCS_TIMEOUT)
+        except Exception:
+            return False
+
+    def delete(self, key: str) -> bool:
+        return self._gcs.delete_file(key)
+
+    def list_children(self, prefix: str) -> list[str]:
+        return self._gcs.list_files(prefix)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  In-memory
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class InMemoryDiaryBackend(DiaryBackend):
+    """Process-local dict store.  Thread-safe (saves run via to_thread)."""
+
+    name = "memory"
+
+    def __init__(self) -> None:
+        self._blobs: dict[str, tuple[str | bytes, int]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str) -> tuple[str | bytes, int]:
+        with self._lock:
+            entry = self._blobs.get(key)
+        if entry is None:
+            raise DiaryNotFoundError(f"No blob at {key}")
+        return entry
+
+    def read(self, key: str) -> tuple[str, int]:
+        content, generation = self._entry(key)
+        if isinstance(content, bytes):
+            content = content.decode("utf-8")
+        return content, generation
+
+    def read_bytes(self, key: str) -> tuple[bytes, int]:
+        content, generation = self._entry(key)
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        return content, generation
+
+    def write(self, key: str, content: str | bytes, generation: int | None = None) -> int:
+        with self._lock:
+            current = self._blobs.get(key)
+            current_gen = current[1] if current else 0
+            if generation is not None and generation != current_gen:
+                raise DiaryConcurrencyError(
+                    f"{key} was modified by another process "
+                    f"(expected generation {generation}, found {current_gen})"
+                )
+            new_gen = current_gen + 1
+            self._blobs[key] = (content, new_gen)
+            return new_gen
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            return key in self._blobs
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._blobs.pop(key, None) is not None
+
+    def list_children(self, prefix: str) -> list[str]:
+        with self._lock:
+            keys = list(self._blobs.keys())
+        return self._children_from_keys(keys, prefix)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  SQLite
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class SQLiteDiaryBackend(DiaryBackend):
+    """
+    Single-file SQLite store.
+
+    Generation-match writes are a compare-and-swap UPDATE inside one
+    transaction, so concurrent writers (threads or processes sharing the
+    file) get the same conflict semantics as GCS.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str) -> None:
+        self._db_path = db_path
+        parent = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " key TEXT PRIMARY KEY,"
+            " content TEXT NOT NULL,"
+            " generation INTEGER NOT NULL)"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _row(self, key: str) -> tuple[str | bytes, int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, generation FROM blobs WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            raise DiaryNotFoundError(f"No blob at {key}")
+        return row[0], row[1]
+
+    def read(self, key: str) -> tuple[str, int]:
+        content, generation = self._row(key)
+        if isinstance(content, bytes):
+            content = content.decode("utf-8")
+        return content, generation
+
+    def read_bytes(self, key: str) -> tuple[bytes, int]:
+        # bytes are stored as SQLite BLOBs and come back as bytes
+        content, generation = self._row(key)
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        return content, generation
+
+    def write(self, key: str, content: str | bytes, generation: int | None = None) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT generation FROM blobs WHERE key = ?", (key,)
+                ).fetchone()
+                current_gen = row[0] if row else 0
+                if generation is not None and generation != current_gen:
+                    raise DiaryConcurrencyError(
+                        f"{key} was modified by another process "
+                        f"(expected generation {generation}, found {current_gen})"
+                    )
+                new_gen = current_gen + 1
+                self._conn.execute(
+                    "INSERT INTO blobs (key, content, generation) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET "
+                    "content = excluded.content, generation = excluded.generation",
+                    (key, content, new_gen),
+                )
+                self._conn.execute("COMMIT")
+                return new_gen
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM blobs WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM blobs WHERE key = ?", (key,))
+        return cur.rowcount > 0
+
+    def list_children(self, prefix: str) -> list[str]:
+        like = prefix.rstrip("/") + "/%"
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM blobs WHERE key LIKE ?", (like,)
+            ).fetchall()
+        return self._children_from_keys((r[0] for r in rows), prefix)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  Local filesystem
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class LocalFileDiaryBackend(DiaryBackend):
+    """
+    One file per blob under ``root``, mirroring the GCS layout.
+
+    The generation lives in a ``<file>.gen`` sidecar.  Writes go to a
+    temp file and are swapped in with os.replace, so readers never see a
+    half-written diary.  Locking is per-process only — use the SQLite
+    backend when several processes share the directory.
+    """
+
+    name = "file"
+
+    GEN_SUFFIX = ".gen"
+
+    def __init__(self, root: str) -> None:
+        self._root = os.path.abspath(root)
+        os.makedirs(self._root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self._root, key))
+        if not path.startswith(self._root + os.sep):
+            raise ValueError(f"Key escapes backend root: {key}")
+        return path
+
+    def _read_gen(self, path: str) -> int:
+        try:
+            with open(path + self.GEN_SUFFIX, encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 1 if os.path.exists(path) else 0
+
+    @staticmethod
+    def _atomic_write(path: str, content: str | bytes) -> None:
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        tmp = f"{path}.tmp.{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)
+
+    def read(self, key: str) -> tuple[str, int]:
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    content = f.read()
+            except FileNotFoundError as e:
+                raise DiaryNotFoundError(f"No blob at {key}") from e
+            return content, self._read_gen(path)
+
+    def read_bytes(self, key: str) -> tuple[bytes, int]:
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, "rb") as f:
+                    content = f.read()
+            except FileNotFoundError as e:
+                raise DiaryNotFoundError(f"No blob at {key}") from e
+            return content, self._read_gen(path)
+
+    def write(self, key: str, content: str | bytes, generation: int | None = None) -> int:
+        path = self._path(key)
+        with self._lock:
+            current_gen = self._read_gen(path)
+            if generation is not None and generation != current_gen:
+                raise DiaryConcurrencyError(
+                    f"{key} was modified by another process "
+                    f"(expected generation {generation}, found {current_gen})"
+                )
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            new_gen = current_gen + 1
+            self._atomic_write(path, content)
+            self._atomic_write(path + self.GEN_SUFFIX, str(new_gen))
+            return new_gen
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def delete(self, key: str) -> bool:
+        path = self._path(key)
+        with self._lock:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                return False
+            try:
+                os.remove(path + self.GEN_SUFFIX)
+            except FileNotFoundError:
+                pass
+            return True
+
+    def list_children(self, prefix: str) -> list[str]:
+        folder = self._path(prefix.rstrip("/")) if prefix.strip("/") else self._root
+        if not os.path.isdir(folder):
+            return []
+        children = []
+        for entry in os.scandir(folder):
+            if entry.is_dir():
+                children.append(entry.name + "/")
+            elif not entry.name.endswith(self.GEN_SUFFIX) and ".tmp." not in entry.name:
+                children.append(entry.name)
+        return sorted(children)
+
+
+def create_backend(kind: str, *, gcs_bucket_manager=None, path: str = "") -> DiaryBackend:
+    """Build a backend by name ("gcs", "sqlite", "file", "memory")."""
+    kind = (kind or "gcs").lower()
+    if kind == "gcs":
+        if gcs_bucket_manager is None:
+            raise ValueError("GCS diary backend requires a GCSBucketManager")
+        return GCSDiaryBackend(gcs_bucket_manager)
+    if kind == "sqlite":
+        return SQLiteDiaryBackend(path or os.path.join("output", "diaries.sqlite3"))
+    if kind == "file":
+        return LocalFileDiaryBackend(path or os.path.join("output", "diaries"))
+    if kind == "memory":
+        return InMemoryDiaryBackend()
+    raise ValueError(f"Unknown diary backend: {kind}")
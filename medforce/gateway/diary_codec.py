@@ -0,0 +1,156 @@
+"""
+Diary Codec — selectable on-disk encodings for PatientDiary.
+
+The original format is pretty-printed JSON (``indent=2``) parsed with
+``json.loads`` + ``model_validate``.  That is kept as the default
+("json"), and compact encodings can be selected per DiaryStore:
+
+  json            pretty JSON text, no header (legacy)
+  compact         minified JSON bytes straight from pydantic-core,
+                  decoded with model_validate_json (no dict round trip)
+  msgpack         MessagePack of the JSON-mode dump (needs ``msgpack``)
+
+Any encoding may add compression with a "+" suffix:
+
+  +zlib           stdlib, always available
+  +zstd           needs ``zstandard``
+
+Non-legacy blobs start with a 6-byte header so the reader never has to
+know which codec wrote them:
+
+  b"MFDY"  magic
+  u8       header version (1)
+  u8       encoding << 4 | compression
+
+Anything that doesn't start with the magic is treated as legacy JSON,
+so existing diaries load transparently after switching codecs.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import zlib
+
+from medforce.gateway.diary import PatientDiary
+
+logger = logging.getLogger("gateway.diary_codec")
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+
+MAGIC = b"MFDY"
+HEADER_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+
+_ENCODINGS = {"compact": 1, "msgpack": 2}
+_COMPRESSIONS = {"": 0, "zlib": 1, "zstd": 2}
+_ENCODING_NAMES = {v: k for k, v in _ENCODINGS.items()}
+_COMPRESSION_NAMES = {v: k for k, v in _COMPRESSIONS.items()}
+
+CODECS = (
+    "json", "compact", "compact+zlib", "compact+zstd",
+    "msgpack", "msgpack+zlib", "msgpack+zstd",
+)
+
+
+class DiaryCodecError(Exception):
+    """Unknown, unavailable or corrupt diary encoding."""
+
+
+def _parse(codec: str) -> tuple[str, str]:
+    encoding, _, compression = (codec or "json").lower().partition("+")
+    if encoding != "json" and encoding not in _ENCODINGS:
+        raise DiaryCodecError(f"Unknown diary encoding: {encoding}")
+    if compression not in _COMPRESSIONS:
+        raise DiaryCodecError(f"Unknown diary compression: {compression}")
+    if encoding == "json" and compression:
+        raise DiaryCodecError("Legacy json codec cannot be compressed — use compact+...")
+    if encoding == "msgpack" and not MSGPACK_AVAILABLE:
+        raise DiaryCodecError("msgpack codec requested but msgpack is not installed")
+    if compression == "zstd" and not ZSTD_AVAILABLE:
+        raise DiaryCodecError("zstd compression requested but zstandard is not installed")
+    return encoding, compression
+
+
+def validate_codec(codec: str) -> str:
+    """Normalise a codec name, raising DiaryCodecError if unusable here."""
+    encoding, compression = _parse(codec)
+    return f"{encoding}+{compression}" if compression else encoding
+
+
+def encode(diary: PatientDiary, codec: str = "json") -> str | bytes:
+    """Serialize a diary.  "json" returns text; everything else bytes."""
+    encoding, compression = _parse(codec)
+    if encoding == "json":
+        return diary.model_dump_json(indent=2)
+
+    if encoding == "compact":
+        body = diary.model_dump_json().encode("utf-8")
+    else:
+        body = msgpack.packb(diary.model_dump(mode="json"), use_bin_type=True)
+
+    if compression == "zlib":
+        body = zlib.compress(body, 6)
+    elif compression == "zstd":
+        body = zstandard.ZstdCompressor(level=3).compress(body)
+
+    flags = (_ENCODINGS[encoding] << 4) | _COMPRESSIONS[compression]
+    return MAGIC + bytes((HEADER_VERSION, flags)) + body
+
+
+def decode(content: str | bytes) -> PatientDiary:
+    """Deserialize any diary blob written by encode() or the legacy store."""
+    if isinstance(content, str):
+        return PatientDiary.model_validate(json.loads(content))
+    if not content.startswith(MAGIC):
+        # Legacy pretty JSON
+        return PatientDiary.model_validate_json(content)
+
+    if len(content) < HEADER_SIZE:
+        raise DiaryCodecError("Truncated diary header")
+    version, flags = content[len(MAGIC)], content[len(MAGIC) + 1]
+    if version != HEADER_VERSION:
+        raise DiaryCodecError(f"Unsupported diary header version {version}")
+    encoding = _ENCODING_NAMES.get(flags >> 4)
+    compression = _COMPRESSION_NAMES.get(flags & 0x0F)
+    if encoding is None or compression is None:
+        raise DiaryCodecError(f"Unknown diary codec flags 0x{flags:02x}")
+
+    body = content[HEADER_SIZE:]
+    if compression == "zlib":
+        body = zlib.decompress(body)
+    elif compression == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise DiaryCodecError("Diary is zstd-compressed but zstandard is not installed")
+        body = zstandard.ZstdDecompressor().decompress(body)
+
+    if encoding == "compact":
+        return PatientDiary.model_validate_json(body)
+    if not MSGPACK_AVAILABLE:
+        raise DiaryCodecError("Diary is msgpack-encoded but msgpack is not installed")
+    return PatientDiary.model_validate(msgpack.unpackb(body, raw=False))
+
+
+def available_codecs() -> list[str]:
+    """Codecs usable with the packages installed in this process."""
+    usable = []
+    for codec in CODECS:
+        try:
+            _parse(codec)
+        except DiaryCodecError:
+            continue
+        usable.append(codec)
+    return usable
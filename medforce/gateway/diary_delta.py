@@ -0,0 +1,373 @@
+"""
+Diary Delta Log — append-only per-patient persistence with compaction.
+
+Instead of re-uploading the whole diary on every event, each save
+appends a small delta blob holding only what changed since the last
+save this process knows about:
+
+  - section-level patches: any top-level section whose JSON differs
+    is written whole ("clinical": {...})
+  - conversation appends: new ConversationEntry items plus how many
+    entries were truncated from the front
+
+Layout (under the patient's diary folder):
+
+  diary.json                     full snapshot, tagged "_delta_seq": S
+  deltas/0000000042.json         delta for version 42 (S < 42)
+
+The diary *version* (V) is the sequence number of the newest delta, and
+is what load() returns as the generation.  A save with generation=V
+creates ``deltas/V+1`` with create-only semantics, so two writers racing
+from the same version get DiaryConcurrencyError exactly like GCS
+generation-match.  Every ``compact_every`` versions the full diary is
+written back to diary.json (generation-matched against the snapshot we
+read) and the folded deltas are deleted.
+
+Deleting folded deltas frees their keys, so a stale writer's create-only
+write at a compacted version would succeed and then be skipped by every
+load.  After each write the snapshot's seq is re-read: a delta at or
+below it is deleted again and the save raises DiaryConcurrencyError.
+
+When no base is known (cold process, first save, retry after a
+conflict) the delta simply carries every section, the conversation log
+included as a full replacement rather than an append.  Legacy diary.json
+files without "_delta_seq" load as version 0.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from medforce.gateway.diary import (
+    DiaryConcurrencyError,
+    DiaryNotFoundError,
+    PatientDiary,
+)
+
+logger = logging.getLogger("gateway.diary_delta")
+
+# Fold deltas into a fresh snapshot after this many versions
+DEFAULT_COMPACT_EVERY = 20
+
+# How many patients' last-persisted state to keep for diffing
+DEFAULT_MAX_BASES = 2_000
+
+SEQ_KEY = "_delta_seq"
+_SEQ_WIDTH = 10
+
+
+class _DeltaVanished(Exception):
+    """A delta listed during load was compacted away before we read it."""
+
+
+@dataclass
+class _DeltaBase:
+    """What we last persisted for a patient — the diff base."""
+
+    version: int
+    sections: dict[str, str]
+    conversation: list[str]
+    snapshot_version: int
+    snapshot_generation: int
+
+
+@dataclass
+class DeltaStats:
+    delta_writes: int = 0
+    full_delta_writes: int = 0
+    compactions: int = 0
+    bytes_written: int = 0
+    full_bytes_equivalent: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def as_dict(self) -> dict[str, Any]:
+        with self._lock:
+            ratio = (
+                round(self.full_bytes_equivalent / self.bytes_written, 1)
+                if self.bytes_written else 0.0
+            )
+            return {
+                "delta_writes": self.delta_writes,
+                "full_delta_writes": self.full_delta_writes,
+                "compactions": self.compactions,
+                "bytes_written": self.bytes_written,
+                "full_bytes_equivalent": self.full_bytes_equivalent,
+                "reduction_ratio": ratio,
+            }
+
+
+class DiaryDeltaLog:
+    """Delta-log load/save for DiaryStore over any DiaryBackend."""
+
+    # Section name → JSON serializer, built once from the model
+    _SECTION_ADAPTERS: dict[str, TypeAdapter] = {
+        name: TypeAdapter(info.annotation)
+        for name, info in PatientDiary.model_fields.items()
+        if name != "conversation_log"
+    }
+
+    def __init__(
+        self,
+        backend,
+        folder_for,
+        *,
+        compact_every: int = DEFAULT_COMPACT_EVERY,
+        max_bases: int = DEFAULT_MAX_BASES,
+    ) -> None:
+        self._backend = backend
+        self._folder_for = folder_for  # patient_id → "patient_diaries/patient_X"
+        self._compact_every = max(1, compact_every)
+        self._max_bases = max_bases
+        self._bases: OrderedDict[str, _DeltaBase] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = DeltaStats()
+
+    # ── Keys ──
+
+    def _snapshot_key(self, patient_id: str) -> str:
+        return f"{self._folder_for(patient_id)}/diary.json"
+
+    def _deltas_prefix(self, patient_id: str) -> str:
+        return f"{self._folder_for(patient_id)}/deltas"
+
+    def _delta_key(self, patient_id: str, version: int) -> str:
+        return f"{self._deltas_prefix(patient_id)}/{version:0{_SEQ_WIDTH}d}.json"
+
+    def _delta_versions(self, patient_id: str) -> list[int]:
+        versions = []
+        for name in self._backend.list_children(self._deltas_prefix(patient_id)):
+            stem = name[:-5] if name.endswith(".json") else ""
+            if stem.isdigit():
+                versions.append(int(stem))
+        return sorted(versions)
+
+    # ── Base cache ──
+
+    def _get_base(self, patient_id: str) -> _DeltaBase | None:
+        with self._lock:
+            base = self._bases.get(patient_id)
+            if base is not None:
+                self._bases.move_to_end(patient_id)
+            return base
+
+    def _put_base(self, patient_id: str, base: _DeltaBase) -> None:
+        with self._lock:
+            self._bases[patient_id] = base
+            self._bases.move_to_end(patient_id)
+            while len(self._bases) > self._max_bases:
+                self._bases.popitem(last=False)
+
+    def forget(self, patient_id: str) -> None:
+        with self._lock:
+            self._bases.pop(patient_id, None)
+
+    # ── Serialization helpers ──
+
+    @classmethod
+    def _dump_sections(cls, diary: PatientDiary) -> tuple[dict[str, str], list[str]]:
+        sections = {
+            name: adapter.dump_json(getattr(diary, name)).decode()
+            for name, adapter in cls._SECTION_ADAPTERS.items()
+        }
+        conversation = [e.model_dump_json() for e in diary.conversation_log]
+        return sections, conversation
+
+    @staticmethod
+    def _conversation_change(old: list[str], new: list[str]) -> tuple[int, list[str]] | None:
+        """Express ``new`` as ``old[drop:] + appended``, or None if it isn't."""
+        for drop in range(len(old) + 1):
+            kept = len(old) - drop
+            if kept <= len(new) and old[drop:] == new[:kept]:
+                return drop, new[kept:]
+        return None
+
+    # ── Load ──
+
+    def load(self, patient_id: str) -> tuple[PatientDiary, int]:
+        # A compaction can delete deltas between our snapshot read and the
+        # delta reads — start over once the newer snapshot is in place.
+        for _ in range(3):
+            try:
+                return self._load_once(patient_id)
+            except _DeltaVanished:
+                continue
+        return self._load_once(patient_id)
+
+    def _load_once(self, patient_id: str) -> tuple[PatientDiary, int]:
+        snapshot_version, snapshot_generation = 0, 0
+        data: dict[str, Any] | None = None
+        try:
+            content, snapshot_generation = self._backend.read(self._snapshot_key(patient_id))
+            data = json.loads(content)
+            snapshot_version = int(data.pop(SEQ_KEY, 0))
+        except DiaryNotFoundError:
+            pass
+
+        version = snapshot_version
+        for v in self._delta_versions(patient_id):
+            if v <= snapshot_version:
+                continue  # already folded by a compaction that didn't clean up
+            try:
+                raw, _ = self._backend.read(self._delta_key(patient_id, v))
+            except DiaryNotFoundError:
+                raise _DeltaVanished(patient_id)
+            delta = json.loads(raw)
+            if data is None:
+                data = {}
+            data.update(delta.get("sections", {}))
+            drop = delta.get("conversation_drop", 0)
+            log = data.get("conversation_log", [])
+            data["conversation_log"] = log[drop:] + delta.get("conversation_append", [])
+            version = v
+
+        if data is None:
+            raise DiaryNotFoundError(f"No diary found for patient {patient_id}")
+
+        diary = PatientDiary.model_validate(data)
+        sections, conversation = self._dump_sections(diary)
+        self._put_base(patient_id, _DeltaBase(
+            version=version,
+            sections=sections,
+            conversation=conversation,
+            snapshot_version=snapshot_version,
+            snapshot_generation=snapshot_generation,
+        ))
+        return diary, version
+
+    # ── Save ──
+
+    def save(
+        self, patient_id: str, diary: PatientDiary, generation: int | None
+    ) -> int:
+        base = self._get_base(patient_id)
+        if generation is None:
+            generation = self._current_version(patient_id)
+        if base is not None and base.version != generation:
+            base = None  # our diff base is not what the caller loaded
+
+        sections, conversation = self._dump_sections(diary)
+        if base is None:
+            # Nothing to diff against: replace the whole log rather than
+            # appending it to whatever the snapshot and deltas already hold
+            changed: dict[str, str] = dict(sections)
+            changed["conversation_log"] = "[" + ",".join(conversation) + "]"
+            drop, appended = 0, []
+        else:
+            changed = {
+                name: text for name, text in sections.items()
+                if base.sections.get(name) != text
+            }
+            conv_change = self._conversation_change(base.conversation, conversation)
+            if conv_change is None:
+                changed["conversation_log"] = "[" + ",".join(conversation) + "]"
+                drop, appended = 0, []
+            else:
+                drop, appended = conv_change
+
+        section_parts = ",".join(
+            f"{json.dumps(name)}:{text}" for name, text in changed.items()
+        )
+        version = generation + 1
+        content = (
+            f'{{"v":{version},"sections":{{{section_parts}}},'
+            f'"conversation_drop":{drop},'
+            f'"conversation_append":[{",".join(appended)}]}}'
+        )
+
+        try:
+            # Create-only: a concurrent writer from the same version loses
+            self._backend.write(self._delta_key(patient_id, version), content, 0)
+        except DiaryConcurrencyError:
+            self.forget(patient_id)
+            raise
+
+        # A compaction elsewhere may have folded past this version and
+        # deleted its delta before our create landed — loads skip it
+        snapshot_version, snapshot_generation = self._snapshot_info(patient_id)
+        if snapshot_version >= version:
+            self._backend.delete(self._delta_key(patient_id, version))
+            self.forget(patient_id)
+            raise DiaryConcurrencyError(
+                f"Diary for {patient_id} was compacted past version {generation}"
+            )
+
+        full_size = sum(len(t) for t in sections.values()) + sum(len(c) for c in conversation)
+        with self.stats._lock:
+            self.stats.delta_writes += 1
+            if base is None:
+                self.stats.full_delta_writes += 1
+            self.stats.bytes_written += len(content)
+            self.stats.full_bytes_equivalent += full_size
+
+        new_base = _DeltaBase(
+            version=version,
+            sections=sections,
+            conversation=conversation,
+            snapshot_version=snapshot_version,
+            snapshot_generation=snapshot_generation,
+        )
+        if version - snapshot_version >= self._compact_every:
+            self._compact(patient_id, diary, new_base)
+        self._put_base(patient_id, new_base)
+        return version
+
+    def _current_version(self, patient_id: str) -> int:
+        versions = self._delta_versions(patient_id)
+        if versions:
+            return versions[-1]
+        return self._snapshot_info(patient_id)[0]
+
+    def _snapshot_info(self, patient_id: str) -> tuple[int, int]:
+        """(delta seq, backend generation) of diary.json — (0, 0) if absent."""
+        try:
+            content, generation = self._backend.read(self._snapshot_key(patient_id))
+        except DiaryNotFoundError:
+            return 0, 0
+        try:
+            return int(json.loads(content).get(SEQ_KEY, 0)), generation
+        except (ValueError, AttributeError):
+            return 0, generation
+
+    def _compact(self, patient_id: str, diary: PatientDiary, base: _DeltaBase) -> None:
+        """Fold everything up to ``base.version`` into diary.json."""
+        full = diary.model_dump_json()
+        content = f'{{"{SEQ_KEY}":{base.version},' + full[1:]
+        try:
+            new_gen = self._backend.write(
+                self._snapshot_key(patient_id), content, base.snapshot_generation,
+            )
+        except DiaryConcurrencyError:
+            # Someone else compacted since we loaded — their snapshot wins
+            logger.info("Skipping compaction for %s — snapshot moved", patient_id)
+            return
+
+        for v in self._delta_versions(patient_id):
+            if v <= base.version:
+                self._backend.delete(self._delta_key(patient_id, v))
+        base.snapshot_version = base.version
+        base.snapshot_generation = new_gen
+        with self.stats._lock:
+            self.stats.compactions += 1
+            self.stats.bytes_written += len(content)
+        logger.info("Compacted diary for %s at version %d", patient_id, base.version)
+
+    # ── Housekeeping ──
+
+    def exists(self, patient_id: str) -> bool:
+        if self._backend.exists(self._snapshot_key(patient_id)):
+            return True
+        return bool(self._delta_versions(patient_id))
+
+    def delete(self, patient_id: str) -> bool:
+        deleted = self._backend.delete(self._snapshot_key(patient_id))
+        for v in self._delta_versions(patient_id):
+            deleted = self._backend.delete(self._delta_key(patient_id, v)) or deleted
+        self.forget(patient_id)
+        return deleted
@@ -0,0 +1,235 @@
+"""
+Diary Write-Behind — coalescing background persistence for diaries.
+
+A single trigger can fan out into a handoff chain
+(USER_MESSAGE → INTAKE_COMPLETE → CLINICAL → BOOKING), and each link
+used to start its own full-diary upload.  Those uploads raced each other
+on generation numbers and all but the last were wasted.
+
+DiaryWriteBehind keeps at most one pending diary per patient.  A newer
+``schedule()`` replaces the pending one (the older save is *elided*),
+and a single per-patient flush task writes only the latest state:
+
+  - after ``debounce_seconds`` of quiet, or
+  - immediately when ``request_flush()`` is called (end of a chain), or
+  - on ``flush_all()`` during shutdown.
+
+Only one write per patient is ever in flight, so generations advance
+monotonically instead of colliding.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable
+
+from medforce.gateway.diary import DiaryConcurrencyError, PatientDiary
+
+logger = logging.getLogger("gateway.diary_writer")
+
+# Default quiet period before a pending save is flushed (seconds)
+DEFAULT_DEBOUNCE_SECONDS = 0.25
+
+# Retry backoffs for a failed write (seconds)
+DEFAULT_BACKOFFS = (0.1, 0.3, 0.9)
+
+
+class DiaryWriteBehind:
+    """
+    Per-patient coalescing write-behind stage in front of a DiaryStore.
+
+    Usage:
+        writer = DiaryWriteBehind(diary_store, on_saved=cache_update)
+        writer.schedule(pid, diary_snapshot, generation)
+        writer.request_flush(pid)     # end of chain — don't wait for debounce
+        await writer.cancel(pid)      # before deleting the diary
+        await writer.flush_all()      # shutdown
+    """
+
+    def __init__(
+        self,
+        diary_store: Any,
+        *,
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+        backoffs: tuple[float, ...] = DEFAULT_BACKOFFS,
+        on_saved: Callable[[str, int], None] | None = None,
+        bg_tasks: set[asyncio.Task] | None = None,
+    ) -> None:
+        self._store = diary_store
+        self._debounce = debounce_seconds
+        self._backoffs = backoffs
+        self._on_saved = on_saved
+        # Shared with the Gateway so callers can drain background work
+        self._bg_tasks = bg_tasks if bg_tasks is not None else set()
+
+        self._pending: dict[str, PatientDiary] = {}
+        # Last generation we know the store holds, per patient
+        self._generations: dict[str, int | None] = {}
+        self._wake: dict[str, asyncio.Event] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._metrics: dict[str, Any] = {
+            "saves_requested": 0,
+            "saves_performed": 0,
+            "saves_elided": 0,
+            "save_retries": 0,
+            "save_failures": 0,
+            "last_save_ms": 0.0,
+        }
+
+    # ── Public API ──
+
+    def schedule(
+        self, patient_id: str, diary: PatientDiary, generation: int | None
+    ) -> None:
+        """
+        Queue ``diary`` as the latest state to persist for a patient.
+
+        ``diary`` must be a snapshot the caller will not mutate further.
+        ``generation`` is only used if no save for this patient is in
+        progress — while one is, the writer tracks the generation itself.
+        """
+        self._metrics["saves_requested"] += 1
+        if patient_id in self._pending:
+            self._metrics["saves_elided"] += 1
+        self._pending[patient_id] = diary
+        self._generations.setdefault(patient_id, generation)
+
+        if patient_id not in self._tasks:
+            self._wake[patient_id] = asyncio.Event()
+            task = asyncio.create_task(self._flush_loop(patient_id))
+            self._tasks[patient_id] = task
+            self._bg_tasks.add(task)
+            task.add_done_callback(self._bg_tasks.discard)
+
+    def request_flush(self, patient_id: str) -> None:
+        """Skip the debounce and write the patient's pending diary now."""
+        wake = self._wake.get(patient_id)
+        if wake is not None:
+            wake.set()
+
+    def has_pending(self, patient_id: str) -> bool:
+        """True while a save is queued or still in flight for the patient."""
+        return patient_id in self._pending or patient_id in self._tasks
+
+    def discard(self, patient_id: str) -> None:
+        """Drop any pending save (e.g. the diary was deleted)."""
+        self._pending.pop(patient_id, None)
+        self._generations.pop(patient_id, None)
+        self.request_flush(patient_id)
+
+    async def cancel(self, patient_id: str) -> None:
+        """
+        Drop the patient's pending save and wait out one already in flight.
+
+        A save that has reached the store cannot be interrupted (it runs
+        in a worker thread), so this returns once it has landed — callers
+        deleting the diary do so afterwards, and nothing is left to
+        write it back.
+        """
+        self.discard(patient_id)
+        task = self._tasks.get(patient_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def flush(self, patient_id: str) -> None:
+        """Write the patient's pending diary and wait for it to land."""
+        self.request_flush(patient_id)
+        task = self._tasks.get(patient_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def flush_all(self) -> None:
+        """Flush every pending diary — called on gateway shutdown."""
+        for pid in list(self._tasks):
+            self.request_flush(pid)
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        logger.info(
+            "Write-behind flushed (performed=%d, elided=%d)",
+            self._metrics["saves_performed"], self._metrics["saves_elided"],
+        )
+
+    def get_metrics(self) -> dict[str, Any]:
+        metrics = dict(self._metrics)
+        metrics["pending"] = len(self._pending)
+        return metrics
+
+    # ── Internal ──
+
+    async def _flush_loop(self, patient_id: str) -> None:
+        wake = self._wake[patient_id]
+        try:
+            while patient_id in self._pending:
+                if not wake.is_set():
+                    try:
+                        await asyncio.wait_for(wake.wait(), timeout=self._debounce)
+                    except asyncio.TimeoutError:
+                        pass
+                wake.clear()
+                diary = self._pending.pop(patient_id, None)
+                if diary is None:
+                    break
+                await self._write(patient_id, diary)
+        finally:
+            self._tasks.pop(patient_id, None)
+            self._wake.pop(patient_id, None)
+            # Once idle, the caller's cached generation is authoritative
+            # again (on_saved keeps it current) — don't hold state forever.
+            if patient_id not in self._pending:
+                self._generations.pop(patient_id, None)
+
+    async def _write(self, patient_id: str, diary: PatientDiary) -> None:
+        backoffs = self._backoffs
+        for attempt in range(len(backoffs) + 1):
+            generation = self._generations.get(patient_id)
+            try:
+                t0 = time.monotonic()
+                new_gen = await asyncio.to_thread(
+                    self._store.save, patient_id, diary, generation,
+                )
+                elapsed = time.monotonic() - t0
+                logger.info("  [timing] diary save: %.2fs", elapsed)
+                self._metrics["saves_performed"] += 1
+                self._metrics["last_save_ms"] = round(elapsed * 1000, 1)
+                self._generations[patient_id] = new_gen
+                if self._on_saved is not None:
+                    self._on_saved(patient_id, new_gen)
+                return
+            except DiaryConcurrencyError:
+                if attempt < len(backoffs):
+                    logger.warning(
+                        "Diary concurrency conflict for patient %s (attempt %d) — retrying",
+                        patient_id, attempt + 1,
+                    )
+                    self._metrics["save_retries"] += 1
+                    try:
+                        # Reload generation from the store for the retry
+                        _, gen = await asyncio.to_thread(
+                            self._store.load, patient_id
+                        )
+                        self._generations[patient_id] = gen
+                    except Exception:
+                        pass
+                    await asyncio.sleep(backoffs[attempt])
+                else:
+                    logger.error(
+                        "Diary save failed after %d retries for %s (concurrency)",
+                        len(backoffs), patient_id,
+                    )
+                    self._metrics["save_failures"] += 1
+            except Exception as exc:
+                if attempt < len(backoffs):
+                    logger.warning(
+                        "Diary save failed for %s (attempt %d): %s — retrying",
+                        patient_id, attempt + 1, exc,
+                    )
+                    self._metrics["save_retries"] += 1
+                    await asyncio.sleep(backoffs[attempt])
+                else:
+                    logger.error(
+                        "Failed to save diary for %s after %d retries: %s",
+                        patient_id, len(backoffs) + 1, exc,
+                    )
+                    self._metrics["save_failures"] += 1
@@ -18,6 +18,7 @@ Configuration (environment variables):
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 from typing import Any
@@ -141,7 +142,8 @@ class DialogflowDispatcher(ChannelDispatcher):
                 },
             )
 
-            df_response = client.detect_intent(request=request)
+            # The SessionsClient is synchronous — keep it off the event loop
+            df_response = await asyncio.to_thread(client.detect_intent, request=request)
             logger.info(
                 "Dialogflow template sent: %s → %s",
                 template_id, phone,
@@ -198,7 +200,8 @@ class DialogflowDispatcher(ChannelDispatcher):
                 query_input=query_input,
             )
 
-            df_response = client.detect_intent(request=request)
+            # The SessionsClient is synchronous — keep it off the event loop
+            df_response = await asyncio.to_thread(client.detect_intent, request=request)
             logger.info("Dialogflow session message sent → %s", phone)
 
             return DeliveryResult(
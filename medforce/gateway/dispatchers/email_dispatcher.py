@@ -8,10 +8,15 @@ Configuration (environment variables):
   SENDGRID_API_KEY     — SendGrid API key
   SENDGRID_FROM_EMAIL  — Sender email (e.g., "noreply@medforce.app")
   SENDGRID_FROM_NAME   — Sender display name (default: "MedForce Clinical")
+
+``send_bulk`` (used by the outbox) folds emails with the same subject,
+body and reply-to into one SendGrid request with a personalization per
+recipient, so a reminder burst costs one API call per distinct message.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 
@@ -66,6 +71,10 @@ class EmailDispatcher(ChannelDispatcher):
                 logger.error("Failed to initialize SendGrid client: %s", exc)
         return self._client
 
+    @property
+    def rate_limit_key(self) -> str:
+        return f"email:{self._from_email}"
+
     async def send(self, response: AgentResponse) -> DeliveryResult:
         """Send an email via SendGrid."""
         to_email = response.metadata.get("to", "")
@@ -81,6 +90,7 @@ class EmailDispatcher(ChannelDispatcher):
                 channel=self.channel_name,
                 recipient=response.recipient,
                 error="No recipient email address",
+                retryable=False,
             )
 
         client = self._get_client()
@@ -124,7 +134,8 @@ class EmailDispatcher(ChannelDispatcher):
                         attachment_ref,
                     )
 
-            sg_response = client.send(message)
+            # The SendGrid SDK is synchronous — run it in a worker thread
+            sg_response = await asyncio.to_thread(client.send, message)
             status_code = sg_response.status_code
 
             if 200 <= status_code < 300:
@@ -147,6 +158,8 @@ class EmailDispatcher(ChannelDispatcher):
                     channel=self.channel_name,
                     recipient=response.recipient,
                     error=f"SendGrid returned status {status_code}",
+                    # 4xx: the request itself was rejected (bad address…)
+                    retryable=not (400 <= status_code < 500 and status_code != 429),
                 )
 
         except Exception as exc:
@@ -157,3 +170,74 @@ class EmailDispatcher(ChannelDispatcher):
                 recipient=response.recipient,
                 error=str(exc),
             )
+
+    async def send_bulk(self, responses: list[AgentResponse]) -> list[DeliveryResult]:
+        """Send a batch, one request per distinct (subject, body, reply-to)."""
+        client = self._get_client()
+        if client is None:
+            return await super().send_bulk(responses)
+
+        results: list[DeliveryResult | None] = [None] * len(responses)
+        groups: dict[tuple[str, str, str], list[int]] = {}
+        for index, response in enumerate(responses):
+            if not response.metadata.get("to") or response.attachments:
+                results[index] = await self.send(response)
+                continue
+            key = (
+                response.metadata.get("subject", "MedForce — Clinical Update"),
+                response.message,
+                response.metadata.get("reply_to", ""),
+            )
+            groups.setdefault(key, []).append(index)
+
+        for (subject, body, reply_to), indices in groups.items():
+            if len(indices) == 1:
+                results[indices[0]] = await self.send(responses[indices[0]])
+                continue
+            error = await self._send_multiple(
+                client, subject, body, reply_to,
+                [responses[i].metadata["to"] for i in indices],
+            )
+            for i in indices:
+                results[i] = DeliveryResult(
+                    success=error is None,
+                    channel=self.channel_name,
+                    recipient=responses[i].recipient,
+                    error=error,
+                )
+        return results  # type: ignore[return-value]
+
+    async def _send_multiple(
+        self, client, subject: str, body: str, reply_to: str, to_emails: list[str],
+    ) -> str | None:
+        """One SendGrid request, one personalization per recipient; error or None."""
+        try:
+            from sendgrid.helpers.mail import Email, Mail, ReplyTo, To
+
+            message = Mail(
+                from_email=Email(self._from_email, self._from_name),
+                to_emails=[To(address) for address in to_emails],
+                subject=subject,
+                plain_text_content=body,
+                # Separate personalizations — recipients don't see each other
+                is_multiple=True,
+            )
+            if reply_to:
+                message.reply_to = ReplyTo(reply_to)
+
+            sg_response = await asyncio.to_thread(client.send, message)
+            status_code = sg_response.status_code
+            if 200 <= status_code < 300:
+                logger.info(
+                    "Bulk email sent: %s → %d recipients (status=%d)",
+                    subject, len(to_emails), status_code,
+                )
+                return None
+            logger.error(
+                "Bulk email send failed: status=%d body=%s",
+                status_code, sg_response.body,
+            )
+            return f"SendGrid returned status {status_code}"
+        except Exception as exc:
+            logger.error("Bulk email send error: %s", exc)
+            return str(exc)
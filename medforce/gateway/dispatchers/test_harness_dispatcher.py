@@ -3,6 +3,9 @@ Test Harness Dispatcher — stores responses in memory for the HTML test
 harness to poll via GET /api/gateway/events/{patient_id}.
 
 Used during development and testing (Phase 5).
+
+Streamed replies show up as drafts (``get_drafts``) while they are being
+generated and move to the response log when the final message lands.
 """
 
 from __future__ import annotations
@@ -14,6 +17,7 @@ from medforce.gateway.channels import (
     AgentResponse,
     ChannelDispatcher,
     DeliveryResult,
+    ResponseStream,
 )
 
 logger = logging.getLogger("gateway.dispatchers.test_harness")
@@ -23,14 +27,19 @@ class TestHarnessDispatcher(ChannelDispatcher):
     """Stores responses in memory for test harness polling."""
 
     channel_name = "test_harness"
+    supports_streaming = True
 
     def __init__(self) -> None:
         # patient_id → list of AgentResponses
         self._response_log: dict[str, list[AgentResponse]] = defaultdict(list)
+        # patient_id → stream_id → in-flight ResponseStream
+        self._drafts: dict[str, dict[str, ResponseStream]] = defaultdict(dict)
 
     async def send(self, response: AgentResponse) -> DeliveryResult:
         # Extract patient_id from recipient if possible
         patient_id = response.metadata.get("patient_id", "unknown")
+        if response.stream is not None:
+            self._drop_draft(patient_id, response.stream.stream_id)
         self._response_log[patient_id].append(response)
         logger.debug(
             "Test harness stored response for %s → %s",
@@ -43,6 +52,28 @@ class TestHarnessDispatcher(ChannelDispatcher):
             recipient=response.recipient,
         )
 
+    async def send_chunks(self, stream: ResponseStream) -> None:
+        patient_id = stream.metadata.get("patient_id", "unknown")
+        self._drafts[patient_id][stream.stream_id] = stream
+        await stream.collect()
+
+    async def cancel_stream(self, stream: ResponseStream) -> None:
+        self._drop_draft(stream.metadata.get("patient_id", "unknown"), stream.stream_id)
+
+    def _drop_draft(self, patient_id: str, stream_id: str) -> None:
+        drafts = self._drafts.get(patient_id)
+        if drafts is not None:
+            drafts.pop(stream_id, None)
+            if not drafts:
+                del self._drafts[patient_id]
+
+    def get_drafts(self, patient_id: str) -> list[dict[str, str]]:
+        """Replies still being generated for a patient, text so far."""
+        return [
+            {"stream_id": stream_id, "recipient": stream.recipient, "text": stream.text}
+            for stream_id, stream in self._drafts.get(patient_id, {}).items()
+        ]
+
     def get_responses(self, patient_id: str) -> list[AgentResponse]:
         """Retrieve all stored responses for a patient (test harness polls this)."""
         return list(self._response_log.get(patient_id, []))
@@ -51,5 +82,7 @@ class TestHarnessDispatcher(ChannelDispatcher):
         """Clear stored responses. If patient_id is None, clear everything."""
         if patient_id:
             self._response_log.pop(patient_id, None)
+            self._drafts.pop(patient_id, None)
         else:
             self._response_log.clear()
+            self._drafts.clear()
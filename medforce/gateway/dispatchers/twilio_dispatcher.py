@@ -8,10 +8,14 @@ Configuration (environment variables):
   TWILIO_ACCOUNT_SID   — Twilio account SID
   TWILIO_AUTH_TOKEN     — Twilio auth token
   TWILIO_FROM_NUMBER   — Twilio phone number (e.g., "+441234567890")
+
+Twilio has no bulk messages endpoint, so ``send_bulk`` (used by the
+outbox) sends a batch concurrently, at most ``BULK_CONCURRENCY`` at once.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 
@@ -23,6 +27,8 @@ from medforce.gateway.channels import (
 
 logger = logging.getLogger("gateway.dispatchers.twilio")
 
+BULK_CONCURRENCY = 10
+
 
 class TwilioSMSDispatcher(ChannelDispatcher):
     """Delivers responses via Twilio SMS API."""
@@ -62,6 +68,11 @@ class TwilioSMSDispatcher(ChannelDispatcher):
                 logger.error("Failed to initialize Twilio client: %s", exc)
         return self._client
 
+    @property
+    def rate_limit_key(self) -> str:
+        # Twilio's throughput limits are per account
+        return f"sms:{self._account_sid or 'stub'}"
+
     async def send(self, response: AgentResponse) -> DeliveryResult:
         """Send an SMS via Twilio."""
         to_number = response.metadata.get("phone", "")
@@ -73,6 +84,7 @@ class TwilioSMSDispatcher(ChannelDispatcher):
                 channel=self.channel_name,
                 recipient=response.recipient,
                 error="No recipient phone number",
+                retryable=False,
             )
 
         # Truncate message if over SMS limit (160 chars for single,
@@ -95,7 +107,10 @@ class TwilioSMSDispatcher(ChannelDispatcher):
             )
 
         try:
-            sms = client.messages.create(
+            # The Twilio SDK is synchronous — run it in a worker thread.
+            # The client (and its HTTP session) is reused across sends.
+            sms = await asyncio.to_thread(
+                client.messages.create,
                 body=message_text,
                 from_=self._from_number,
                 to=to_number,
@@ -113,9 +128,25 @@ class TwilioSMSDispatcher(ChannelDispatcher):
 
         except Exception as exc:
             logger.error("Twilio SMS send error: %s", exc)
+            # TwilioRestException carries the HTTP status: a 4xx (other
+            # than 429) is this number or message being rejected
+            status = getattr(exc, "status", None)
             return DeliveryResult(
                 success=False,
                 channel=self.channel_name,
                 recipient=response.recipient,
                 error=str(exc),
+                retryable=not (
+                    isinstance(status, int) and 400 <= status < 500 and status != 429
+                ),
             )
+
+    async def send_bulk(self, responses: list[AgentResponse]) -> list[DeliveryResult]:
+        """Send a batch concurrently — one API call per message."""
+        semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+        async def send_one(response: AgentResponse) -> DeliveryResult:
+            async with semaphore:
+                return await self.send(response)
+
+        return list(await asyncio.gather(*(send_one(r) for r in responses)))
@@ -3,16 +3,25 @@ WebSocket Dispatcher — delivers responses via connected WebSocket sessions.
 
 This is the primary dispatcher during Phases 1-5, using the existing
 WebSocket infrastructure in medforce.agents.websocket_agent.
+
+Streamed replies are pushed as they are generated:
+  {"type": "stream_chunk", "stream_id": ..., "text": ...}   per chunk
+  {"type": "message", "stream_id": ..., "message": ...}     final text
+  {"type": "stream_cancel", "stream_id": ...}               draft dropped
+The final frame carries the complete, authoritative message — clients
+replace the draft for that stream_id with it.
 """
 
 from __future__ import annotations
 
 import logging
+from typing import Any
 
 from medforce.gateway.channels import (
     AgentResponse,
     ChannelDispatcher,
     DeliveryResult,
+    ResponseStream,
 )
 
 logger = logging.getLogger("gateway.dispatchers.websocket")
@@ -22,6 +31,7 @@ class WebSocketDispatcher(ChannelDispatcher):
     """Push messages to connected WebSocket sessions."""
 
     channel_name = "websocket"
+    supports_streaming = True
 
     def __init__(self) -> None:
         # Will hold reference to the WebSocket session registry once
@@ -36,8 +46,28 @@ class WebSocketDispatcher(ChannelDispatcher):
             response.recipient,
             response.message[:80] if response.message else "(empty)",
         )
+        frame: dict[str, Any] = {"type": "message", "message": response.message}
+        if response.stream is not None:
+            frame["stream_id"] = response.stream.stream_id
+        await self._push(response.recipient, frame)
         return DeliveryResult(
             success=True,
             channel=self.channel_name,
             recipient=response.recipient,
         )
+
+    async def send_chunks(self, stream: ResponseStream) -> None:
+        async for chunk in stream:
+            await self._push(
+                stream.recipient,
+                {"type": "stream_chunk", "stream_id": stream.stream_id, "text": chunk},
+            )
+
+    async def cancel_stream(self, stream: ResponseStream) -> None:
+        await self._push(
+            stream.recipient, {"type": "stream_cancel", "stream_id": stream.stream_id},
+        )
+
+    async def _push(self, recipient: str, frame: dict[str, Any]) -> None:
+        """Send one frame to the recipient's session (logged until Phase 2)."""
+        logger.debug("WebSocket frame → %s: %s", recipient, frame.get("type"))
@@ -0,0 +1,344 @@
+"""
+Event Journal — durable, replayable log behind PatientQueueManager.
+
+PatientQueueManager keeps events in in-process asyncio.Queues, so a
+restart used to lose every queued USER_MESSAGE.  With a journal,
+``enqueue`` appends the event here (flushed and fsynced) before it is
+acknowledged, and the patient's worker appends a commit marker once the
+event has been processed.  On startup every journaled event past its
+patient's committed offset is replayed, in order.
+
+Delivery is at-least-once: an event that was being processed when the
+process died runs again after restart (loop-back handoffs are part of
+that event's processing, so the whole chain re-runs from its root).
+
+Layout (one directory per process / shard):
+
+  seg-000000000001.log   JSON lines, one record per line:
+                           {"t": "e", "o": offset, "e": envelope}
+                           {"t": "c", "p": patient_id, "o": offset}
+  dead_letters.log       JSON lines of DLQ entries + replay markers
+  journal.lock           held (flock) while a process has the journal open
+
+Two processes appending to one directory would interleave segments and
+replay each other's events, so opening a directory another process
+holds raises JournalInUseError (setup gives each shard its own
+subdirectory).
+
+Offsets are global and increase monotonically.  Because each patient's
+events are processed FIFO, a single committed offset per patient is
+enough to know which of their events are done.  A new segment starts
+once the active one passes ``segment_max_bytes``; segments are deleted
+oldest-first once every event in them is committed.
+
+Only a local-disk implementation exists; a GCS-backed journal can
+implement the same EventJournal interface later.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from pathlib import Path
+from typing import Any
+
+from medforce.gateway.events import EventEnvelope
+
+try:
+    import fcntl
+except ImportError:  # Windows — no advisory locks, one process assumed
+    fcntl = None
+
+logger = logging.getLogger("gateway.event_journal")
+
+DEFAULT_SEGMENT_MAX_BYTES = 4 * 1024 * 1024
+
+# Dead letters loaded back into memory on startup
+DEAD_LETTER_LIMIT = 500
+
+
+class JournalInUseError(RuntimeError):
+    """Another process already has this journal directory open."""
+
+
+class EventJournal(ABC):
+    """Append-only event log with per-patient committed offsets."""
+
+    @abstractmethod
+    def append(self, event: EventEnvelope) -> int:
+        """Durably record an event; returns its offset."""
+
+    @abstractmethod
+    def commit(self, patient_id: str, offset: int) -> None:
+        """Mark a patient's events up to ``offset`` as processed."""
+
+    @abstractmethod
+    def pending(self) -> list[tuple[int, EventEnvelope]]:
+        """Uncommitted events in offset order."""
+
+    @abstractmethod
+    def record_dead_letter(self, entry: dict[str, Any], event: EventEnvelope) -> None:
+        """Persist a DLQ entry together with the full event."""
+
+    @abstractmethod
+    def dead_letters(self, limit: int = DEAD_LETTER_LIMIT) -> list[dict[str, Any]]:
+        """Most recent DLQ entries that have not been replayed."""
+
+    @abstractmethod
+    def dead_letter_event(self, event_id: str) -> EventEnvelope | None:
+        """The journaled event behind a DLQ entry, if still replayable."""
+
+    @abstractmethod
+    def mark_replayed(self, event_id: str) -> None:
+        """Record that a dead-lettered event was re-enqueued."""
+
+    def get_stats(self) -> dict[str, Any]:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+class SegmentFileJournal(EventJournal):
+    """
+    EventJournal on local disk, split into size-capped segment files.
+
+    Usage:
+        journal = SegmentFileJournal("output/event_journal")
+        offset = journal.append(event)     # before acknowledging
+        journal.commit(event.patient_id, offset)
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+        fsync: bool = True,
+    ) -> None:
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._lock_file = self._acquire_dir_lock()
+        self._segment_max_bytes = segment_max_bytes
+        self._fsync = fsync
+        self._lock = threading.Lock()
+
+        self._next_offset = 1
+        self._checkpoints: dict[str, int] = {}
+        # Uncommitted events: offset → event
+        self._uncommitted: dict[int, EventEnvelope] = {}
+        self._by_patient: dict[str, deque[int]] = {}
+        # Segment first offsets (sorted) and their uncommitted-event counts
+        self._segments: list[int] = []
+        self._live: dict[int, int] = {}
+        self._active = None  # open file handle of the newest segment
+        self._active_size = 0
+
+        # Dead letters: event_id → (entry, event json), insertion-ordered
+        self._dead: dict[str, tuple[dict[str, Any], dict[str, Any]]] = {}
+        self._dead_file = None
+
+        self._stats = {
+            "appended": 0, "committed": 0, "segments_deleted": 0,
+            "recovered_pending": 0, "dead_letters": 0,
+        }
+        self._recover()
+
+    # ── Events ──
+
+    def append(self, event: EventEnvelope) -> int:
+        with self._lock:
+            offset = self._next_offset
+            self._next_offset += 1
+            if self._active is None or self._active_size >= self._segment_max_bytes:
+                self._roll(offset)
+            self._write({"t": "e", "o": offset, "e": event.model_dump(mode="json")}, sync=True)
+            self._track(offset, event)
+            self._stats["appended"] += 1
+            return offset
+
+    def commit(self, patient_id: str, offset: int) -> None:
+        with self._lock:
+            if offset <= self._checkpoints.get(patient_id, 0):
+                return
+            self._checkpoints[patient_id] = offset
+            # A lost commit marker only means a replay — no fsync needed
+            self._write({"t": "c", "p": patient_id, "o": offset}, sync=False)
+            offsets = self._by_patient.get(patient_id)
+            while offsets and offsets[0] <= offset:
+                done = offsets.popleft()
+                del self._uncommitted[done]
+                self._live[self._segment_of(done)] -= 1
+            if not offsets:
+                self._by_patient.pop(patient_id, None)
+            self._stats["committed"] += 1
+            self._delete_finished_segments()
+
+    def pending(self) -> list[tuple[int, EventEnvelope]]:
+        with self._lock:
+            return sorted(self._uncommitted.items())
+
+    # ── Dead letters ──
+
+    def record_dead_letter(self, entry: dict[str, Any], event: EventEnvelope) -> None:
+        with self._lock:
+            raw = event.model_dump(mode="json")
+            self._dead[event.event_id] = (entry, raw)
+            if len(self._dead) > DEAD_LETTER_LIMIT:
+                del self._dead[next(iter(self._dead))]
+            self._append_dead({"entry": entry, "event": raw})
+            self._stats["dead_letters"] += 1
+
+    def dead_letters(self, limit: int = DEAD_LETTER_LIMIT) -> list[dict[str, Any]]:
+        with self._lock:
+            return [entry for entry, _ in list(self._dead.values())[-limit:]]
+
+    def dead_letter_event(self, event_id: str) -> EventEnvelope | None:
+        with self._lock:
+            found = self._dead.get(event_id)
+        return EventEnvelope.model_validate(found[1]) if found else None
+
+    def mark_replayed(self, event_id: str) -> None:
+        with self._lock:
+            if self._dead.pop(event_id, None) is not None:
+                self._append_dead({"replayed": event_id})
+
+    # ── Lifecycle ──
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "pending": len(self._uncommitted),
+                "segments": len(self._segments),
+                "next_offset": self._next_offset,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            for handle in (self._active, self._dead_file, self._lock_file):
+                if handle is not None:
+                    handle.close()  # closing the lock file releases the flock
+            self._active = self._dead_file = self._lock_file = None
+
+    # ── Internal ──
+
+    def _acquire_dir_lock(self):
+        handle = open(self._dir / "journal.lock", "a")
+        if fcntl is None:
+            return handle
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            raise JournalInUseError(
+                f"Event journal {self._dir} is already open in another process"
+            ) from None
+        return handle
+
+    def _segment_path(self, first_offset: int) -> Path:
+        return self._dir / f"seg-{first_offset:012d}.log"
+
+    def _segment_of(self, offset: int) -> int:
+        return self._segments[bisect.bisect_right(self._segments, offset) - 1]
+
+    def _track(self, offset: int, event: EventEnvelope) -> None:
+        self._uncommitted[offset] = event
+        self._by_patient.setdefault(event.patient_id, deque()).append(offset)
+        self._live[self._segment_of(offset)] += 1
+
+    def _roll(self, first_offset: int) -> None:
+        if self._active is not None:
+            self._active.close()
+        self._segments.append(first_offset)
+        self._live[first_offset] = 0
+        self._active = open(self._segment_path(first_offset), "ab")
+        self._active_size = 0
+
+    def _write(self, record: dict[str, Any], *, sync: bool) -> None:
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        self._active.write(line)
+        self._active.flush()
+        if sync and self._fsync:
+            os.fsync(self._active.fileno())
+        self._active_size += len(line)
+
+    def _append_dead(self, record: dict[str, Any]) -> None:
+        if self._dead_file is None:
+            self._dead_file = open(self._dir / "dead_letters.log", "ab")
+        self._dead_file.write((json.dumps(record, default=str) + "\n").encode())
+        self._dead_file.flush()
+        if self._fsync:
+            os.fsync(self._dead_file.fileno())
+
+    def _delete_finished_segments(self) -> None:
+        # Oldest first, never the active segment: a segment's commit
+        # markers may cover events in older segments, so it can only go
+        # once everything before it is gone.
+        while len(self._segments) > 1 and self._live[self._segments[0]] == 0:
+            first = self._segments.pop(0)
+            del self._live[first]
+            try:
+                self._segment_path(first).unlink()
+            except FileNotFoundError:
+                pass
+            self._stats["segments_deleted"] += 1
+
+    def _recover(self) -> None:
+        events: dict[int, EventEnvelope] = {}
+        segment_files = sorted(self._dir.glob("seg-*.log"))
+        for path in segment_files:
+            first = int(path.stem.split("-", 1)[1])
+            self._segments.append(first)
+            self._live[first] = 0
+            with open(path, "rb") as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn final line from a crash mid-write
+                        logger.warning("Skipping corrupt journal record in %s", path.name)
+                        continue
+                    if record["t"] == "e":
+                        events[record["o"]] = EventEnvelope.model_validate(record["e"])
+                        self._next_offset = max(self._next_offset, record["o"] + 1)
+                    elif record["o"] > self._checkpoints.get(record["p"], 0):
+                        self._checkpoints[record["p"]] = record["o"]
+
+        for offset, event in sorted(events.items()):
+            if offset > self._checkpoints.get(event.patient_id, 0):
+                self._track(offset, event)
+        self._stats["recovered_pending"] = len(self._uncommitted)
+
+        if self._segments:
+            self._active = open(self._segment_path(self._segments[-1]), "ab")
+            self._active_size = self._active.tell()
+        self._delete_finished_segments()
+
+        dead_path = self._dir / "dead_letters.log"
+        if dead_path.exists():
+            dead: dict[str, tuple[dict[str, Any], dict[str, Any]]] = {}
+            with open(dead_path, "rb") as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "replayed" in record:
+                        dead.pop(record["replayed"], None)
+                    else:
+                        dead[record["event"]["event_id"]] = (record["entry"], record["event"])
+            # Keep only the most recent ones in memory
+            recent = deque(dead.items(), maxlen=DEAD_LETTER_LIMIT)
+            self._dead = dict(recent)
+
+        if self._uncommitted:
+            logger.info(
+                "Event journal recovered %d unprocessed events across %d segments",
+                len(self._uncommitted), len(self._segments),
+            )
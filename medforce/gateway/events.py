@@ -51,6 +51,9 @@ class EventType(str, Enum):
     # Form-based intake
     INTAKE_FORM_SUBMITTED = "INTAKE_FORM_SUBMITTED"
 
+    # Outbox delivery outcomes
+    DELIVERY_RECEIPT = "DELIVERY_RECEIPT"
+
     # System events
     HEARTBEAT = "HEARTBEAT"
     AGENT_ERROR = "AGENT_ERROR"
@@ -85,6 +88,7 @@ EXPLICIT_ROUTE_EVENTS = {
     EventType.CROSS_PHASE_DATA,
     EventType.CROSS_PHASE_REPROMPT,
     EventType.INTAKE_FORM_SUBMITTED,
+    EventType.DELIVERY_RECEIPT,
 }
 
 # Events that the Gateway routes via Strategy B (diary phase lookup)
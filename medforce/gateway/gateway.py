@@ -15,11 +15,13 @@ from __future__ import annotations
 import asyncio
 import logging
 import time
+import uuid
 from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Awaitable, Callable
 
 from medforce.gateway.agents.base_agent import AgentResult, BaseAgent
+from medforce.gateway.cache import BoundedCache
 from medforce.gateway.channels import (
     AgentResponse,
     DispatcherRegistry,
@@ -27,18 +29,20 @@ from medforce.gateway.channels import (
 from medforce.gateway.diary import (
     ConversationEntry,
     CrossPhaseState,
-    DiaryConcurrencyError,
     DiaryNotFoundError,
     DiaryStore,
     PatientDiary,
     Phase,
 )
+from medforce.gateway.diary_writer import DiaryWriteBehind
 from medforce.gateway.events import (
     EventEnvelope,
     EventType,
     SenderRole,
 )
+from medforce.gateway.llm_gateway import get_llm_gateway
 from medforce.gateway.permissions import PermissionChecker, PermissionResult
+from medforce.gateway.phrases import PHRASES
 
 logger = logging.getLogger("gateway.core")
 
@@ -52,6 +56,37 @@ RATE_LIMIT_MAX_MESSAGES = 15  # max USER_MESSAGE events per window
 # P2: Input size limits
 MAX_MESSAGE_LENGTH = 10_000  # characters — truncate beyond this
 
+# Bounded per-patient state (LRU + TTL) — see cache.py
+DIARY_CACHE_MAX_ENTRIES = 2_000
+DIARY_CACHE_MAX_BYTES = 256 * 1024 * 1024  # approximate, see _approx_diary_bytes
+DIARY_CACHE_TTL_SECONDS = 3600
+PROCESSED_EVENTS_MAX_PATIENTS = 10_000
+PROCESSED_EVENTS_TTL_SECONDS = 24 * 3600
+
+
+def _approx_diary_bytes(entry: tuple[PatientDiary, int | None]) -> int:
+    """
+    Cheap estimate of a cached diary's in-memory footprint.
+
+    Walking the model with sys.getsizeof would cost as much as the deep
+    copies we are trying to bound, so count the variable-length parts
+    with per-item constants calibrated against pydantic objects.
+    """
+    diary = entry[0]
+    size = 6_000  # fixed sections, enums, datetimes
+    for conv in diary.conversation_log:
+        size += 400 + len(conv.message)
+    clinical = diary.clinical
+    for q in clinical.questions_asked:
+        size += 500 + len(q.question) + len(q.answer or "")
+    size += 800 * len(clinical.documents)
+    size += len(clinical.referral_narrative or "")
+    size += 120 * len(clinical.generated_questions)
+    size += 600 * len(diary.monitoring.entries)
+    size += 300 * len(diary.monitoring.communication_plan.questions)
+    size += 400 * len(diary.cross_phase_extractions)
+    return size
+
 
 class Gateway:
     """
@@ -97,6 +132,7 @@ class Gateway:
         EventType.HELPER_VERIFIED: "helper_manager",
         EventType.AGENT_ERROR: "error_handler",
         EventType.INTAKE_FORM_SUBMITTED: "intake",
+        EventType.DELIVERY_RECEIPT: "delivery_receipts",
     }
 
     # Strategy B: phase → agent name
@@ -114,21 +150,58 @@ class Gateway:
         diary_store: DiaryStore,
         dispatcher_registry: DispatcherRegistry,
         permission_checker: PermissionChecker | None = None,
+        diary_cache_max_entries: int = DIARY_CACHE_MAX_ENTRIES,
+        diary_cache_max_bytes: int | None = DIARY_CACHE_MAX_BYTES,
+        diary_cache_ttl_seconds: float | None = DIARY_CACHE_TTL_SECONDS,
+        event_journal: Any = None,
     ) -> None:
         self._diary_store = diary_store
+        self._event_journal = event_journal
         self._dispatchers = dispatcher_registry
         self._permissions = permission_checker or PermissionChecker()
         self._agents: dict[str, BaseAgent] = {}
         self._event_log: list[dict[str, Any]] = []  # in-memory event log for debugging
-        self._processed_events: dict[str, OrderedDict[str, bool]] = {}  # patient_id → {event_id: True}
-        # Per-patient diary cache — safe because events per patient are sequential
-        self._diary_cache: dict[str, tuple[PatientDiary, int]] = {}  # patient_id → (diary, generation)
+        # Idempotency window — patient_id → {event_id: True}
+        self._processed_events: BoundedCache[str, OrderedDict[str, bool]] = BoundedCache(
+            "processed_events",
+            max_entries=PROCESSED_EVENTS_MAX_PATIENTS,
+            ttl_seconds=PROCESSED_EVENTS_TTL_SECONDS,
+            sizeof=lambda seen: 120 * len(seen),
+        )
+        # Per-patient diary cache — safe because events per patient are sequential.
+        # patient_id → (diary, generation); evicting a dirty diary flushes its save.
+        self._diary_cache: BoundedCache[str, tuple[PatientDiary, int]] = BoundedCache(
+            "diary",
+            max_entries=diary_cache_max_entries,
+            max_bytes=diary_cache_max_bytes,
+            ttl_seconds=diary_cache_ttl_seconds,
+            sizeof=_approx_diary_bytes,
+            on_evict=self._on_diary_evicted,
+        )
         # Background tasks (fire-and-forget chat persistence etc.)
         self._bg_tasks: set[asyncio.Task] = set()
-        # P0: Per-patient rate limiting — patient_id → list of timestamps
-        self._rate_limiter: dict[str, list[float]] = {}
-        # P2: Dead Letter Queue — failed events stored for ops review
-        self._dead_letter_queue: list[dict[str, Any]] = []
+        # P0: Per-patient rate limiting — patient_id → list of timestamps.
+        # Entries older than the window carry no information, so they expire.
+        self._rate_limiter: BoundedCache[str, list[float]] = BoundedCache(
+            "rate_limiter",
+            max_entries=PROCESSED_EVENTS_MAX_PATIENTS,
+            ttl_seconds=RATE_LIMIT_WINDOW_SECONDS,
+            sizeof=lambda stamps: 64 + 32 * len(stamps),
+        )
+        # P2: Dead Letter Queue — failed events stored for ops review.
+        # With an event journal the DLQ is durable and survives restarts.
+        self._dead_letter_queue: list[dict[str, Any]] = (
+            event_journal.dead_letters() if event_journal is not None else []
+        )
+        # Write-behind persistence — one coalesced save per patient in flight
+        self._diary_writer = DiaryWriteBehind(
+            diary_store,
+            on_saved=self._on_diary_saved,
+            bg_tasks=self._bg_tasks,
+        )
+        # Called with (patient_id, diary snapshot) after every processed
+        # event — lets the heartbeat scheduler track deadlines without I/O
+        self._diary_observers: list[Callable[[str, PatientDiary], None]] = []
         # P2: Observability metrics
         self._metrics: dict[str, Any] = {
             "events_processed": 0,
@@ -150,6 +223,14 @@ class Gateway:
     def get_agent(self, name: str) -> BaseAgent | None:
         return self._agents.get(name)
 
+    def add_diary_observer(self, observer: Callable[[str, PatientDiary], None]) -> None:
+        """Register a callback run with each updated diary snapshot.
+
+        Observers run inline on the event path — they must be cheap and
+        must not mutate the snapshot.
+        """
+        self._diary_observers.append(observer)
+
     @property
     def registered_agents(self) -> list[str]:
         return list(self._agents.keys())
@@ -177,21 +258,26 @@ class Gateway:
             event.event_type.value, event.patient_id, chain_depth,
         )
 
-        # Idempotency guard — skip duplicate events per patient
+        # Idempotency guard — skip duplicate events per patient.  A
+        # micro-batched message carries the ids of every message merged
+        # into it; it is a duplicate only if all of them were seen.
         patient_seen = self._processed_events.setdefault(
             event.patient_id, OrderedDict()
         )
-        if event.event_id in patient_seen:
+        event_ids = event.payload.get("coalesced_event_ids") or [event.event_id]
+        if all(eid in patient_seen for eid in event_ids):
             logger.info(
                 "Duplicate event %s for patient %s — skipping",
                 event.event_id, event.patient_id,
             )
             self._log_event(event, "DUPLICATE", None)
             return None
-        patient_seen[event.event_id] = True
+        for eid in event_ids:
+            patient_seen[eid] = True
         # Cap at 100 per patient with FIFO eviction
         while len(patient_seen) > 100:
             patient_seen.popitem(last=False)
+        self._processed_events.resize(event.patient_id)
 
         # P0: Rate limiting for user messages (skip internal/agent events)
         if (
@@ -370,7 +456,10 @@ class Gateway:
 
         try:
             t1 = time.monotonic()
-            result = await agent.process(event, diary)
+            # Replies the agent streams start reaching streaming channels
+            # while it is still running (see ResponseStream in channels.py)
+            with self._dispatchers.streaming() as published_streams:
+                result = await agent.process(event, diary)
             elapsed = time.monotonic() - t1
             logger.info("  [timing] agent %s process: %.2fs", target_agent_name, elapsed)
 
@@ -394,6 +483,7 @@ class Gateway:
 
             # P2: Add to dead letter queue for ops replay
             self._add_to_dlq(event, target_agent_name, exc)
+            await self._dispatchers.release_streams(published_streams)
 
             error_response = AgentResponse(
                 recipient=event.sender_id or "patient",
@@ -447,16 +537,21 @@ class Gateway:
                 else "pre_consultation"
             )
         )
+        #    Outbox channels are delivered later; their entries start as
+        #    "queued" and a DELIVERY_RECEIPT updates them by message_id.
         for resp in result.responses:
             resp.metadata.setdefault("chat_channel", outbound_chat_channel)
-            result.updated_diary.add_conversation(
-                ConversationEntry(
-                    direction=f"AGENT→{resp.recipient.upper()}",
-                    channel=resp.channel,
-                    message=resp.message[:200] if resp.message else "",
-                    chat_channel=resp.metadata.get("chat_channel", outbound_chat_channel),
-                )
+            entry = ConversationEntry(
+                direction=f"AGENT→{resp.recipient.upper()}",
+                channel=resp.channel,
+                message=resp.message[:200] if resp.message else "",
+                chat_channel=resp.metadata.get("chat_channel", outbound_chat_channel),
             )
+            if self._dispatchers.queues(resp.channel):
+                resp.metadata.setdefault("patient_id", event.patient_id)
+                entry.message_id = resp.metadata.setdefault("message_id", uuid.uuid4().hex)
+                entry.delivery_status = "queued"
+            result.updated_diary.add_conversation(entry)
 
         # 6b. P0: Stamp phase_entered_at if the phase changed
         if result.updated_diary.header.current_phase != phase_before:
@@ -471,13 +566,22 @@ class Gateway:
         # 6c. Eagerly update the diary cache BEFORE dispatching responses.
         #      This ensures that any API consumer polling the diary after
         #      receiving a response sees the latest agent-updated state,
-        #      even while the GCS save (step 8) is still in flight.
-        #      The generation is stale until step 8 updates it, but the
+        #      even while the save (step 8) is still in flight.
+        #      The generation is stale until the save lands, but the
         #      per-patient queue guarantees no concurrent event uses it.
-        self._diary_cache[event.patient_id] = (
-            result.updated_diary.model_copy(deep=True),
-            generation,
+        #      The snapshot shares unchanged sections with the previous
+        #      cached one and is itself shared by the cache, the
+        #      write-behind saver and chat persistence — one copy per event.
+        previous = self._diary_cache.peek(event.patient_id)
+        snapshot = result.updated_diary.snapshot(
+            previous[0] if previous is not None else None
         )
+        self._diary_cache[event.patient_id] = (snapshot, generation)
+        for observer in self._diary_observers:
+            try:
+                observer(event.patient_id, snapshot)
+            except Exception as exc:
+                logger.warning("Diary observer failed for %s: %s", event.patient_id, exc)
 
         # 7. Dispatch responses IMMEDIATELY (before diary save) so patients
         #    don't wait for GCS round-trips.
@@ -491,82 +595,14 @@ class Gateway:
                         dr.channel,
                         dr.error,
                     )
+        if published_streams:
+            await self._dispatchers.release_streams(published_streams)
 
-        # 8. Cache diary immediately so reads return fresh data instantly,
-        #    then persist to GCS in background (fire-and-forget).
-        #    This eliminates the 30-90s GCS save blocking the response pipeline.
-        self._diary_cache[event.patient_id] = (
-            result.updated_diary.model_copy(deep=True),
-            generation,  # will be updated by background save
-        )
-
-        async def _save_diary_bg(pid, diary_copy, gen):
-            backoffs = [0.1, 0.3, 0.9]
-            for attempt in range(len(backoffs) + 1):
-                try:
-                    t2 = time.monotonic()
-                    new_gen = await asyncio.to_thread(
-                        self._diary_store.save, pid, diary_copy, gen,
-                    )
-                    logger.info("  [timing] diary save: %.2fs", time.monotonic() - t2)
-                    # Update ONLY the generation in the cache — the diary data
-                    # in the cache may already be newer (updated by a subsequent
-                    # event processed while this bg save was in flight).
-                    # Overwriting with diary_copy would revert to stale state.
-                    cached = self._diary_cache.get(pid)
-                    if cached is not None:
-                        self._diary_cache[pid] = (cached[0], new_gen)
-                    else:
-                        self._diary_cache[pid] = (diary_copy, new_gen)
-                    return
-                except DiaryConcurrencyError:
-                    # Do NOT clear the diary cache — it has the latest agent-
-                    # updated state which is MORE current than what's in GCS.
-                    # Clearing it causes the next event to load stale state
-                    # from GCS, leading to duplicate agent actions (e.g. booking
-                    # agent re-offering slots after the user already selected).
-                    if attempt < len(backoffs):
-                        logger.warning(
-                            "Diary concurrency conflict for patient %s (attempt %d) — retrying",
-                            pid, attempt + 1,
-                        )
-                        try:
-                            # Reload generation from GCS for the retry
-                            _, gen = await asyncio.to_thread(
-                                self._diary_store.load, pid
-                            )
-                        except Exception:
-                            pass
-                        await asyncio.sleep(backoffs[attempt])
-                    else:
-                        logger.error(
-                            "Diary save failed after %d retries for %s (concurrency)",
-                            len(backoffs), pid,
-                        )
-                        self._metrics["diary_save_failures"] += 1
-                except Exception as exc:
-                    if attempt < len(backoffs):
-                        logger.warning(
-                            "Diary save failed for %s (attempt %d): %s — retrying",
-                            pid, attempt + 1, exc,
-                        )
-                        await asyncio.sleep(backoffs[attempt])
-                    else:
-                        logger.error(
-                            "Failed to save diary for %s after %d retries: %s",
-                            pid, len(backoffs) + 1, exc,
-                        )
-                        self._metrics["diary_save_failures"] += 1
-
-        save_task = asyncio.create_task(
-            _save_diary_bg(
-                event.patient_id,
-                result.updated_diary.model_copy(deep=True),
-                generation,
-            )
-        )
-        self._bg_tasks.add(save_task)
-        save_task.add_done_callback(self._bg_tasks.discard)
+        # 8. Persist to the diary store in the background.  The write-behind
+        #    stage coalesces saves per patient, so a handoff chain only
+        #    uploads the diary once (at chain end).  This eliminates the
+        #    30-90s GCS save blocking the response pipeline.
+        self._diary_writer.schedule(event.patient_id, snapshot, generation)
 
         # 9. Persist chat history to patient_data in GCS
         #    Fire-and-forget so it doesn't block the patient queue.
@@ -581,7 +617,7 @@ class Gateway:
                         "Chat persistence failed for patient %s: %s", pid, exc,
                     )
             task = asyncio.create_task(
-                _persist_bg(event.patient_id, result.updated_diary)
+                _persist_bg(event.patient_id, snapshot)
             )
             self._bg_tasks.add(task)
             task.add_done_callback(self._bg_tasks.discard)
@@ -605,8 +641,65 @@ class Gateway:
             )
             await self.process_event(emitted)
 
+        # 11. End of the top-level chain — flush the coalesced diary save now
+        #     rather than waiting out the debounce.
+        if chain_depth == 0:
+            self._diary_writer.request_flush(event.patient_id)
+
         return result
 
+    # ── Diary Persistence ──
+
+    def _on_diary_saved(self, patient_id: str, generation: int) -> None:
+        """Write-behind callback — record the new generation in the cache.
+
+        Only the generation is updated: the cached diary may already be
+        newer than the one just written (a later event was processed
+        while the save was in flight).
+        """
+        cached = self._diary_cache.peek(patient_id)
+        if cached is not None:
+            self._diary_cache[patient_id] = (cached[0], generation)
+
+    def _on_diary_evicted(
+        self, patient_id: str, entry: tuple[PatientDiary, int], reason: str
+    ) -> None:
+        """Cache eviction hook — make sure a dirty diary reaches the store.
+
+        The write-behind stage holds its own snapshot of the pending diary,
+        so dropping the cached copy loses nothing as long as the save is
+        flushed now instead of after the debounce.
+        """
+        if self._diary_writer.has_pending(patient_id):
+            logger.info(
+                "Evicting dirty diary for patient %s (%s) — flushing save",
+                patient_id, reason,
+            )
+            self._diary_writer.request_flush(patient_id)
+
+    async def flush_pending_saves(self) -> None:
+        """Persist every pending diary and drain background tasks."""
+        await self._diary_writer.flush_all()
+        if self._bg_tasks:
+            await asyncio.gather(*list(self._bg_tasks), return_exceptions=True)
+
+    async def reset_patient(self, patient_id: str) -> bool:
+        """Delete a patient's diary and forget everything held in memory.
+
+        Pending and in-flight saves are settled first so none of them
+        can write the diary back after the delete.  Returns whether a
+        diary existed.
+        """
+        await self._diary_writer.cancel(patient_id)
+        self._diary_cache.pop(patient_id, None)
+        deleted = await asyncio.to_thread(self._diary_store.delete, patient_id)
+        self._processed_events.pop(patient_id, None)
+        self._rate_limiter.pop(patient_id, None)
+        self._event_log = [
+            e for e in self._event_log if e.get("patient_id") != patient_id
+        ]
+        return deleted
+
     # ── Routing Logic ──
 
     def _resolve_target(
@@ -646,22 +739,16 @@ class Gateway:
         Fast keyword matching to detect cross-phase content.
         Returns list of agent names that should ALSO receive this data.
         Excludes the current phase's agent (no self-routing).
-        """
-        text_lower = text.lower()
-        targets = []
 
-        # Check clinical keywords
+        The lists are sets in the shared phrase matcher, so this scan is
+        the one the receiving agents' own keyword checks reuse.
+        """
+        matched = PHRASES.scan(text)
         current_agent = self.PHASE_ROUTES.get(current_phase)
-        if current_agent != "clinical":
-            if any(kw in text_lower for kw in self.CLINICAL_KEYWORDS):
-                targets.append("clinical")
-
-        # Check intake keywords
-        if current_agent != "intake":
-            if any(kw in text_lower for kw in self.INTAKE_KEYWORDS):
-                targets.append("intake")
-
-        return targets
+        return [
+            agent for agent in ("clinical", "intake")
+            if f"gateway.{agent}" in matched and agent != current_agent
+        ]
 
     # ── Patient Data Persistence ──
 
@@ -675,6 +762,11 @@ class Gateway:
         """
         import json as _json
 
+        gcs = getattr(self._diary_store, "_gcs", None)
+        if gcs is None:
+            # Local diary backend (offline / benchmark) — no GCS side files
+            return
+
         def _build_conversation(entries):
             conversation = []
             for entry in entries:
@@ -696,7 +788,7 @@ class Gateway:
 
             # Always write pre-consultation chat
             pre_data = {"conversation": _build_conversation(pre_consult_entries)}
-            self._diary_store._gcs.create_file_from_string(
+            gcs.create_file_from_string(
                 _json.dumps(pre_data, indent=2),
                 f"patient_data/{patient_id}/pre_consultation_chat.json",
                 content_type="application/json",
@@ -705,7 +797,7 @@ class Gateway:
             # Write monitoring chat if there are any monitoring entries
             if monitoring_entries:
                 mon_data = {"conversation": _build_conversation(monitoring_entries)}
-                self._diary_store._gcs.create_file_from_string(
+                gcs.create_file_from_string(
                     _json.dumps(mon_data, indent=2),
                     f"patient_data/{patient_id}/monitoring_chat.json",
                     content_type="application/json",
@@ -730,6 +822,11 @@ class Gateway:
             logger.info("  diary cache hit for patient %s", event.patient_id)
             return diary.model_copy(deep=True), generation
 
+        # Cache miss while a save is still pending (entry was evicted) —
+        # land the save first so we don't read a stale diary back.
+        if self._diary_writer.has_pending(event.patient_id):
+            await self._diary_writer.flush(event.patient_id)
+
         try:
             t0 = time.monotonic()
             diary, generation = await asyncio.to_thread(
@@ -737,9 +834,7 @@ class Gateway:
             )
             logger.info("  [timing] diary load: %.2fs", time.monotonic() - t0)
             # Cache for subsequent loads
-            self._diary_cache[event.patient_id] = (
-                diary.model_copy(deep=True), generation,
-            )
+            self._diary_cache[event.patient_id] = (diary.snapshot(), generation)
             return diary, generation
         except DiaryNotFoundError:
             logger.info(
@@ -752,9 +847,7 @@ class Gateway:
                 event.patient_id, event.correlation_id
             )
             generation = None  # type: ignore[assignment]
-            self._diary_cache[event.patient_id] = (
-                diary.model_copy(deep=True), generation,
-            )
+            self._diary_cache[event.patient_id] = (diary.snapshot(), generation)
             return diary, generation
 
     def _check_permissions(
@@ -845,6 +938,11 @@ class Gateway:
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
         self._dead_letter_queue.append(entry)
+        if self._event_journal is not None:
+            try:
+                self._event_journal.record_dead_letter(entry, event)
+            except Exception as exc:
+                logger.error("Failed to journal DLQ entry %s: %s", event.event_id, exc)
         # Cap at 500 entries
         if len(self._dead_letter_queue) > 500:
             self._dead_letter_queue = self._dead_letter_queue[-250:]
@@ -854,11 +952,39 @@ class Gateway:
         """Retrieve dead letter queue entries for ops review."""
         return self._dead_letter_queue[-limit:]
 
-    def replay_dlq_event(self, index: int) -> dict[str, Any] | None:
-        """Get a DLQ entry by index for manual replay."""
-        if 0 <= index < len(self._dead_letter_queue):
-            return self._dead_letter_queue[index]
-        return None
+    async def replay_dlq_event(
+        self,
+        index: int,
+        enqueue: Callable[[EventEnvelope], Awaitable[Any]] | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Get a DLQ entry by index; with ``enqueue``, also re-submit it.
+
+        The original event (same event_id) is re-read from the event
+        journal, removed from the idempotency window so it isn't skipped
+        as a duplicate, and passed to ``enqueue`` — normally
+        PatientQueueManager.enqueue.  The entry leaves the DLQ.
+        """
+        if not 0 <= index < len(self._dead_letter_queue):
+            return None
+        entry = self._dead_letter_queue[index]
+        if enqueue is None:
+            return entry
+
+        if self._event_journal is None:
+            raise RuntimeError("DLQ replay needs an event journal")
+        event = self._event_journal.dead_letter_event(entry["event_id"])
+        if event is None:
+            raise KeyError(f"Event {entry['event_id']} is no longer in the journal")
+
+        seen = self._processed_events.get(event.patient_id)
+        if seen is not None:
+            seen.pop(event.event_id, None)
+        await enqueue(event)
+        self._event_journal.mark_replayed(event.event_id)
+        self._dead_letter_queue.pop(index)
+        logger.info("Replayed DLQ event %s for %s", event.event_id, event.patient_id)
+        return entry
 
     # ── P2: Observability & Metrics ──
 
@@ -876,7 +1002,26 @@ class Gateway:
                     "min_ms": round(min(times) * 1000, 1),
                 }
         metrics["agent_processing_summaries"] = summaries
+        diary_writes = self._diary_writer.get_metrics()
+        metrics["diary_writes"] = diary_writes
+        metrics["diary_save_failures"] = (
+            self._metrics["diary_save_failures"] + diary_writes["save_failures"]
+        )
+        store_stats = getattr(self._diary_store, "get_stats", None)
+        if store_stats is not None:
+            metrics["diary_store"] = store_stats()
         metrics["dlq_size"] = len(self._dead_letter_queue)
+        if self._event_journal is not None:
+            metrics["event_journal"] = self._event_journal.get_stats()
+        metrics["caches"] = {
+            cache.name: cache.stats()
+            for cache in (self._diary_cache, self._processed_events, self._rate_limiter)
+        }
+        metrics["cache_approx_bytes"] = sum(
+            c["approx_bytes"] for c in metrics["caches"].values()
+        )
+        metrics["llm"] = get_llm_gateway().get_metrics()
+        metrics["dispatch"] = self._dispatchers.get_metrics()
         return metrics
 
     def health_check(self) -> dict[str, Any]:
@@ -919,3 +1064,7 @@ class Gateway:
         timestamps.append(now)
         self._rate_limiter[patient_id] = timestamps
         return False
+
+
+PHRASES.register("gateway.clinical", Gateway.CLINICAL_KEYWORDS)
+PHRASES.register("gateway.intake", Gateway.INTAKE_KEYWORDS)
@@ -0,0 +1,61 @@
+"""
+Delivery Receipt Handler — records outbox delivery outcomes in the diary.
+
+Responses on outbox channels (SMS, email) are logged in the conversation
+log with delivery_status="queued" and a message_id when the agent that
+wrote them finishes.  Once the outbox has delivered or given up on them
+it emits a DELIVERY_RECEIPT event for the patient:
+
+    payload = {"receipts": [{"message_id": ..., "status": "delivered" | "failed",
+                             "error": ...}, ...]}
+
+Routing it through the per-patient queue means the status update is
+serialised with every other change to the diary.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from medforce.gateway.agents.base_agent import AgentResult, BaseAgent
+from medforce.gateway.diary import PatientDiary
+from medforce.gateway.events import EventEnvelope, EventType
+
+logger = logging.getLogger("gateway.handlers.delivery_receipts")
+
+
+class DeliveryReceiptHandler(BaseAgent):
+    """Sets ConversationEntry.delivery_status from outbox receipts."""
+
+    agent_name = "delivery_receipts"
+
+    async def process(
+        self, event: EventEnvelope, diary: PatientDiary
+    ) -> AgentResult:
+        if event.event_type != EventType.DELIVERY_RECEIPT:
+            logger.warning(
+                "DeliveryReceiptHandler received unexpected event: %s",
+                event.event_type.value,
+            )
+            return AgentResult(updated_diary=diary)
+
+        statuses = {
+            r["message_id"]: r.get("status", "delivered")
+            for r in event.payload.get("receipts", [])
+            if r.get("message_id")
+        }
+        # Newest entries first — receipts are for recent messages
+        for entry in reversed(diary.conversation_log):
+            if not statuses:
+                break
+            status = statuses.pop(entry.message_id, None) if entry.message_id else None
+            if status is not None:
+                entry.delivery_status = status
+
+        if statuses:
+            # Entry rotated out of the capped conversation log
+            logger.debug(
+                "No conversation entry for %d receipt(s) on patient %s",
+                len(statuses), event.patient_id,
+            )
+        return AgentResult(updated_diary=diary)
@@ -7,18 +7,34 @@ Resolution order:
   3. GP registry (email across all patient diaries)
   4. Unknown → reject
 
-Maintains an in-memory contact index rebuilt from GCS on startup and
-updated incrementally when helpers are added/removed.
+Maintains an in-memory contact index, with a reverse map patient_id →
+contact keys so updating or removing one patient only touches that
+patient's entries.  DiaryStore reports every save (observe_save), so
+the index follows new contacts, helpers and GPs as they are recorded.
+
+With an IdentityIndexLog store the index is persisted as a snapshot
+plus an incremental log next to the diaries, and ``load()`` reads it
+back at startup in O(index size) — see medforce.gateway.identity_index.
+Without one (or before the first snapshot exists) it is rebuilt from a
+diary scan.  A lookup miss re-reads entries other processes appended,
+at most once per ``refresh_interval`` seconds.
 """
 
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass, field
-from typing import Optional
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Iterable
+
+from medforce.gateway.identity_index import IdentityIndexLog
 
 logger = logging.getLogger("gateway.identity")
 
+# Minimum seconds between re-reads of the persisted log on a lookup miss
+DEFAULT_REFRESH_INTERVAL = 5.0
+
 
 @dataclass
 class IdentityRecord:
@@ -49,8 +65,24 @@ class IdentityResolver:
     for multiple patients.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        store: IdentityIndexLog | None = None,
+        *,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+    ) -> None:
         self._index: dict[str, list[IdentityRecord]] = {}
+        # patient_id → its (contact_key, record) entries, so replacing or
+        # removing one patient touches only that patient's keys
+        self._by_patient: dict[str, list[tuple[str, IdentityRecord]]] = {}
+        self._store = store
+        self._refresh_interval = refresh_interval
+        self._last_refresh = 0.0
+        self._lock = threading.RLock()
+        self._stats = {
+            "updates": 0, "unchanged": 0, "removals": 0, "rebuilds": 0,
+            "remote_patients": 0,
+        }
 
     # ── Public API ──
 
@@ -64,7 +96,7 @@ class IdentityResolver:
           - None if no match (unknown sender)
         """
         contact_key = self._normalise(contact)
-        records = self._index.get(contact_key)
+        records = self._lookup(contact_key)
 
         if not records:
             return None
@@ -77,7 +109,7 @@ class IdentityResolver:
     ) -> IdentityRecord | None:
         """Resolve contact in the context of a specific patient."""
         contact_key = self._normalise(contact)
-        records = self._index.get(contact_key, [])
+        records = self._lookup(contact_key) or []
         for r in records:
             if r.patient_id == patient_id:
                 return r
@@ -85,6 +117,36 @@ class IdentityResolver:
 
     # ── Index Management ──
 
+    def load(
+        self,
+        rebuild: Callable[[], Iterable[tuple[str, Any]]] | None = None,
+    ) -> int:
+        """
+        Fill the index at startup.  Returns the number of contacts indexed.
+
+        With a store this reads the persisted snapshot and log — no diary
+        is loaded.  If nothing was persisted yet, or there is no store,
+        the index is built once from ``rebuild()`` (yielding
+        (patient_id, diary) pairs) and, with a store, saved as the first
+        snapshot.
+        """
+        with self._lock:
+            patients = self._store.load() if self._store is not None else None
+            if patients is None:
+                if rebuild is None:
+                    return 0
+                return self._rebuild(rebuild())
+
+            self._clear()
+            for pid, rows in patients.items():
+                self._set_patient(pid, self._from_rows(rows))
+            self._last_refresh = time.monotonic()
+            logger.info(
+                "Identity index loaded: %d contacts across %d patients",
+                self.index_size, len(self._by_patient),
+            )
+            return self.index_size
+
     def rebuild_from_diaries(self, diaries: dict) -> int:
         """
         Rebuild the full contact index from all patient diaries.
@@ -94,111 +156,58 @@ class IdentityResolver:
 
         Returns: number of contacts indexed
         """
-        self._index.clear()
-        count = 0
-
-        for pid, diary in diaries.items():
-            # Index the patient themselves
-            for contact_field in ["phone", "email", "nhs_number"]:
-                value = getattr(diary.intake, contact_field, None)
-                if value:
-                    self._add_to_index(
-                        self._normalise(value),
-                        IdentityRecord(
-                            patient_id=pid,
-                            sender_id="PATIENT",
-                            sender_role="patient",
-                            name=diary.intake.name or "",
-                            permissions=["full_access"],
-                            channel=diary.intake.contact_preference,
-                        ),
-                    )
-                    count += 1
-
-            # Index helpers
-            for helper in diary.helper_registry.helpers:
-                if helper.contact:
-                    self._add_to_index(
-                        self._normalise(helper.contact),
-                        IdentityRecord(
-                            patient_id=pid,
-                            sender_id=helper.id,
-                            sender_role="helper",
-                            name=helper.name,
-                            relationship=helper.relationship,
-                            permissions=list(helper.permissions),
-                            channel=helper.channel,
-                        ),
-                    )
-                    count += 1
-
-            # Index GP
-            if diary.gp_channel.gp_email:
-                self._add_to_index(
-                    self._normalise(diary.gp_channel.gp_email),
-                    IdentityRecord(
-                        patient_id=pid,
-                        sender_id=f"GP-{diary.gp_channel.gp_name or 'unknown'}",
-                        sender_role="gp",
-                        name=diary.gp_channel.gp_name or "",
-                        permissions=["view_status", "upload_documents", "respond_to_queries"],
-                        channel="email",
-                    ),
-                )
-                count += 1
-
-        logger.info("Identity index rebuilt: %d contacts across %d patients",
-                     count, len(diaries))
-        return count
+        with self._lock:
+            return self._rebuild(diaries.items())
 
     def update_for_patient(self, patient_id: str, diary) -> None:
-        """Incrementally update the index for a single patient's diary."""
-        # Remove all existing entries for this patient
-        self._remove_patient(patient_id)
-
-        # Re-add from current diary
-        for contact_field in ["phone", "email", "nhs_number"]:
-            value = getattr(diary.intake, contact_field, None)
-            if value:
-                self._add_to_index(
-                    self._normalise(value),
-                    IdentityRecord(
-                        patient_id=patient_id,
-                        sender_id="PATIENT",
-                        sender_role="patient",
-                        name=diary.intake.name or "",
-                        permissions=["full_access"],
-                        channel=diary.intake.contact_preference,
-                    ),
-                )
+        """Incrementally update the index for a single patient's diary.
 
-        for helper in diary.helper_registry.helpers:
-            if helper.contact:
-                self._add_to_index(
-                    self._normalise(helper.contact),
-                    IdentityRecord(
-                        patient_id=patient_id,
-                        sender_id=helper.id,
-                        sender_role="helper",
-                        name=helper.name,
-                        relationship=helper.relationship,
-                        permissions=list(helper.permissions),
-                        channel=helper.channel,
-                    ),
-                )
-
-        if diary.gp_channel.gp_email:
-            self._add_to_index(
-                self._normalise(diary.gp_channel.gp_email),
-                IdentityRecord(
-                    patient_id=patient_id,
-                    sender_id=f"GP-{diary.gp_channel.gp_name or 'unknown'}",
-                    sender_role="gp",
-                    name=diary.gp_channel.gp_name or "",
-                    permissions=["view_status", "upload_documents", "respond_to_queries"],
-                    channel="email",
-                ),
-            )
+        Costs O(contacts of that patient); persisted only when the
+        patient's entries actually changed.
+        """
+        entries = self._records_for(patient_id, diary)
+        with self._lock:
+            if entries == self._by_patient.get(patient_id, []):
+                self._stats["unchanged"] += 1
+                return
+            self._stats["updates"] += 1
+            self._set_patient(patient_id, entries)
+            self._persist(patient_id, entries)
+
+    def remove_patient(self, patient_id: str) -> None:
+        """Drop every index entry for a patient (e.g. diary deleted)."""
+        with self._lock:
+            if patient_id not in self._by_patient:
+                return
+            self._stats["removals"] += 1
+            self._remove_patient(patient_id)
+            self._persist(patient_id, [])
+
+    def observe_save(self, patient_id: str, diary) -> None:
+        """DiaryStore save observer — *diary* is None when it was deleted."""
+        if diary is None:
+            self.remove_patient(patient_id)
+        else:
+            self.update_for_patient(patient_id, diary)
+
+    def refresh(self) -> None:
+        """Apply entries other processes persisted since we last looked."""
+        if self._store is None:
+            return
+        with self._lock:
+            self._last_refresh = time.monotonic()
+            self._apply_remote(*self._store.catch_up())
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats = {
+                **self._stats,
+                "patients": len(self._by_patient),
+                "contacts": self.unique_contacts,
+            }
+            if self._store is not None:
+                stats["store"] = self._store.get_stats()
+            return stats
 
     @property
     def index_size(self) -> int:
@@ -223,6 +232,149 @@ class IdentityResolver:
                 contact = "+44" + contact[1:]
         return contact
 
+    def _lookup(self, contact_key: str) -> list[IdentityRecord] | None:
+        records = self._index.get(contact_key)
+        if (
+            not records
+            and self._store is not None
+            and time.monotonic() - self._last_refresh >= self._refresh_interval
+        ):
+            # Unknown here — maybe another process just indexed it
+            try:
+                self.refresh()
+            except Exception as exc:
+                logger.warning("Identity index refresh failed: %s", exc)
+            records = self._index.get(contact_key)
+        return records
+
+    def _records_for(
+        self, patient_id: str, diary
+    ) -> list[tuple[str, IdentityRecord]]:
+        """Every (contact_key, record) a diary contributes, deduplicated."""
+        entries: list[tuple[str, IdentityRecord]] = []
+        seen: set[tuple[str, str]] = set()
+
+        def add(contact: str, record: IdentityRecord) -> None:
+            key = self._normalise(contact)
+            if (key, record.sender_id) not in seen:
+                seen.add((key, record.sender_id))
+                entries.append((key, record))
+
+        # Index the patient themselves
+        for contact_field in ["phone", "email", "nhs_number"]:
+            value = getattr(diary.intake, contact_field, None)
+            if value:
+                add(value, IdentityRecord(
+                    patient_id=patient_id,
+                    sender_id="PATIENT",
+                    sender_role="patient",
+                    name=diary.intake.name or "",
+                    permissions=["full_access"],
+                    channel=diary.intake.contact_preference,
+                ))
+
+        # Index helpers
+        for helper in diary.helper_registry.helpers:
+            if helper.contact:
+                add(helper.contact, IdentityRecord(
+                    patient_id=patient_id,
+                    sender_id=helper.id,
+                    sender_role="helper",
+                    name=helper.name,
+                    relationship=helper.relationship,
+                    permissions=list(helper.permissions),
+                    channel=helper.channel,
+                ))
+
+        # Index GP
+        if diary.gp_channel.gp_email:
+            add(diary.gp_channel.gp_email, IdentityRecord(
+                patient_id=patient_id,
+                sender_id=f"GP-{diary.gp_channel.gp_name or 'unknown'}",
+                sender_role="gp",
+                name=diary.gp_channel.gp_name or "",
+                permissions=["view_status", "upload_documents", "respond_to_queries"],
+                channel="email",
+            ))
+
+        return entries
+
+    def _rebuild(self, diaries: Iterable[tuple[str, Any]]) -> int:
+        self._clear()
+        for pid, diary in diaries:
+            self._set_patient(pid, self._records_for(pid, diary))
+        self._stats["rebuilds"] += 1
+        if self._store is not None:
+            self._store.compact(self._to_rows())
+        self._last_refresh = time.monotonic()
+        logger.info("Identity index rebuilt: %d contacts across %d patients",
+                    self.index_size, len(self._by_patient))
+        return self.index_size
+
+    def _persist(
+        self, patient_id: str, entries: list[tuple[str, IdentityRecord]]
+    ) -> None:
+        if self._store is None:
+            return
+        try:
+            remote, replace = self._store.append(
+                patient_id, self._entries_to_rows(entries),
+            )
+            if remote or replace:
+                self._apply_remote(remote, replace)
+                # Ours was appended after theirs
+                self._set_patient(patient_id, entries)
+            if self._store.compaction_due:
+                self._store.compact(self._to_rows())
+        except Exception as exc:
+            # The in-memory index is current — a lost entry costs a rebuild
+            logger.warning("Identity index persist failed for %s: %s", patient_id, exc)
+
+    def _apply_remote(
+        self, patients: dict[str, list[dict[str, Any]]], replace: bool = False,
+    ) -> None:
+        if replace:
+            self._clear()
+        for pid, rows in patients.items():
+            self._set_patient(pid, self._from_rows(rows))
+        self._stats["remote_patients"] += len(patients)
+
+    def _clear(self) -> None:
+        self._index.clear()
+        self._by_patient.clear()
+
+    def _set_patient(
+        self, patient_id: str, entries: list[tuple[str, IdentityRecord]]
+    ) -> None:
+        self._remove_patient(patient_id)
+        for key, record in entries:
+            self._add_to_index(key, record)
+        if entries:
+            self._by_patient[patient_id] = entries
+
+    # ── Serialization ──
+
+    @staticmethod
+    def _entries_to_rows(
+        entries: list[tuple[str, IdentityRecord]]
+    ) -> list[dict[str, Any]]:
+        return [{"key": key, **asdict(record)} for key, record in entries]
+
+    def _to_rows(self) -> dict[str, list[dict[str, Any]]]:
+        return {
+            pid: self._entries_to_rows(entries)
+            for pid, entries in self._by_patient.items()
+        }
+
+    @staticmethod
+    def _from_rows(rows: list[dict[str, Any]]) -> list[tuple[str, IdentityRecord]]:
+        entries = []
+        for row in rows:
+            row = dict(row)
+            key = row.pop("key")
+            entries.append((key, IdentityRecord(**row)))
+        return entries
+
     def _add_to_index(self, key: str, record: IdentityRecord) -> None:
         if key not in self._index:
             self._index[key] = []
@@ -234,11 +386,10 @@ class IdentityResolver:
         self._index[key].append(record)
 
     def _remove_patient(self, patient_id: str) -> None:
-        """Remove all index entries for a given patient."""
-        keys_to_clean = []
-        for key, records in self._index.items():
-            self._index[key] = [r for r in records if r.patient_id != patient_id]
-            if not self._index[key]:
-                keys_to_clean.append(key)
-        for key in keys_to_clean:
-            del self._index[key]
+        """Remove all index entries for a given patient — only its own keys."""
+        for key, _ in self._by_patient.pop(patient_id, []):
+            records = [r for r in self._index.get(key, []) if r.patient_id != patient_id]
+            if records:
+                self._index[key] = records
+            else:
+                self._index.pop(key, None)
@@ -8,13 +8,36 @@ Features:
   - GP reminder CRON: fires GP_REMINDER for pending queries >48h
   - Register/unregister patients dynamically
 
+Scheduling: instead of waking every CHECK_INTERVAL and loading every
+monitored diary, each patient has a single due time — the earliest of
+their next unfired milestone and next GP-reminder deadline — kept in a
+min-heap.  The loop sleeps until the earliest due time, so the work per
+wake-up is proportional to what is actually due.  Due times are
+recomputed from the diary whenever it is loaded here, and without any
+I/O from every diary the Gateway processes (``observe_diary``).
+Patients with nothing scheduled are re-checked at least every
+RECHECK_CEILING as a safety net.
+
+Due patients are checked concurrently, at most ``max_concurrency`` at a
+time, with diary loads off the event-loop thread.  When a
+PatientQueueManager is supplied, HEARTBEAT / GP_REMINDER events are
+enqueued on the patient's queue (serialised with their other events)
+instead of being processed inline.
+
+In a sharded deployment (see sharding.py) ``owns`` restricts startup
+recovery to the patients this shard owns, so each monitored patient
+gets exactly one scheduler.
+
 Scaling path: swap to Google Cloud Scheduler hitting /api/gateway/emit.
 """
 
 from __future__ import annotations
 
 import asyncio
+import heapq
+import itertools
 import logging
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Any, Callable, Awaitable
 
@@ -25,9 +48,18 @@ logger = logging.getLogger("gateway.heartbeat")
 # Milestone days when heartbeats should fire
 MILESTONE_DAYS = [14, 30, 60, 90]
 
-# How often the loop checks (in seconds)
+# Longest the loop sleeps without re-examining the heap (in seconds)
 CHECK_INTERVAL = 3600  # 1 hour
 
+# GP queries get a reminder once they are older than this
+GP_REMINDER_AFTER = timedelta(hours=48)
+
+# Upper bound between checks of a patient with no known deadline
+RECHECK_CEILING = 24 * 3600  # seconds
+
+# Default number of patients checked in parallel per tick
+DEFAULT_MAX_CONCURRENCY = 8
+
 
 class HeartbeatScheduler:
     """
@@ -49,14 +81,38 @@ class HeartbeatScheduler:
         processor: Callable[[EventEnvelope], Awaitable[Any]],
         diary_store: Any,
         check_interval: int = CHECK_INTERVAL,
+        queue_manager: Any = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        owns: Callable[[str], bool] | None = None,
     ) -> None:
         self._processor = processor
+        self._owns = owns
         self._diary_store = diary_store
         self._check_interval = check_interval
+        self._queue_manager = queue_manager
+        self._max_concurrency = max(1, max_concurrency)
         self._monitored: dict[str, dict[str, Any]] = {}
         self._task: asyncio.Task | None = None
         self._running = False
 
+        # Due-time min-heap: (due_ts, seq, patient_id).  Entries whose
+        # due_ts no longer matches _next_due are stale and skipped.
+        self._due_heap: list[tuple[float, int, str]] = []
+        self._next_due: dict[str, float] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._metrics: dict[str, Any] = {
+            "checks": 0,
+            "wakeups": 0,
+            "heartbeats_fired": 0,
+            "gp_reminders_fired": 0,
+            "ticks": 0,
+            "last_tick_ms": 0.0,
+            "max_tick_ms": 0.0,
+            "total_tick_ms": 0.0,
+            "last_tick_patients": 0,
+        }
+
     @property
     def monitored_patients(self) -> list[str]:
         """List of currently monitored patient IDs."""
@@ -92,25 +148,166 @@ class HeartbeatScheduler:
         logger.info("HeartbeatScheduler stopped")
 
     def register(self, patient_id: str, appointment_date: str | None = None) -> None:
-        """Register a patient for monitoring heartbeats."""
+        """Register a patient for monitoring heartbeats.
+
+        The patient is checked on the next loop pass; that check loads
+        the diary once and schedules its real deadlines.
+        """
         self._monitored[patient_id] = {
             "registered_at": datetime.now(timezone.utc),
             "appointment_date": appointment_date,
             "last_heartbeat": None,
         }
+        self._schedule(patient_id, time.time())
         logger.info("Registered patient %s for monitoring", patient_id)
 
     def unregister(self, patient_id: str) -> None:
         """Remove a patient from monitoring."""
         self._monitored.pop(patient_id, None)
+        self._next_due.pop(patient_id, None)  # heap entry becomes stale
         logger.info("Unregistered patient %s from monitoring", patient_id)
 
+    def observe_diary(self, patient_id: str, diary: Any) -> None:
+        """
+        Re-derive a patient's deadlines from a diary the caller already has.
+
+        Registered as a Gateway diary observer: patients entering
+        monitoring are picked up immediately, patients leaving it are
+        dropped, and new GP queries or fired milestones move the due
+        time — all without loading anything.
+        """
+        active = diary.monitoring.monitoring_active
+        if not active:
+            if patient_id in self._monitored:
+                self.unregister(patient_id)
+            return
+        if patient_id not in self._monitored:
+            self._monitored[patient_id] = {
+                "registered_at": datetime.now(timezone.utc),
+                "appointment_date": diary.monitoring.appointment_date,
+                "last_heartbeat": None,
+            }
+            logger.info("Registered patient %s for monitoring", patient_id)
+        else:
+            self._monitored[patient_id]["appointment_date"] = diary.monitoring.appointment_date
+        self._schedule(patient_id, self._deadline_for(patient_id, diary))
+
+    def next_due(self, patient_id: str) -> datetime | None:
+        """When the patient will next be checked (None if unscheduled)."""
+        due = self._next_due.get(patient_id)
+        return datetime.fromtimestamp(due, timezone.utc) if due is not None else None
+
+    def get_metrics(self) -> dict[str, Any]:
+        metrics = dict(self._metrics)
+        total = metrics.pop("total_tick_ms")
+        metrics["avg_tick_ms"] = round(total / metrics["ticks"], 1) if metrics["ticks"] else 0.0
+        metrics["max_concurrency"] = self._max_concurrency
+        metrics["monitored"] = len(self._monitored)
+        metrics["scheduled"] = len(self._next_due)
+        earliest = self._peek_due()
+        metrics["seconds_to_next_due"] = (
+            round(max(0.0, earliest - time.time()), 1) if earliest is not None else None
+        )
+        return metrics
+
+    # ── Scheduling ──
+
+    def _schedule(self, patient_id: str, due_ts: float) -> None:
+        previous = self._next_due.get(patient_id)
+        if previous == due_ts:
+            return
+        self._next_due[patient_id] = due_ts
+        heapq.heappush(self._due_heap, (due_ts, next(self._seq), patient_id))
+        earliest = self._peek_due()
+        if earliest is not None and due_ts <= earliest:
+            self._wakeup.set()  # new earliest deadline — re-arm the sleep
+
+    def _peek_due(self) -> float | None:
+        """Earliest live due time, discarding stale heap entries."""
+        heap = self._due_heap
+        while heap and self._next_due.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def _pop_due(self, now: float) -> list[str]:
+        """Pop every patient whose due time has passed."""
+        due = []
+        while True:
+            earliest = self._peek_due()
+            if earliest is None or earliest > now:
+                return due
+            _, _, pid = heapq.heappop(self._due_heap)
+            self._next_due.pop(pid, None)
+            due.append(pid)
+
+    def _deadline_for(self, patient_id: str, diary: Any) -> float:
+        deadline = self._next_deadline(diary)
+        info = self._monitored.get(patient_id) or {}
+        return max(deadline, info.get("cooldown_until", 0.0))
+
+    def _next_deadline(self, diary: Any) -> float:
+        """Earliest time anything could become due for this diary."""
+        now = time.time()
+        candidates = [now + RECHECK_CEILING]
+
+        appointment_date = diary.monitoring.appointment_date
+        if appointment_date:
+            try:
+                booked = datetime.strptime(appointment_date, "%Y-%m-%d")
+                booked = booked.replace(tzinfo=timezone.utc)
+            except (ValueError, TypeError):
+                booked = None
+            if booked is not None:
+                fired = {e.type for e in diary.monitoring.entries}
+                for milestone_day in MILESTONE_DAYS:
+                    if f"heartbeat_{milestone_day}d" not in fired:
+                        # _is_milestone_due fires the first unfired one
+                        due = booked + timedelta(days=milestone_day)
+                        candidates.append(due.timestamp())
+                        break
+
+        for query in diary.gp_channel.get_pending_queries():
+            if query.reminder_sent is not None:
+                continue
+            sent = query.sent
+            if isinstance(sent, str):
+                try:
+                    sent = datetime.fromisoformat(sent)
+                except (ValueError, TypeError):
+                    continue
+            if sent.tzinfo is None:
+                sent = sent.replace(tzinfo=timezone.utc)
+            # Strictly more than 48h, matching _check_patient
+            candidates.append((sent + GP_REMINDER_AFTER).timestamp() + 1)
+
+        return max(now, min(candidates))
+
     # ── Internal ──
 
     async def _recover_on_startup(self) -> None:
         """Scan GCS for patients with monitoring_active=True."""
+        # The patient index already carries appointment dates — one blob
+        # read instead of listing and loading every monitored diary.
+        list_entries = getattr(self._diary_store, "list_monitoring_entries", None)
+        if list_entries is not None:
+            try:
+                entries = await asyncio.to_thread(list_entries)
+                entries = [e for e in entries if self._is_owned(e.patient_id)]
+                for entry in entries:
+                    self.register(entry.patient_id, entry.appointment_date)
+                logger.info(
+                    "Recovered %d monitored patients on startup (index)",
+                    len(entries),
+                )
+                return
+            except Exception as exc:
+                logger.warning("Index recovery failed, scanning diaries: %s", exc)
+
         try:
-            patient_ids = self._diary_store.list_monitoring_patients()
+            patient_ids = [
+                pid for pid in self._diary_store.list_monitoring_patients()
+                if self._is_owned(pid)
+            ]
             for pid in patient_ids:
                 try:
                     diary, _ = self._diary_store.load(pid)
@@ -126,39 +323,94 @@ class HeartbeatScheduler:
         except Exception as exc:
             logger.error("Monitoring recovery failed: %s", exc)
 
+    def _is_owned(self, patient_id: str) -> bool:
+        return self._owns is None or self._owns(patient_id)
+
     async def _heartbeat_loop(self) -> None:
-        """Main loop — fires heartbeats and GP reminders periodically."""
+        """Main loop — sleeps until the earliest deadline, then checks what is due."""
         while self._running:
             try:
-                await asyncio.sleep(self._check_interval)
+                earliest = self._peek_due()
+                timeout = self._check_interval
+                if earliest is not None:
+                    timeout = min(timeout, max(0.0, earliest - time.time()))
+                self._wakeup.clear()
+                if timeout > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                        continue  # schedule changed — recompute the sleep
+                    except asyncio.TimeoutError:
+                        pass
                 if not self._running:
                     break
 
-                await self._check_all_patients()
+                self._metrics["wakeups"] += 1
+                await self._check_due_patients()
 
             except asyncio.CancelledError:
                 break
             except Exception as exc:
                 logger.error("Heartbeat loop error: %s", exc, exc_info=True)
 
+    async def _check_due_patients(self) -> None:
+        """Check only the patients whose deadline has passed."""
+        due = [pid for pid in self._pop_due(time.time()) if pid in self._monitored]
+        await self._run_tick(due)
+
     async def _check_all_patients(self) -> None:
-        """Check all monitored patients for milestones and GP reminders."""
+        """Check all monitored patients for milestones and GP reminders.
+
+        Full sweep — the loop itself only checks due patients.
+        """
         # Snapshot the keys to avoid mutation during iteration
-        patient_ids = list(self._monitored.keys())
+        await self._run_tick(list(self._monitored.keys()))
 
-        for pid in patient_ids:
-            try:
-                await self._check_patient(pid)
-            except Exception as exc:
-                logger.warning(
-                    "Error checking patient %s: %s", pid, exc
-                )
+    async def _run_tick(self, patient_ids: list[str]) -> None:
+        """Check patients with at most max_concurrency in flight."""
+        if not patient_ids:
+            return
+        t0 = time.monotonic()
+        pending = iter(patient_ids)
+
+        async def worker() -> None:
+            for pid in pending:  # shared iterator — each pid taken once
+                try:
+                    await self._check_patient(pid)
+                except Exception as exc:
+                    logger.warning(
+                        "Error checking patient %s: %s", pid, exc
+                    )
+
+        workers = min(self._max_concurrency, len(patient_ids))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+        elapsed_ms = (time.monotonic() - t0) * 1000
+        self._metrics["ticks"] += 1
+        self._metrics["last_tick_ms"] = round(elapsed_ms, 1)
+        self._metrics["max_tick_ms"] = round(max(self._metrics["max_tick_ms"], elapsed_ms), 1)
+        self._metrics["total_tick_ms"] += elapsed_ms
+        self._metrics["last_tick_patients"] = len(patient_ids)
+        logger.info(
+            "Heartbeat tick: %d patients in %.0fms (concurrency=%d)",
+            len(patient_ids), elapsed_ms, workers,
+        )
+
+    async def _emit(self, event: EventEnvelope) -> None:
+        """Hand an event to the patient's queue, or process it inline."""
+        if self._queue_manager is not None:
+            await self._queue_manager.enqueue(event)
+        else:
+            await self._processor(event)
 
     async def _check_patient(self, patient_id: str) -> None:
         """Check a single patient for milestone heartbeats and GP reminders."""
+        self._metrics["checks"] += 1
         try:
-            diary, _ = self._diary_store.load(patient_id)
+            diary, _ = await asyncio.to_thread(self._diary_store.load, patient_id)
         except Exception:
+            # Try again later rather than dropping the patient
+            if patient_id in self._monitored:
+                self._schedule(patient_id, time.time() + self._check_interval)
             return
 
         # Skip if monitoring is no longer active
@@ -166,6 +418,8 @@ class HeartbeatScheduler:
             self.unregister(patient_id)
             return
 
+        fired = False
+
         # Check milestone
         appointment_date = diary.monitoring.appointment_date
         if appointment_date:
@@ -179,7 +433,9 @@ class HeartbeatScheduler:
                     milestone=milestone,
                 )
                 try:
-                    await self._processor(event)
+                    await self._emit(event)
+                    self._metrics["heartbeats_fired"] += 1
+                    fired = True
                     info = self._monitored.get(patient_id)
                     if info:
                         info["last_heartbeat"] = datetime.now(timezone.utc)
@@ -201,13 +457,30 @@ class HeartbeatScheduler:
                         payload={"channel": "websocket"},
                     )
                     try:
-                        await self._processor(event)
+                        await self._emit(event)
+                        self._metrics["gp_reminders_fired"] += 1
+                        fired = True
                     except Exception as exc:
                         logger.warning(
                             "Failed to send GP reminder for %s: %s",
                             patient_id, exc,
                         )
 
+        info = self._monitored.get(patient_id)
+        if info is None:
+            return
+        if fired:
+            # Don't re-fire sooner than check_interval even if the agent
+            # didn't record the milestone/reminder (old polling cadence).
+            info["cooldown_until"] = time.time() + self._check_interval
+            if patient_id in self._next_due:
+                # observe_diary already rescheduled from the updated diary
+                self._schedule(patient_id, max(
+                    self._next_due[patient_id], info["cooldown_until"],
+                ))
+                return
+        self._schedule(patient_id, self._deadline_for(patient_id, diary))
+
     def _is_milestone_due(self, days_since: int, diary: Any) -> str:
         """Check if a milestone heartbeat should fire."""
         for milestone_day in MILESTONE_DAYS:
@@ -0,0 +1,299 @@
+"""
+Identity Index Log — persisted snapshot + entry log for IdentityResolver.
+
+The resolver's contact index (phone / email / NHS number → patient,
+role, permissions) used to live only in memory, and the only way to
+fill it was ``rebuild_from_diaries`` over every loaded diary — so after
+a restart inbound SMS and email senders resolved to nobody.  This log
+keeps the index next to the diaries so startup reads it back in
+O(index size):
+
+  patient_diaries/_identity/snapshot.json       every patient's rows, tagged "seq": S
+  patient_diaries/_identity/log/0000000042.json  one patient's new rows (S < 42)
+
+Each log entry replaces all rows of one patient (an empty list removes
+the patient), so replaying the log over the snapshot in sequence order
+gives the current index.  Entries are written create-only: two
+processes appending the same sequence number get DiaryConcurrencyError,
+and the loser reads the winner's entries, hands them back to the
+resolver and retries at the next number.  Every ``compact_every``
+entries the full index is written back to snapshot.json (generation-
+matched against the snapshot we read) and the folded entries deleted,
+all but the newest — a process that has fallen behind then finds a gap
+before it and reloads the snapshot instead of missing entries.
+
+Because compaction deletes entries, a lagging writer's create-only
+write can also "succeed" at a number a snapshot already covers, where
+loaders would never look.  So after each append the snapshot's seq is
+re-read: an entry at or below it is deleted, the index reloaded and
+the append retried past it.  The same read keeps the snapshot
+generation current for our next compaction.
+
+If neither the snapshot nor any entry exists yet (first run after
+upgrade), ``load`` returns None and the resolver rebuilds the index
+once from a diary scan.
+
+Not thread-safe on its own — IdentityResolver calls it under its lock.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Any
+
+from medforce.gateway.diary import DiaryConcurrencyError, DiaryNotFoundError
+
+logger = logging.getLogger("gateway.identity_index")
+
+INDEX_FORMAT_VERSION = 1
+
+DEFAULT_PREFIX = "patient_diaries/_identity"
+
+# Fold log entries into a fresh snapshot after this many
+DEFAULT_COMPACT_EVERY = 200
+
+# Catch-up-and-retry attempts when another process took our sequence number
+MAX_APPEND_ATTEMPTS = 5
+
+# Re-reads when an entry we listed was compacted away before we read it
+MAX_LOAD_ATTEMPTS = 3
+
+_SEQ_WIDTH = 10
+
+# patient_id → that patient's rows ({"key": contact, **IdentityRecord fields})
+Rows = dict[str, list[dict[str, Any]]]
+
+
+class _EntryVanished(Exception):
+    """A log entry listed during a read was compacted away before we read it."""
+
+
+class IdentityIndexLog:
+    """
+    Snapshot + create-only entry log over any DiaryBackend.
+
+    Usage:
+        log = IdentityIndexLog(backend)
+        patients = log.load()                  # None → never persisted
+        remote, replace = log.append(pid, rows)  # other writers' entries
+        if log.compaction_due:
+            log.compact(all_rows)
+    """
+
+    def __init__(
+        self,
+        backend,
+        prefix: str = DEFAULT_PREFIX,
+        *,
+        compact_every: int = DEFAULT_COMPACT_EVERY,
+    ) -> None:
+        self._backend = backend
+        self._prefix = prefix.rstrip("/")
+        self._compact_every = max(1, compact_every)
+        self._seq = 0                  # newest entry applied
+        self._snapshot_seq = 0         # entries ≤ this are in the snapshot
+        self._snapshot_generation = 0  # 0 → no snapshot yet
+        self._stats = {
+            "appends": 0, "append_conflicts": 0, "replayed": 0,
+            "remote_entries": 0, "compactions": 0,
+        }
+
+    @classmethod
+    def from_env(cls, backend) -> "IdentityIndexLog | None":
+        """IDENTITY_INDEX=0 keeps the index in memory only;
+        IDENTITY_INDEX_COMPACT_EVERY sets the snapshot interval."""
+        if os.getenv("IDENTITY_INDEX", "1").lower() in ("0", "false", "no"):
+            return None
+        compact_every = int(
+            os.getenv("IDENTITY_INDEX_COMPACT_EVERY", str(DEFAULT_COMPACT_EVERY))
+        )
+        return cls(backend, compact_every=compact_every)
+
+    # ── Keys ──
+
+    @property
+    def _snapshot_key(self) -> str:
+        return f"{self._prefix}/snapshot.json"
+
+    @property
+    def _log_prefix(self) -> str:
+        return f"{self._prefix}/log"
+
+    def _entry_key(self, seq: int) -> str:
+        return f"{self._log_prefix}/{seq:0{_SEQ_WIDTH}d}.json"
+
+    def _entry_seqs(self) -> list[int]:
+        seqs = []
+        for name in self._backend.list_children(self._log_prefix):
+            stem = name[:-5] if name.endswith(".json") else ""
+            if stem.isdigit():
+                seqs.append(int(stem))
+        return sorted(seqs)
+
+    def _snapshot_info(self) -> tuple[int, int]:
+        """(seq, backend generation) of snapshot.json — (0, 0) if absent."""
+        try:
+            content, generation = self._backend.read(self._snapshot_key)
+        except DiaryNotFoundError:
+            return 0, 0
+        return int(json.loads(content).get("seq", 0)), generation
+
+    # ── Reads ──
+
+    def load(self) -> Rows | None:
+        """The full persisted index, or None if nothing was ever written."""
+        for _ in range(MAX_LOAD_ATTEMPTS):
+            try:
+                return self._load_once()
+            except _EntryVanished:
+                continue
+        return self._load_once()
+
+    def _load_once(self) -> Rows | None:
+        try:
+            content, generation = self._backend.read(self._snapshot_key)
+        except DiaryNotFoundError:
+            data, generation = None, 0
+        else:
+            data = json.loads(content)
+
+        patients: Rows = dict(data.get("patients", {})) if data else {}
+        self._snapshot_seq = int(data.get("seq", 0)) if data else 0
+        self._snapshot_generation = generation
+        self._seq = self._snapshot_seq
+
+        entries = self._read_entries_after(self._snapshot_seq)
+        if data is None and not entries:
+            return None
+        self._stats["replayed"] += len(entries)
+        patients.update(entries)
+        return {pid: rows for pid, rows in patients.items() if rows}
+
+    def catch_up(self) -> tuple[Rows, bool]:
+        """Entries other processes appended since our last read or write.
+
+        Returns (patients, replace).  If some of those entries were
+        already compacted into a newer snapshot, the whole index is
+        re-read and ``replace`` is True: *patients* is then the complete
+        index, not a set of changes.
+        """
+        try:
+            entries = self._read_entries_after(self._seq)
+        except _EntryVanished:
+            previous = self._seq
+            patients = self.load() or {}
+            logger.info(
+                "Identity index compacted past seq %d elsewhere — reloaded", previous,
+            )
+            return patients, True
+        self._stats["remote_entries"] += len(entries)
+        return entries, False
+
+    def _read_entries_after(self, seq: int) -> Rows:
+        entries: Rows = {}
+        for entry_seq in self._entry_seqs():
+            if entry_seq <= seq:
+                continue
+            if entry_seq != seq + 1:
+                # Only compaction leaves gaps: ours is older than the snapshot
+                raise _EntryVanished(seq + 1)
+            seq = entry_seq
+            try:
+                content, _ = self._backend.read(self._entry_key(entry_seq))
+            except DiaryNotFoundError:
+                raise _EntryVanished(entry_seq) from None
+            entry = json.loads(content)
+            entries[entry["patient_id"]] = entry.get("records", [])
+            self._seq = entry_seq
+        return entries
+
+    # ── Writes ──
+
+    def append(
+        self, patient_id: str, rows: list[dict[str, Any]]
+    ) -> tuple[Rows, bool]:
+        """
+        Persist *rows* as the patient's current rows ([] removes them).
+
+        Returns what other processes appended first, as ``catch_up``
+        does, for the caller to apply underneath its own change.
+        """
+        remote: Rows = {}
+        replace = False
+        for _ in range(MAX_APPEND_ATTEMPTS):
+            seq = self._seq + 1
+            content = json.dumps({"seq": seq, "patient_id": patient_id, "records": rows})
+            try:
+                # Create-only: a concurrent writer at the same seq loses
+                self._backend.write(self._entry_key(seq), content, 0)
+            except DiaryConcurrencyError:
+                self._stats["append_conflicts"] += 1
+                patients, reloaded = self.catch_up()
+                if reloaded:
+                    remote, replace = dict(patients), True
+                else:
+                    remote.update(patients)
+                continue
+            # A compaction elsewhere may have folded past this seq and
+            # deleted its entry before our create landed — such an entry
+            # is invisible to loaders, so drop it, reload and go again
+            snapshot_seq, generation = self._snapshot_info()
+            if snapshot_seq >= seq:
+                self._backend.delete(self._entry_key(seq))
+                self._stats["append_conflicts"] += 1
+                remote, replace = self.load() or {}, True
+                continue
+            self._snapshot_seq, self._snapshot_generation = snapshot_seq, generation
+            self._seq = seq
+            self._stats["appends"] += 1
+            return remote, replace
+        logger.warning(
+            "Identity index append for %s still conflicting after %d attempts — "
+            "keeping in-memory update only", patient_id, MAX_APPEND_ATTEMPTS,
+        )
+        return remote, replace
+
+    @property
+    def compaction_due(self) -> bool:
+        return self._seq - self._snapshot_seq >= self._compact_every
+
+    def compact(self, patients: Rows) -> bool:
+        """Write *patients* (the index as of our newest seq) as the snapshot."""
+        seq = self._seq
+        content = json.dumps({
+            "version": INDEX_FORMAT_VERSION,
+            "seq": seq,
+            "patients": dict(sorted(patients.items())),
+        })
+        try:
+            generation = self._backend.write(
+                self._snapshot_key, content, self._snapshot_generation,
+            )
+        except DiaryConcurrencyError:
+            # Someone else compacted since we read — their snapshot wins.
+            # Track it, so the next compaction matches its generation.
+            self._snapshot_seq, self._snapshot_generation = self._snapshot_info()
+            logger.info("Skipping identity index compaction — snapshot moved")
+            return False
+
+        # Keep the newest folded entry: a reader further behind then sees
+        # a gap before it and knows to reload the snapshot
+        for entry_seq in self._entry_seqs():
+            if entry_seq < seq:
+                self._backend.delete(self._entry_key(entry_seq))
+        self._snapshot_seq = seq
+        self._snapshot_generation = generation
+        self._stats["compactions"] += 1
+        logger.info(
+            "Compacted identity index at seq %d (%d patients)", seq, len(patients),
+        )
+        return True
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            **self._stats,
+            "seq": self._seq,
+            "snapshot_seq": self._snapshot_seq,
+        }
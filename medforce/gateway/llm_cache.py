@@ -0,0 +1,225 @@
+"""
+LLM Response Cache — content-addressed cache for deterministic prompts.
+
+Many prompts are pure functions of their inputs (referral PDF analysis,
+field extraction over a message, monitoring questions for a risk level
+and condition, dashboard generators over an unchanged
+parsed_raw_data.json).  Callers that know a prompt is deterministic pass
+``cache=True`` to ``LLMGateway.generate`` / ``llm_generate`` and repeated
+calls are answered from here instead of the model.
+
+Key: sha256 over the model, the prompt text, a hash of every attachment
+(inline bytes such as a PDF part) and the generation config.
+
+Tiers:
+  memory  BoundedCache (LRU + TTL), always on when the cache is enabled
+  disk    one JSON file per key under LLM_CACHE_DIR, same TTL; survives
+          restarts so re-running scenario loads and test suites hits it
+
+Only response text is stored.  A hit returns a ``CachedResponse`` with a
+``.text`` attribute, which is all the callers read.
+
+Configuration:
+  LLM_CACHE          "1" enables the memory tier
+  LLM_CACHE_DIR      enables the disk tier (implies LLM_CACHE=1)
+  LLM_CACHE_ENTRIES  memory tier size (default 2000)
+  LLM_CACHE_TTL      seconds an entry stays valid (default 86400)
+  LLM_CACHE_BYPASS   "1" skips lookups (fresh responses still refresh
+                     the cache); per call, pass ``bypass_cache=True``
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Callable
+
+from medforce.gateway.cache import BoundedCache
+
+logger = logging.getLogger("gateway.llm_cache")
+
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_TTL_SECONDS = 24 * 3600.0
+
+
+class CachedResponse:
+    """Minimal stand-in for an SDK response served from the cache."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    # No tokens were spent on a cache hit
+    usage_metadata = None
+
+
+def _attachment_bytes(part: Any) -> bytes | None:
+    """Raw bytes of an inline attachment (genai Part / Blob), if any."""
+    if isinstance(part, (bytes, bytearray)):
+        return bytes(part)
+    inline = getattr(part, "inline_data", None)
+    data = getattr(inline, "data", None)
+    if isinstance(data, (bytes, bytearray)):
+        mime = getattr(inline, "mime_type", "") or ""
+        return mime.encode() + b"\0" + bytes(data)
+    return None
+
+
+def _config_fingerprint(config: Any) -> str:
+    if config is None:
+        return ""
+    dump = getattr(config, "model_dump_json", None)
+    if callable(dump):
+        return dump(exclude_none=True)
+    return repr(config)
+
+
+def cache_key(model: str, contents: Any, config: Any = None) -> str:
+    """sha256 key over (model, prompt hash, attachment hashes, config)."""
+    parts = contents if isinstance(contents, (list, tuple)) else [contents]
+    prompt = hashlib.sha256()
+    attachments: list[str] = []
+    for part in parts:
+        blob = _attachment_bytes(part)
+        if blob is not None:
+            attachments.append(hashlib.sha256(blob).hexdigest())
+            continue
+        text = getattr(part, "text", None)
+        prompt.update((part if isinstance(part, str) else str(text or repr(part))).encode())
+        prompt.update(b"\0")
+    key = hashlib.sha256()
+    for piece in (model, prompt.hexdigest(), *attachments, _config_fingerprint(config)):
+        key.update(piece.encode())
+        key.update(b"\0")
+    return key.hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier (memory, optional disk) cache of LLM response text."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        disk_dir: str | None = None,
+        bypass: bool = False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._ttl = ttl_seconds
+        self._disk_dir = disk_dir
+        self._bypass = bypass
+        self._clock = clock
+        self._memory: BoundedCache[str, str] = BoundedCache(
+            "llm_responses",
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            sizeof=len,
+            clock=clock,
+        )
+        self._stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+        }
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCache | None":
+        disk_dir = os.getenv("LLM_CACHE_DIR") or None
+        if os.getenv("LLM_CACHE", "0") != "1" and not disk_dir:
+            return None
+        cache = cls(
+            max_entries=int(os.getenv("LLM_CACHE_ENTRIES", str(DEFAULT_MAX_ENTRIES))),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL", str(DEFAULT_TTL_SECONDS))),
+            disk_dir=disk_dir,
+            bypass=os.getenv("LLM_CACHE_BYPASS", "0") == "1",
+        )
+        logger.info("LLM response cache enabled (disk tier: %s)", disk_dir or "off")
+        return cache
+
+    # ── Lookup / store ──
+
+    async def get(self, key: str, *, bypass: bool = False) -> str | None:
+        """Cached text for *key*, or None on a miss or when bypassed."""
+        if bypass or self._bypass:
+            self._stats["bypassed"] += 1
+            return None
+        text = self._memory.get(key)
+        if text is not None:
+            self._stats["hits"] += 1
+            return text
+        if self._disk_dir:
+            text = await asyncio.to_thread(self._read_disk, key)
+            if text is not None:
+                self._stats["disk_hits"] += 1
+                self._memory[key] = text
+                return text
+        self._stats["misses"] += 1
+        return None
+
+    async def put(self, key: str, model: str, text: str) -> None:
+        self._memory[key] = text
+        self._stats["stores"] += 1
+        if self._disk_dir:
+            await asyncio.to_thread(self._write_disk, key, model, text)
+
+    def clear(self) -> None:
+        """Drop the memory tier (the disk tier is left for the next run)."""
+        for key in list(self._memory.keys()):
+            self._memory.pop(key, None)
+
+    # ── Disk tier ──
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Unreadable LLM cache entry %s: %s", path, exc)
+            return None
+        if self._clock() - entry.get("created_at", 0) > self._ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry.get("text")
+
+    def _write_disk(self, key: str, model: str, text: str) -> None:
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"model": model, "created_at": self._clock(), "text": text}, f)
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning("Failed to write LLM cache entry %s: %s", path, exc)
+
+    # ── Metrics ──
+
+    def stats(self) -> dict[str, Any]:
+        stats = dict(self._stats)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (
+            round((stats["hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+        )
+        stats["entries"] = len(self._memory)
+        stats["approx_bytes"] = self._memory.stats()["approx_bytes"]
+        stats["disk_tier"] = bool(self._disk_dir)
+        return stats
@@ -0,0 +1,418 @@
+"""
+LLM Gateway — one shared entry point for every Gemini call.
+
+Before this module each agent lazily built its own ``genai.Client`` and
+the board-chat / side-agent paths built a fresh ``GenerativeModel`` per
+call.  Nothing bounded how many requests were in flight at once, so a
+burst of welcome-message polish could hold up a risk assessment.
+
+The gateway provides:
+
+  - a pooled ``genai.Client`` per model (``client(model)``) and pooled
+    legacy ``google.generativeai`` models (``legacy_model(...)``)
+  - a global concurrency cap plus a cap per model; a call holds one
+    permit of each while the request is on the wire
+  - priorities: when permits run out, waiters are admitted CRITICAL
+    first, then HIGH, NORMAL, LOW (FIFO within a priority)
+  - per-model latency and token metrics (``get_metrics``), surfaced
+    under ``"llm"`` in ``Gateway.get_metrics``
+  - an optional response cache for deterministic prompts
+    (``generate(..., cache=True)``, see llm_cache.py)
+  - ``generate_stream`` for replies that are pushed to the patient
+    while they are being written (see ResponseStream in channels.py)
+
+Configuration:
+
+  LLM_MAX_CONCURRENCY    global cap (default 32)
+  LLM_MODEL_CONCURRENCY  default cap per model (default 16)
+  LLM_MODEL_LIMITS       per-model overrides, e.g.
+                         "gemini-2.0-flash=24,gemini-3-pro-image-preview=2"
+
+Usage:
+    gw = get_llm_gateway()
+    response = await gw.generate(model, prompt, priority=Priority.CRITICAL)
+    resp = await gw.run_blocking(model, legacy.generate_content, prompt)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Callable
+
+from medforce.gateway.llm_cache import CachedResponse, LLMResponseCache, cache_key
+
+logger = logging.getLogger("gateway.llm_gateway")
+
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_MODEL_CONCURRENCY = 16
+
+# Latency samples kept per model for the summaries
+LATENCY_WINDOW = 500
+
+
+class Priority(IntEnum):
+    """Admission order when the LLM is saturated (lower runs first)."""
+
+    CRITICAL = 0   # risk scoring, severity / emergency assessment
+    HIGH = 1       # extraction and replies a patient is waiting on
+    NORMAL = 2
+    LOW = 3        # polish: welcome messages, bridges, reports
+
+
+class PrioritySemaphore:
+    """
+    Semaphore whose waiters are woken in priority order.
+
+    A released permit is handed straight to the best waiter rather than
+    returned to the pool, so a newly arriving LOW call can't overtake a
+    CRITICAL one that is already queued.
+    """
+
+    def __init__(self, value: int) -> None:
+        if value < 1:
+            raise ValueError("PrioritySemaphore needs at least one permit")
+        self._limit = value
+        self._value = value
+        self._seq = itertools.count()
+        # (priority, seq, future) — cancelled futures are skipped lazily
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_use(self) -> int:
+        return self._limit - self._value
+
+    def waiting(self) -> dict[str, int]:
+        counts = {p.name.lower(): 0 for p in Priority}
+        for priority, _, fut in self._waiters:
+            if not fut.done():
+                counts[Priority(priority).name.lower()] += 1
+        return counts
+
+    async def acquire(self, priority: Priority = Priority.NORMAL) -> None:
+        if self._value > 0 and not self._has_waiters():
+            self._value -= 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # The permit was handed over just as we were cancelled
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._value = min(self._value + 1, self._limit)
+
+    def _has_waiters(self) -> bool:
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        return bool(self._waiters)
+
+
+def _default_client_factory(model: str) -> Any:
+    from google import genai
+    return genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+
+
+def _usage_tokens(response: Any) -> tuple[int, int]:
+    """(prompt, completion) token counts from a Gemini response, 0 if absent."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return 0, 0
+    prompt = getattr(usage, "prompt_token_count", 0)
+    completion = getattr(usage, "candidates_token_count", 0)
+    return (
+        prompt if isinstance(prompt, int) else 0,
+        completion if isinstance(completion, int) else 0,
+    )
+
+
+def _parse_model_limits(raw: str) -> dict[str, int]:
+    limits: dict[str, int] = {}
+    for item in raw.split(","):
+        if not item.strip():
+            continue
+        model, _, value = item.partition("=")
+        if not value.strip():
+            raise ValueError(f"LLM_MODEL_LIMITS entry {item!r} is not model=limit")
+        limits[model.strip()] = int(value)
+    return limits
+
+
+class LLMGateway:
+    """Pooled clients, concurrency caps, priorities and metrics for LLM calls."""
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        model_concurrency: int = DEFAULT_MODEL_CONCURRENCY,
+        model_limits: dict[str, int] | None = None,
+        client_factory: Callable[[str], Any] | None = None,
+        response_cache: LLMResponseCache | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._global = PrioritySemaphore(max_concurrency)
+        self._model_concurrency = model_concurrency
+        self._model_limits = dict(model_limits or {})
+        self._model_sems: dict[str, PrioritySemaphore] = {}
+        self._client_factory = client_factory or _default_client_factory
+        self._cache = response_cache
+        self._clock = clock
+
+        self._clients: dict[str, Any] = {}
+        self._legacy_models: dict[tuple[str, str | None], Any] = {}
+        self._legacy_configured = False
+
+        # model → counters; latencies are kept separately (bounded)
+        self._stats: dict[str, dict[str, int]] = {}
+        self._latencies: dict[str, deque[float]] = {}
+
+    @classmethod
+    def from_env(cls) -> "LLMGateway":
+        return cls(
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY))),
+            model_concurrency=int(
+                os.getenv("LLM_MODEL_CONCURRENCY", str(DEFAULT_MODEL_CONCURRENCY))
+            ),
+            model_limits=_parse_model_limits(os.getenv("LLM_MODEL_LIMITS", "")),
+            response_cache=LLMResponseCache.from_env(),
+        )
+
+    # ── Pooled clients ──
+
+    def client(self, model: str) -> Any:
+        """Shared ``genai.Client`` for *model*, created on first use."""
+        client = self._clients.get(model)
+        if client is None:
+            client = self._client_factory(model)
+            self._clients[model] = client
+        return client
+
+    def legacy_model(self, model: str, system_instruction: str | None = None) -> Any:
+        """Shared ``google.generativeai.GenerativeModel`` per (model, system prompt)."""
+        key = (model, system_instruction or None)
+        cached = self._legacy_models.get(key)
+        if cached is None:
+            import google.generativeai as legacy_genai
+            if not self._legacy_configured:
+                legacy_genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+                self._legacy_configured = True
+            cached = legacy_genai.GenerativeModel(model, system_instruction=key[1])
+            self._legacy_models[key] = cached
+        return cached
+
+    # ── Admission ──
+
+    def _model_sem(self, model: str) -> PrioritySemaphore:
+        sem = self._model_sems.get(model)
+        if sem is None:
+            sem = PrioritySemaphore(self._model_limits.get(model, self._model_concurrency))
+            self._model_sems[model] = sem
+        return sem
+
+    @asynccontextmanager
+    async def slot(
+        self, model: str, priority: Priority = Priority.NORMAL
+    ) -> AsyncIterator[None]:
+        """Hold one model permit and one global permit for the block."""
+        model_sem = self._model_sem(model)
+        # Always model first, then global — a fixed order can't deadlock
+        await model_sem.acquire(priority)
+        try:
+            await self._global.acquire(priority)
+            try:
+                yield
+            finally:
+                self._global.release()
+        finally:
+            model_sem.release()
+
+    # ── Calls ──
+
+    async def generate(
+        self,
+        model: str,
+        contents: Any,
+        *,
+        priority: Priority = Priority.NORMAL,
+        client: Any = None,
+        config: Any = None,
+        cache: bool = False,
+        bypass_cache: bool = False,
+    ) -> Any:
+        """
+        ``client.aio.models.generate_content`` under the caps.
+
+        Uses the pooled client for *model* unless one is passed in
+        (agents with an injected client keep using it).  Exceptions
+        propagate after being counted.
+
+        ``cache=True`` declares the prompt deterministic: a cached answer
+        is returned as a CachedResponse without taking a permit, and a
+        fresh non-empty answer is stored.  ``bypass_cache`` skips the
+        lookup but still stores.
+        """
+        key = None
+        if cache and self._cache is not None:
+            key = cache_key(model, contents, config)
+            text = await self._cache.get(key, bypass=bypass_cache)
+            if text is not None:
+                return CachedResponse(text)
+
+        client = client if client is not None else self.client(model)
+        kwargs: dict[str, Any] = {"model": model, "contents": contents}
+        if config is not None:
+            kwargs["config"] = config
+        async with self.slot(model, priority):
+            started = self._clock()
+            try:
+                response = await client.aio.models.generate_content(**kwargs)
+            except Exception:
+                self._record(model, self._clock() - started, None, failed=True)
+                raise
+            self._record(model, self._clock() - started, response)
+        if key is not None:
+            text = getattr(response, "text", None)
+            if isinstance(text, str) and text.strip():
+                await self._cache.put(key, model, text)
+        return response
+
+    async def generate_stream(
+        self,
+        model: str,
+        contents: Any,
+        *,
+        priority: Priority = Priority.NORMAL,
+        client: Any = None,
+        config: Any = None,
+    ) -> AsyncIterator[str]:
+        """
+        ``client.aio.models.generate_content_stream`` under the caps,
+        yielding text chunks as they arrive.
+
+        The permits are held until the stream is exhausted or the caller
+        stops iterating.  Latency is recorded to the last chunk and the
+        token counts come from the final chunk's usage metadata.
+        """
+        client = client if client is not None else self.client(model)
+        kwargs: dict[str, Any] = {"model": model, "contents": contents}
+        if config is not None:
+            kwargs["config"] = config
+        async with self.slot(model, priority):
+            started = self._clock()
+            last = None
+            try:
+                async for chunk in await client.aio.models.generate_content_stream(**kwargs):
+                    last = chunk
+                    text = getattr(chunk, "text", None)
+                    if isinstance(text, str) and text:
+                        yield text
+            except Exception:
+                self._record(model, self._clock() - started, None, failed=True)
+                raise
+            self._record(model, self._clock() - started, last)
+
+    async def run_blocking(
+        self,
+        model: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: Priority = Priority.NORMAL,
+        **kwargs: Any,
+    ) -> Any:
+        """Run a synchronous SDK call in a worker thread under the caps."""
+        async with self.slot(model, priority):
+            started = self._clock()
+            try:
+                response = await asyncio.to_thread(fn, *args, **kwargs)
+            except Exception:
+                self._record(model, self._clock() - started, None, failed=True)
+                raise
+            self._record(model, self._clock() - started, response)
+        return response
+
+    # ── Metrics ──
+
+    def _record(
+        self, model: str, elapsed: float, response: Any, *, failed: bool = False
+    ) -> None:
+        stats = self._stats.setdefault(
+            model,
+            {"calls": 0, "failures": 0, "prompt_tokens": 0, "completion_tokens": 0},
+        )
+        stats["calls"] += 1
+        if failed:
+            stats["failures"] += 1
+        else:
+            prompt, completion = _usage_tokens(response)
+            stats["prompt_tokens"] += prompt
+            stats["completion_tokens"] += completion
+        self._latencies.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(elapsed)
+
+    def get_metrics(self) -> dict[str, Any]:
+        models: dict[str, Any] = {}
+        for model in sorted(set(self._stats) | set(self._model_sems)):
+            stats = dict(self._stats.get(model, {
+                "calls": 0, "failures": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            }))
+            stats["total_tokens"] = stats["prompt_tokens"] + stats["completion_tokens"]
+            sem = self._model_sems.get(model)
+            if sem is not None:
+                stats["limit"] = sem.limit
+                stats["in_flight"] = sem.in_use
+                stats["waiting"] = sem.waiting()
+            times = sorted(self._latencies.get(model, ()))
+            if times:
+                stats["latency"] = {
+                    "count": len(times),
+                    "avg_ms": round(sum(times) / len(times) * 1000, 1),
+                    "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1000, 1),
+                    "max_ms": round(times[-1] * 1000, 1),
+                }
+            models[model] = stats
+        return {
+            "max_concurrency": self._global.limit,
+            "in_flight": self._global.in_use,
+            "waiting": self._global.waiting(),
+            "pooled_clients": len(self._clients),
+            "pooled_legacy_models": len(self._legacy_models),
+            "response_cache": self._cache.stats() if self._cache is not None else None,
+            "models": models,
+        }
+
+
+_llm_gateway: LLMGateway | None = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Process-wide LLMGateway, configured from the environment on first use."""
+    global _llm_gateway
+    if _llm_gateway is None:
+        _llm_gateway = LLMGateway.from_env()
+    return _llm_gateway
+
+
+def set_llm_gateway(gateway: LLMGateway | None) -> None:
+    """Replace the process-wide instance (tests; None resets to env config)."""
+    global _llm_gateway
+    _llm_gateway = gateway
@@ -0,0 +1,538 @@
+"""
+Outbox — durable hand-off between the event path and slow providers.
+
+Heartbeat milestones and GP reminders can produce bursts of SMS / email
+to many patients at once.  Sending them inline made the patient's queue
+wait on Twilio or SendGrid for every message.  With an outbox attached
+to the DispatcherRegistry, responses on the outbox channels are written
+here and ``dispatch`` returns at once (``DeliveryResult.queued``); a
+background drainer delivers them:
+
+  - per channel, up to ``batch_size`` due entries at a time, handed to
+    the dispatcher's ``send_bulk`` so providers with a bulk API (SendGrid
+    personalizations) get one request per batch
+  - a token bucket per provider account (``rate_limit_key`` on the
+    dispatcher, e.g. the Twilio account SID) caps messages per second
+  - failed entries are retried with exponential backoff and given up
+    on after ``max_attempts``
+  - each final outcome becomes a DELIVERY_RECEIPT event for the patient,
+    which sets ``ConversationEntry.delivery_status`` to "delivered" or
+    "failed" through the normal per-patient queue
+
+Stores:
+  MemoryOutboxStore   in-process (lost on restart)
+  SQLiteOutboxStore   single SQLite file; pending entries survive restarts
+
+Configuration (``Outbox.from_env``):
+  OUTBOX               "1" enables the outbox with the memory store
+  OUTBOX_PATH          SQLite file for the persistent store (implies OUTBOX=1)
+  OUTBOX_CHANNELS      channels routed through the outbox (default "sms,email")
+  OUTBOX_BATCH_SIZE    entries per send_bulk call (default 50)
+  OUTBOX_RATE_LIMITS   messages/second per provider account,
+                       e.g. "sms=1,email=10" (unlisted channels: unlimited)
+  OUTBOX_MAX_ATTEMPTS  delivery attempts before an entry fails (default 5)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+from uuid import uuid4
+
+from medforce.gateway.channels import AgentResponse, ChannelDispatcher, DeliveryResult
+from medforce.gateway.events import EventEnvelope, EventType
+
+logger = logging.getLogger("gateway.outbox")
+
+DEFAULT_CHANNELS = ("sms", "email")
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_BASE = 5.0
+DEFAULT_RETRY_MAX = 600.0
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+@dataclass
+class OutboxEntry:
+    """One queued AgentResponse plus its delivery bookkeeping."""
+
+    channel: str
+    response: dict[str, Any]  # AgentResponse.model_dump(mode="json")
+    patient_id: str = ""
+    message_id: str = ""
+    entry_id: str = field(default_factory=lambda: uuid4().hex)
+    attempts: int = 0
+    next_attempt_at: float = 0.0
+    created_at: float = 0.0
+    last_error: str | None = None
+
+    def to_response(self) -> AgentResponse:
+        return AgentResponse.model_validate(self.response)
+
+
+# ── Stores ──
+
+
+class OutboxStore(ABC):
+    """Where pending outbox entries live until delivered or failed."""
+
+    @abstractmethod
+    def add(self, entry: OutboxEntry) -> None:
+        """Persist a new entry."""
+
+    @abstractmethod
+    def due(self, channel: str, now: float, limit: int) -> list[OutboxEntry]:
+        """Oldest entries on *channel* whose next attempt is at or before *now*."""
+
+    @abstractmethod
+    def channels(self) -> list[str]:
+        """Channels with at least one pending entry."""
+
+    @abstractmethod
+    def remove(self, entry_ids: list[str]) -> None:
+        """Drop entries that reached a final outcome."""
+
+    @abstractmethod
+    def reschedule(self, entry: OutboxEntry) -> None:
+        """Store an entry's new attempts / next_attempt_at / last_error."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of pending entries."""
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryOutboxStore(OutboxStore):
+    """In-process store — for tests and single-process development."""
+
+    def __init__(self) -> None:
+        self._entries: dict[str, OutboxEntry] = {}
+
+    def add(self, entry: OutboxEntry) -> None:
+        self._entries[entry.entry_id] = entry
+
+    def due(self, channel: str, now: float, limit: int) -> list[OutboxEntry]:
+        ready = [
+            e for e in self._entries.values()
+            if e.channel == channel and e.next_attempt_at <= now
+        ]
+        ready.sort(key=lambda e: (e.next_attempt_at, e.created_at))
+        return ready[:limit]
+
+    def channels(self) -> list[str]:
+        return sorted({e.channel for e in self._entries.values()})
+
+    def remove(self, entry_ids: list[str]) -> None:
+        for entry_id in entry_ids:
+            self._entries.pop(entry_id, None)
+
+    def reschedule(self, entry: OutboxEntry) -> None:
+        if entry.entry_id in self._entries:
+            self._entries[entry.entry_id] = entry
+
+    def count(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteOutboxStore(OutboxStore):
+    """Single-file SQLite store; pending entries survive a restart."""
+
+    def __init__(self, db_path: str) -> None:
+        parent = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " entry_id TEXT PRIMARY KEY,"
+            " channel TEXT NOT NULL,"
+            " patient_id TEXT NOT NULL,"
+            " message_id TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL,"
+            " next_attempt_at REAL NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_error TEXT)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_due ON outbox (channel, next_attempt_at)"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add(self, entry: OutboxEntry) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO outbox VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.entry_id, entry.channel, entry.patient_id, entry.message_id,
+                    json.dumps(entry.response), entry.attempts,
+                    entry.next_attempt_at, entry.created_at, entry.last_error,
+                ),
+            )
+
+    def due(self, channel: str, now: float, limit: int) -> list[OutboxEntry]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT entry_id, channel, patient_id, message_id, response, attempts,"
+                " next_attempt_at, created_at, last_error FROM outbox"
+                " WHERE channel = ? AND next_attempt_at <= ?"
+                " ORDER BY next_attempt_at, created_at LIMIT ?",
+                (channel, now, limit),
+            ).fetchall()
+        return [
+            OutboxEntry(
+                entry_id=row[0], channel=row[1], patient_id=row[2], message_id=row[3],
+                response=json.loads(row[4]), attempts=row[5],
+                next_attempt_at=row[6], created_at=row[7], last_error=row[8],
+            )
+            for row in rows
+        ]
+
+    def channels(self) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT channel FROM outbox ORDER BY channel"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def remove(self, entry_ids: list[str]) -> None:
+        if not entry_ids:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM outbox WHERE entry_id = ?", [(i,) for i in entry_ids],
+            )
+
+    def reschedule(self, entry: OutboxEntry) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ?"
+                " WHERE entry_id = ?",
+                (entry.attempts, entry.next_attempt_at, entry.last_error, entry.entry_id),
+            )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+
+# ── Rate limiting ──
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst``."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._rate = rate
+        self._burst = burst if burst is not None else max(1.0, rate)
+        self._clock = clock
+        self._tokens = self._burst
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def take(self, n: int) -> int:
+        """Grant up to *n* tokens now; returns how many were granted."""
+        self._refill()
+        granted = min(n, int(self._tokens))
+        self._tokens -= granted
+        return granted
+
+    def refund(self, n: int) -> None:
+        """Return tokens that were granted but not used."""
+        self._tokens = min(self._burst, self._tokens + n)
+
+    def wait_time(self) -> float:
+        """Seconds until at least one token is available."""
+        self._refill()
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self._rate
+
+
+def _parse_rates(raw: str) -> dict[str, float]:
+    """Parse "sms=1,email=10" into {"sms": 1.0, "email": 10.0}."""
+    rates: dict[str, float] = {}
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        channel, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Bad OUTBOX_RATE_LIMITS entry: {item!r}")
+        rates[channel.strip()] = float(value)
+    return rates
+
+
+# ── Outbox ──
+
+
+class Outbox:
+    """
+    Accepts responses for the outbox channels and drains them in batches.
+
+    Usage:
+        outbox = Outbox(SQLiteOutboxStore(path), dispatchers=registry.get,
+                        receipt_sink=queue_manager.enqueue)
+        registry.attach_outbox(outbox)
+        await outbox.start()
+    """
+
+    def __init__(
+        self,
+        store: OutboxStore,
+        *,
+        dispatchers: Callable[[str], ChannelDispatcher | None],
+        channels: tuple[str, ...] | list[str] = DEFAULT_CHANNELS,
+        receipt_sink: Callable[[EventEnvelope], Awaitable[None]] | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        rate_limits: dict[str, float] | None = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        retry_base: float = DEFAULT_RETRY_BASE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._store = store
+        self._dispatchers = dispatchers
+        self._channels = set(channels)
+        self._receipt_sink = receipt_sink
+        self._batch_size = max(1, batch_size)
+        self._rate_limits = dict(rate_limits or {})
+        self._max_attempts = max(1, max_attempts)
+        self._retry_base = retry_base
+        self._poll_interval = poll_interval
+        self._clock = clock
+        # rate_limit_key → bucket; several channels may share an account
+        self._buckets: dict[str, TokenBucket] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._running = False
+        self._stats = {
+            "enqueued": 0, "delivered": 0, "failed": 0, "retried": 0,
+            "batches": 0, "rate_limited": 0, "receipts": 0,
+        }
+
+    @classmethod
+    def from_env(
+        cls,
+        *,
+        dispatchers: Callable[[str], ChannelDispatcher | None],
+        receipt_sink: Callable[[EventEnvelope], Awaitable[None]] | None = None,
+    ) -> "Outbox | None":
+        path = os.getenv("OUTBOX_PATH", "")
+        if os.getenv("OUTBOX", "0") != "1" and not path:
+            return None
+        store: OutboxStore = SQLiteOutboxStore(path) if path else MemoryOutboxStore()
+        channels = [
+            c.strip()
+            for c in os.getenv("OUTBOX_CHANNELS", ",".join(DEFAULT_CHANNELS)).split(",")
+            if c.strip()
+        ]
+        outbox = cls(
+            store,
+            dispatchers=dispatchers,
+            channels=channels,
+            receipt_sink=receipt_sink,
+            batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", str(DEFAULT_BATCH_SIZE))),
+            rate_limits=_parse_rates(os.getenv("OUTBOX_RATE_LIMITS", "")),
+            max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", str(DEFAULT_MAX_ATTEMPTS))),
+        )
+        logger.info(
+            "Outbox enabled for %s (store: %s)", sorted(channels), path or "memory",
+        )
+        return outbox
+
+    def handles(self, channel: str) -> bool:
+        return channel in self._channels
+
+    # ── Request path ──
+
+    async def enqueue(self, response: AgentResponse) -> DeliveryResult:
+        """Record *response* for background delivery; never calls the provider."""
+        now = self._clock()
+        entry = OutboxEntry(
+            channel=response.channel,
+            response=response.model_dump(mode="json"),
+            patient_id=response.metadata.get("patient_id", ""),
+            message_id=response.metadata.get("message_id", ""),
+            next_attempt_at=now,
+            created_at=now,
+        )
+        await asyncio.to_thread(self._store.add, entry)
+        self._stats["enqueued"] += 1
+        self._wakeup.set()
+        return DeliveryResult(
+            success=True,
+            channel=response.channel,
+            recipient=response.recipient,
+            queued=True,
+        )
+
+    # ── Drainer ──
+
+    async def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._drain_loop())
+        pending = await asyncio.to_thread(self._store.count)
+        logger.info("Outbox drainer started — %d entries pending", pending)
+
+    async def stop(self) -> None:
+        self._running = False
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._store.close()
+        logger.info("Outbox drainer stopped")
+
+    async def _drain_loop(self) -> None:
+        while self._running:
+            try:
+                await self.drain_once()
+            except Exception as exc:
+                logger.error("Outbox drain pass failed: %s", exc, exc_info=True)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain_once(self) -> int:
+        """One pass over every channel; returns how many entries were sent."""
+        sent = 0
+        for channel in await asyncio.to_thread(self._store.channels):
+            dispatcher = self._dispatchers(channel)
+            if dispatcher is None:
+                continue  # kept until a dispatcher for the channel registers
+            while True:
+                bucket = self._bucket(channel, dispatcher)
+                limit = self._batch_size if bucket is None else bucket.take(self._batch_size)
+                if limit == 0:
+                    self._stats["rate_limited"] += 1
+                    break
+                entries = await asyncio.to_thread(
+                    self._store.due, channel, self._clock(), limit,
+                )
+                if bucket is not None and len(entries) < limit:
+                    # Hand back tokens the batch didn't use
+                    bucket.refund(limit - len(entries))
+                if not entries:
+                    break
+                sent += await self._deliver_batch(dispatcher, entries)
+                if len(entries) < limit:
+                    break
+        return sent
+
+    def _bucket(self, channel: str, dispatcher: ChannelDispatcher) -> TokenBucket | None:
+        rate = self._rate_limits.get(channel)
+        if not rate:
+            return None
+        key = dispatcher.rate_limit_key
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate)
+        return bucket
+
+    async def _deliver_batch(
+        self, dispatcher: ChannelDispatcher, entries: list[OutboxEntry]
+    ) -> int:
+        self._stats["batches"] += 1
+        responses = [entry.to_response() for entry in entries]
+        try:
+            results = await dispatcher.send_bulk(responses)
+        except Exception as exc:
+            logger.warning("Outbox batch on '%s' failed: %s", dispatcher.channel_name, exc)
+            results = [
+                DeliveryResult(
+                    success=False, channel=r.channel, recipient=r.recipient, error=str(exc),
+                )
+                for r in responses
+            ]
+
+        done: list[str] = []
+        receipts: list[tuple[OutboxEntry, str, str | None]] = []
+        for entry, result in zip(entries, results):
+            entry.attempts += 1
+            if result.success:
+                done.append(entry.entry_id)
+                receipts.append((entry, "delivered", None))
+                self._stats["delivered"] += 1
+            elif entry.attempts >= self._max_attempts or not result.retryable:
+                done.append(entry.entry_id)
+                receipts.append((entry, "failed", result.error))
+                self._stats["failed"] += 1
+                logger.error(
+                    "Outbox gave up on %s to %s after %d attempts: %s",
+                    entry.channel, entry.patient_id or "?", entry.attempts, result.error,
+                )
+            else:
+                entry.last_error = result.error
+                entry.next_attempt_at = self._clock() + min(
+                    DEFAULT_RETRY_MAX, self._retry_base * 2 ** (entry.attempts - 1),
+                )
+                await asyncio.to_thread(self._store.reschedule, entry)
+                self._stats["retried"] += 1
+        await asyncio.to_thread(self._store.remove, done)
+        await self._send_receipts(receipts)
+        return sum(1 for _, status, _ in receipts if status == "delivered")
+
+    async def _send_receipts(
+        self, receipts: list[tuple[OutboxEntry, str, str | None]]
+    ) -> None:
+        if self._receipt_sink is None:
+            return
+        by_patient: dict[str, list[dict[str, Any]]] = {}
+        for entry, status, error in receipts:
+            if entry.patient_id and entry.message_id:
+                by_patient.setdefault(entry.patient_id, []).append(
+                    {"message_id": entry.message_id, "status": status, "error": error}
+                )
+        for patient_id, items in by_patient.items():
+            event = EventEnvelope.handoff(
+                EventType.DELIVERY_RECEIPT,
+                patient_id,
+                source_agent="outbox",
+                payload={"receipts": items},
+            )
+            try:
+                await self._receipt_sink(event)
+                self._stats["receipts"] += 1
+            except Exception as exc:
+                # Delivery happened; only the diary status is stale
+                logger.warning("Delivery receipt for %s not enqueued: %s", patient_id, exc)
+
+    # ── Metrics ──
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            **self._stats,
+            "pending": self._store.count(),
+            "channels": sorted(self._channels),
+        }
@@ -0,0 +1,227 @@
+"""
+Patient Index — small secondary index over all diaries.
+
+Answering "who is in monitoring?" used to mean listing every diary
+folder and fully loading each diary, and HeartbeatScheduler recovery
+then loaded each monitored diary a second time.  The index keeps the
+handful of fields those scans need, per patient:
+
+  phase, risk_level, monitoring_active, appointment_date,
+  pending_gp_queries
+
+It lives in one blob next to the diaries
+("patient_diaries/_index.json") and is updated by DiaryStore on every
+save.  The blob is only rewritten when an indexed field actually
+changed — a conversation turn costs nothing — and writes are
+generation-matched with a re-read/merge on conflict, so several
+processes sharing a bucket don't lose each other's updates.
+
+If the blob doesn't exist yet (first run after upgrade) it is rebuilt
+once by scanning every diary.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Optional
+
+from pydantic import BaseModel, Field
+
+from medforce.gateway.diary import (
+    DiaryConcurrencyError,
+    DiaryNotFoundError,
+    PatientDiary,
+    Phase,
+)
+
+logger = logging.getLogger("gateway.patient_index")
+
+INDEX_FORMAT_VERSION = 1
+
+# Merge-and-retry attempts when another process wrote the index first
+MAX_WRITE_ATTEMPTS = 5
+
+
+class PatientIndexEntry(BaseModel):
+    patient_id: str
+    phase: str = Phase.INTAKE.value
+    risk_level: str = "none"
+    monitoring_active: bool = False
+    appointment_date: Optional[str] = None
+    pending_gp_queries: int = 0
+    updated: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @classmethod
+    def from_diary(cls, patient_id: str, diary: PatientDiary) -> "PatientIndexEntry":
+        return cls(
+            patient_id=patient_id,
+            phase=diary.header.current_phase.value,
+            risk_level=diary.header.risk_level.value,
+            monitoring_active=diary.monitoring.monitoring_active,
+            appointment_date=diary.monitoring.appointment_date,
+            pending_gp_queries=len(diary.gp_channel.get_pending_queries()),
+        )
+
+    def same_fields(self, other: "PatientIndexEntry") -> bool:
+        """True if every indexed field (not the timestamp) matches."""
+        return self.model_dump(exclude={"updated"}) == other.model_dump(exclude={"updated"})
+
+
+class PatientIndex:
+    """
+    In-memory view of the index blob with incremental, merged writes.
+
+    Usage:
+        index = PatientIndex(backend, "patient_diaries/_index.json", rebuild=scan)
+        index.update(pid, diary)           # from DiaryStore.save
+        index.query(monitoring_active=True)
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        key: str,
+        *,
+        rebuild: Callable[[], Iterable[tuple[str, PatientDiary]]] | None = None,
+    ) -> None:
+        self._backend = backend
+        self._key = key
+        self._rebuild = rebuild
+        self._entries: dict[str, PatientIndexEntry] = {}
+        self._generation: int | None = None  # None → not loaded yet
+        self._lock = threading.RLock()
+        self._stats = {"updates": 0, "writes": 0, "write_conflicts": 0, "rebuilds": 0}
+
+    # ── Reads ──
+
+    def refresh(self) -> None:
+        """Re-read the blob (one read), rebuilding it if it doesn't exist."""
+        with self._lock:
+            try:
+                content, generation = self._backend.read(self._key)
+            except DiaryNotFoundError:
+                self._rebuild_from_diaries()
+                return
+            self._entries = self._parse(content)
+            self._generation = generation
+
+    def _ensure_loaded(self) -> None:
+        if self._generation is None:
+            self.refresh()
+
+    def get(self, patient_id: str) -> PatientIndexEntry | None:
+        with self._lock:
+            self._ensure_loaded()
+            return self._entries.get(patient_id)
+
+    def entries(self) -> list[PatientIndexEntry]:
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._entries.values())
+
+    def query(
+        self,
+        *,
+        phase: str | None = None,
+        monitoring_active: bool | None = None,
+        risk_level: str | None = None,
+    ) -> list[PatientIndexEntry]:
+        """Filter entries; every given criterion must match."""
+        result = []
+        for entry in self.entries():
+            if phase is not None and entry.phase != phase:
+                continue
+            if monitoring_active is not None and entry.monitoring_active != monitoring_active:
+                continue
+            if risk_level is not None and entry.risk_level != risk_level:
+                continue
+            result.append(entry)
+        return sorted(result, key=lambda e: e.patient_id)
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+    # ── Writes ──
+
+    def update(self, patient_id: str, diary: PatientDiary) -> None:
+        """Record a saved diary.  Writes the blob only if an indexed field changed."""
+        entry = PatientIndexEntry.from_diary(patient_id, diary)
+        with self._lock:
+            self._ensure_loaded()
+            current = self._entries.get(patient_id)
+            if current is not None and current.same_fields(entry):
+                return
+            self._stats["updates"] += 1
+            self._write_merged({patient_id: entry})
+
+    def remove(self, patient_id: str) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            if patient_id not in self._entries:
+                return
+            self._write_merged({patient_id: None})
+
+    def _write_merged(self, changes: dict[str, PatientIndexEntry | None]) -> None:
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            self._apply(changes)
+            try:
+                self._generation = self._backend.write(
+                    self._key, self._serialize(), self._generation or 0,
+                )
+                self._stats["writes"] += 1
+                return
+            except DiaryConcurrencyError:
+                # Another process updated the index — merge onto theirs
+                self._stats["write_conflicts"] += 1
+                try:
+                    content, generation = self._backend.read(self._key)
+                    self._entries = self._parse(content)
+                    self._generation = generation
+                except DiaryNotFoundError:
+                    self._generation = 0
+        logger.warning(
+            "Patient index write still conflicting after %d attempts — "
+            "keeping in-memory update only", MAX_WRITE_ATTEMPTS,
+        )
+
+    def _apply(self, changes: dict[str, PatientIndexEntry | None]) -> None:
+        for pid, entry in changes.items():
+            if entry is None:
+                self._entries.pop(pid, None)
+            else:
+                self._entries[pid] = entry
+
+    def _rebuild_from_diaries(self) -> None:
+        self._entries = {}
+        self._generation = 0
+        if self._rebuild is None:
+            return
+        rebuilt = {}
+        for pid, diary in self._rebuild():
+            rebuilt[pid] = PatientIndexEntry.from_diary(pid, diary)
+        self._stats["rebuilds"] += 1
+        logger.info("Rebuilt patient index from %d diaries", len(rebuilt))
+        self._write_merged(rebuilt)
+
+    # ── Serialization ──
+
+    def _serialize(self) -> str:
+        return json.dumps({
+            "version": INDEX_FORMAT_VERSION,
+            "patients": {
+                pid: entry.model_dump(mode="json")
+                for pid, entry in sorted(self._entries.items())
+            },
+        })
+
+    @staticmethod
+    def _parse(content: str) -> dict[str, PatientIndexEntry]:
+        data = json.loads(content)
+        return {
+            pid: PatientIndexEntry.model_validate(raw)
+            for pid, raw in data.get("patients", {}).items()
+        }
@@ -0,0 +1,272 @@
+"""
+Phrase Matcher — one-pass multi-set phrase matching for message routing.
+
+The Gateway and its agents classify patient messages by looking for
+known phrases: cross-phase routing ("medication", "next of kin"),
+booking intents ("reschedule", "none of these"), clinical sign-offs
+("that's all"), monitoring red flags ("clay stool", "chest pain") and
+the RiskScorer's keyword rules.  Each owner registers its phrase sets
+once, at import, in the shared ``PHRASES`` matcher:
+
+    PHRASES.register("booking.reschedule", RESCHEDULE_KEYWORDS)
+    ...
+    PHRASES.has(text, "booking.reschedule")
+
+All phrases of all sets are compiled into one Aho-Corasick automaton
+(folded into a DFA), so a message is scanned once however many sets and
+phrases there are.  ``scan`` returns every set that matched with its
+matching phrases (in the set's own order); recent scans are memoised,
+so the Gateway's cross-phase check and every agent's later check of
+the same message cost one pass.  The rule engine keeps its own
+``PhraseMatcher`` since its keyword rules vary per engine.
+
+Per set, a ``PhraseSet`` can tighten what counts as a match:
+
+  - ``whole_words`` — the phrase must start on a word boundary and end
+    on one, allowing simple inflections ("jaundiced", "tumours").
+    Without it a phrase matches anywhere, like ``phrase in text`` (so
+    stems such as "allerg" work)
+  - ``negation`` — a callable ``(text, start) -> bool`` that suppresses
+    an occurrence.  ``clause_negation`` looks for a cue word among the
+    few words before the phrase in the same clause ("no jaundice",
+    "hasn't had any melena"); ``prefix_negation`` looks for a cue phrase
+    in the characters just before it ("no sign of fever")
+
+A phrase set matches a phrase if any occurrence of it passes these
+checks.  Matching is case-insensitive.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterable, Mapping, Sequence
+
+Negation = Callable[[str, int], bool]
+
+# Words a whole-word phrase may be followed by and still count as a match
+INFLECTIONS = ("s", "es", "d", "ed", "ing", "ous")
+
+NEGATION_CUES = frozenset({
+    "no", "not", "nil", "never", "without", "denies", "denied", "deny",
+    "negative",
+})
+_CLAUSE_BREAK_RE = re.compile(r"[.;:!?,\n]|\bbut\b|\bhowever\b")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def clause_negation(
+    cues: Iterable[str] = NEGATION_CUES, *, words: int = 3,
+) -> Negation:
+    """Negated if one of the *words* words before the phrase, in the same
+    clause, is a cue word or ends in "n't"."""
+    cue_set = frozenset(cues)
+
+    def negated(text: str, start: int) -> bool:
+        clause = _CLAUSE_BREAK_RE.split(text[max(0, start - 60):start])[-1]
+        for word in clause.split()[-words:]:
+            word = word.strip("'\"()")
+            if word in cue_set or word.endswith("n't"):
+                return True
+        return False
+
+    return negated
+
+
+def prefix_negation(cues: Iterable[str], *, chars: int = 25) -> Negation:
+    """Negated if a cue phrase occurs in the *chars* characters before it."""
+    cue_list = tuple(cues)
+
+    def negated(text: str, start: int) -> bool:
+        prefix = text[max(0, start - chars):start]
+        return any(cue in prefix for cue in cue_list)
+
+    return negated
+
+
+@dataclass(frozen=True)
+class PhraseSet:
+    """A named group of phrases and what counts as a match for them."""
+
+    phrases: tuple[str, ...]
+    whole_words: bool = False
+    negation: Negation | None = None
+
+    def __init__(
+        self,
+        phrases: Iterable[str],
+        *,
+        whole_words: bool = False,
+        negation: Negation | None = None,
+    ) -> None:
+        object.__setattr__(self, "phrases", tuple(p.lower() for p in phrases))
+        object.__setattr__(self, "whole_words", whole_words)
+        object.__setattr__(self, "negation", negation)
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over the phrases of several named sets."""
+
+    def __init__(
+        self,
+        sets: Mapping[str, PhraseSet | Sequence[str]] | None = None,
+        *,
+        cache_size: int = 256,
+    ) -> None:
+        self.sets: dict[str, PhraseSet] = {}
+        self._lock = threading.Lock()
+        self._compiled = False
+        self._scan_cached = lru_cache(maxsize=cache_size)(self._scan)
+        for name, spec in (sets or {}).items():
+            self.register(name, spec)
+
+    def register(self, name: str, spec: PhraseSet | Sequence[str]) -> None:
+        """Add (or replace) phrase set *name*; compiled on the next scan."""
+        with self._lock:
+            self.sets[name] = spec if isinstance(spec, PhraseSet) else PhraseSet(spec)
+            self._compiled = False
+            self._scan_cached.cache_clear()
+
+    def _compile(self) -> None:
+        with self._lock:
+            if self._compiled:
+                return
+            specs = list(self.sets.values())
+            # phrase id → [(set index, position in set)]
+            phrases: list[str] = []
+            owners: list[list[tuple[int, int]]] = []
+            ids: dict[str, int] = {}
+            for set_index, spec in enumerate(specs):
+                for position, phrase in enumerate(spec.phrases):
+                    if not phrase:
+                        continue
+                    if phrase not in ids:
+                        ids[phrase] = len(phrases)
+                        phrases.append(phrase)
+                        owners.append([])
+                    owners[ids[phrase]].append((set_index, position))
+
+            goto: list[dict[str, int]] = [{}]
+            out: list[list[int]] = [[]]
+            for phrase_id, phrase in enumerate(phrases):
+                state = 0
+                for ch in phrase:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[state][ch] = nxt
+                        goto.append({})
+                        out.append([])
+                    state = nxt
+                out[state].append(phrase_id)
+
+            # Fold the failure links into a full transition table (a DFA),
+            # so scanning is one dict lookup per character
+            fail = [0] * len(goto)
+            delta: list[dict[str, int]] = [dict(goto[0])] + [{}] * (len(goto) - 1)
+            queue: deque[int] = deque(goto[0].values())
+            while queue:
+                state = queue.popleft()
+                delta[state] = {**delta[fail[state]], **goto[state]}
+                for ch, nxt in goto[state].items():
+                    queue.append(nxt)
+                    fail[nxt] = delta[fail[state]].get(ch, 0) if state else 0
+                    out[nxt] = out[nxt] + out[fail[nxt]]
+
+            self._specs = specs
+            self._names = list(self.sets)
+            self._index = {name: i for i, name in enumerate(self._names)}
+            self._phrases = phrases
+            self._owners = owners
+            self._delta = delta
+            self._out = out
+            self._compiled = True
+
+    # ── Queries ──
+
+    def scan(self, text: str) -> dict[str, tuple[str, ...]]:
+        """Every set with at least one match → its matching phrases."""
+        if not text:
+            return {}
+        return {
+            name: tuple(self.sets[name].phrases[p] for p in positions)
+            for name, positions in self._scan_cached(text)
+        }
+
+    def indices(self, text: str, name: str) -> tuple[int, ...]:
+        """Positions, within set *name*, of its matching phrases."""
+        if name not in self.sets:
+            raise KeyError(name)
+        if not text:
+            return ()
+        for set_name, positions in self._scan_cached(text):
+            if set_name == name:
+                return positions
+        return ()
+
+    def matches(self, text: str, name: str) -> tuple[str, ...]:
+        """Matching phrases of set *name* (empty if none)."""
+        positions = self.indices(text, name)
+        phrases = self.sets[name].phrases
+        return tuple(phrases[p] for p in positions)
+
+    def has(self, text: str, name: str) -> bool:
+        """Whether any phrase of set *name* matches *text*."""
+        return bool(self.indices(text, name))
+
+    # ── Scanning ──
+
+    def _scan(self, text: str) -> tuple[tuple[str, tuple[int, ...]], ...]:
+        if not self._compiled:
+            self._compile()
+        text = text.lower()
+        specs, lengths = self._specs, self._phrases
+        delta, out, owners = self._delta, self._out, self._owners
+        # set index → {position in set}
+        found: dict[int, set[int]] = {}
+        state = 0
+        for end, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if not out[state]:
+                continue
+            for phrase_id in out[state]:
+                start = end + 1 - len(lengths[phrase_id])
+                for set_index, position in owners[phrase_id]:
+                    hits = found.setdefault(set_index, set())
+                    if position in hits:
+                        continue
+                    spec = specs[set_index]
+                    if spec.whole_words and not _bounded(text, start, end + 1):
+                        continue
+                    if spec.negation is not None and spec.negation(text, start):
+                        continue
+                    hits.add(position)
+
+        return tuple(
+            (self._names[set_index], tuple(sorted(hits)))
+            for set_index, hits in sorted(found.items())
+            if hits
+        )
+
+
+# Shared matcher for patient-message routing: the Gateway and each agent
+# register their sets at import ("<owner>.<set>"), so the Gateway's scan
+# of a message is the one every agent's later check of it reuses.
+PHRASES = PhraseMatcher(cache_size=1024)
+
+
+def _bounded(text: str, start: int, end: int) -> bool:
+    if start > 0 and _is_word_char(text[start - 1]):
+        return False
+    if end == len(text) or not _is_word_char(text[end]):
+        return True
+    tail_end = end
+    while tail_end < len(text) and _is_word_char(text[tail_end]):
+        tail_end += 1
+    return text[end:tail_end] in INFLECTIONS
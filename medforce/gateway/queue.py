@@ -5,22 +5,158 @@ One asyncio.Queue per active patient.  Events are processed FIFO,
 one at a time.  Cross-patient queues run in parallel.
 
 Idle queues are cleaned up after a configurable timeout.
+
+With an EventJournal (event_journal.py), every event is durably
+appended before ``enqueue`` returns and committed once processed;
+``start()`` replays whatever a previous process left unfinished.
+
+Backpressure: each patient queue holds at most ``max_queue_depth``
+events and the manager as a whole at most ``max_in_flight`` (queued +
+processing).  When either limit is hit the overflow policy decides:
+
+  reject       raise QueueFullError (the API answers 429)
+  drop_oldest  discard the patient's oldest queued event
+  coalesce     merge a USER_MESSAGE into the patient's last queued
+               USER_MESSAGE from the same sender (text joined, original
+               event_ids kept in payload["coalesced_event_ids"])
+
+drop_oldest / coalesce fall back to reject when the patient has nothing
+queued to drop or merge into.
+
+Schedulers:
+
+  per_patient  (default) one worker task per active patient, torn down
+               after idle_timeout_seconds.  Each idle worker still wakes
+               every 5 s, so thousands of patients mean thousands of
+               timers.
+  pool         a fixed pool of ``pool_size`` workers pulling patient ids
+               from a ready queue.  A patient is in the ready queue or
+               being processed at most once at a time (the "busy" set),
+               which keeps per-patient FIFO; after each event the patient
+               goes to the back of the ready queue, so a chatty patient
+               can't starve others.  Idle workers block without timers
+               and empty patient queues are dropped immediately.
+
+Micro-batching (``batch_window_ms`` > 0): when a worker picks up a
+USER_MESSAGE it waits up to the window for more USER_MESSAGEs from the
+same sender and merges them (same rules as ``coalesce``), each arrival
+extending the window, up to ``batch_max_events``.  Patients who send
+three short SMS in a row then get one agent run and one reply.
 """
 
 from __future__ import annotations
 
 import asyncio
+import bisect
 import logging
 from datetime import datetime, timezone
+from enum import Enum
 from typing import Any, Awaitable, Callable
 
-from medforce.gateway.events import EventEnvelope
+from medforce.gateway.event_journal import EventJournal
+from medforce.gateway.events import EventEnvelope, EventType
 
 logger = logging.getLogger("gateway.queue")
 
 # Type for the callback the queue calls to process each event
 EventProcessor = Callable[[EventEnvelope], Awaitable[Any]]
 
+# Defaults for the admission limits
+DEFAULT_MAX_QUEUE_DEPTH = 100
+DEFAULT_MAX_IN_FLIGHT = 10_000
+
+# Upper bounds of the queue-depth histogram buckets (last is open-ended)
+DEPTH_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+# Most USER_MESSAGEs merged into one micro-batch
+DEFAULT_BATCH_MAX_EVENTS = 10
+
+# Workers in the "pool" scheduler
+DEFAULT_POOL_SIZE = 64
+
+SCHEDULERS = ("per_patient", "pool")
+
+
+class OverflowPolicy(str, Enum):
+    REJECT = "reject"
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+
+
+class QueueFullError(Exception):
+    """An event was refused because a queue limit was reached."""
+
+    def __init__(self, patient_id: str, reason: str) -> None:
+        super().__init__(f"Queue full for patient {patient_id}: {reason}")
+        self.patient_id = patient_id
+        self.reason = reason
+
+
+class PatientQueue(asyncio.Queue):
+    """asyncio.Queue with access to its oldest and newest items."""
+
+    def _init(self, maxsize: int) -> None:
+        super()._init(maxsize)
+        self._arrived = asyncio.Event()
+
+    def _put(self, item: Any) -> None:
+        super()._put(item)
+        self._arrived.set()
+
+    async def wait_for_item(self, timeout: float) -> bool:
+        """Wait (without consuming) until an item is queued; False on timeout."""
+        if self._queue:
+            return True
+        self._arrived.clear()
+        try:
+            await asyncio.wait_for(self._arrived.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def peek_oldest(self) -> Any:
+        return self._queue[0] if self._queue else None
+
+    def pop_oldest(self) -> Any:
+        item = self._queue.popleft()
+        self.task_done()
+        return item
+
+    def peek_newest(self) -> Any:
+        return self._queue[-1] if self._queue else None
+
+    def replace_newest(self, item: Any) -> None:
+        self._queue[-1] = item
+
+
+def _depth_bucket(depth: int) -> str:
+    idx = bisect.bisect_left(DEPTH_BUCKETS, depth)
+    if idx == len(DEPTH_BUCKETS):
+        return f"{DEPTH_BUCKETS[-1] + 1}+"
+    return f"<={DEPTH_BUCKETS[idx]}"
+
+
+def _coalesce(queued: EventEnvelope, new: EventEnvelope) -> EventEnvelope | None:
+    """Merge two consecutive USER_MESSAGEs from one sender, or None."""
+    if not (
+        queued.event_type == new.event_type == EventType.USER_MESSAGE
+        and queued.sender_id == new.sender_id
+        and queued.payload.get("channel") == new.payload.get("channel")
+    ):
+        return None
+    payload = dict(queued.payload)
+    texts = [t for t in (queued.payload.get("text"), new.payload.get("text")) if t]
+    payload["text"] = "\n".join(texts)
+    attachments = list(queued.payload.get("attachments") or []) + list(
+        new.payload.get("attachments") or []
+    )
+    if attachments:
+        payload["attachments"] = attachments
+    payload["coalesced_event_ids"] = list(
+        queued.payload.get("coalesced_event_ids") or [queued.event_id]
+    ) + [new.event_id]
+    return queued.model_copy(update={"payload": payload})
+
 
 class PatientQueueManager:
     """
@@ -39,23 +175,68 @@ class PatientQueueManager:
         processor: EventProcessor,
         idle_timeout_seconds: int = 1800,  # 30 minutes
         event_timeout_seconds: int = 60,   # max time for a single event
+        journal: EventJournal | None = None,
+        max_queue_depth: int = DEFAULT_MAX_QUEUE_DEPTH,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        overflow_policy: OverflowPolicy | str = OverflowPolicy.REJECT,
+        batch_window_ms: int = 0,
+        batch_max_events: int = DEFAULT_BATCH_MAX_EVENTS,
+        scheduler: str = "per_patient",
+        pool_size: int = DEFAULT_POOL_SIZE,
     ) -> None:
+        if scheduler not in SCHEDULERS:
+            raise ValueError(f"Unknown scheduler {scheduler!r}; expected one of {SCHEDULERS}")
         self._processor = processor
         self._idle_timeout = idle_timeout_seconds
         self._event_timeout = event_timeout_seconds
-
-        self._queues: dict[str, asyncio.Queue[EventEnvelope]] = {}
+        self._journal = journal
+        self._max_queue_depth = max(1, max_queue_depth)
+        self._max_in_flight = max(1, max_in_flight)
+        self._policy = OverflowPolicy(overflow_policy)
+        self._batch_window = max(0, batch_window_ms) / 1000
+        self._batch_max_events = max(1, batch_max_events)
+        self._in_flight = 0  # queued + processing, across all patients
+        # Serialises journal appends with queue puts so journal offsets
+        # follow queue order (per-patient commits rely on it)
+        self._journal_lock = asyncio.Lock()
+
+        # Items are (journal offset or None, event)
+        self._queues: dict[str, PatientQueue] = {}
         self._workers: dict[str, asyncio.Task] = {}
         self._last_activity: dict[str, datetime] = {}
         self._cleanup_task: asyncio.Task | None = None
         self._running = False
 
+        # "pool" scheduler state
+        self._scheduler = scheduler
+        self._pool_size = max(1, pool_size)
+        self._pool: list[asyncio.Task] = []
+        self._ready: asyncio.Queue[str] = asyncio.Queue()
+        self._busy: set[str] = set()  # queued in _ready or being processed
+
+        self._metrics: dict[str, Any] = {
+            "enqueued": 0,
+            "rejected": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "batches": 0,
+            "batched_events": 0,
+            "peak_in_flight": 0,
+            "depth_at_enqueue": {},  # bucket → count
+        }
+
     # ── Public API ──
 
     async def start(self) -> None:
-        """Start the cleanup background loop."""
+        """Start the cleanup background loop and replay unfinished events."""
         self._running = True
         self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+        if self._journal is not None:
+            pending = await asyncio.to_thread(self._journal.pending)
+            for offset, event in pending:
+                self._put(offset, event)
+            if pending:
+                logger.info("Replayed %d unfinished events from the journal", len(pending))
         logger.info("PatientQueueManager started (idle timeout=%ds)", self._idle_timeout)
 
     async def stop(self) -> None:
@@ -71,19 +252,35 @@ class PatientQueueManager:
         for pid in list(self._workers.keys()):
             await self._destroy_queue(pid)
 
+        if self._pool:
+            for task in self._pool:
+                task.cancel()
+            await asyncio.gather(*self._pool, return_exceptions=True)
+            self._pool = []
+            for q in self._queues.values():
+                self._in_flight -= q.qsize()
+            self._queues.clear()
+            self._last_activity.clear()
+            self._busy.clear()
+            self._ready = asyncio.Queue()
+
         logger.info("PatientQueueManager stopped")
 
     async def enqueue(self, event: EventEnvelope) -> None:
-        """Add an event to the patient's queue.  Creates queue if needed."""
-        pid = event.patient_id
-
-        if pid not in self._queues:
-            self._create_queue(pid)
-
-        self._last_activity[pid] = datetime.now(timezone.utc)
-        await self._queues[pid].put(event)
-        logger.debug("Enqueued %s for patient %s (depth=%d)",
-                      event.event_type.value, pid, self._queues[pid].qsize())
+        """Add an event to the patient's queue.  Creates queue if needed.
+
+        With a journal, returns only once the event is durably recorded.
+        Raises QueueFullError when a limit is hit and the overflow policy
+        can't make room.
+        """
+        if self._journal is None:
+            self._admit(None, event, self._overflow_action(event))
+            return
+        async with self._journal_lock:
+            # Decide before appending so refused events never hit the journal
+            action = self._overflow_action(event)
+            offset = await asyncio.to_thread(self._journal.append, event)
+            self._admit(offset, event, action)
 
     @property
     def active_patients(self) -> list[str]:
@@ -99,16 +296,140 @@ class PatientQueueManager:
         q = self._queues.get(patient_id)
         return q.qsize() if q else 0
 
+    @property
+    def in_flight(self) -> int:
+        """Events queued or being processed, across all patients."""
+        return self._in_flight
+
+    def get_metrics(self) -> dict[str, Any]:
+        depth_now: dict[str, int] = {}
+        for q in self._queues.values():
+            bucket = _depth_bucket(q.qsize())
+            depth_now[bucket] = depth_now.get(bucket, 0) + 1
+        return {
+            **self._metrics,
+            "depth_at_enqueue": dict(self._metrics["depth_at_enqueue"]),
+            "depth_now": depth_now,
+            "active_queues": len(self._queues),
+            "scheduler": self._scheduler,
+            "worker_tasks": len(self._pool) if self._pool else len(self._workers),
+            "in_flight": self._in_flight,
+            "max_in_flight": self._max_in_flight,
+            "max_queue_depth": self._max_queue_depth,
+            "overflow_policy": self._policy.value,
+        }
+
     # ── Internal ──
 
+    def _overflow_action(self, event: EventEnvelope) -> str:
+        """'put', 'drop' or 'coalesce' — or raise QueueFullError."""
+        q = self._queues.get(event.patient_id)
+        depth = q.qsize() if q else 0
+        if depth < self._max_queue_depth and self._in_flight < self._max_in_flight:
+            return "put"
+
+        reason = (
+            f"{depth} events queued (max {self._max_queue_depth})"
+            if depth >= self._max_queue_depth
+            else f"{self._in_flight} events in flight (max {self._max_in_flight})"
+        )
+        if self._policy == OverflowPolicy.DROP_OLDEST and depth:
+            return "drop"
+        if self._policy == OverflowPolicy.COALESCE and depth:
+            _, newest = q.peek_newest()
+            if _coalesce(newest, event) is not None:
+                return "coalesce"
+        self._metrics["rejected"] += 1
+        logger.warning(
+            "Rejecting %s for patient %s: %s",
+            event.event_type.value, event.patient_id, reason,
+        )
+        raise QueueFullError(event.patient_id, reason)
+
+    def _admit(self, offset: int | None, event: EventEnvelope, action: str) -> None:
+        pid = event.patient_id
+        q = self._queues.get(pid)
+        self._record_depth(q.qsize() if q else 0)
+        # The worker may have drained the queue while the journal append
+        # was awaited — then there is room again and a plain put is fine.
+        newest = q.peek_newest() if q else None
+        merged = _coalesce(newest[1], event) if action == "coalesce" and newest else None
+        if merged is not None:
+            # The merged item takes the newer offset: committing it covers both
+            q.replace_newest((offset, merged))
+            self._metrics["coalesced"] += 1
+            self._last_activity[pid] = datetime.now(timezone.utc)
+            return
+        if action == "drop" and newest is not None:
+            # A dropped journaled event is covered by the patient's next
+            # commit; it only replays if the process dies before then.
+            _, dropped = q.pop_oldest()
+            self._in_flight -= 1
+            self._metrics["dropped"] += 1
+            logger.warning(
+                "Dropped oldest %s (%s) for patient %s — queue full",
+                dropped.event_type.value, dropped.event_id, pid,
+            )
+        self._put(offset, event)
+        self._metrics["enqueued"] += 1
+
+    def _record_depth(self, depth: int) -> None:
+        hist = self._metrics["depth_at_enqueue"]
+        bucket = _depth_bucket(depth)
+        hist[bucket] = hist.get(bucket, 0) + 1
+
+    def _put(self, offset: int | None, event: EventEnvelope) -> None:
+        pid = event.patient_id
+        if pid not in self._queues:
+            self._create_queue(pid)
+
+        self._last_activity[pid] = datetime.now(timezone.utc)
+        self._queues[pid].put_nowait((offset, event))
+        self._in_flight += 1
+        self._metrics["peak_in_flight"] = max(self._metrics["peak_in_flight"], self._in_flight)
+        logger.debug("Enqueued %s for patient %s (depth=%d)",
+                      event.event_type.value, pid, self._queues[pid].qsize())
+        if self._scheduler == "pool" and pid not in self._busy:
+            self._busy.add(pid)
+            self._ready.put_nowait(pid)
+
     def _create_queue(self, patient_id: str) -> None:
-        q: asyncio.Queue[EventEnvelope] = asyncio.Queue()
+        # Limits are enforced in enqueue, so the queue itself is unbounded
+        q = PatientQueue()
         self._queues[patient_id] = q
         self._last_activity[patient_id] = datetime.now(timezone.utc)
+        if self._scheduler == "pool":
+            if not self._pool:
+                self._pool = [
+                    asyncio.create_task(self._pool_worker())
+                    for _ in range(self._pool_size)
+                ]
+            return
         worker = asyncio.create_task(self._worker_loop(patient_id))
         self._workers[patient_id] = worker
         logger.debug("Created queue + worker for patient %s", patient_id)
 
+    async def _pool_worker(self) -> None:
+        """Pool scheduler: take a ready patient, process one event, requeue."""
+        while True:
+            pid = await self._ready.get()
+            q = self._queues.get(pid)
+            if q is None or q.empty():
+                self._busy.discard(pid)
+                continue
+            offset, event = q.get_nowait()
+            try:
+                await self._process_item(pid, q, offset, event)
+            finally:
+                if q.empty():
+                    # Nothing left — release the patient and drop the queue
+                    self._busy.discard(pid)
+                    if self._queues.get(pid) is q:
+                        del self._queues[pid]
+                        self._last_activity.pop(pid, None)
+                else:
+                    self._ready.put_nowait(pid)
+
     async def _worker_loop(self, patient_id: str) -> None:
         """Process events for a single patient, one at a time."""
         q = self._queues.get(patient_id)
@@ -117,7 +438,7 @@ class PatientQueueManager:
 
         while self._running or not q.empty():
             try:
-                event = await asyncio.wait_for(q.get(), timeout=5.0)
+                offset, event = await asyncio.wait_for(q.get(), timeout=5.0)
             except asyncio.TimeoutError:
                 if not self._running:
                     break
@@ -125,37 +446,83 @@ class PatientQueueManager:
             except asyncio.CancelledError:
                 break
 
-            import time as _time
-            try:
-                self._last_activity[patient_id] = datetime.now(timezone.utc)
-                logger.info(
-                    "Processing %s for patient %s (queue depth=%d)",
-                    event.event_type.value, patient_id, q.qsize(),
-                )
-                t0 = _time.monotonic()
-                # Do NOT use asyncio.wait_for — cancelling a to_thread
-                # coroutine leaves zombie threads that hold GCS connections,
-                # causing cascading timeouts. Let events run to completion;
-                # individual GCS calls have their own HTTP timeouts.
-                await self._processor(event)
-                elapsed = _time.monotonic() - t0
-                logger.info(
-                    "Event %s for %s processed in %.2fs",
+            await self._process_item(patient_id, q, offset, event)
+
+    async def _process_item(
+        self, patient_id: str, q: PatientQueue, offset: int | None, event: EventEnvelope,
+    ) -> None:
+        """Process one dequeued item (plus its micro-batch) and commit it."""
+        import time as _time
+        try:
+            offset, event = await self._gather_batch(q, offset, event)
+            self._last_activity[patient_id] = datetime.now(timezone.utc)
+            logger.info(
+                "Processing %s for patient %s (queue depth=%d)",
+                event.event_type.value, patient_id, q.qsize(),
+            )
+            t0 = _time.monotonic()
+            # Do NOT use asyncio.wait_for — cancelling a to_thread
+            # coroutine leaves zombie threads that hold GCS connections,
+            # causing cascading timeouts. Let events run to completion;
+            # individual GCS calls have their own HTTP timeouts.
+            await self._processor(event)
+            elapsed = _time.monotonic() - t0
+            logger.info(
+                "Event %s for %s processed in %.2fs",
+                event.event_type.value, patient_id, elapsed,
+            )
+            if elapsed > 30:
+                logger.warning(
+                    "Slow event: %s for %s took %.1fs",
                     event.event_type.value, patient_id, elapsed,
                 )
-                if elapsed > 30:
-                    logger.warning(
-                        "Slow event: %s for %s took %.1fs",
-                        event.event_type.value, patient_id, elapsed,
-                    )
-            except Exception as exc:
-                logger.error(
-                    "Error processing %s for patient %s: %s",
-                    event.event_type.value, patient_id, exc,
-                    exc_info=True,
-                )
-            finally:
-                q.task_done()
+        except Exception as exc:
+            logger.error(
+                "Error processing %s for patient %s: %s",
+                event.event_type.value, patient_id, exc,
+                exc_info=True,
+            )
+        finally:
+            q.task_done()
+            self._in_flight -= 1
+        # Reached only when the event ran to completion — a cancelled
+        # worker skips this, so its event replays.  Failed events are
+        # committed too: agent errors are already in the DLQ, and
+        # replaying a poison event forever helps nobody.
+        if offset is not None:
+            await self._commit(patient_id, offset)
+
+    async def _gather_batch(
+        self, q: PatientQueue, offset: int | None, event: EventEnvelope,
+    ) -> tuple[int | None, EventEnvelope]:
+        """Merge USER_MESSAGEs that follow ``event`` within the batching window."""
+        if self._batch_window <= 0 or event.event_type != EventType.USER_MESSAGE:
+            return offset, event
+        count = 1
+        while count < self._batch_max_events and await q.wait_for_item(self._batch_window):
+            next_offset, nxt = q.peek_oldest()
+            merged = _coalesce(event, nxt)
+            if merged is None:
+                break  # a different event is next — keep the order
+            q.pop_oldest()
+            self._in_flight -= 1
+            # Committing the merged event must cover every part of it
+            offset = next_offset if next_offset is not None else offset
+            event = merged
+            count += 1
+        if count > 1:
+            self._metrics["batches"] += 1
+            self._metrics["batched_events"] += count
+            logger.info(
+                "Micro-batched %d USER_MESSAGEs for patient %s", count, event.patient_id,
+            )
+        return offset, event
+
+    async def _commit(self, patient_id: str, offset: int) -> None:
+        try:
+            await asyncio.to_thread(self._journal.commit, patient_id, offset)
+        except Exception as exc:
+            logger.error("Journal commit failed for %s: %s", patient_id, exc)
 
     async def _destroy_queue(self, patient_id: str) -> None:
         worker = self._workers.pop(patient_id, None)
@@ -165,7 +532,9 @@ class PatientQueueManager:
                 await worker
             except asyncio.CancelledError:
                 pass
-        self._queues.pop(patient_id, None)
+        q = self._queues.pop(patient_id, None)
+        if q is not None:
+            self._in_flight -= q.qsize()
         self._last_activity.pop(patient_id, None)
         logger.debug("Destroyed queue for patient %s", patient_id)
 
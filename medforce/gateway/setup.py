@@ -7,17 +7,21 @@ and the rest of the app continues working normally.
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
 
 from medforce.gateway.agents.booking_agent import BookingAgent
 from medforce.gateway.booking_registry import BookingRegistry
 from medforce.gateway.agents.clinical_agent import ClinicalAgent
 from medforce.gateway.agents.intake_agent import IntakeAgent
 from medforce.gateway.agents.monitoring_agent import MonitoringAgent
+from medforce.gateway.handlers.delivery_receipts import DeliveryReceiptHandler
 from medforce.gateway.handlers.gp_comms import GPCommunicationHandler
 from medforce.gateway.heartbeat import HeartbeatScheduler
 from medforce.gateway.channels import DispatcherRegistry
 from medforce.gateway.diary import DiaryStore
+from medforce.gateway.event_journal import EventJournal
 from medforce.gateway.dispatchers.test_harness_dispatcher import (
     TestHarnessDispatcher,
 )
@@ -25,9 +29,17 @@ from medforce.gateway.dispatchers.websocket_dispatcher import (
     WebSocketDispatcher,
 )
 from medforce.gateway.gateway import Gateway
+from medforce.gateway.outbox import Outbox
 from medforce.gateway.handlers.identity_resolver import IdentityResolver
+from medforce.gateway.identity_index import IdentityIndexLog
 from medforce.gateway.permissions import PermissionChecker
-from medforce.gateway.queue import PatientQueueManager
+from medforce.gateway.queue import (
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_MAX_QUEUE_DEPTH,
+    DEFAULT_POOL_SIZE,
+    PatientQueueManager,
+)
+from medforce.gateway.sharding import ShardRouter
 
 logger = logging.getLogger("gateway.setup")
 
@@ -38,6 +50,9 @@ _dispatcher_registry: DispatcherRegistry | None = None
 _identity_resolver: IdentityResolver | None = None
 _diary_store: DiaryStore | None = None
 _heartbeat_scheduler: HeartbeatScheduler | None = None
+_shard_router: ShardRouter | None = None
+_event_journal: EventJournal | None = None
+_outbox: Outbox | None = None
 
 
 async def initialize_gateway() -> Gateway:
@@ -47,35 +62,56 @@ async def initialize_gateway() -> Gateway:
     Returns the fully initialized Gateway instance.
     """
     global _gateway, _queue_manager, _dispatcher_registry
-    global _identity_resolver, _diary_store, _heartbeat_scheduler
+    global _identity_resolver, _diary_store, _heartbeat_scheduler, _shard_router
+    global _event_journal, _outbox
 
     logger.info("Initializing MedForce Gateway...")
 
-    # 1. GCS-backed diary store (eager init to avoid cold-start on first request)
-    from medforce.dependencies import get_gcs
-    gcs = get_gcs()
-    gcs._ensure_initialized()
-    _diary_store = DiaryStore(gcs)
+    # 0. Shard router — None unless GATEWAY_SHARDS lists 2+ shards
+    _shard_router = ShardRouter.from_env()
+
+    # 1. Diary store — GCS by default (eager init to avoid cold-start on
+    #    first request); DIARY_BACKEND=sqlite|file|memory runs offline,
+    #    without touching GCS at all (gcs stays None, so the booking
+    #    registry keeps its holds in memory and intake skips PDF reads).
+    gcs = None
+    if _diary_backend_kind() == "gcs":
+        from medforce.dependencies import get_gcs
+        gcs = get_gcs()
+    _diary_store = _build_diary_store(gcs)
 
     # 2. Dispatcher registry
-    _dispatcher_registry = DispatcherRegistry()
+    _dispatcher_registry = DispatcherRegistry.from_env()
     _dispatcher_registry.register(WebSocketDispatcher())
     _dispatcher_registry.register(TestHarnessDispatcher())
 
     # Phase 6: Register external channel dispatchers (conditional on config)
     _register_external_dispatchers(_dispatcher_registry)
 
-    # 3. Identity resolver
-    _identity_resolver = IdentityResolver()
+    # 3. Identity resolver — loaded from its persisted snapshot + log
+    #    (rebuilt once from a diary scan if none exists yet) and kept
+    #    current by every diary save.  IDENTITY_INDEX=0 keeps it in
+    #    memory only (rebuilt from the diaries at each start).
+    _identity_resolver = IdentityResolver(
+        IdentityIndexLog.from_env(_diary_store.backend),
+    )
+    await asyncio.to_thread(
+        _identity_resolver.load, rebuild=_diary_store.iter_all_diaries,
+    )
+    _diary_store.add_save_observer(_identity_resolver.observe_save)
 
     # 4. Permission checker
     permission_checker = PermissionChecker()
 
+    # 4b. Event journal — durable queue + DLQ when EVENT_JOURNAL_DIR is set
+    _event_journal = _build_event_journal(_shard_router)
+
     # 5. Gateway
     _gateway = Gateway(
         diary_store=_diary_store,
         dispatcher_registry=_dispatcher_registry,
         permission_checker=permission_checker,
+        event_journal=_event_journal,
     )
 
     # 6. Register agents
@@ -87,16 +123,49 @@ async def initialize_gateway() -> Gateway:
     _gateway.register_agent("booking", BookingAgent(booking_registry=booking_registry))
     _gateway.register_agent("gp_comms", GPCommunicationHandler())
     _gateway.register_agent("monitoring", MonitoringAgent())
+    _gateway.register_agent("delivery_receipts", DeliveryReceiptHandler())
 
     # 7. Queue manager (uses gateway.process_event as the processor)
-    _queue_manager = PatientQueueManager(processor=_gateway.process_event)
+    #    Starting it replays events a previous process journaled but
+    #    never finished.
+    #    QUEUE_MAX_DEPTH / QUEUE_MAX_IN_FLIGHT / QUEUE_OVERFLOW_POLICY
+    #    set the admission limits; QUEUE_BATCH_WINDOW_MS merges rapid
+    #    USER_MESSAGEs; QUEUE_SCHEDULER=pool swaps per-patient tasks for
+    #    QUEUE_POOL_SIZE shared workers (see queue.py).
+    _queue_manager = PatientQueueManager(
+        processor=_gateway.process_event,
+        journal=_event_journal,
+        max_queue_depth=int(os.getenv("QUEUE_MAX_DEPTH", str(DEFAULT_MAX_QUEUE_DEPTH))),
+        max_in_flight=int(os.getenv("QUEUE_MAX_IN_FLIGHT", str(DEFAULT_MAX_IN_FLIGHT))),
+        overflow_policy=os.getenv("QUEUE_OVERFLOW_POLICY", "reject"),
+        batch_window_ms=int(os.getenv("QUEUE_BATCH_WINDOW_MS", "0")),
+        scheduler=os.getenv("QUEUE_SCHEDULER", "per_patient"),
+        pool_size=int(os.getenv("QUEUE_POOL_SIZE", str(DEFAULT_POOL_SIZE))),
+    )
     await _queue_manager.start()
 
+    # 7b. Outbox — OUTBOX=1 / OUTBOX_PATH queue SMS and email for batched
+    #     background delivery; receipts come back through the patient queues.
+    _outbox = Outbox.from_env(
+        dispatchers=_dispatcher_registry.get,
+        receipt_sink=_queue_manager.enqueue,
+    )
+    if _outbox is not None:
+        _dispatcher_registry.attach_outbox(_outbox)
+        await _outbox.start()
+
     # 8. Heartbeat scheduler (fires HEARTBEAT events for monitored patients)
+    #    Heartbeat events go through the patient queues so they never
+    #    interleave with the patient's own messages.
     _heartbeat_scheduler = HeartbeatScheduler(
         processor=_gateway.process_event,
         diary_store=_diary_store,
+        queue_manager=_queue_manager,
+        max_concurrency=int(os.getenv("HEARTBEAT_CONCURRENCY", "8")),
+        owns=_shard_router.is_local if _shard_router else None,
     )
+    # Keep heartbeat deadlines current from every processed diary
+    _gateway.add_diary_observer(_heartbeat_scheduler.observe_diary)
     await _heartbeat_scheduler.start()
 
     logger.info(
@@ -109,13 +178,23 @@ async def initialize_gateway() -> Gateway:
 
 
 async def shutdown_gateway() -> None:
-    """Gracefully stop background tasks."""
+    """Gracefully stop background tasks and flush pending diary saves."""
     global _queue_manager, _heartbeat_scheduler
     if _heartbeat_scheduler:
         await _heartbeat_scheduler.stop()
     if _queue_manager:
         await _queue_manager.stop()
-        logger.info("Gateway shutdown complete")
+    if _outbox:
+        # After the queues drain, so their last responses are stored;
+        # undelivered entries stay in a persistent store for next start.
+        await _outbox.stop()
+    if _gateway:
+        await _gateway.flush_pending_saves()
+    if _shard_router:
+        await _shard_router.close()
+    if _event_journal:
+        _event_journal.close()
+    logger.info("Gateway shutdown complete")
 
 
 def get_gateway() -> Gateway | None:
@@ -142,6 +221,74 @@ def get_heartbeat_scheduler() -> HeartbeatScheduler | None:
     return _heartbeat_scheduler
 
 
+def get_shard_router() -> ShardRouter | None:
+    return _shard_router
+
+
+def _build_event_journal(shard_router: ShardRouter | None = None) -> EventJournal | None:
+    """
+    Build the event journal selected by EVENT_JOURNAL_DIR (unset → none).
+
+    A journal belongs to one process, so when sharded each shard uses
+    EVENT_JOURNAL_DIR/<shard id> — the shard launcher hands every shard
+    the same environment.  EVENT_JOURNAL_FSYNC=0 skips the fsync per
+    append (faster, but a machine crash can lose the last few
+    acknowledged events).
+    """
+    directory = os.getenv("EVENT_JOURNAL_DIR", "")
+    if not directory:
+        return None
+    if shard_router is not None:
+        directory = os.path.join(directory, shard_router.local_id)
+
+    from medforce.gateway.event_journal import SegmentFileJournal
+
+    fsync = os.getenv("EVENT_JOURNAL_FSYNC", "1").lower() not in ("0", "false", "no")
+    logger.info("Event journal at %s (fsync=%s)", directory, fsync)
+    return SegmentFileJournal(directory, fsync=fsync)
+
+
+def _build_diary_store(gcs) -> DiaryStore:
+    """
+    Build the DiaryStore for the backend selected by DIARY_BACKEND.
+
+      gcs (default)  — GCS bucket, generation-match locking
+      sqlite         — DIARY_BACKEND_PATH (default output/diaries.sqlite3)
+      file           — DIARY_BACKEND_PATH (default output/diaries/)
+      memory         — process-local, lost on restart
+
+    DIARY_DELTA_LOG=1 switches any backend to append-only delta saves,
+    compacted every DIARY_COMPACT_EVERY versions (default 20).
+    DIARY_CODEC picks the full-diary encoding (json, compact, msgpack,
+    with optional +zlib / +zstd); existing diaries load with any codec.
+
+    *gcs* is only used (and only needed) for the gcs backend.
+    """
+    from medforce.gateway.diary_backends import create_backend
+
+    delta_log = os.getenv("DIARY_DELTA_LOG", "").lower() in ("1", "true", "yes")
+    compact_every = int(os.getenv("DIARY_COMPACT_EVERY", "0")) or None
+    codec = os.getenv("DIARY_CODEC", "json")
+
+    kind = _diary_backend_kind()
+    if kind == "gcs":
+        gcs._ensure_initialized()
+        return DiaryStore(
+            gcs, delta_log=delta_log, compact_every=compact_every, codec=codec,
+        )
+
+    backend = create_backend(kind, path=os.getenv("DIARY_BACKEND_PATH", ""))
+    logger.info("Diary store using local %s backend", backend.name)
+    return DiaryStore(
+        backend=backend, delta_log=delta_log, compact_every=compact_every,
+        codec=codec,
+    )
+
+
+def _diary_backend_kind() -> str:
+    return os.getenv("DIARY_BACKEND", "gcs").lower()
+
+
 def _register_external_dispatchers(registry: DispatcherRegistry) -> None:
     """
     Register Phase 6 channel dispatchers based on environment variables.
@@ -149,8 +296,6 @@ def _register_external_dispatchers(registry: DispatcherRegistry) -> None:
     Each dispatcher is independently conditional — you can enable any
     combination of Dialogflow, Email, and Twilio.
     """
-    import os
-
     # Dialogflow CX → WhatsApp/SMS
     if os.getenv("DIALOGFLOW_PROJECT_ID"):
         try:
@@ -0,0 +1,71 @@
+"""
+Shard Launcher — run N gateway shards as local processes.
+
+Starts one uvicorn process per shard on consecutive ports, each with
+GATEWAY_SHARDS / GATEWAY_SHARD_SELF set so they agree on the
+consistent-hash ring (see medforce.gateway.sharding).  Put any load
+balancer in front; every shard accepts traffic and forwards to owners.
+
+    python -m medforce.gateway.shard_launcher --shards 4 --base-port 8081
+
+On a cluster, skip this and set the two variables on each node instead.
+Shards must share a diary backend (GCS, or DIARY_BACKEND=sqlite on one
+host); a per-process memory backend only works for throwaway testing.
+An EVENT_JOURNAL_DIR is not shared: each shard journals into its own
+subdirectory of it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+
+logger = logging.getLogger("gateway.shard_launcher")
+
+
+def shard_urls(host: str, base_port: int, shards: int) -> list[str]:
+    return [f"http://{host}:{base_port + i}" for i in range(shards)]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=8081)
+    parser.add_argument("--app", default="medforce.app:app")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    urls = shard_urls(args.host, args.base_port, args.shards)
+    procs: list[subprocess.Popen] = []
+    for i, url in enumerate(urls):
+        env = dict(os.environ)
+        env["GATEWAY_SHARDS"] = ",".join(urls)
+        env["GATEWAY_SHARD_SELF"] = url
+        cmd = [
+            sys.executable, "-m", "uvicorn", args.app,
+            "--host", args.host, "--port", str(args.base_port + i),
+        ]
+        procs.append(subprocess.Popen(cmd, env=env))
+        logger.info("Started shard %d/%d at %s (pid %d)", i + 1, len(urls), url, procs[-1].pid)
+
+    def _stop(signum, _frame):
+        for p in procs:
+            if p.poll() is None:
+                p.send_signal(signum)
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    exit_code = 0
+    for p in procs:
+        exit_code = p.wait() or exit_code
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
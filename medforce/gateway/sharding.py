@@ -0,0 +1,218 @@
+"""
+Gateway Sharding — consistent-hash patient_id onto N gateway processes.
+
+Each gateway process (a "shard") owns the patients that hash to it on a
+consistent-hash ring.  Only the owner processes a patient's events, so
+the per-patient PatientQueueManager still guarantees ordering and
+diaries never see cross-process write conflicts — while agent work for
+different patients spreads across every process (and core).
+
+Any shard can accept ingest traffic.  If the patient belongs elsewhere,
+the envelope is forwarded to the owner's /api/gateway/shard/ingest
+endpoint.  The ingress awaits the owner's acknowledgement, so a client
+sending messages in sequence sees them enqueued in that order.
+
+Configuration (same on every shard):
+
+  GATEWAY_SHARDS      comma-separated base URLs of all shards,
+                      e.g. "http://10.0.0.1:8080,http://10.0.0.2:8080"
+  GATEWAY_SHARD_SELF  this process's URL (must be one of the above)
+  GATEWAY_SHARD_VNODES  virtual nodes per shard (default 128)
+
+With fewer than two shards configured, sharding is disabled and every
+patient is local.  ``python -m medforce.gateway.shard_launcher`` starts
+N local shards with this wiring.  All shards must share a diary
+backend (GCS, or one SQLite file on the same host).
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import logging
+import os
+import re
+from typing import Any
+
+from medforce.gateway.events import EventEnvelope
+from medforce.gateway.queue import QueueFullError
+
+logger = logging.getLogger("gateway.sharding")
+
+DEFAULT_VNODES = 128
+
+# Header set on shard-to-shard requests (value: the sending shard)
+FORWARDED_HEADER = "X-Gateway-Forwarded-By"
+
+INGEST_PATH = "/api/gateway/shard/ingest"
+
+
+def _hash(value: str) -> int:
+    # Stable across processes and Python versions (unlike hash())
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes."""
+
+    def __init__(self, nodes: list[str], vnodes: int = DEFAULT_VNODES) -> None:
+        if not nodes:
+            raise ValueError("HashRing needs at least one node")
+        self._vnodes = vnodes
+        self._points: list[int] = []
+        self._owners: list[str] = []
+        self._nodes: list[str] = []
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> list[str]:
+        return list(self._nodes)
+
+    def add(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.append(node)
+        for i in range(self._vnodes):
+            point = _hash(f"{node}#{i}")
+            idx = bisect.bisect(self._points, point)
+            self._points.insert(idx, point)
+            self._owners.insert(idx, node)
+
+    def remove(self, node: str) -> None:
+        if node not in self._nodes:
+            return
+        self._nodes.remove(node)
+        keep = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in keep]
+        self._owners = [o for _, o in keep]
+
+    def owner(self, key: str) -> str:
+        idx = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[idx]
+
+
+class ShardForwardError(Exception):
+    """The owning shard could not be reached or rejected the event."""
+
+
+class ShardRouter:
+    """
+    Decides which shard owns a patient and forwards events to it.
+
+    Usage:
+        router = ShardRouter.from_env()      # None when not sharded
+        if router and not router.is_local(pid):
+            await router.forward(envelope)
+    """
+
+    def __init__(
+        self,
+        local_node: str,
+        nodes: list[str],
+        *,
+        vnodes: int = DEFAULT_VNODES,
+        timeout_seconds: float = 30.0,
+        client: Any = None,
+    ) -> None:
+        nodes = [n.rstrip("/") for n in nodes]
+        local_node = local_node.rstrip("/")
+        if local_node not in nodes:
+            raise ValueError(f"Local shard {local_node} is not in the shard list {nodes}")
+        self._local = local_node
+        self._ring = HashRing(nodes, vnodes=vnodes)
+        self._timeout = timeout_seconds
+        self._client = client  # httpx.AsyncClient, created lazily
+        self._metrics = {"local": 0, "forwarded": 0, "forward_failures": 0}
+
+    @classmethod
+    def from_env(cls) -> "ShardRouter | None":
+        nodes = [n.strip() for n in os.getenv("GATEWAY_SHARDS", "").split(",") if n.strip()]
+        if len(nodes) < 2:
+            return None
+        local = os.getenv("GATEWAY_SHARD_SELF", "")
+        if not local:
+            raise ValueError("GATEWAY_SHARDS is set but GATEWAY_SHARD_SELF is not")
+        vnodes = int(os.getenv("GATEWAY_SHARD_VNODES", str(DEFAULT_VNODES)))
+        router = cls(local, nodes, vnodes=vnodes)
+        logger.info("Sharding enabled: %s is 1 of %d shards", router.local_node, len(nodes))
+        return router
+
+    @property
+    def local_node(self) -> str:
+        return self._local
+
+    @property
+    def local_id(self) -> str:
+        """This shard's URL as a file-name-safe id ("127.0.0.1_8081")."""
+        return re.sub(r"[^A-Za-z0-9.-]+", "_", self._local.split("://", 1)[-1]).strip("_")
+
+    @property
+    def nodes(self) -> list[str]:
+        return self._ring.nodes
+
+    def owner(self, patient_id: str) -> str:
+        return self._ring.owner(patient_id)
+
+    def is_local(self, patient_id: str) -> bool:
+        return self.owner(patient_id) == self._local
+
+    async def forward(self, envelope: EventEnvelope, *, wait: bool = False) -> dict[str, Any]:
+        """
+        Send an event to its owning shard.
+
+        ``wait=False`` returns once the owner has enqueued it;
+        ``wait=True`` returns after the owner processed it (for webhooks
+        that reply synchronously) and includes the response messages.
+        """
+        owner = self.owner(envelope.patient_id)
+        if owner == self._local:
+            raise ValueError(f"{envelope.patient_id} is owned by this shard")
+
+        client = self._get_client()
+        try:
+            resp = await client.post(
+                owner + INGEST_PATH,
+                json={"event": envelope.model_dump(mode="json"), "wait": wait},
+                headers={FORWARDED_HEADER: self._local},
+            )
+        except Exception as exc:
+            raise self._forward_failed(envelope, owner, exc) from exc
+        if resp.status_code == 429:
+            # Owner's queue admission refused it — pass the 429 through
+            raise QueueFullError(envelope.patient_id, f"owner shard {owner} at capacity")
+        try:
+            resp.raise_for_status()
+        except Exception as exc:
+            raise self._forward_failed(envelope, owner, exc) from exc
+
+        self._metrics["forwarded"] += 1
+        return resp.json()
+
+    def _forward_failed(
+        self, envelope: EventEnvelope, owner: str, exc: Exception,
+    ) -> ShardForwardError:
+        self._metrics["forward_failures"] += 1
+        logger.error(
+            "Forwarding %s for %s to %s failed: %s",
+            envelope.event_type.value, envelope.patient_id, owner, exc,
+        )
+        return ShardForwardError(f"Shard {owner} unavailable: {exc}")
+
+    def record_local(self) -> None:
+        self._metrics["local"] += 1
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {**self._metrics, "local_node": self._local, "shards": len(self._ring.nodes)}
+
+    def _get_client(self):
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(timeout=self._timeout)
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,169 @@
+"""
+Tests for the bounded LRU/TTL cache and its use inside the Gateway.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from medforce.gateway.agents.base_agent import AgentResult
+from medforce.gateway.cache import BoundedCache
+from medforce.gateway.channels import DeliveryResult, DispatcherRegistry
+from medforce.gateway.diary import DiaryStore, PatientDiary
+from medforce.gateway.diary_backends import InMemoryDiaryBackend
+from medforce.gateway.events import EventEnvelope
+from medforce.gateway.gateway import Gateway, _approx_diary_bytes
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBoundedCache:
+
+    def test_get_set_and_stats(self):
+        cache = BoundedCache("t")
+        cache["a"] = 1
+        assert cache.get("a") == 1
+        assert cache.get("missing") is None
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+
+    def test_lru_eviction_by_count(self):
+        evicted = []
+        cache = BoundedCache(
+            "t", max_entries=2, on_evict=lambda k, v, r: evicted.append((k, r)),
+        )
+        cache["a"] = 1
+        cache["b"] = 2
+        cache.get("a")  # a is now most recently used
+        cache["c"] = 3
+        assert "b" not in cache
+        assert "a" in cache and "c" in cache
+        assert evicted == [("b", "capacity")]
+        assert cache.stats()["evictions"] == 1
+
+    def test_byte_budget(self):
+        cache = BoundedCache("t", max_entries=100, max_bytes=10, sizeof=len)
+        cache["a"] = "xxxx"
+        cache["b"] = "xxxx"
+        cache["c"] = "xxxx"
+        assert "a" not in cache
+        assert cache.stats()["approx_bytes"] == 8
+
+    def test_oversized_single_entry_is_kept(self):
+        cache = BoundedCache("t", max_bytes=2, sizeof=len)
+        cache["big"] = "xxxxxxxx"
+        assert cache.get("big") == "xxxxxxxx"
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        evicted = []
+        cache = BoundedCache(
+            "t", ttl_seconds=10, clock=clock,
+            on_evict=lambda k, v, r: evicted.append((k, r)),
+        )
+        cache["a"] = 1
+        clock.now = 5
+        assert cache.get("a") == 1
+        clock.now = 11
+        assert cache.get("a") is None
+        assert evicted == [("a", "expired")]
+        assert cache.stats()["expirations"] == 1
+
+    def test_expire_sweep(self):
+        clock = FakeClock()
+        cache = BoundedCache("t", ttl_seconds=1, clock=clock)
+        cache["a"] = 1
+        cache["b"] = 2
+        clock.now = 2
+        assert cache.expire() == 2
+        assert len(cache) == 0
+
+    def test_pop_does_not_fire_hook(self):
+        evicted = []
+        cache = BoundedCache("t", on_evict=lambda k, v, r: evicted.append(k))
+        cache["a"] = 1
+        assert cache.pop("a") == 1
+        assert cache.pop("a", "gone") == "gone"
+        assert evicted == []
+
+    def test_setdefault_and_resize(self):
+        cache = BoundedCache("t", sizeof=len)
+        seen = cache.setdefault("p", [])
+        seen.append(1)
+        seen.append(2)
+        cache.resize("p")
+        assert cache.stats()["approx_bytes"] == 2
+        assert cache.setdefault("p", []) is seen
+
+
+class TestGatewayBoundedState:
+
+    def _gateway(self, store, **kwargs):
+        registry = DispatcherRegistry()
+        disp = MagicMock()
+        disp.channel_name = "websocket"
+        disp.send = AsyncMock(return_value=DeliveryResult(
+            success=True, channel="websocket", recipient="patient",
+        ))
+        registry.register(disp)
+        gw = Gateway(diary_store=store, dispatcher_registry=registry, **kwargs)
+
+        class Echo:
+            agent_name = "echo"
+
+            async def process(self, event, diary):
+                return AgentResult(updated_diary=diary)
+
+        gw.register_agent("intake", Echo())
+        return gw
+
+    @pytest.mark.asyncio
+    async def test_diary_cache_is_bounded(self):
+        store = DiaryStore(backend=InMemoryDiaryBackend())
+        gw = self._gateway(store, diary_cache_max_entries=3)
+        for i in range(10):
+            await gw.process_event(EventEnvelope.user_message(f"PT-{i}", "hi"))
+        await gw.flush_pending_saves()
+
+        assert len(gw._diary_cache) == 3
+        caches = gw.get_metrics()["caches"]
+        assert caches["diary"]["evictions"] == 7
+        assert caches["diary"]["approx_bytes"] > 0
+        # Every evicted diary still reached the store
+        assert sorted(store.list_all_patient_ids()) == sorted(f"PT-{i}" for i in range(10))
+
+    @pytest.mark.asyncio
+    async def test_evicted_dirty_diary_is_flushed_before_reload(self):
+        import time
+
+        class SlowStore(DiaryStore):
+            def save(self, patient_id, diary, generation=None):
+                time.sleep(0.1)  # save still in flight when A is reloaded
+                return super().save(patient_id, diary, generation)
+
+        store = SlowStore(backend=InMemoryDiaryBackend())
+        gw = self._gateway(store, diary_cache_max_entries=1)
+
+        await gw.process_event(EventEnvelope.user_message("PT-A", "first"))
+        await gw.process_event(EventEnvelope.user_message("PT-B", "evicts A"))
+        await gw.process_event(EventEnvelope.user_message("PT-A", "second"))
+        await gw.flush_pending_saves()
+
+        diary, _ = store.load("PT-A")
+        messages = [c.message for c in diary.conversation_log]
+        assert messages == ["first", "second"]
+
+    def test_approx_diary_bytes_grows_with_content(self):
+        diary = PatientDiary.create_new("PT-SIZE")
+        base = _approx_diary_bytes((diary, 1))
+        from medforce.gateway.diary import ConversationEntry
+        for _ in range(50):
+            diary.add_conversation(ConversationEntry(message="x" * 100))
+        assert _approx_diary_bytes((diary, 1)) > base + 50 * 100
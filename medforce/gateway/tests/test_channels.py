@@ -11,18 +11,26 @@ Tests cover:
   - DeliveryResult model
   - Concrete dispatchers: WebSocketDispatcher, TestHarnessDispatcher
   - Patient scenarios with multi-channel responses
+  - Streaming responses (ResponseStream) and buffering channels
+  - Concurrent fan-out, per-channel limits, retry and circuit breaker
 """
 
+import asyncio
+
 import pytest
 
 from medforce.gateway.channels import (
     AgentResponse,
     ChannelDispatcher,
+    CircuitBreaker,
     ChannelIngest,
     DeliveryResult,
     DispatcherRegistry,
+    ResponseStream,
+    open_response_stream,
 )
 from medforce.gateway.dispatchers.test_harness_dispatcher import TestHarnessDispatcher
+from medforce.gateway.dispatchers.twilio_dispatcher import TwilioSMSDispatcher
 from medforce.gateway.dispatchers.websocket_dispatcher import WebSocketDispatcher
 from medforce.gateway.events import EventEnvelope, EventType, SenderRole
 
@@ -392,3 +400,302 @@ class TestMultiChannelScenarios:
         # Helper got stored in test harness
         stored = th.get_responses("PT-HELEN")
         assert len(stored) == 1
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  Streaming Responses
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class RecordingDispatcher(ChannelDispatcher):
+    """Records chunk / final / cancel events in arrival order."""
+
+    def __init__(self, name: str, streaming: bool) -> None:
+        self.channel_name = name
+        self.supports_streaming = streaming
+        self.events: list[tuple[str, str]] = []
+
+    async def send(self, response):
+        self.events.append(("final", response.message))
+        return DeliveryResult(success=True, channel=self.channel_name, recipient=response.recipient)
+
+    async def send_chunks(self, stream):
+        async for chunk in stream:
+            self.events.append(("chunk", chunk))
+
+    async def cancel_stream(self, stream):
+        self.events.append(("cancel", stream.stream_id))
+
+
+class TestResponseStream:
+
+    @pytest.mark.asyncio
+    async def test_iterates_chunks_as_fed(self):
+        stream = ResponseStream("patient", "websocket")
+        received = []
+
+        async def reader():
+            async for chunk in stream:
+                received.append(chunk)
+
+        task = asyncio.create_task(reader())
+        stream.feed("Hello ")
+        await asyncio.sleep(0)
+        assert received == ["Hello "]
+        stream.feed("there")
+        stream.close()
+        await task
+        assert received == ["Hello ", "there"]
+        assert stream.text == "Hello there"
+
+    @pytest.mark.asyncio
+    async def test_late_reader_replays_and_feed_after_close_ignored(self):
+        stream = ResponseStream("patient", "websocket")
+        stream.feed("a")
+        stream.feed("b")
+        stream.close()
+        stream.feed("c")
+        assert await stream.collect() == "ab"
+
+    def test_stream_excluded_from_serialisation(self):
+        r = AgentResponse(
+            recipient="patient", channel="websocket", message="Hi",
+            stream=ResponseStream("patient", "websocket"),
+        )
+        assert "stream" not in r.model_dump()
+        assert AgentResponse.model_validate_json(r.model_dump_json()).stream is None
+
+
+class TestStreamingDispatch:
+
+    @pytest.mark.asyncio
+    async def test_chunks_reach_streaming_channel_before_final(self):
+        reg = DispatcherRegistry()
+        ws = RecordingDispatcher("websocket", streaming=True)
+        reg.register(ws)
+
+        with reg.streaming() as published:
+            stream = open_response_stream("patient", "websocket")
+            stream.feed("Thanks, ")
+            await asyncio.sleep(0)
+            assert ws.events == [("chunk", "Thanks, ")]
+            stream.feed("noted.")
+        response = AgentResponse(
+            recipient="patient", channel="websocket", message="Thanks, noted.", stream=stream,
+        )
+        result = await reg.dispatch(response)
+        await reg.release_streams(published)
+
+        assert result.success
+        assert ws.events == [("chunk", "Thanks, "), ("chunk", "noted."), ("final", "Thanks, noted.")]
+        assert response.metadata["stream_id"] == stream.stream_id
+
+    @pytest.mark.asyncio
+    async def test_non_streaming_channel_gets_only_final_message(self):
+        reg = DispatcherRegistry()
+        sms = RecordingDispatcher("sms", streaming=False)
+        reg.register(sms)
+
+        with reg.streaming() as published:
+            stream = open_response_stream("patient", "sms")
+            stream.feed("partial")
+        await reg.dispatch(AgentResponse(
+            recipient="patient", channel="sms", message="complete text", stream=stream,
+        ))
+        await reg.release_streams(published)
+        assert sms.events == [("final", "complete text")]
+
+    @pytest.mark.asyncio
+    async def test_unsent_stream_is_cancelled(self):
+        reg = DispatcherRegistry()
+        ws = RecordingDispatcher("websocket", streaming=True)
+        reg.register(ws)
+
+        with reg.streaming() as published:
+            stream = open_response_stream("patient", "websocket")
+            stream.feed("draft")
+        await reg.release_streams(published)
+        assert ws.events == [("chunk", "draft"), ("cancel", stream.stream_id)]
+
+    @pytest.mark.asyncio
+    async def test_no_sink_outside_streaming_scope(self):
+        reg = DispatcherRegistry()
+        ws = RecordingDispatcher("websocket", streaming=True)
+        reg.register(ws)
+        stream = open_response_stream("patient", "websocket")
+        stream.feed("buffered")
+        await reg.dispatch(AgentResponse(
+            recipient="patient", channel="websocket", message="buffered", stream=stream,
+        ))
+        assert ws.events == [("final", "buffered")]
+
+    @pytest.mark.asyncio
+    async def test_test_harness_exposes_drafts(self):
+        reg = DispatcherRegistry()
+        th = TestHarnessDispatcher()
+        reg.register(th)
+
+        with reg.streaming() as published:
+            stream = open_response_stream("patient", "test_harness", {"patient_id": "PT-S"})
+            stream.feed("How are ")
+            await asyncio.sleep(0)
+            assert th.get_drafts("PT-S")[0]["text"] == "How are "
+        await reg.dispatch(AgentResponse(
+            recipient="patient", channel="test_harness", message="How are you?",
+            metadata={"patient_id": "PT-S"}, stream=stream,
+        ))
+        await reg.release_streams(published)
+        assert th.get_drafts("PT-S") == []
+        assert th.get_responses("PT-S")[0].message == "How are you?"
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  Concurrent Dispatch, Retry and Circuit Breaker
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class SlowDispatcher(ChannelDispatcher):
+    """Sleeps per send; fails the first ``failures`` sends."""
+
+    def __init__(self, name: str, delay: float = 0.05, failures: int = 0) -> None:
+        self.channel_name = name
+        self.delay = delay
+        self.failures = failures
+        self.sent: list[str] = []
+        self.running = 0
+        self.peak = 0
+
+    async def send(self, response):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        if self.failures > 0:
+            self.failures -= 1
+            return DeliveryResult(
+                success=False, channel=self.channel_name,
+                recipient=response.recipient, error="provider 503",
+            )
+        self.sent.append(response.message)
+        return DeliveryResult(success=True, channel=self.channel_name, recipient=response.recipient)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestConcurrentDispatch:
+
+    @pytest.mark.asyncio
+    async def test_fan_out_runs_lanes_concurrently_and_keeps_order(self):
+        reg = DispatcherRegistry()
+        sms, email = SlowDispatcher("sms", delay=0.1), SlowDispatcher("email", delay=0.1)
+        reg.register(sms)
+        reg.register(email)
+        responses = [
+            AgentResponse(recipient="patient", channel="sms", message="1"),
+            AgentResponse(recipient="gp:Dr.Patel", channel="email", message="gp"),
+            AgentResponse(recipient="patient", channel="sms", message="2"),
+            AgentResponse(recipient="helper:Sarah", channel="sms", message="helper"),
+        ]
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await reg.dispatch_all(responses)
+        elapsed = loop.time() - started
+
+        assert [r.recipient for r in results] == [r.recipient for r in responses]
+        assert all(r.success for r in results)
+        # Patient lane is two sends long; everything else overlaps with it
+        # (sequential dispatch would take four)
+        assert elapsed < 3.5 * sms.delay
+        assert sms.sent.index("1") < sms.sent.index("2")
+
+    @pytest.mark.asyncio
+    async def test_per_channel_concurrency_limit(self):
+        reg = DispatcherRegistry(channel_concurrency=2)
+        sms = SlowDispatcher("sms", delay=0.01)
+        reg.register(sms)
+        await reg.dispatch_all([
+            AgentResponse(recipient=f"helper:{i}", channel="sms", message=str(i))
+            for i in range(6)
+        ])
+        assert sms.peak == 2
+        assert len(sms.sent) == 6
+
+    @pytest.mark.asyncio
+    async def test_retry_then_success(self):
+        reg = DispatcherRegistry(max_attempts=3, retry_base_delay=0.001)
+        sms = SlowDispatcher("sms", delay=0, failures=2)
+        reg.register(sms)
+        result = await reg.dispatch(AgentResponse(recipient="patient", channel="sms", message="hi"))
+        assert result.success
+        stats = reg.get_metrics()["channels"]["sms"]
+        assert stats["retries"] == 2
+        assert stats["sent"] == 1
+        assert stats["breaker"] == "closed"
+
+    def test_backoff_is_exponential_with_jitter(self):
+        reg = DispatcherRegistry(retry_base_delay=1.0, retry_max_delay=3.0)
+        for _ in range(20):
+            assert 0.5 <= reg._backoff(1) <= 1.5
+            assert 1.0 <= reg._backoff(2) <= 3.0
+            assert 1.5 <= reg._backoff(5) <= 4.5  # capped at retry_max_delay
+
+    @pytest.mark.asyncio
+    async def test_circuit_opens_and_short_circuits(self):
+        clock = FakeClock()
+        reg = DispatcherRegistry(
+            max_attempts=1, breaker_threshold=2, breaker_cooldown=30, clock=clock,
+        )
+        sms = SlowDispatcher("sms", delay=0, failures=2)
+        reg.register(sms)
+        msg = AgentResponse(recipient="patient", channel="sms", message="hi")
+
+        await reg.dispatch(msg)
+        await reg.dispatch(msg)
+        blocked = await reg.dispatch(msg)
+        assert not blocked.success
+        assert "Circuit open" in blocked.error
+        assert reg.get_metrics()["channels"]["sms"]["short_circuited"] == 1
+
+        # After the cooldown one trial goes through and closes the breaker
+        clock.now += 31
+        assert (await reg.dispatch(msg)).success
+        assert reg.get_metrics()["channels"]["sms"]["breaker"] == "closed"
+
+    @pytest.mark.asyncio
+    async def test_recipient_errors_do_not_trip_breaker(self):
+        reg = DispatcherRegistry(max_attempts=2, breaker_threshold=2, retry_base_delay=0.001)
+        reg.register(TwilioSMSDispatcher(account_sid="", auth_token=""))  # stub mode
+
+        for _ in range(3):
+            missing = await reg.dispatch(
+                AgentResponse(recipient="patient", channel="sms", message="hi"),
+            )
+            assert missing.error == "No recipient phone number"
+            assert not missing.retryable
+
+        ok = await reg.dispatch(AgentResponse(
+            recipient="patient", channel="sms", message="hi",
+            metadata={"phone": "+447700900123"},
+        ))
+        assert ok.success
+        stats = reg.get_metrics()["channels"]["sms"]
+        assert stats["rejected"] == 3
+        assert stats["retries"] == 0
+        assert stats["breaker"] == "closed"
+
+    def test_half_open_allows_single_trial(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(threshold=1, cooldown=10, clock=clock)
+        breaker.record_failure()
+        assert breaker.state == "open"
+        clock.now += 10
+        assert breaker.allow() is True
+        assert breaker.allow() is False
+        breaker.record_failure()
+        assert breaker.state == "open"
@@ -0,0 +1,130 @@
+"""
+Tests for the cohort re-scoring job.
+"""
+
+import json
+
+import pytest
+
+from medforce.gateway.cohort_rescore import StoreSpec, build_rule_engine, main, run_rescore
+from medforce.gateway.diary import ClinicalDocument, DiaryStore, PatientDiary, RiskLevel
+from medforce.gateway.diary_backends import InMemoryDiaryBackend, SQLiteDiaryBackend
+
+# Bilirubin 30 µmol/L: MEDIUM today; HIGH if the severe threshold drops to 25
+TIGHTER_BILIRUBIN = {"threshold_overrides": {"Bilirubin > 50 µmol/L (severe)": 25}}
+
+
+def _seed(store: DiaryStore, n: int) -> None:
+    for i in range(n):
+        diary = PatientDiary.create_new(f"PT-{i}")
+        diary.clinical.risk_level = RiskLevel.MEDIUM
+        diary.clinical.documents.append(ClinicalDocument(
+            type="lab_results",
+            processed=True,
+            # Even patients have bilirubin 30, odd ones 10
+            extracted_values={"bilirubin": 30 if i % 2 == 0 else 10},
+        ))
+        store.save(f"PT-{i}", diary)
+
+
+class TestRuleSpec:
+
+    def test_empty_spec_is_current_rules(self):
+        engine = build_rule_engine({})
+        assert [h.description for h in engine.evaluate_labs({"ALT": 600})] == [
+            "ALT > 500 U/L", "ALT > 200 U/L",
+        ]
+
+    def test_threshold_override(self):
+        engine = build_rule_engine(TIGHTER_BILIRUBIN)
+        assert engine.evaluate_labs({"bilirubin": 30})[0].risk == RiskLevel.HIGH
+
+    def test_replacement_rules(self):
+        engine = build_rule_engine({
+            "hard_rules": [{
+                "param": "ALT", "op": ">", "threshold": 100,
+                "risk": "high", "description": "ALT > 100",
+            }],
+            "keyword_rules": [{"keyword": "Wheeze", "risk": "low", "description": "Wheeze"}],
+        })
+        assert [h.description for h in engine.evaluate_labs({"alt": 150})] == ["ALT > 100"]
+        assert [h.description for h in engine.match_keywords(["some wheeze"])] == ["Wheeze"]
+
+    @pytest.mark.parametrize("spec", [
+        {"threshold_overrides": {"No such rule": 1}},
+        {"hard_rules": [{"param": "alt", "op": ">=", "threshold": 1,
+                         "risk": "high", "description": "x"}]},
+        {"thresholds": {}},
+    ])
+    def test_invalid_spec_rejected(self, spec):
+        with pytest.raises(ValueError):
+            build_rule_engine(spec)
+
+
+class TestRunRescore:
+
+    def test_in_process_diff(self, tmp_path):
+        store = DiaryStore(backend=InMemoryDiaryBackend())
+        _seed(store, 10)
+        changes_path = tmp_path / "changes.jsonl"
+        report = run_rescore(
+            TIGHTER_BILIRUBIN,
+            store=store,
+            store_spec=StoreSpec(kind="memory"),
+            chunk_size=3,
+            sample_limit=2,
+            changes_path=str(changes_path),
+        )
+        assert report["patients"] == report["scored"] == 10
+        assert report["changed"] == 5
+        assert report["transitions"] == {"medium->high": 5}
+        assert report["levels"]["candidate"]["high"] == 5
+        assert len(report["changes"]) == 2
+        rows = [json.loads(line) for line in changes_path.read_text().splitlines()]
+        assert sorted(r["patient_id"] for r in rows) == [f"PT-{i}" for i in range(0, 10, 2)]
+        assert rows[0]["stored"] == "medium"
+        assert "deterministic_rule" in rows[0]["candidate_method"]
+
+    def test_unchanged_rules_report_no_changes(self):
+        store = DiaryStore(backend=InMemoryDiaryBackend())
+        _seed(store, 4)
+        report = run_rescore(None, store=store, store_spec=StoreSpec(kind="memory"))
+        assert report["changed"] == 0
+        assert report["transitions"] == {}
+
+    def test_process_pool_matches_in_process(self, tmp_path):
+        spec = StoreSpec(kind="sqlite", path=str(tmp_path / "diaries.sqlite3"))
+        store = spec.open()
+        _seed(store, 12)
+        parallel = run_rescore(TIGHTER_BILIRUBIN, store_spec=spec, workers=2, chunk_size=2)
+        serial = run_rescore(TIGHTER_BILIRUBIN, store_spec=spec, workers=1, chunk_size=2)
+        assert parallel["workers"] == 2
+        for key in ("scored", "changed", "transitions", "levels"):
+            assert parallel[key] == serial[key]
+        store.backend.close()
+
+    def test_memory_backend_forces_in_process(self):
+        store = DiaryStore(backend=InMemoryDiaryBackend())
+        _seed(store, 2)
+        report = run_rescore(
+            TIGHTER_BILIRUBIN, store=store, store_spec=StoreSpec(kind="memory"), workers=4,
+        )
+        assert report["workers"] == 1
+        assert report["changed"] == 1
+
+
+class TestCli:
+
+    def test_cli_writes_report(self, tmp_path, monkeypatch):
+        db = tmp_path / "diaries.sqlite3"
+        store = DiaryStore(backend=SQLiteDiaryBackend(str(db)))
+        _seed(store, 4)
+        rules = tmp_path / "rules.json"
+        rules.write_text(json.dumps(TIGHTER_BILIRUBIN))
+        monkeypatch.setenv("DIARY_BACKEND", "sqlite")
+        monkeypatch.setenv("DIARY_BACKEND_PATH", str(db))
+        report_path = tmp_path / "report.json"
+        assert main([
+            "--rules", str(rules), "--workers", "1", "--report", str(report_path),
+        ]) == 0
+        assert json.loads(report_path.read_text())["changed"] == 2
@@ -575,6 +575,74 @@ class TestPatientScenarios:
         assert len(uploaders) == 2
 
 
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  Copy-on-write snapshots
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class TestDiarySnapshot:
+
+    def _diary(self):
+        diary = PatientDiary.create_new("PT-SNAP")
+        diary.intake.mark_field_collected("name", "Snap Patient")
+        for i in range(5):
+            diary.add_conversation(ConversationEntry(message=f"m{i}"))
+        return diary
+
+    def test_snapshot_equals_source(self):
+        diary = self._diary()
+        snap = diary.snapshot()
+        assert snap == diary
+        assert snap.model_dump() == diary.model_dump()
+
+    def test_snapshot_is_isolated_from_source(self):
+        diary = self._diary()
+        snap = diary.snapshot()
+        diary.intake.name = "Changed"
+        diary.conversation_log[0].message = "changed"
+        assert snap.intake.name == "Snap Patient"
+        assert snap.conversation_log[0].message == "m0"
+
+    def test_unchanged_sections_are_shared(self):
+        prev = self._diary().snapshot()
+        working = prev.model_copy(deep=True)
+        working.add_conversation(ConversationEntry(message="new"))
+        working.clinical.chief_complaint = "jaundice"
+
+        snap = working.snapshot(prev)
+        assert snap.intake is prev.intake
+        assert snap.monitoring is prev.monitoring
+        assert snap.clinical is not prev.clinical
+        assert snap.clinical.chief_complaint == "jaundice"
+        # Existing conversation entries shared, new one copied
+        assert all(a is b for a, b in zip(snap.conversation_log[:5], prev.conversation_log))
+        assert snap.conversation_log[5].message == "new"
+        # Header is always private to the snapshot
+        assert snap.header is not prev.header
+
+    def test_sharing_survives_log_truncation(self):
+        prev = PatientDiary.create_new("PT-TRUNC")
+        for i in range(PatientDiary.MAX_CONVERSATION_LOG):
+            prev.add_conversation(ConversationEntry(message=f"m{i}"))
+        prev = prev.snapshot()
+        working = prev.model_copy(deep=True)
+        working.add_conversation(ConversationEntry(message="overflow"))
+
+        snap = working.snapshot(prev)
+        assert len(snap.conversation_log) == PatientDiary.MAX_CONVERSATION_LOG
+        assert snap.conversation_log[0] is prev.conversation_log[1]
+        assert snap.conversation_log[-1].message == "overflow"
+
+    def test_snapshot_round_trips_through_json(self):
+        prev = self._diary().snapshot()
+        working = prev.model_copy(deep=True)
+        working.header.current_phase = Phase.CLINICAL
+        snap = working.snapshot(prev)
+        restored = PatientDiary.model_validate(json.loads(snap.model_dump_json()))
+        assert restored.header.current_phase == Phase.CLINICAL
+        assert restored == working
+
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 #  DiaryStore (Mocked GCS)
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -605,6 +673,10 @@ class TestDiaryStore:
                     raise Exception("NotFound")
                 return gcs._storage[self.path]
 
+            def download_as_bytes(self, timeout=None):
+                content = self.download_as_text(timeout)
+                return content.encode() if isinstance(content, str) else content
+
             def upload_from_string(self, content, content_type=None, if_generation_match=None, timeout=None):
                 if if_generation_match is not None:
                     existing_gen = gcs._generations.get(self.path, 0)
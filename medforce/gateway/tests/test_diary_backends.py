@@ -0,0 +1,215 @@
+"""
+Tests for the pluggable DiaryStore backends.
+
+Every backend must honour the same contract as GCS:
+  - read of a missing key raises DiaryNotFoundError
+  - writes bump the generation
+  - generation-match writes fail with DiaryConcurrencyError on mismatch
+  - generation 0 means "must not exist yet"
+"""
+
+import threading
+
+import pytest
+
+from medforce.gateway.diary import (
+    DiaryConcurrencyError,
+    DiaryNotFoundError,
+    DiaryStore,
+    Phase,
+    RiskLevel,
+)
+from medforce.gateway.diary_backends import (
+    InMemoryDiaryBackend,
+    LocalFileDiaryBackend,
+    SQLiteDiaryBackend,
+    create_backend,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite", "file"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryDiaryBackend()
+    if request.param == "sqlite":
+        return SQLiteDiaryBackend(str(tmp_path / "diaries.sqlite3"))
+    return LocalFileDiaryBackend(str(tmp_path / "diaries"))
+
+
+@pytest.fixture
+def store(backend):
+    return DiaryStore(backend=backend)
+
+
+class TestBackendContract:
+
+    def test_read_missing_raises(self, backend):
+        with pytest.raises(DiaryNotFoundError):
+            backend.read("patient_diaries/patient_X/diary.json")
+
+    def test_write_bumps_generation(self, backend):
+        key = "patient_diaries/patient_A/diary.json"
+        g1 = backend.write(key, "one")
+        g2 = backend.write(key, "two", generation=g1)
+        assert g2 > g1
+        content, gen = backend.read(key)
+        assert content == "two"
+        assert gen == g2
+
+    def test_binary_round_trip(self, backend):
+        key = "patient_diaries/patient_A/diary.json"
+        payload = b"MFDY\x01\x10\x00\xff\xfe binary"
+        backend.write(key, payload)
+        content, gen = backend.read_bytes(key)
+        assert content == payload
+        assert gen == 1
+
+    def test_read_bytes_of_text(self, backend):
+        key = "patient_diaries/patient_A/diary.json"
+        backend.write(key, "{\"a\": 1}")
+        assert backend.read_bytes(key)[0] == b"{\"a\": 1}"
+
+    def test_stale_generation_conflicts(self, backend):
+        key = "patient_diaries/patient_A/diary.json"
+        g1 = backend.write(key, "one")
+        backend.write(key, "two", generation=g1)
+        with pytest.raises(DiaryConcurrencyError):
+            backend.write(key, "three", generation=g1)
+        assert backend.read(key)[0] == "two"
+
+    def test_generation_zero_means_create_only(self, backend):
+        key = "patient_diaries/patient_A/diary.json"
+        backend.write(key, "first", generation=0)
+        with pytest.raises(DiaryConcurrencyError):
+            backend.write(key, "second", generation=0)
+
+    def test_force_write_ignores_generation(self, backend):
+        key = "patient_diaries/patient_A/diary.json"
+        backend.write(key, "one")
+        backend.write(key, "two")
+        assert backend.read(key)[0] == "two"
+
+    def test_exists_and_delete(self, backend):
+        key = "patient_diaries/patient_A/diary.json"
+        assert not backend.exists(key)
+        backend.write(key, "x")
+        assert backend.exists(key)
+        assert backend.delete(key) is True
+        assert not backend.exists(key)
+        assert backend.delete(key) is False
+
+    def test_list_children(self, backend):
+        backend.write("patient_diaries/patient_A/diary.json", "a")
+        backend.write("patient_diaries/patient_B/diary.json", "b")
+        backend.write("other/patient_C/diary.json", "c")
+        children = backend.list_children("patient_diaries")
+        assert sorted(children) == ["patient_A/", "patient_B/"]
+
+    def test_concurrent_writers_one_wins(self, backend):
+        key = "patient_diaries/patient_A/diary.json"
+        gen = backend.write(key, "base")
+        outcomes: list[str] = []
+
+        def _writer(n):
+            try:
+                backend.write(key, f"writer-{n}", generation=gen)
+                outcomes.append("ok")
+            except DiaryConcurrencyError:
+                outcomes.append("conflict")
+
+        threads = [threading.Thread(target=_writer, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert outcomes.count("ok") == 1
+        assert outcomes.count("conflict") == 7
+
+
+class TestDiaryStoreOnBackends:
+
+    def test_create_and_load(self, store):
+        diary, gen = store.create("PT-1")
+        loaded, loaded_gen = store.load("PT-1")
+        assert loaded.header.patient_id == "PT-1"
+        assert loaded_gen == gen
+
+    def test_load_missing_raises(self, store):
+        with pytest.raises(DiaryNotFoundError):
+            store.load("PT-NOPE")
+
+    def test_save_round_trip(self, store):
+        diary, gen = store.create("PT-2")
+        diary.header.current_phase = Phase.CLINICAL
+        diary.clinical.risk_level = RiskLevel.HIGH
+        store.save("PT-2", diary, generation=gen)
+        loaded, _ = store.load("PT-2")
+        assert loaded.header.current_phase == Phase.CLINICAL
+        assert loaded.clinical.risk_level == RiskLevel.HIGH
+
+    def test_save_with_stale_generation_raises(self, store):
+        diary, gen = store.create("PT-3")
+        store.save("PT-3", diary, generation=gen)
+        with pytest.raises(DiaryConcurrencyError):
+            store.save("PT-3", diary, generation=gen)
+
+    def test_list_monitoring_patients(self, store):
+        d1, _ = store.create("PT-MON")
+        d1.header.current_phase = Phase.MONITORING
+        d1.monitoring.monitoring_active = True
+        store.save("PT-MON", d1)
+        store.create("PT-INTAKE")
+        assert store.list_monitoring_patients() == ["PT-MON"]
+        assert sorted(store.list_all_patient_ids()) == ["PT-INTAKE", "PT-MON"]
+
+
+class TestBackendPersistence:
+
+    def test_sqlite_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "d.sqlite3")
+        DiaryStore(backend=SQLiteDiaryBackend(path)).create("PT-P")
+        reopened = DiaryStore(backend=SQLiteDiaryBackend(path))
+        diary, gen = reopened.load("PT-P")
+        assert diary.header.patient_id == "PT-P"
+        assert gen == 1
+
+    def test_file_survives_reopen(self, tmp_path):
+        root = str(tmp_path / "diaries")
+        DiaryStore(backend=LocalFileDiaryBackend(root)).create("PT-F")
+        diary, gen = DiaryStore(backend=LocalFileDiaryBackend(root)).load("PT-F")
+        assert diary.header.patient_id == "PT-F"
+        assert gen == 1
+
+    def test_file_backend_rejects_path_escape(self, tmp_path):
+        backend = LocalFileDiaryBackend(str(tmp_path / "diaries"))
+        with pytest.raises(ValueError):
+            backend.write("../escape.json", "x")
+
+
+class TestCreateBackend:
+
+    def test_known_kinds(self, tmp_path):
+        assert create_backend("memory").name == "memory"
+        assert create_backend("sqlite", path=str(tmp_path / "a.db")).name == "sqlite"
+        assert create_backend("file", path=str(tmp_path / "f")).name == "file"
+
+    def test_gcs_requires_manager(self):
+        with pytest.raises(ValueError):
+            create_backend("gcs")
+
+    def test_unknown_kind(self):
+        with pytest.raises(ValueError):
+            create_backend("redis")
+
+    def test_store_requires_gcs_or_backend(self):
+        with pytest.raises(ValueError):
+            DiaryStore()
+
+    def test_local_backend_store_needs_no_gcs(self, monkeypatch):
+        from medforce.gateway.setup import _build_diary_store
+
+        monkeypatch.setenv("DIARY_BACKEND", "memory")
+        store = _build_diary_store(None)
+        assert store.backend.name == "memory"
+        store.save("PT-1", store.create("PT-1")[0])
+        assert store.exists("PT-1")
@@ -0,0 +1,86 @@
+"""
+Tests for the selectable diary encodings and their version header.
+"""
+
+import pytest
+
+from medforce.gateway import diary_codec
+from medforce.gateway.diary import ConversationEntry, DiaryStore, PatientDiary, Phase
+from medforce.gateway.diary_backends import InMemoryDiaryBackend
+from medforce.gateway.diary_codec import (
+    MAGIC,
+    DiaryCodecError,
+    available_codecs,
+    decode,
+    encode,
+)
+
+
+def _diary():
+    diary = PatientDiary.create_new("PT-CODEC")
+    diary.header.current_phase = Phase.CLINICAL
+    diary.intake.mark_field_collected("name", "Zoë O'Brien")
+    for i in range(20):
+        diary.add_conversation(ConversationEntry(message=f"message {i} ✓"))
+    return diary
+
+
+class TestDiaryCodec:
+
+    @pytest.mark.parametrize("codec", available_codecs())
+    def test_round_trip(self, codec):
+        diary = _diary()
+        blob = encode(diary, codec)
+        assert decode(blob) == diary
+        if codec != "json":
+            assert blob.startswith(MAGIC)
+
+    def test_compact_is_smaller_than_legacy(self):
+        diary = _diary()
+        assert len(encode(diary, "compact")) < len(encode(diary, "json").encode())
+        assert len(encode(diary, "compact+zlib")) < len(encode(diary, "compact"))
+
+    def test_legacy_json_bytes_decode(self):
+        diary = _diary()
+        assert decode(diary.model_dump_json(indent=2).encode()) == diary
+
+    def test_unknown_codec_rejected(self):
+        with pytest.raises(DiaryCodecError):
+            encode(_diary(), "yaml")
+        with pytest.raises(DiaryCodecError):
+            encode(_diary(), "json+zlib")
+
+    def test_bad_header_version(self):
+        blob = bytearray(encode(_diary(), "compact"))
+        blob[len(MAGIC)] = 99
+        with pytest.raises(DiaryCodecError):
+            decode(bytes(blob))
+
+    def test_missing_optional_dependency(self, monkeypatch):
+        monkeypatch.setattr(diary_codec, "ZSTD_AVAILABLE", False)
+        with pytest.raises(DiaryCodecError):
+            encode(_diary(), "compact+zstd")
+
+
+class TestDiaryStoreCodec:
+
+    def test_switching_codec_keeps_old_diaries_readable(self):
+        backend = InMemoryDiaryBackend()
+        legacy = DiaryStore(backend=backend)
+        diary = _diary()
+        gen = legacy.save("PT-CODEC", diary)
+
+        compact = DiaryStore(backend=backend, codec="compact+zlib")
+        loaded, loaded_gen = compact.load("PT-CODEC")
+        assert loaded_gen == gen
+        assert loaded.header.current_phase == Phase.CLINICAL
+
+        compact.save("PT-CODEC", loaded, loaded_gen)
+        raw, _ = backend.read_bytes("patient_diaries/patient_PT-CODEC/diary.json")
+        assert raw.startswith(MAGIC)
+        # And a legacy-configured store still reads the compact blob
+        assert legacy.load("PT-CODEC")[0] == compact.load("PT-CODEC")[0]
+
+    def test_invalid_codec_fails_fast(self):
+        with pytest.raises(DiaryCodecError):
+            DiaryStore(backend=InMemoryDiaryBackend(), codec="bogus")
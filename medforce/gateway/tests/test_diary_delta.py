@@ -0,0 +1,199 @@
+"""
+Tests for the append-only diary delta log and its compaction.
+"""
+
+import json
+
+import pytest
+
+from medforce.gateway.diary import (
+    ConversationEntry,
+    DiaryConcurrencyError,
+    DiaryNotFoundError,
+    DiaryStore,
+    PatientDiary,
+    Phase,
+)
+from medforce.gateway.diary_backends import InMemoryDiaryBackend, SQLiteDiaryBackend
+
+
+def _delta_store(backend=None, compact_every=5):
+    return DiaryStore(
+        backend=backend or InMemoryDiaryBackend(),
+        delta_log=True,
+        compact_every=compact_every,
+    )
+
+
+def _keys(store):
+    return sorted(k for k in store.backend._blobs if k != DiaryStore.INDEX_PATH)
+
+
+class TestDeltaLog:
+
+    def test_round_trip_through_deltas(self):
+        store = _delta_store(compact_every=100)
+        diary = PatientDiary.create_new("PT-1")
+        gen = store.save("PT-1", diary, generation=0)
+        assert gen == 1
+
+        diary.add_conversation(ConversationEntry(message="hello"))
+        diary.header.current_phase = Phase.CLINICAL
+        gen = store.save("PT-1", diary, gen)
+        assert gen == 2
+
+        loaded, loaded_gen = store.load("PT-1")
+        assert loaded_gen == 2
+        assert loaded.header.current_phase == Phase.CLINICAL
+        assert [c.message for c in loaded.conversation_log] == ["hello"]
+        assert "patient_diaries/patient_PT-1/diary.json" not in _keys(store)
+
+    def test_second_delta_only_carries_changes(self):
+        store = _delta_store(compact_every=100)
+        diary = PatientDiary.create_new("PT-1")
+        for i in range(30):
+            diary.add_conversation(ConversationEntry(message=f"old {i}" * 20))
+        gen = store.save("PT-1", diary, generation=0)
+
+        diary.add_conversation(ConversationEntry(message="new"))
+        gen = store.save("PT-1", diary, gen)
+
+        raw, _ = store.backend.read(
+            "patient_diaries/patient_PT-1/deltas/0000000002.json"
+        )
+        delta = json.loads(raw)
+        # touch() changes the header; nothing else but the append
+        assert set(delta["sections"]) == {"header"}
+        assert [c["message"] for c in delta["conversation_append"]] == ["new"]
+        stats = store.get_stats()["delta_log"]
+        assert stats["delta_writes"] == 2
+        assert stats["full_delta_writes"] == 1
+        assert stats["reduction_ratio"] > 1
+
+    def test_conversation_truncation_is_a_drop(self):
+        store = _delta_store(compact_every=100)
+        diary = PatientDiary.create_new("PT-1")
+        for i in range(3):
+            diary.add_conversation(ConversationEntry(message=str(i)))
+        gen = store.save("PT-1", diary, generation=0)
+        diary.conversation_log = diary.conversation_log[1:]
+        diary.add_conversation(ConversationEntry(message="3"))
+        store.save("PT-1", diary, gen)
+
+        loaded, _ = store.load("PT-1")
+        assert [c.message for c in loaded.conversation_log] == ["1", "2", "3"]
+
+    def test_compaction_folds_deltas_into_snapshot(self):
+        store = _delta_store(compact_every=3)
+        diary = PatientDiary.create_new("PT-1")
+        gen = 0
+        for i in range(4):
+            diary.add_conversation(ConversationEntry(message=str(i)))
+            gen = store.save("PT-1", diary, gen)
+
+        keys = _keys(store)
+        assert "patient_diaries/patient_PT-1/diary.json" in keys
+        assert keys == [
+            "patient_diaries/patient_PT-1/deltas/0000000004.json",
+            "patient_diaries/patient_PT-1/diary.json",
+        ]
+        assert store.get_stats()["delta_log"]["compactions"] == 1
+
+        # A fresh process sees the same diary and version
+        fresh = _delta_store(backend=store.backend, compact_every=3)
+        loaded, loaded_gen = fresh.load("PT-1")
+        assert loaded_gen == 4
+        assert [c.message for c in loaded.conversation_log] == ["0", "1", "2", "3"]
+
+    def test_stale_generation_conflicts(self):
+        store = _delta_store()
+        diary = PatientDiary.create_new("PT-1")
+        gen = store.save("PT-1", diary, generation=0)
+        store.save("PT-1", diary, gen)
+        with pytest.raises(DiaryConcurrencyError):
+            store.save("PT-1", diary, gen)
+
+    def test_stale_writer_after_compaction_conflicts(self):
+        a = _delta_store(compact_every=3)
+        diary = PatientDiary.create_new("PT-1")
+        gen = a.save("PT-1", diary, generation=0)
+        b = _delta_store(backend=a.backend, compact_every=3)
+        stale, stale_gen = b.load("PT-1")
+        for i in range(3):
+            diary.add_conversation(ConversationEntry(message=str(i)))
+            gen = a.save("PT-1", diary, gen)  # compacts at version 3
+
+        # deltas/2 was deleted by the compaction — recreating it must fail
+        stale.header.current_phase = Phase.BOOKING
+        with pytest.raises(DiaryConcurrencyError):
+            b.save("PT-1", stale, stale_gen)
+        assert _keys(a) == [
+            "patient_diaries/patient_PT-1/deltas/0000000004.json",
+            "patient_diaries/patient_PT-1/diary.json",
+        ]
+        loaded, loaded_gen = b.load("PT-1")
+        assert loaded_gen == 4
+        assert len(loaded.conversation_log) == 3
+
+    def test_force_write_appends_after_head(self):
+        store = _delta_store(compact_every=100)
+        diary = PatientDiary.create_new("PT-1")
+        store.save("PT-1", diary, generation=0)
+        other = _delta_store(backend=store.backend, compact_every=100)
+        diary.header.current_phase = Phase.BOOKING
+        assert other.save("PT-1", diary, generation=None) == 2
+        loaded, gen = store.load("PT-1")
+        assert gen == 2
+        assert loaded.header.current_phase == Phase.BOOKING
+
+    def test_cold_base_save_replaces_conversation(self):
+        store = _delta_store(compact_every=2)
+        diary = PatientDiary.create_new("PT-1")
+        for i in range(3):
+            diary.add_conversation(ConversationEntry(message=f"m{i}"))
+        gen = store.save("PT-1", diary, generation=0)
+        gen = store.save("PT-1", diary, gen)  # compacts into diary.json
+
+        # A restarted process has no diff base for this patient
+        cold = _delta_store(backend=store.backend, compact_every=100)
+        diary.add_conversation(ConversationEntry(message="m3"))
+        cold.save("PT-1", diary, gen)
+
+        loaded, _ = _delta_store(backend=store.backend).load("PT-1")
+        assert [c.message for c in loaded.conversation_log] == ["m0", "m1", "m2", "m3"]
+
+    def test_legacy_snapshot_loads_as_version_zero(self):
+        backend = InMemoryDiaryBackend()
+        DiaryStore(backend=backend).save("PT-OLD", PatientDiary.create_new("PT-OLD"))
+
+        store = _delta_store(backend=backend)
+        diary, gen = store.load("PT-OLD")
+        assert gen == 0
+        diary.header.current_phase = Phase.CLINICAL
+        assert store.save("PT-OLD", diary, gen) == 1
+        assert store.load("PT-OLD")[0].header.current_phase == Phase.CLINICAL
+
+    def test_exists_delete_and_listing(self):
+        store = _delta_store()
+        assert not store.exists("PT-1")
+        store.save("PT-1", PatientDiary.create_new("PT-1"), generation=0)
+        assert store.exists("PT-1")
+        assert store.list_all_patient_ids() == ["PT-1"]
+        assert store.delete("PT-1")
+        assert not store.exists("PT-1")
+        with pytest.raises(DiaryNotFoundError):
+            store.load("PT-1")
+
+    def test_sqlite_backend(self, tmp_path):
+        backend = SQLiteDiaryBackend(str(tmp_path / "d.sqlite3"))
+        store = _delta_store(backend=backend, compact_every=2)
+        diary = PatientDiary.create_new("PT-1")
+        gen = 0
+        for i in range(5):
+            diary.add_conversation(ConversationEntry(message=str(i)))
+            gen = store.save("PT-1", diary, gen)
+        fresh = _delta_store(backend=backend, compact_every=2)
+        loaded, loaded_gen = fresh.load("PT-1")
+        assert loaded_gen == 5
+        assert len(loaded.conversation_log) == 5
+        backend.close()
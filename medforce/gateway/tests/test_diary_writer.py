@@ -0,0 +1,207 @@
+"""
+Tests for the write-behind diary persistence stage.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from medforce.gateway.agents.base_agent import AgentResult, BaseAgent
+from medforce.gateway.channels import DeliveryResult, DispatcherRegistry
+from medforce.gateway.diary import (
+    DiaryConcurrencyError,
+    DiaryStore,
+    PatientDiary,
+    Phase,
+)
+from medforce.gateway.diary_backends import InMemoryDiaryBackend
+from medforce.gateway.diary_writer import DiaryWriteBehind
+from medforce.gateway.events import EventEnvelope, EventType
+from medforce.gateway.gateway import Gateway
+
+
+class CountingStore:
+    """DiaryStore wrapper that counts saves."""
+
+    def __init__(self):
+        self._inner = DiaryStore(backend=InMemoryDiaryBackend())
+        self._gcs = None
+        self.saves: list[tuple[str, str]] = []
+        self.fail_with: Exception | None = None
+
+    def load(self, patient_id):
+        return self._inner.load(patient_id)
+
+    def save(self, patient_id, diary, generation=None):
+        self.saves.append((patient_id, diary.header.current_phase.value))
+        if self.fail_with is not None:
+            raise self.fail_with
+        return self._inner.save(patient_id, diary, generation)
+
+    def delete(self, patient_id):
+        return self._inner.delete(patient_id)
+
+    def exists(self, patient_id):
+        return self._inner.exists(patient_id)
+
+
+class BlockingStore(CountingStore):
+    """Saves wait in their worker thread until ``release`` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def save(self, patient_id, diary, generation=None):
+        self.started.set()
+        self.release.wait(timeout=5)
+        return super().save(patient_id, diary, generation)
+
+
+class TestDiaryWriteBehind:
+
+    @pytest.mark.asyncio
+    async def test_coalesces_to_latest(self):
+        store = CountingStore()
+        writer = DiaryWriteBehind(store, debounce_seconds=5)
+
+        for phase in (Phase.INTAKE, Phase.CLINICAL, Phase.BOOKING):
+            diary = PatientDiary.create_new("PT-1")
+            diary.header.current_phase = phase
+            writer.schedule("PT-1", diary, None)
+
+        await writer.flush("PT-1")
+
+        assert store.saves == [("PT-1", "booking")]
+        metrics = writer.get_metrics()
+        assert metrics["saves_requested"] == 3
+        assert metrics["saves_performed"] == 1
+        assert metrics["saves_elided"] == 2
+        assert metrics["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_debounce_flushes_without_request(self):
+        store = CountingStore()
+        writer = DiaryWriteBehind(store, debounce_seconds=0.01)
+        writer.schedule("PT-1", PatientDiary.create_new("PT-1"), None)
+        await asyncio.sleep(0.1)
+        assert len(store.saves) == 1
+
+    @pytest.mark.asyncio
+    async def test_tracks_generation_between_saves(self):
+        store = CountingStore()
+        saved: dict[str, int] = {}
+        writer = DiaryWriteBehind(
+            store, debounce_seconds=0, on_saved=saved.__setitem__,
+        )
+        writer.schedule("PT-1", PatientDiary.create_new("PT-1"), None)
+        await writer.flush("PT-1")
+        writer.schedule("PT-1", PatientDiary.create_new("PT-1"), None)
+        await writer.flush("PT-1")
+        # Second write used the generation from the first — no conflict
+        assert saved["PT-1"] == 2
+        assert writer.get_metrics()["save_failures"] == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_all(self):
+        store = CountingStore()
+        writer = DiaryWriteBehind(store, debounce_seconds=60)
+        for pid in ("PT-A", "PT-B", "PT-C"):
+            writer.schedule(pid, PatientDiary.create_new(pid), None)
+        await writer.flush_all()
+        assert sorted(pid for pid, _ in store.saves) == ["PT-A", "PT-B", "PT-C"]
+
+    @pytest.mark.asyncio
+    async def test_discard_drops_pending(self):
+        store = CountingStore()
+        writer = DiaryWriteBehind(store, debounce_seconds=60)
+        writer.schedule("PT-1", PatientDiary.create_new("PT-1"), None)
+        writer.discard("PT-1")
+        await writer.flush_all()
+        assert store.saves == []
+
+    @pytest.mark.asyncio
+    async def test_failure_is_retried_then_counted(self):
+        store = CountingStore()
+        store.fail_with = DiaryConcurrencyError("conflict")
+        writer = DiaryWriteBehind(store, debounce_seconds=0, backoffs=(0, 0))
+        writer.schedule("PT-1", PatientDiary.create_new("PT-1"), None)
+        await writer.flush("PT-1")
+        assert len(store.saves) == 3
+        metrics = writer.get_metrics()
+        assert metrics["save_retries"] == 2
+        assert metrics["save_failures"] == 1
+
+
+class HandoffAgent(BaseAgent):
+    """Advances the phase and emits the next handoff until BOOKING."""
+
+    agent_name = "handoff"
+    NEXT = {
+        Phase.INTAKE: (Phase.CLINICAL, EventType.INTAKE_COMPLETE),
+        Phase.CLINICAL: (Phase.BOOKING, EventType.CLINICAL_COMPLETE),
+    }
+
+    async def process(self, event, diary):
+        nxt = self.NEXT.get(diary.header.current_phase)
+        emitted = []
+        if nxt is not None:
+            diary.header.current_phase = nxt[0]
+            emitted.append(EventEnvelope.handoff(
+                event_type=nxt[1], patient_id=event.patient_id,
+                source_agent="handoff",
+            ))
+        return AgentResult(updated_diary=diary, emitted_events=emitted)
+
+
+class TestGatewayWriteBehind:
+
+    @pytest.mark.asyncio
+    async def test_handoff_chain_saves_once(self):
+        store = CountingStore()
+        registry = DispatcherRegistry()
+        disp = MagicMock()
+        disp.channel_name = "websocket"
+        disp.send = AsyncMock(return_value=DeliveryResult(
+            success=True, channel="websocket", recipient="patient",
+        ))
+        registry.register(disp)
+        gw = Gateway(diary_store=store, dispatcher_registry=registry)
+        agent = HandoffAgent()
+        for name in ("intake", "clinical", "booking"):
+            gw.register_agent(name, agent)
+
+        await gw.process_event(EventEnvelope.user_message("PT-CHAIN", "hi"))
+        await gw.flush_pending_saves()
+
+        # Three events processed, one upload of the final state
+        assert store.saves == [("PT-CHAIN", "booking")]
+        writes = gw.get_metrics()["diary_writes"]
+        assert writes["saves_requested"] == 3
+        assert writes["saves_elided"] == 2
+        assert writes["saves_performed"] == 1
+        cached_diary, cached_gen = gw._diary_cache["PT-CHAIN"]
+        assert cached_gen == 1
+        assert cached_diary.header.current_phase == Phase.BOOKING
+
+    @pytest.mark.asyncio
+    async def test_reset_during_in_flight_save(self):
+        store = BlockingStore()
+        gw = Gateway(diary_store=store, dispatcher_registry=DispatcherRegistry())
+        gw._diary_writer.schedule("PT-R", PatientDiary.create_new("PT-R"), None)
+        gw._diary_writer.request_flush("PT-R")
+        await asyncio.to_thread(store.started.wait, 5)
+
+        # The save is in the store's hands — the reset must outlast it
+        reset = asyncio.create_task(gw.reset_patient("PT-R"))
+        await asyncio.sleep(0.05)
+        assert not reset.done()
+        store.release.set()
+
+        assert await reset is True
+        await gw.flush_pending_saves()
+        assert not store.exists("PT-R")
+        assert gw._diary_cache.peek("PT-R") is None
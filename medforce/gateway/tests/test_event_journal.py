@@ -0,0 +1,318 @@
+"""
+Tests for the durable event journal behind PatientQueueManager.
+
+Covers:
+  - append / commit / pending bookkeeping
+  - recovery after a restart (including a torn final record)
+  - segment rollover and deletion
+  - queue replay of unfinished events, in per-patient order
+  - durable DLQ and replay through Gateway.replay_dlq_event
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from medforce.gateway.agents.base_agent import BaseAgent
+from medforce.gateway.channels import DeliveryResult, DispatcherRegistry
+from medforce.gateway.diary import PatientDiary
+from medforce.gateway.event_journal import JournalInUseError, SegmentFileJournal
+from medforce.gateway.events import EventEnvelope
+from medforce.gateway.gateway import Gateway
+from medforce.gateway.queue import PatientQueueManager
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  Helpers
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+def _msg(patient_id: str, text: str) -> EventEnvelope:
+    return EventEnvelope.user_message(patient_id=patient_id, text=text)
+
+
+def _journal(path, **kwargs):
+    return SegmentFileJournal(str(path), fsync=False, **kwargs)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  Journal
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class TestSegmentFileJournal:
+
+    def test_commit_removes_patient_events_up_to_offset(self, tmp_path):
+        journal = _journal(tmp_path)
+        a1 = journal.append(_msg("PT-A", "a1"))
+        b1 = journal.append(_msg("PT-B", "b1"))
+        a2 = journal.append(_msg("PT-A", "a2"))
+        assert (a1, b1, a2) == (1, 2, 3)
+
+        journal.commit("PT-A", a1)
+        assert [o for o, _ in journal.pending()] == [b1, a2]
+        journal.commit("PT-A", a2)
+        assert [o for o, _ in journal.pending()] == [b1]
+
+    def test_recovery_returns_uncommitted_events_in_order(self, tmp_path):
+        journal = _journal(tmp_path)
+        events = [_msg("PT-A", "a1"), _msg("PT-B", "b1"), _msg("PT-A", "a2")]
+        offsets = [journal.append(e) for e in events]
+        journal.commit("PT-A", offsets[0])
+        journal.close()
+
+        reopened = _journal(tmp_path)
+        pending = reopened.pending()
+        assert [e.event_id for _, e in pending] == [events[1].event_id, events[2].event_id]
+        assert reopened.get_stats()["recovered_pending"] == 2
+        # New appends continue after the highest journaled offset
+        assert reopened.append(_msg("PT-C", "c1")) == 4
+
+    def test_torn_final_record_is_skipped(self, tmp_path):
+        journal = _journal(tmp_path)
+        journal.append(_msg("PT-A", "a1"))
+        journal.close()
+        segment = next(tmp_path.glob("seg-*.log"))
+        with open(segment, "ab") as fh:
+            fh.write(b'{"t":"e","o":2,"e":{"event_')
+
+        reopened = _journal(tmp_path)
+        assert len(reopened.pending()) == 1
+
+    def test_finished_segments_are_deleted_oldest_first(self, tmp_path):
+        journal = _journal(tmp_path, segment_max_bytes=200)
+        offsets = [journal.append(_msg(f"PT-{i}", "x" * 50)) for i in range(6)]
+        assert len(list(tmp_path.glob("seg-*.log"))) == 6
+
+        # Committing a later segment first must not delete anything
+        journal.commit("PT-1", offsets[1])
+        assert len(list(tmp_path.glob("seg-*.log"))) == 6
+
+        journal.commit("PT-0", offsets[0])
+        assert len(list(tmp_path.glob("seg-*.log"))) == 4
+        assert journal.get_stats()["segments_deleted"] == 2
+
+        journal.close()
+        reopened = _journal(tmp_path, segment_max_bytes=200)
+        assert [o for o, _ in reopened.pending()] == offsets[2:]
+
+    def test_dead_letters_survive_restart_until_replayed(self, tmp_path):
+        journal = _journal(tmp_path)
+        event = _msg("PT-A", "boom")
+        journal.record_dead_letter({"event_id": event.event_id, "patient_id": "PT-A"}, event)
+        journal.close()
+
+        reopened = _journal(tmp_path)
+        assert [e["event_id"] for e in reopened.dead_letters()] == [event.event_id]
+        assert reopened.dead_letter_event(event.event_id).payload["text"] == "boom"
+
+        reopened.mark_replayed(event.event_id)
+        reopened.close()
+        assert _journal(tmp_path).dead_letters() == []
+
+
+    def test_directory_open_in_one_journal_at_a_time(self, tmp_path):
+        journal = _journal(tmp_path)
+        with pytest.raises(JournalInUseError):
+            _journal(tmp_path)
+        journal.close()
+        _journal(tmp_path).close()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  Queue Replay
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class TestQueueReplay:
+
+    @pytest.mark.asyncio
+    async def test_processed_events_are_committed(self, tmp_path):
+        processed = []
+
+        async def processor(event):
+            processed.append(event.payload["text"])
+
+        journal = _journal(tmp_path)
+        mgr = PatientQueueManager(processor=processor, journal=journal)
+        await mgr.start()
+        await mgr.enqueue(_msg("PT-1", "one"))
+        await mgr.enqueue(_msg("PT-1", "two"))
+        await asyncio.sleep(0.1)
+        await mgr.stop()
+
+        assert processed == ["one", "two"]
+        assert journal.pending() == []
+
+    @pytest.mark.asyncio
+    async def test_unfinished_events_replay_in_order_after_restart(self, tmp_path):
+        gate = asyncio.Event()
+        first_run = []
+
+        async def stuck_processor(event):
+            first_run.append(event.payload["text"])
+            await gate.wait()  # never released — simulates a crash mid-event
+
+        journal = _journal(tmp_path)
+        mgr = PatientQueueManager(processor=stuck_processor, journal=journal)
+        await mgr.start()
+        for text in ("one", "two", "three"):
+            await mgr.enqueue(_msg("PT-1", text))
+        await mgr.enqueue(_msg("PT-2", "other"))
+        await asyncio.sleep(0.05)
+        await mgr.stop()
+        journal.close()
+        assert first_run[0] == "one"
+
+        replayed = []
+
+        async def processor(event):
+            replayed.append((event.patient_id, event.payload["text"]))
+
+        journal = _journal(tmp_path)
+        mgr = PatientQueueManager(processor=processor, journal=journal)
+        await mgr.start()
+        await asyncio.sleep(0.1)
+        await mgr.stop()
+
+        assert [t for p, t in replayed if p == "PT-1"] == ["one", "two", "three"]
+        assert ("PT-2", "other") in replayed
+        assert journal.pending() == []
+
+    @pytest.mark.asyncio
+    async def test_micro_batch_commit_covers_every_part(self, tmp_path):
+        seen = []
+
+        async def processor(event):
+            seen.append(event)
+
+        journal = _journal(tmp_path)
+        mgr = PatientQueueManager(processor=processor, journal=journal, batch_window_ms=50)
+        await mgr.start()
+        for text in ("a", "b", "c"):
+            await mgr.enqueue(_msg("PT-1", text))
+        await asyncio.sleep(0.2)
+        await mgr.stop()
+
+        assert len(seen) == 1
+        assert journal.pending() == []
+
+    @pytest.mark.asyncio
+    async def test_failed_events_are_committed(self, tmp_path):
+        async def processor(event):
+            raise RuntimeError("nope")
+
+        journal = _journal(tmp_path)
+        mgr = PatientQueueManager(processor=processor, journal=journal)
+        await mgr.start()
+        await mgr.enqueue(_msg("PT-1", "poison"))
+        await asyncio.sleep(0.1)
+        await mgr.stop()
+        assert journal.pending() == []
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  DLQ Replay
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class FlakyAgent(BaseAgent):
+    """Fails on the first call, succeeds afterwards."""
+
+    agent_name = "flaky"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def process(self, event, diary):
+        from medforce.gateway.agents.base_agent import AgentResult
+
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("exploded")
+        return AgentResult(updated_diary=diary)
+
+
+class MemoryStore:
+    def __init__(self):
+        self._diaries = {}
+
+    def load(self, patient_id):
+        from medforce.gateway.diary import DiaryNotFoundError
+
+        if patient_id not in self._diaries:
+            raise DiaryNotFoundError(patient_id)
+        return self._diaries[patient_id]
+
+    def save(self, patient_id, diary, generation=None):
+        gen = (generation or 0) + 1
+        self._diaries[patient_id] = (diary, gen)
+        return gen
+
+    def create(self, patient_id, correlation_id=None):
+        diary = PatientDiary.create_new(patient_id, correlation_id=correlation_id)
+        return diary, self.save(patient_id, diary)
+
+
+def _gateway(journal):
+    registry = DispatcherRegistry()
+    ws = MagicMock()
+    ws.channel_name = "websocket"
+    ws.send = AsyncMock(return_value=DeliveryResult(
+        success=True, channel="websocket", recipient="patient"
+    ))
+    registry.register(ws)
+    gw = Gateway(diary_store=MemoryStore(), dispatcher_registry=registry, event_journal=journal)
+    agent = FlakyAgent()
+    gw.register_agent("intake", agent)
+    return gw, agent
+
+
+class TestDLQReplay:
+
+    @pytest.mark.asyncio
+    async def test_dlq_is_durable_and_replays_original_event(self, tmp_path):
+        journal = _journal(tmp_path)
+        gw, agent = _gateway(journal)
+        event = _msg("PT-DLQ", "hello")
+        await gw.process_event(event)
+        assert len(gw.get_dlq()) == 1
+        journal.close()
+
+        # A new Gateway over the same journal sees the DLQ entry
+        journal2 = _journal(tmp_path)
+        gw2, agent2 = _gateway(journal2)
+        agent2.calls = 1  # next call succeeds
+        assert [e["event_id"] for e in gw2.get_dlq()] == [event.event_id]
+
+        enqueued = []
+
+        async def enqueue(ev):
+            enqueued.append(ev)
+            await gw2.process_event(ev)
+
+        entry = await gw2.replay_dlq_event(0, enqueue=enqueue)
+        assert entry["event_id"] == event.event_id
+        assert enqueued[0].event_id == event.event_id
+        assert agent2.calls == 2
+        assert gw2.get_dlq() == []
+        journal2.close()
+        assert _journal(tmp_path).dead_letters() == []
+
+    @pytest.mark.asyncio
+    async def test_replay_clears_idempotency_entry(self, tmp_path):
+        gw, agent = _gateway(_journal(tmp_path))
+        await gw.process_event(_msg("PT-DLQ", "hello"))
+        await gw.replay_dlq_event(0, enqueue=gw.process_event)
+        # The replay was processed, not skipped as a duplicate
+        assert agent.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_lookup_without_enqueue(self, tmp_path):
+        gw, _ = _gateway(None)
+        await gw.process_event(_msg("PT-DLQ", "hello"))
+        assert (await gw.replay_dlq_event(0))["patient_id"] == "PT-DLQ"
+        assert await gw.replay_dlq_event(5) is None
+        with pytest.raises(RuntimeError):
+            await gw.replay_dlq_event(0, enqueue=gw.process_event)
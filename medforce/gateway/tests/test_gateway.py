@@ -447,6 +447,31 @@ class TestCircuitBreaker:
         assert len(routed) <= MAX_CHAIN_DEPTH
 
 
+# ── Idempotency ──
+
+
+class TestIdempotency:
+    @pytest.mark.asyncio
+    async def test_duplicate_event_skipped(self, gateway):
+        event = EventEnvelope.user_message("PT-001", "Hello")
+        assert await gateway.process_event(event) is not None
+        assert await gateway.process_event(event) is None
+
+    @pytest.mark.asyncio
+    async def test_batched_message_marks_every_original_id(self, gateway):
+        first = EventEnvelope.user_message("PT-001", "a")
+        second = EventEnvelope.user_message("PT-001", "b")
+        batched = first.model_copy(update={"payload": {
+            **first.payload, "text": "a\nb",
+            "coalesced_event_ids": [first.event_id, second.event_id],
+        }})
+        assert await gateway.process_event(batched) is not None
+        # A redelivered original (e.g. journal replay) is now a duplicate
+        assert await gateway.process_event(second) is None
+        log = gateway.get_event_log("PT-001")
+        assert [e["status"] for e in log].count("DUPLICATE") == 1
+
+
 # ── Diary Auto-Creation ──
 
 
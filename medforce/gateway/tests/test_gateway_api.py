@@ -6,6 +6,7 @@ Covers:
   - GET /api/gateway/diary/{id} — diary retrieval
   - GET /api/gateway/events/{id} — event log
   - GET /api/gateway/status — health check
+  - POST /api/gateway/admin/rescore — cohort re-scoring
   - Error handling and validation
 """
 
@@ -165,6 +166,21 @@ class TestEmitEndpoint:
         assert resp.status_code == 400
         assert "Invalid sender_role" in resp.json()["detail"]
 
+    def test_emit_queue_full_is_429(self, client):
+        from medforce.gateway.queue import QueueFullError
+
+        with patch(
+            "medforce.routers.gateway_api._enqueue_local",
+            AsyncMock(side_effect=QueueFullError("PT-001", "100 events queued")),
+        ):
+            resp = client.post("/api/gateway/emit", json={
+                "event_type": "USER_MESSAGE",
+                "patient_id": "PT-001",
+                "payload": {"text": "again"},
+            })
+        assert resp.status_code == 429
+        assert resp.headers["retry-after"] == "1"
+
     def test_emit_heartbeat(self, client):
         resp = client.post("/api/gateway/emit", json={
             "event_type": "HEARTBEAT",
@@ -291,3 +307,39 @@ class TestStatusEndpoint:
         resp = client.get("/api/gateway/status")
         data = resp.json()
         assert "websocket" in data["registered_channels"]
+
+
+# ── POST /api/gateway/admin/rescore ──
+
+
+class TestRescoreEndpoint:
+    @pytest.fixture
+    def store(self, monkeypatch):
+        from medforce.gateway.diary import ClinicalDocument
+        from medforce.gateway.diary_backends import InMemoryDiaryBackend
+
+        monkeypatch.setenv("DIARY_BACKEND", "memory")
+        store = DiaryStore(backend=InMemoryDiaryBackend())
+        diary = PatientDiary.create_new("PT-R1")
+        diary.clinical.documents.append(ClinicalDocument(
+            type="lab_results", processed=True, extracted_values={"ALT": 300},
+        ))
+        store.save("PT-R1", diary)
+        with patch("medforce.gateway.setup._diary_store", store):
+            yield store
+
+    def test_rescore_reports_changes(self, client, store):
+        resp = client.post("/api/gateway/admin/rescore", json={
+            "rules": {"threshold_overrides": {"ALT > 500 U/L": 250}},
+        })
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["changed"] == 1
+        assert data["changes"][0]["patient_id"] == "PT-R1"
+        assert data["transitions"] == {"medium->high": 1}
+
+    def test_invalid_rules_rejected(self, client, store):
+        resp = client.post("/api/gateway/admin/rescore", json={
+            "rules": {"threshold_overrides": {"No such rule": 1}},
+        })
+        assert resp.status_code == 400
@@ -0,0 +1,263 @@
+"""
+Tests for the persisted identity index (snapshot + entry log) and how
+IdentityResolver loads and maintains it.
+"""
+
+import json
+
+import pytest
+
+from medforce.gateway.diary import DiaryStore, HelperEntry, PatientDiary
+from medforce.gateway.diary_backends import InMemoryDiaryBackend
+from medforce.gateway.handlers.identity_resolver import IdentityResolver
+from medforce.gateway.identity_index import IdentityIndexLog
+
+
+class CountingBackend(InMemoryDiaryBackend):
+    def __init__(self):
+        super().__init__()
+        self.reads: list[str] = []
+        self.writes: list[str] = []
+
+    def read(self, key):
+        self.reads.append(key)
+        return super().read(key)
+
+    def read_bytes(self, key):
+        self.reads.append(key)
+        return super().read_bytes(key)
+
+    def write(self, key, content, generation=None):
+        self.writes.append(key)
+        return super().write(key, content, generation)
+
+
+def _diary(pid, phone, helper_contact=""):
+    diary = PatientDiary.create_new(pid)
+    diary.intake.mark_field_collected("name", f"Patient {pid}")
+    diary.intake.mark_field_collected("phone", phone)
+    if helper_contact:
+        diary.helper_registry.add_helper(HelperEntry(
+            id="HELPER-001", name="Sarah", relationship="spouse",
+            channel="sms", contact=helper_contact, permissions=["view_status"],
+        ))
+    return diary
+
+
+def _resolver(backend, **kwargs):
+    return IdentityResolver(IdentityIndexLog(backend, **kwargs))
+
+
+@pytest.fixture
+def backend():
+    return CountingBackend()
+
+
+class TestPersistence:
+
+    def test_restart_loads_without_reading_diaries(self, backend):
+        first = _resolver(backend)
+        first.load()
+        first.update_for_patient("PT-1", _diary("PT-1", "+441111", "+449999"))
+        first.update_for_patient("PT-2", _diary("PT-2", "07700900123"))
+
+        backend.reads.clear()
+        second = _resolver(backend)
+        assert second.load(rebuild=lambda: pytest.fail("rebuilt")) == 3
+        assert second.resolve("+449999").sender_role == "helper"
+        assert second.resolve("+447700900123").patient_id == "PT-2"
+        assert not any("diary" in key for key in backend.reads)
+
+    def test_first_load_rebuilds_and_snapshots(self, backend):
+        store = DiaryStore(backend=backend)
+        store.save("PT-1", _diary("PT-1", "+441111"))
+
+        resolver = _resolver(backend)
+        assert resolver.load(rebuild=store.iter_all_diaries) == 1
+        assert backend.exists("patient_diaries/_identity/snapshot.json")
+
+        backend.reads.clear()
+        restarted = _resolver(backend)
+        restarted.load(rebuild=lambda: pytest.fail("rebuilt"))
+        assert restarted.resolve("+441111").patient_id == "PT-1"
+
+    def test_nothing_persisted_and_no_rebuild(self, backend):
+        assert _resolver(backend).load() == 0
+
+    def test_unchanged_diary_writes_nothing(self, backend):
+        resolver = _resolver(backend)
+        resolver.load()
+        diary = _diary("PT-1", "+441111")
+        resolver.update_for_patient("PT-1", diary)
+        backend.writes.clear()
+
+        diary.intake.mark_field_collected("dob", "1970-01-01")
+        resolver.update_for_patient("PT-1", diary)
+        assert backend.writes == []
+        assert resolver.get_stats()["unchanged"] == 1
+
+    def test_removal_persists(self, backend):
+        resolver = _resolver(backend)
+        resolver.load()
+        resolver.update_for_patient("PT-1", _diary("PT-1", "+441111"))
+        resolver.remove_patient("PT-1")
+
+        restarted = _resolver(backend)
+        restarted.load()
+        assert restarted.resolve("+441111") is None
+
+    def test_compaction_folds_log(self, backend):
+        resolver = _resolver(backend, compact_every=3)
+        resolver.load()
+        for i in range(7):
+            resolver.update_for_patient(f"PT-{i}", _diary(f"PT-{i}", f"+44100{i}"))
+
+        log = backend.list_children("patient_diaries/_identity/log")
+        assert log == ["0000000006.json", "0000000007.json"]
+        content, _ = backend.read("patient_diaries/_identity/snapshot.json")
+        snapshot = json.loads(content)
+        assert snapshot["seq"] == 6
+        assert len(snapshot["patients"]) == 6
+
+        restarted = _resolver(backend)
+        assert restarted.load() == 7
+
+
+class TestSharedLog:
+
+    def test_concurrent_appends_merge(self, backend):
+        a, b = _resolver(backend), _resolver(backend)
+        a.load()
+        b.load()
+        a.update_for_patient("PT-A", _diary("PT-A", "+441111"))
+        # b is behind: its append conflicts, it catches up, then appends
+        b.update_for_patient("PT-B", _diary("PT-B", "+442222"))
+
+        assert b.resolve("+441111").patient_id == "PT-A"
+        assert b.get_stats()["store"]["append_conflicts"] == 1
+
+        restarted = _resolver(backend)
+        restarted.load()
+        assert restarted.resolve("+441111") is not None
+        assert restarted.resolve("+442222") is not None
+
+    def test_miss_refreshes_from_log(self, backend):
+        a = _resolver(backend)
+        b = IdentityResolver(IdentityIndexLog(backend), refresh_interval=0)
+        a.load()
+        b.load()
+        a.update_for_patient("PT-A", _diary("PT-A", "+441111"))
+        assert b.resolve("+441111").patient_id == "PT-A"
+
+    def test_catch_up_after_remote_compaction(self, backend):
+        a = _resolver(backend, compact_every=2)
+        b = IdentityResolver(IdentityIndexLog(backend), refresh_interval=0)
+        a.load()
+        a.update_for_patient("PT-0", _diary("PT-0", "+441000"))
+        b.load()
+        assert b.resolve("+441000").patient_id == "PT-0"
+
+        a.remove_patient("PT-0")
+        for i in range(1, 5):
+            a.update_for_patient(f"PT-{i}", _diary(f"PT-{i}", f"+44100{i}"))
+        # The entries b missed were compacted away — it reloads the
+        # snapshot, which also drops the removed patient
+        assert b.resolve("+441004").patient_id == "PT-4"
+        assert b.resolve("+441000") is None
+        assert b.get_stats()["patients"] == 4
+
+
+    def test_lagging_writer_after_remote_compaction(self, backend):
+        a = _resolver(backend, compact_every=3)
+        b = _resolver(backend, compact_every=3)
+        a.load()
+        b.load()
+        for i in range(3):
+            a.update_for_patient(f"PT-a{i}", _diary(f"PT-a{i}", f"+44100{i}"))
+        # a compacted at seq 3 and deleted entries 1-2: b's create-only
+        # write at seq 1 lands, but must not stay below the snapshot
+        for i in range(8):
+            b.update_for_patient(f"PT-b{i}", _diary(f"PT-b{i}", f"+44200{i}"))
+
+        restarted = _resolver(backend)
+        restarted.load()
+        for pid in [f"PT-a{i}" for i in range(3)] + [f"PT-b{i}" for i in range(8)]:
+            assert restarted.resolve_for_patient(
+                f"+44{'1' if 'a' in pid else '2'}00{pid[-1]}", pid,
+            ) is not None, pid
+        assert b.get_stats()["store"]["compactions"] >= 1
+
+    def test_compaction_tracks_remote_snapshot(self, backend):
+        a = _resolver(backend, compact_every=3)
+        b = _resolver(backend, compact_every=3)
+        a.load()
+        b.load()
+        a.update_for_patient("PT-a0", _diary("PT-a0", "+441000"))
+        a.update_for_patient("PT-a1", _diary("PT-a1", "+441001"))
+        b.refresh()
+        # a compacts at seq 3; b catches up on entry 3 without a gap
+        a.update_for_patient("PT-a2", _diary("PT-a2", "+441002"))
+        for i in range(4):
+            b.update_for_patient(f"PT-b{i}", _diary(f"PT-b{i}", f"+44200{i}"))
+
+        stats = b.get_stats()["store"]
+        assert stats["compactions"] == 1
+        assert stats["snapshot_seq"] == 6
+        restarted = _resolver(backend)
+        assert restarted.load() == 7
+
+
+class TestReverseMap:
+
+    def test_remove_touches_only_that_patient(self):
+        resolver = IdentityResolver()
+        shared = "+447700900462"
+        resolver.rebuild_from_diaries({
+            "PT-1": _diary("PT-1", "+441111", shared),
+            "PT-2": _diary("PT-2", "+442222", shared),
+        })
+        resolver.remove_patient("PT-1")
+
+        assert resolver.resolve("+441111") is None
+        assert resolver.resolve(shared).patient_id == "PT-2"
+        assert resolver.index_size == 2
+
+
+class TestDiaryStoreHook:
+
+    def test_saves_and_deletes_update_resolver(self, backend):
+        store = DiaryStore(backend=backend)
+        resolver = _resolver(backend)
+        resolver.load(rebuild=store.iter_all_diaries)
+        store.add_save_observer(resolver.observe_save)
+
+        diary, gen = store.create("PT-1")
+        diary.intake.mark_field_collected("phone", "07700900461")
+        store.save("PT-1", diary, gen)
+        assert resolver.resolve("+447700900461").patient_id == "PT-1"
+
+        store.delete("PT-1")
+        assert resolver.resolve("+447700900461") is None
+
+    def test_failing_observer_does_not_fail_save(self, backend):
+        store = DiaryStore(backend=backend)
+
+        def broken(pid, diary):
+            raise RuntimeError("boom")
+
+        store.add_save_observer(broken)
+        store.save("PT-1", _diary("PT-1", "+441111"))
+        assert store.exists("PT-1")
+
+
+class TestFromEnv:
+
+    def test_disabled(self, monkeypatch, backend):
+        monkeypatch.setenv("IDENTITY_INDEX", "0")
+        assert IdentityIndexLog.from_env(backend) is None
+
+    def test_enabled_by_default(self, monkeypatch, backend):
+        monkeypatch.delenv("IDENTITY_INDEX", raising=False)
+        monkeypatch.setenv("IDENTITY_INDEX_COMPACT_EVERY", "50")
+        log = IdentityIndexLog.from_env(backend)
+        assert log is not None and log._compact_every == 50
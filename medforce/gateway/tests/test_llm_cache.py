@@ -0,0 +1,148 @@
+"""
+Tests for the content-addressed LLM response cache.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from medforce.gateway.agents.llm_utils import llm_generate
+from medforce.gateway.llm_cache import CachedResponse, LLMResponseCache, cache_key
+from medforce.gateway.llm_gateway import LLMGateway, set_llm_gateway
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _pdf_part(data: bytes):
+    part = MagicMock()
+    part.inline_data.data = data
+    part.inline_data.mime_type = "application/pdf"
+    return part
+
+
+def _client(text="answer"):
+    response = MagicMock()
+    response.text = text
+    response.usage_metadata = None
+    client = MagicMock()
+    client.aio.models.generate_content = AsyncMock(return_value=response)
+    return client
+
+
+class TestCacheKey:
+
+    def test_stable_for_same_inputs(self):
+        assert cache_key("m", "prompt") == cache_key("m", "prompt")
+        assert cache_key("m", ["a", "b"]) == cache_key("m", ["a", "b"])
+
+    def test_varies_with_model_prompt_and_config(self):
+        base = cache_key("m", "prompt")
+        assert cache_key("other", "prompt") != base
+        assert cache_key("m", "prompt2") != base
+        assert cache_key("m", "prompt", config={"temperature": 0.1}) != base
+
+    def test_attachments_hashed_by_content(self):
+        a = cache_key("m", [_pdf_part(b"%PDF-1"), "analyse"])
+        b = cache_key("m", [_pdf_part(b"%PDF-1"), "analyse"])
+        c = cache_key("m", [_pdf_part(b"%PDF-2"), "analyse"])
+        assert a == b
+        assert a != c
+
+
+class TestLLMResponseCache:
+
+    @pytest.mark.asyncio
+    async def test_memory_hit_and_hit_rate(self):
+        cache = LLMResponseCache()
+        assert await cache.get("k") is None
+        await cache.put("k", "m", "text")
+        assert await cache.get("k") == "text"
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_survives_restart(self, tmp_path):
+        first = LLMResponseCache(disk_dir=str(tmp_path))
+        await first.put("abcd", "m", "persisted")
+        second = LLMResponseCache(disk_dir=str(tmp_path))
+        assert await second.get("abcd") == "persisted"
+        assert second.stats()["disk_hits"] == 1
+        # Promoted to memory
+        assert await second.get("abcd") == "persisted"
+        assert second.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_ttl_expires_both_tiers(self, tmp_path):
+        clock = FakeClock()
+        cache = LLMResponseCache(ttl_seconds=60, disk_dir=str(tmp_path), clock=clock)
+        await cache.put("abcd", "m", "old")
+        clock.now += 61
+        assert await cache.get("abcd") is None
+        assert not (tmp_path / "ab" / "abcd.json").exists()
+
+    @pytest.mark.asyncio
+    async def test_bypass_skips_lookup(self):
+        cache = LLMResponseCache()
+        await cache.put("k", "m", "text")
+        assert await cache.get("k", bypass=True) is None
+        assert cache.stats()["bypassed"] == 1
+        assert await LLMResponseCache(bypass=True).get("k") is None
+
+    def test_from_env(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("LLM_CACHE", raising=False)
+        monkeypatch.delenv("LLM_CACHE_DIR", raising=False)
+        assert LLMResponseCache.from_env() is None
+        monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path))
+        assert LLMResponseCache.from_env().stats()["disk_tier"] is True
+
+
+class TestGatewayCaching:
+
+    @pytest.mark.asyncio
+    async def test_cached_generate_skips_llm(self):
+        gw = LLMGateway(response_cache=LLMResponseCache())
+        client = _client()
+        first = await gw.generate("m", "p", client=client, cache=True)
+        second = await gw.generate("m", "p", client=client, cache=True)
+        assert first.text == second.text == "answer"
+        assert isinstance(second, CachedResponse)
+        assert client.aio.models.generate_content.await_count == 1
+        metrics = gw.get_metrics()
+        assert metrics["response_cache"]["hits"] == 1
+        assert metrics["models"]["m"]["calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_uncached_calls_and_bypass_reach_llm(self):
+        gw = LLMGateway(response_cache=LLMResponseCache())
+        client = _client()
+        await gw.generate("m", "p", client=client)
+        await gw.generate("m", "p", client=client)
+        await gw.generate("m", "p", client=client, cache=True)
+        await gw.generate("m", "p", client=client, cache=True, bypass_cache=True)
+        assert client.aio.models.generate_content.await_count == 4
+
+    @pytest.mark.asyncio
+    async def test_empty_response_not_cached(self):
+        gw = LLMGateway(response_cache=LLMResponseCache())
+        client = _client(text="  ")
+        await gw.generate("m", "p", client=client, cache=True)
+        await gw.generate("m", "p", client=client, cache=True)
+        assert client.aio.models.generate_content.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_llm_generate_cache_flag(self):
+        set_llm_gateway(LLMGateway(response_cache=LLMResponseCache()))
+        try:
+            client = _client("extracted")
+            assert await llm_generate(client, "m", "prompt", cache=True) == "extracted"
+            assert await llm_generate(client, "m", "prompt", cache=True) == "extracted"
+            assert client.aio.models.generate_content.await_count == 1
+        finally:
+            set_llm_gateway(None)
@@ -0,0 +1,268 @@
+"""
+Tests for the shared LLM gateway — pooling, concurrency caps, priorities,
+metrics, streaming.
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from medforce.gateway.agents.llm_utils import llm_generate, llm_generate_stream
+from medforce.gateway.channels import ResponseStream
+from medforce.gateway.llm_gateway import (
+    LLMGateway,
+    Priority,
+    PrioritySemaphore,
+    _parse_model_limits,
+    get_llm_gateway,
+    set_llm_gateway,
+)
+
+
+def _response(text="ok", prompt_tokens=10, completion_tokens=5):
+    response = MagicMock()
+    response.text = text
+    response.usage_metadata.prompt_token_count = prompt_tokens
+    response.usage_metadata.candidates_token_count = completion_tokens
+    return response
+
+
+def _client(response=None):
+    client = MagicMock()
+    client.aio.models.generate_content = AsyncMock(return_value=response or _response())
+    return client
+
+
+@pytest.fixture
+def llm_gateway():
+    gw = LLMGateway(max_concurrency=4, model_concurrency=2, client_factory=lambda m: _client())
+    set_llm_gateway(gw)
+    yield gw
+    set_llm_gateway(None)
+
+
+class TestPrioritySemaphore:
+
+    @pytest.mark.asyncio
+    async def test_waiters_admitted_in_priority_order(self):
+        sem = PrioritySemaphore(1)
+        await sem.acquire()
+        order = []
+
+        async def waiter(name, priority):
+            await sem.acquire(priority)
+            order.append(name)
+            sem.release()
+
+        tasks = [
+            asyncio.create_task(waiter("low", Priority.LOW)),
+            asyncio.create_task(waiter("normal", Priority.NORMAL)),
+            asyncio.create_task(waiter("critical", Priority.CRITICAL)),
+        ]
+        await asyncio.sleep(0)
+        assert sem.waiting()["critical"] == 1
+        sem.release()
+        await asyncio.gather(*tasks)
+        assert order == ["critical", "normal", "low"]
+        assert sem.in_use == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_permit(self):
+        sem = PrioritySemaphore(1)
+        await sem.acquire()
+        task = asyncio.create_task(sem.acquire(Priority.HIGH))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        sem.release()
+        assert sem.in_use == 0
+        await sem.acquire()
+        assert sem.in_use == 1
+
+
+class TestLLMGateway:
+
+    def test_client_pooled_per_model(self):
+        created = []
+        gw = LLMGateway(client_factory=lambda m: created.append(m) or object())
+        assert gw.client("a") is gw.client("a")
+        assert gw.client("a") is not gw.client("b")
+        assert created == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_generate_records_latency_and_tokens(self, llm_gateway):
+        response = await llm_gateway.generate("m", "hello")
+        assert response.text == "ok"
+        stats = llm_gateway.get_metrics()["models"]["m"]
+        assert stats["calls"] == 1
+        assert stats["failures"] == 0
+        assert stats["prompt_tokens"] == 10
+        assert stats["completion_tokens"] == 5
+        assert stats["total_tokens"] == 15
+        assert stats["latency"]["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_generate_counts_failures(self, llm_gateway):
+        client = MagicMock()
+        client.aio.models.generate_content = AsyncMock(side_effect=RuntimeError("boom"))
+        with pytest.raises(RuntimeError):
+            await llm_gateway.generate("m", "hello", client=client)
+        stats = llm_gateway.get_metrics()["models"]["m"]
+        assert stats["failures"] == 1
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_per_model_cap(self):
+        gw = LLMGateway(max_concurrency=10, model_limits={"slow": 2})
+        peak = 0
+        running = 0
+
+        async def call(*args, **kwargs):
+            nonlocal peak, running
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return _response()
+
+        client = MagicMock()
+        client.aio.models.generate_content = call
+        await asyncio.gather(*(gw.generate("slow", "x", client=client) for _ in range(6)))
+        assert peak == 2
+        assert gw.get_metrics()["models"]["slow"]["calls"] == 6
+
+    @pytest.mark.asyncio
+    async def test_global_cap_spans_models(self):
+        gw = LLMGateway(max_concurrency=1, model_concurrency=5)
+        await gw._global.acquire()
+        task = asyncio.create_task(gw.generate("other", "x", client=_client()))
+        await asyncio.sleep(0)
+        assert not task.done()
+        assert gw.get_metrics()["waiting"]["normal"] == 1
+        gw._global.release()
+        await task
+
+    @pytest.mark.asyncio
+    async def test_run_blocking(self, llm_gateway):
+        legacy = MagicMock()
+        legacy.generate_content.return_value = _response("sync", 3, 4)
+        resp = await llm_gateway.run_blocking("legacy", legacy.generate_content, "p", temperature=0.1)
+        assert resp.text == "sync"
+        legacy.generate_content.assert_called_once_with("p", temperature=0.1)
+        assert llm_gateway.get_metrics()["models"]["legacy"]["total_tokens"] == 7
+
+    def test_missing_usage_metadata_counts_zero(self, llm_gateway):
+        llm_gateway._record("m", 0.1, MagicMock(spec=["text"]))
+        assert llm_gateway.get_metrics()["models"]["m"]["total_tokens"] == 0
+
+    def test_parse_model_limits(self):
+        assert _parse_model_limits("a=2, b=8,") == {"a": 2, "b": 8}
+        with pytest.raises(ValueError):
+            _parse_model_limits("a")
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("LLM_MAX_CONCURRENCY", "7")
+        monkeypatch.setenv("LLM_MODEL_LIMITS", "x=3")
+        set_llm_gateway(None)
+        try:
+            gw = get_llm_gateway()
+            assert gw.get_metrics()["max_concurrency"] == 7
+            assert gw._model_sem("x").limit == 3
+        finally:
+            set_llm_gateway(None)
+
+
+class TestLLMGenerateThroughGateway:
+
+    @pytest.mark.asyncio
+    async def test_llm_generate_uses_injected_client(self, llm_gateway):
+        client = _client(_response("reply"))
+        assert await llm_generate(client, "m", "prompt") == "reply"
+        client.aio.models.generate_content.assert_awaited_once_with(model="m", contents="prompt")
+        assert llm_gateway.get_metrics()["models"]["m"]["calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_critical_calls_jump_the_queue(self, llm_gateway):
+        gw = LLMGateway(max_concurrency=1)
+        set_llm_gateway(gw)
+        order = []
+
+        def client_for(name):
+            async def call(**kwargs):
+                order.append(name)
+                return _response(name)
+            client = MagicMock()
+            client.aio.models.generate_content = call
+            return client
+
+        await gw._global.acquire()
+        polish = asyncio.create_task(
+            llm_generate(client_for("polish"), "m", "p", priority=Priority.LOW)
+        )
+        await asyncio.sleep(0)
+        risk = asyncio.create_task(
+            llm_generate(client_for("risk"), "m", "p", critical=True)
+        )
+        await asyncio.sleep(0)
+        gw._global.release()
+        await asyncio.gather(polish, risk)
+        assert order == ["risk", "polish"]
+
+
+def _streaming_client(chunks, fail_after=None):
+    client = _client(_response("fallback"))
+
+    async def generate_content_stream(**kwargs):
+        async def gen():
+            for i, text in enumerate(chunks):
+                if fail_after is not None and i == fail_after:
+                    raise RuntimeError("stream dropped")
+                chunk = _response(text, 4, i + 1)
+                yield chunk
+        return gen()
+
+    client.aio.models.generate_content_stream = generate_content_stream
+    return client
+
+
+class TestStreaming:
+
+    @pytest.mark.asyncio
+    async def test_generate_stream_yields_chunks_and_records(self, llm_gateway):
+        client = _streaming_client(["Hel", "lo"])
+        chunks = [c async for c in llm_gateway.generate_stream("m", "p", client=client)]
+        assert chunks == ["Hel", "lo"]
+        stats = llm_gateway.get_metrics()["models"]["m"]
+        assert stats["calls"] == 1
+        assert stats["total_tokens"] == 6  # usage from the final chunk
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_llm_generate_stream_feeds_and_closes(self, llm_gateway):
+        stream = ResponseStream("patient", "websocket")
+        text = await llm_generate_stream(
+            _streaming_client(["Thanks ", "for ", "that."]), "m", "p", stream,
+        )
+        assert text == "Thanks for that."
+        assert stream.closed
+        assert stream.text == "Thanks for that."
+
+    @pytest.mark.asyncio
+    async def test_stream_failure_falls_back_to_generate(self, llm_gateway):
+        stream = ResponseStream("patient", "websocket")
+        client = _streaming_client(["partial ", "never"], fail_after=1)
+        text = await llm_generate_stream(client, "m", "p", stream)
+        assert text == "fallback"
+        assert stream.closed
+        assert stream.text == "partial "
+        client.aio.models.generate_content.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_non_streaming_client_uses_generate(self, llm_gateway):
+        stream = ResponseStream("patient", "websocket")
+        client = _client(_response("whole"))
+        assert await llm_generate_stream(client, "m", "p", stream) == "whole"
+        assert stream.closed
+        assert stream.text == ""
@@ -0,0 +1,277 @@
+"""
+Tests for the outbound message outbox.
+"""
+
+import pytest
+
+from medforce.gateway.agents.base_agent import AgentResult, BaseAgent
+from medforce.gateway.channels import (
+    AgentResponse,
+    ChannelDispatcher,
+    DeliveryResult,
+    DispatcherRegistry,
+)
+from medforce.gateway.diary import ConversationEntry, PatientDiary
+from medforce.gateway.events import EventEnvelope, EventType
+from medforce.gateway.gateway import Gateway
+from medforce.gateway.handlers.delivery_receipts import DeliveryReceiptHandler
+from medforce.gateway.outbox import (
+    MemoryOutboxStore,
+    Outbox,
+    OutboxEntry,
+    SQLiteOutboxStore,
+    TokenBucket,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class BulkDispatcher(ChannelDispatcher):
+    channel_name = "sms"
+
+    def __init__(self, fail: bool = False, account: str = "acct"):
+        self.fail = fail
+        self.account = account
+        self.batches: list[list[str]] = []
+
+    @property
+    def rate_limit_key(self) -> str:
+        return f"sms:{self.account}"
+
+    async def send(self, response):
+        return (await self.send_bulk([response]))[0]
+
+    async def send_bulk(self, responses):
+        self.batches.append([r.message for r in responses])
+        return [
+            DeliveryResult(
+                success=not self.fail,
+                channel="sms",
+                recipient=r.recipient,
+                error="provider down" if self.fail else None,
+            )
+            for r in responses
+        ]
+
+
+def _response(i: int, patient_id: str = "PT-1") -> AgentResponse:
+    return AgentResponse(
+        recipient="patient",
+        channel="sms",
+        message=f"msg {i}",
+        metadata={"patient_id": patient_id, "message_id": f"m{i}", "phone": "07700900000"},
+    )
+
+
+def _outbox(dispatcher, clock=None, receipts=None, **kwargs) -> Outbox:
+    async def sink(event):
+        receipts.append(event)
+
+    return Outbox(
+        MemoryOutboxStore(),
+        dispatchers=lambda channel: dispatcher if channel == "sms" else None,
+        receipt_sink=sink if receipts is not None else None,
+        clock=clock or FakeClock(),
+        **kwargs,
+    )
+
+
+class TestTokenBucket:
+
+    def test_take_refills_at_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=4, clock=clock)
+        assert bucket.take(10) == 4
+        assert bucket.take(1) == 0
+        assert bucket.wait_time() == pytest.approx(0.5)
+        clock.now += 1
+        assert bucket.take(10) == 2
+
+
+class TestOutbox:
+
+    @pytest.mark.asyncio
+    async def test_enqueue_does_not_call_provider(self):
+        dispatcher = BulkDispatcher()
+        outbox = _outbox(dispatcher)
+        result = await outbox.enqueue(_response(1))
+        assert result.success and result.queued
+        assert dispatcher.batches == []
+        assert outbox.get_stats()["pending"] == 1
+
+    @pytest.mark.asyncio
+    async def test_drain_sends_in_batches(self):
+        dispatcher = BulkDispatcher()
+        outbox = _outbox(dispatcher, batch_size=3)
+        for i in range(7):
+            await outbox.enqueue(_response(i))
+        assert await outbox.drain_once() == 7
+        assert [len(b) for b in dispatcher.batches] == [3, 3, 1]
+        assert dispatcher.batches[0] == ["msg 0", "msg 1", "msg 2"]
+        assert outbox.get_stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_per_provider_account(self):
+        # The bucket is wall-clock based; a rate of 0.001/s never refills
+        # during the test, so only the initial burst of 1 gets through.
+        dispatcher = BulkDispatcher()
+        outbox = _outbox(dispatcher, rate_limits={"sms": 0.001})
+        for i in range(3):
+            await outbox.enqueue(_response(i))
+        assert await outbox.drain_once() == 1
+        assert await outbox.drain_once() == 0
+        stats = outbox.get_stats()
+        assert stats["pending"] == 2
+        assert stats["rate_limited"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_retry_with_backoff_then_fail(self):
+        clock = FakeClock()
+        receipts: list[EventEnvelope] = []
+        dispatcher = BulkDispatcher(fail=True)
+        outbox = _outbox(dispatcher, clock, receipts, max_attempts=2, retry_base=10)
+        await outbox.enqueue(_response(1))
+
+        await outbox.drain_once()
+        assert outbox.get_stats()["retried"] == 1
+        # Not due again until the backoff has passed
+        await outbox.drain_once()
+        assert len(dispatcher.batches) == 1
+
+        clock.now += 10
+        await outbox.drain_once()
+        assert len(dispatcher.batches) == 2
+        stats = outbox.get_stats()
+        assert stats["failed"] == 1 and stats["pending"] == 0
+        assert receipts[0].payload["receipts"] == [
+            {"message_id": "m1", "status": "failed", "error": "provider down"}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_receipts_grouped_per_patient(self):
+        receipts: list[EventEnvelope] = []
+        outbox = _outbox(BulkDispatcher(), receipts=receipts)
+        await outbox.enqueue(_response(1, "PT-1"))
+        await outbox.enqueue(_response(2, "PT-1"))
+        await outbox.enqueue(_response(3, "PT-2"))
+        await outbox.drain_once()
+        by_patient = {e.patient_id: e for e in receipts}
+        assert set(by_patient) == {"PT-1", "PT-2"}
+        assert by_patient["PT-1"].event_type == EventType.DELIVERY_RECEIPT
+        assert [r["message_id"] for r in by_patient["PT-1"].payload["receipts"]] == ["m1", "m2"]
+
+    @pytest.mark.asyncio
+    async def test_registry_routes_outbox_channels(self):
+        dispatcher = BulkDispatcher()
+        registry = DispatcherRegistry()
+        registry.register(dispatcher)
+        outbox = _outbox(dispatcher, channels=["sms"])
+        registry.attach_outbox(outbox)
+        assert registry.queues("sms") and not registry.queues("websocket")
+        result = await registry.dispatch(_response(1))
+        assert result.queued
+        assert dispatcher.batches == []
+        assert registry.get_metrics()["outbox"]["pending"] == 1
+
+    def test_from_env(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("OUTBOX", raising=False)
+        monkeypatch.delenv("OUTBOX_PATH", raising=False)
+        assert Outbox.from_env(dispatchers=lambda c: None) is None
+        monkeypatch.setenv("OUTBOX_PATH", str(tmp_path / "outbox.db"))
+        monkeypatch.setenv("OUTBOX_CHANNELS", "email")
+        monkeypatch.setenv("OUTBOX_RATE_LIMITS", "email=5")
+        outbox = Outbox.from_env(dispatchers=lambda c: None)
+        assert outbox.handles("email") and not outbox.handles("sms")
+        outbox._store.close()
+
+
+class TestSQLiteOutboxStore:
+
+    def test_entries_survive_reopen(self, tmp_path):
+        path = str(tmp_path / "outbox.db")
+        store = SQLiteOutboxStore(path)
+        entry = OutboxEntry(
+            channel="sms",
+            response=_response(1).model_dump(mode="json"),
+            patient_id="PT-1",
+            message_id="m1",
+            next_attempt_at=5.0,
+        )
+        store.add(entry)
+        store.close()
+
+        reopened = SQLiteOutboxStore(path)
+        assert reopened.count() == 1
+        assert reopened.due("sms", now=4.0, limit=10) == []
+        [due] = reopened.due("sms", now=5.0, limit=10)
+        assert due.to_response().message == "msg 1"
+        due.attempts = 1
+        due.next_attempt_at = 20.0
+        reopened.reschedule(due)
+        assert reopened.due("sms", now=10.0, limit=10) == []
+        reopened.remove([due.entry_id])
+        assert reopened.count() == 0
+        reopened.close()
+
+
+class TestDeliveryReceipts:
+
+    @pytest.mark.asyncio
+    async def test_handler_updates_delivery_status(self):
+        diary = PatientDiary.create_new("PT-1")
+        diary.add_conversation(ConversationEntry(message="a", message_id="m1", delivery_status="queued"))
+        diary.add_conversation(ConversationEntry(message="b", message_id="m2", delivery_status="queued"))
+        event = EventEnvelope.handoff(
+            EventType.DELIVERY_RECEIPT,
+            "PT-1",
+            source_agent="outbox",
+            payload={"receipts": [
+                {"message_id": "m1", "status": "delivered", "error": None},
+                {"message_id": "m2", "status": "failed", "error": "bounced"},
+            ]},
+        )
+        result = await DeliveryReceiptHandler().process(event, diary)
+        statuses = [e.delivery_status for e in result.updated_diary.conversation_log]
+        assert statuses == ["delivered", "failed"]
+
+    @pytest.mark.asyncio
+    async def test_gateway_logs_outbox_responses_as_queued(self):
+        from unittest.mock import MagicMock
+
+        class SmsAgent(BaseAgent):
+            agent_name = "sms_agent"
+
+            async def process(self, event, diary):
+                return AgentResult(
+                    updated_diary=diary,
+                    responses=[AgentResponse(recipient="patient", channel="sms", message="hi")],
+                )
+
+        store = MagicMock()
+        store.load.return_value = (PatientDiary.create_new("PT-1"), 1)
+        dispatcher = BulkDispatcher()
+        registry = DispatcherRegistry()
+        registry.register(dispatcher)
+        outbox = _outbox(dispatcher, channels=["sms"])
+        registry.attach_outbox(outbox)
+        gateway = Gateway(diary_store=store, dispatcher_registry=registry)
+        gateway.register_agent("delivery_receipts", SmsAgent())
+
+        event = EventEnvelope.handoff(
+            EventType.DELIVERY_RECEIPT, "PT-1", source_agent="outbox", payload={},
+        )
+        result = await gateway.process_event(event)
+        entry = result.updated_diary.conversation_log[-1]
+        assert entry.delivery_status == "queued"
+        assert entry.message_id
+        [pending] = outbox._store.due("sms", now=float("inf"), limit=10)
+        assert pending.message_id == entry.message_id
+        assert pending.patient_id == "PT-1"
+        assert dispatcher.batches == []
+        await gateway.flush_pending_saves()
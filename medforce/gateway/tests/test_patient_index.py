@@ -0,0 +1,140 @@
+"""
+Tests for the secondary patient index maintained by DiaryStore.
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from medforce.gateway.diary import (
+    ConversationEntry,
+    DiaryStore,
+    GPQuery,
+    PatientDiary,
+    Phase,
+    RiskLevel,
+)
+from medforce.gateway.diary_backends import InMemoryDiaryBackend
+from medforce.gateway.heartbeat import HeartbeatScheduler
+
+
+class CountingBackend(InMemoryDiaryBackend):
+    def __init__(self):
+        super().__init__()
+        self.reads: list[str] = []
+        self.writes: list[str] = []
+
+    def read(self, key):
+        self.reads.append(key)
+        return super().read(key)
+
+    def read_bytes(self, key):
+        self.reads.append(key)
+        return super().read_bytes(key)
+
+    def write(self, key, content, generation=None):
+        self.writes.append(key)
+        return super().write(key, content, generation)
+
+
+def _monitored(store, pid, appointment="2026-01-01"):
+    diary = PatientDiary.create_new(pid)
+    diary.header.current_phase = Phase.MONITORING
+    diary.header.risk_level = RiskLevel.HIGH
+    diary.monitoring.monitoring_active = True
+    diary.monitoring.appointment_date = appointment
+    store.save(pid, diary)
+    return diary
+
+
+class TestPatientIndex:
+
+    def test_save_updates_index(self):
+        store = DiaryStore(backend=InMemoryDiaryBackend())
+        diary = _monitored(store, "PT-1")
+        diary.gp_channel.queries.append(GPQuery(query_id="Q1", query_text="LFTs?"))
+        store.save("PT-1", diary)
+
+        entry = store.patient_index.get("PT-1")
+        assert entry.phase == "monitoring"
+        assert entry.risk_level == "high"
+        assert entry.monitoring_active is True
+        assert entry.appointment_date == "2026-01-01"
+        assert entry.pending_gp_queries == 1
+
+    def test_unchanged_fields_do_not_rewrite_index(self):
+        backend = CountingBackend()
+        store = DiaryStore(backend=backend)
+        diary = _monitored(store, "PT-1")
+        before = backend.writes.count(DiaryStore.INDEX_PATH)
+        for i in range(5):
+            diary.add_conversation(ConversationEntry(message=str(i)))
+            store.save("PT-1", diary)
+        assert backend.writes.count(DiaryStore.INDEX_PATH) == before
+
+    def test_listing_reads_one_blob(self):
+        backend = CountingBackend()
+        store = DiaryStore(backend=backend)
+        for i in range(10):
+            _monitored(store, f"PT-{i}")
+        store.create("PT-NEW")
+
+        fresh = DiaryStore(backend=backend)
+        backend.reads.clear()
+        assert fresh.list_monitoring_patients() == [f"PT-{i}" for i in range(10)]
+        assert backend.reads == [DiaryStore.INDEX_PATH]
+
+    def test_rebuilds_when_index_missing(self):
+        backend = InMemoryDiaryBackend()
+        legacy = DiaryStore(backend=backend, patient_index=False)
+        _monitored(legacy, "PT-OLD")
+        legacy.create("PT-INTAKE")
+        assert not backend.exists(DiaryStore.INDEX_PATH)
+
+        store = DiaryStore(backend=backend)
+        assert store.list_monitoring_patients() == ["PT-OLD"]
+        assert backend.exists(DiaryStore.INDEX_PATH)
+        assert store.get_stats()["patient_index"]["rebuilds"] == 1
+
+    def test_two_stores_merge_updates(self):
+        backend = InMemoryDiaryBackend()
+        a = DiaryStore(backend=backend)
+        b = DiaryStore(backend=backend)
+        a.create("PT-A")
+        b.create("PT-B")  # b's view predates PT-A's index write → conflict + merge
+        _monitored(a, "PT-A")
+
+        ids = sorted(e.patient_id for e in DiaryStore(backend=backend).list_index())
+        assert ids == ["PT-A", "PT-B"]
+        assert DiaryStore(backend=backend).list_monitoring_patients() == ["PT-A"]
+
+    def test_delete_removes_entry(self):
+        store = DiaryStore(backend=InMemoryDiaryBackend())
+        _monitored(store, "PT-1")
+        store.delete("PT-1")
+        assert store.list_monitoring_patients() == []
+
+    def test_list_index_filters(self):
+        store = DiaryStore(backend=InMemoryDiaryBackend())
+        _monitored(store, "PT-MON")
+        store.create("PT-INT")
+        assert [e.patient_id for e in store.list_index(phase="intake")] == ["PT-INT"]
+        assert [e.patient_id for e in store.list_index(risk_level="high")] == ["PT-MON"]
+
+
+class TestHeartbeatRecoveryFromIndex:
+
+    @pytest.mark.asyncio
+    async def test_recovery_does_not_load_diaries(self):
+        backend = CountingBackend()
+        store = DiaryStore(backend=backend)
+        _monitored(store, "PT-1", "2026-02-01")
+        _monitored(store, "PT-2", "2026-03-01")
+
+        fresh = DiaryStore(backend=backend)
+        backend.reads.clear()
+        scheduler = HeartbeatScheduler(processor=AsyncMock(), diary_store=fresh)
+        await scheduler._recover_on_startup()
+
+        assert sorted(scheduler.monitored_patients) == ["PT-1", "PT-2"]
+        assert scheduler._monitored["PT-2"]["appointment_date"] == "2026-03-01"
+        assert backend.reads == [DiaryStore.INDEX_PATH]
@@ -0,0 +1,108 @@
+"""
+Tests for the shared phrase matcher.
+"""
+
+import pytest
+
+from medforce.gateway.phrases import (
+    PhraseMatcher,
+    PhraseSet,
+    clause_negation,
+    prefix_negation,
+)
+
+
+class TestSubstringSets:
+
+    def test_matches_like_in(self):
+        matcher = PhraseMatcher({"clinical": ["allerg", "side effect"], "intake": ["my gp"]})
+        assert matcher.scan("I'm ALLERGIC to it, my GP knows") == {
+            "clinical": ("allerg",), "intake": ("my gp",),
+        }
+
+    def test_phrases_in_set_order(self):
+        matcher = PhraseMatcher({"flags": ["tarry", "black and tarry", "black stool"]})
+        assert matcher.matches("black and tarry, black stool", "flags") == (
+            "tarry", "black and tarry", "black stool",
+        )
+
+    def test_shared_phrase_reported_for_each_set(self):
+        matcher = PhraseMatcher({"a": ["fever"], "b": ["chills", "fever"]})
+        assert matcher.scan("a fever") == {"a": ("fever",), "b": ("fever",)}
+        assert matcher.indices("a fever", "b") == (1,)
+
+    def test_no_match(self):
+        matcher = PhraseMatcher({"a": ["fever"]})
+        assert matcher.scan("all good") == {}
+        assert matcher.scan("") == {}
+        assert not matcher.has("all good", "a")
+
+    def test_unknown_set(self):
+        with pytest.raises(KeyError):
+            PhraseMatcher({"a": ["x"]}).has("x", "b")
+
+    def test_scan_is_memoised(self):
+        matcher = PhraseMatcher({"a": ["fever"], "b": ["rash"]})
+        matcher.has("fever and rash", "a")
+        matcher.has("fever and rash", "b")
+        info = matcher._scan_cached.cache_info()
+        assert (info.misses, info.hits) == (1, 1)
+
+
+class TestWholeWords:
+
+    @pytest.fixture
+    def matcher(self):
+        return PhraseMatcher({"kw": PhraseSet(["jaundice", "tumour", "ascites"], whole_words=True)})
+
+    @pytest.mark.parametrize("text,expected", [
+        ("yellow, jaundiced skin", ("jaundice",)),
+        ("two tumours", ("tumour",)),
+        ("ascitesque", ()),
+        ("prejaundice", ()),
+    ])
+    def test_boundaries(self, matcher, text, expected):
+        assert matcher.matches(text, "kw") == expected
+
+
+class TestNegation:
+
+    def test_clause_negation(self):
+        matcher = PhraseMatcher({
+            "kw": PhraseSet(["jaundice"], whole_words=True, negation=clause_negation()),
+        })
+        assert not matcher.has("no jaundice", "kw")
+        assert not matcher.has("hasn't had any jaundice", "kw")
+        assert matcher.has("no pain, but jaundice", "kw")
+        assert matcher.has("no pain at all today and jaundice", "kw")
+
+    def test_prefix_negation(self):
+        matcher = PhraseMatcher({
+            "kw": PhraseSet(["fever"], negation=prefix_negation(["no sign of ", "no "])),
+        })
+        assert not matcher.has("there is no sign of fever", "kw")
+        assert matcher.has("no, but some time later a fever came back", "kw")
+
+    def test_any_unnegated_occurrence_counts(self):
+        matcher = PhraseMatcher({
+            "kw": PhraseSet(["dark urine"], negation=prefix_negation(["no "])),
+        })
+        assert matcher.has("no dark urine yesterday; today dark urine again", "kw")
+
+
+class TestRegistration:
+
+    def test_register_after_scan_recompiles(self):
+        matcher = PhraseMatcher({"a": ["fever"]})
+        assert matcher.scan("fever and rash") == {"a": ("fever",)}
+        matcher.register("b", ["rash"])
+        assert matcher.scan("fever and rash") == {"a": ("fever",), "b": ("rash",)}
+
+    def test_owner_sets_share_one_scan(self):
+        import medforce.gateway.agents.booking_agent  # noqa: F401
+        import medforce.gateway.gateway  # noqa: F401
+        from medforce.gateway.phrases import PHRASES
+
+        matched = PHRASES.scan("Can I reschedule? I started a new medication")
+        assert matched["gateway.clinical"] == ("medication",)
+        assert matched["booking.reschedule"] == ("reschedule",)
@@ -10,6 +10,9 @@ Tests cover:
   - Active patient listing
   - Stop/cleanup
   - Multiple rapid events for same patient
+  - Backpressure: depth / in-flight limits and overflow policies
+  - Micro-batching of rapid USER_MESSAGEs
+  - Pool scheduler (fixed workers + ready set)
 """
 
 import asyncio
@@ -17,7 +20,11 @@ import asyncio
 import pytest
 
 from medforce.gateway.events import EventEnvelope, EventType
-from medforce.gateway.queue import PatientQueueManager
+from medforce.gateway.queue import (
+    OverflowPolicy,
+    PatientQueueManager,
+    QueueFullError,
+)
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -303,3 +310,288 @@ class TestPatientScenarios:
         assert patient_events["PT-1"] == ["A1", "A2", "A3"]
         assert patient_events["PT-2"] == ["B1", "B2"]
         assert patient_events["PT-3"] == ["C1"]
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  Backpressure
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+async def _blocked_manager(**kwargs):
+    """A manager whose processor blocks until ``gate`` is set."""
+    gate = asyncio.Event()
+    processed = []
+
+    async def processor(event: EventEnvelope):
+        await gate.wait()
+        processed.append(event.payload.get("text"))
+
+    mgr = PatientQueueManager(processor=processor, idle_timeout_seconds=5, **kwargs)
+    mgr._running = True
+    return mgr, gate, processed
+
+
+class TestBackpressure:
+
+    @pytest.mark.asyncio
+    async def test_reject_when_patient_queue_full(self):
+        mgr, gate, processed = await _blocked_manager(max_queue_depth=2)
+        await mgr.enqueue(_msg("PT-1", "0"))   # picked up by the worker
+        await asyncio.sleep(0.01)
+        await mgr.enqueue(_msg("PT-1", "1"))
+        await mgr.enqueue(_msg("PT-1", "2"))
+        with pytest.raises(QueueFullError):
+            await mgr.enqueue(_msg("PT-1", "3"))
+        # Other patients are unaffected
+        await mgr.enqueue(_msg("PT-2", "x"))
+
+        gate.set()
+        await asyncio.sleep(0.05)
+        await mgr.stop()
+        assert processed.count("3") == 0
+        assert mgr.get_metrics()["rejected"] == 1
+        assert mgr.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_global_in_flight_budget(self):
+        mgr, gate, _ = await _blocked_manager(max_in_flight=3)
+        for pid in ("PT-1", "PT-2", "PT-3"):
+            await mgr.enqueue(_msg(pid, "hi"))
+        with pytest.raises(QueueFullError, match="in flight"):
+            await mgr.enqueue(_msg("PT-4", "hi"))
+        gate.set()
+        await asyncio.sleep(0.05)
+        await mgr.enqueue(_msg("PT-4", "hi"))  # budget freed
+        await mgr.stop()
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest(self):
+        mgr, gate, processed = await _blocked_manager(
+            max_queue_depth=2, overflow_policy=OverflowPolicy.DROP_OLDEST,
+        )
+        await mgr.enqueue(_msg("PT-1", "0"))
+        await asyncio.sleep(0.01)
+        for text in ("1", "2", "3"):
+            await mgr.enqueue(_msg("PT-1", text))
+
+        gate.set()
+        await asyncio.sleep(0.05)
+        await mgr.stop()
+        assert processed == ["0", "2", "3"]
+        assert mgr.get_metrics()["dropped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_coalesce_merges_user_messages(self):
+        seen = []
+        gate = asyncio.Event()
+
+        async def processor(event: EventEnvelope):
+            await gate.wait()
+            seen.append(event)
+
+        mgr = PatientQueueManager(
+            processor=processor, max_queue_depth=1, overflow_policy="coalesce",
+        )
+        mgr._running = True
+        first = _msg("PT-1", "0")
+        await mgr.enqueue(first)
+        await asyncio.sleep(0.01)
+        a, b, c = _msg("PT-1", "a"), _msg("PT-1", "b"), _msg("PT-1", "c")
+        for event in (a, b, c):
+            await mgr.enqueue(event)
+
+        gate.set()
+        await asyncio.sleep(0.05)
+        await mgr.stop()
+        assert len(seen) == 2
+        merged = seen[1]
+        assert merged.event_id == a.event_id
+        assert merged.payload["text"] == "a\nb\nc"
+        assert merged.payload["coalesced_event_ids"] == [a.event_id, b.event_id, c.event_id]
+        assert mgr.get_metrics()["coalesced"] == 2
+
+    @pytest.mark.asyncio
+    async def test_coalesce_rejects_other_event_types(self):
+        mgr, gate, _ = await _blocked_manager(max_queue_depth=1, overflow_policy="coalesce")
+        await mgr.enqueue(_msg("PT-1", "0"))
+        await asyncio.sleep(0.01)
+        await mgr.enqueue(_msg("PT-1", "1"))
+        heartbeat = EventEnvelope.heartbeat("PT-1", days_since_appointment=14, milestone="day_14")
+        with pytest.raises(QueueFullError):
+            await mgr.enqueue(heartbeat)
+        gate.set()
+        await mgr.stop()
+
+    @pytest.mark.asyncio
+    async def test_depth_histograms(self):
+        mgr, gate, _ = await _blocked_manager()
+        for i in range(7):
+            await mgr.enqueue(_msg("PT-1", str(i)))
+        await mgr.enqueue(_msg("PT-2", "x"))
+        metrics = mgr.get_metrics()
+        assert sum(metrics["depth_at_enqueue"].values()) == 8
+        assert metrics["depth_at_enqueue"]["<=0"] == 2
+        assert metrics["depth_now"] == {"<=10": 1, "<=1": 1}
+        assert metrics["in_flight"] == 8
+        gate.set()
+        await mgr.stop()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  Micro-batching
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class TestMicroBatching:
+
+    @staticmethod
+    async def _run(events, delays, **kwargs):
+        seen = []
+
+        async def processor(event: EventEnvelope):
+            seen.append(event)
+
+        mgr = PatientQueueManager(processor=processor, **kwargs)
+        mgr._running = True
+        for event, delay in zip(events, delays):
+            await asyncio.sleep(delay)
+            await mgr.enqueue(event)
+        await asyncio.sleep(0.2)
+        await mgr.stop()
+        return seen, mgr
+
+    @pytest.mark.asyncio
+    async def test_rapid_messages_merge_with_original_ids(self):
+        events = [_msg("PT-1", t) for t in ("I have", "a rash", "on my arm")]
+        seen, mgr = await self._run(events, [0, 0.01, 0.01], batch_window_ms=50)
+        assert len(seen) == 1
+        assert seen[0].payload["text"] == "I have\na rash\non my arm"
+        assert seen[0].payload["coalesced_event_ids"] == [e.event_id for e in events]
+        assert mgr.get_metrics()["batched_events"] == 3
+        assert mgr.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_messages_outside_window_stay_separate(self):
+        events = [_msg("PT-1", "one"), _msg("PT-1", "two")]
+        seen, _ = await self._run(events, [0, 0.1], batch_window_ms=20)
+        assert [e.payload["text"] for e in seen] == ["one", "two"]
+
+    @pytest.mark.asyncio
+    async def test_other_event_types_end_the_batch_in_order(self):
+        hb = EventEnvelope.heartbeat("PT-1", days_since_appointment=14, milestone="day_14")
+        events = [_msg("PT-1", "a"), hb, _msg("PT-1", "b")]
+        seen, _ = await self._run(events, [0, 0, 0], batch_window_ms=50)
+        assert [e.event_type for e in seen] == [
+            EventType.USER_MESSAGE, EventType.HEARTBEAT, EventType.USER_MESSAGE,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_different_senders_not_merged(self):
+        helper = EventEnvelope.user_message("PT-1", "from helper", sender_id="HELPER-1")
+        seen, _ = await self._run([_msg("PT-1", "me"), helper], [0, 0], batch_window_ms=50)
+        assert len(seen) == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_size_capped(self):
+        events = [_msg("PT-1", str(i)) for i in range(5)]
+        seen, _ = await self._run(
+            events, [0] * 5, batch_window_ms=50, batch_max_events=2,
+        )
+        assert [len(e.payload.get("coalesced_event_ids", [1])) for e in seen] == [2, 2, 1]
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self):
+        events = [_msg("PT-1", "a"), _msg("PT-1", "b")]
+        seen, _ = await self._run(events, [0, 0])
+        assert len(seen) == 2
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  Pool Scheduler
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class TestPoolScheduler:
+
+    @pytest.mark.asyncio
+    async def test_per_patient_order_with_shared_workers(self):
+        processed = {"PT-1": [], "PT-2": []}
+        running = set()
+        overlaps = []
+
+        async def processor(event: EventEnvelope):
+            pid = event.patient_id
+            if pid in running:
+                overlaps.append(pid)
+            running.add(pid)
+            await asyncio.sleep(0.005)
+            running.discard(pid)
+            processed[pid].append(event.payload["text"])
+
+        mgr = PatientQueueManager(processor=processor, scheduler="pool", pool_size=4)
+        await mgr.start()
+        for i in range(10):
+            await mgr.enqueue(_msg("PT-1", str(i)))
+            await mgr.enqueue(_msg("PT-2", str(i)))
+        await asyncio.sleep(0.3)
+
+        assert processed["PT-1"] == [str(i) for i in range(10)]
+        assert processed["PT-2"] == [str(i) for i in range(10)]
+        assert overlaps == []  # never two workers on one patient
+        assert mgr.get_metrics()["worker_tasks"] == 4
+        await mgr.stop()
+
+    @pytest.mark.asyncio
+    async def test_patients_share_workers_fairly(self):
+        order = []
+
+        async def processor(event: EventEnvelope):
+            order.append(event.patient_id)
+
+        mgr = PatientQueueManager(processor=processor, scheduler="pool", pool_size=1)
+        await mgr.start()
+        for i in range(3):
+            await mgr.enqueue(_msg("PT-BUSY", str(i)))
+        await mgr.enqueue(_msg("PT-QUIET", "hi"))
+        await asyncio.sleep(0.05)
+        await mgr.stop()
+        # The quiet patient doesn't wait for the whole backlog
+        assert order.index("PT-QUIET") < 3
+
+    @pytest.mark.asyncio
+    async def test_empty_queues_are_released(self):
+        async def processor(event: EventEnvelope):
+            pass
+
+        mgr = PatientQueueManager(processor=processor, scheduler="pool", pool_size=2)
+        await mgr.start()
+        for i in range(20):
+            await mgr.enqueue(_msg(f"PT-{i}", "hi"))
+        await asyncio.sleep(0.05)
+        assert mgr.active_count == 0
+        assert mgr.in_flight == 0
+        await mgr.stop()
+
+    @pytest.mark.asyncio
+    async def test_processor_errors_do_not_kill_workers(self):
+        processed = []
+
+        async def processor(event: EventEnvelope):
+            if event.payload["text"] == "bad":
+                raise RuntimeError("boom")
+            processed.append(event.payload["text"])
+
+        mgr = PatientQueueManager(processor=processor, scheduler="pool", pool_size=1)
+        await mgr.start()
+        await mgr.enqueue(_msg("PT-1", "bad"))
+        await mgr.enqueue(_msg("PT-1", "good"))
+        await asyncio.sleep(0.05)
+        await mgr.stop()
+        assert processed == ["good"]
+
+    def test_unknown_scheduler_rejected(self):
+        async def processor(event):
+            pass
+
+        with pytest.raises(ValueError):
+            PatientQueueManager(processor=processor, scheduler="threads")
@@ -0,0 +1,236 @@
+"""
+Tests for consistent-hash sharding and shard forwarding.
+
+Covers:
+  - HashRing stability and balance
+  - ShardRouter.from_env configuration
+  - forward() over an httpx MockTransport
+  - /emit, webhook and /shard/ingest routing through the API
+"""
+
+import json
+from collections import Counter
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from medforce.gateway.events import EventEnvelope, EventType
+from medforce.gateway.sharding import (
+    INGEST_PATH,
+    HashRing,
+    ShardForwardError,
+    ShardRouter,
+)
+
+NODES = ["http://s0:8081", "http://s1:8082", "http://s2:8083"]
+PIDS = [f"PT-{i}" for i in range(3000)]
+
+
+def _pid_owned_by(router, node):
+    return next(pid for pid in PIDS if router.owner(pid) == node)
+
+
+# ── HashRing ──
+
+
+class TestHashRing:
+
+    def test_owner_is_deterministic(self):
+        a, b = HashRing(NODES), HashRing(list(reversed(NODES)))
+        assert all(a.owner(pid) == b.owner(pid) for pid in PIDS)
+
+    def test_keys_spread_across_nodes(self):
+        ring = HashRing(NODES)
+        counts = Counter(ring.owner(pid) for pid in PIDS)
+        assert set(counts) == set(NODES)
+        assert min(counts.values()) > len(PIDS) / len(NODES) * 0.6
+
+    def test_adding_a_node_moves_only_its_share(self):
+        ring = HashRing(NODES)
+        before = {pid: ring.owner(pid) for pid in PIDS}
+        ring.add("http://s3:8084")
+        moved = [pid for pid in PIDS if ring.owner(pid) != before[pid]]
+        # Every moved key moved to the new node, roughly 1/4 of them
+        assert all(ring.owner(pid) == "http://s3:8084" for pid in moved)
+        assert 0.1 < len(moved) / len(PIDS) < 0.4
+
+    def test_remove_restores_previous_owners(self):
+        ring = HashRing(NODES)
+        before = {pid: ring.owner(pid) for pid in PIDS}
+        ring.add("http://s3:8084")
+        ring.remove("http://s3:8084")
+        assert all(ring.owner(pid) == before[pid] for pid in PIDS)
+
+
+# ── ShardRouter ──
+
+
+class TestShardRouter:
+
+    def test_from_env_disabled_with_one_shard(self, monkeypatch):
+        monkeypatch.setenv("GATEWAY_SHARDS", "http://s0:8081")
+        assert ShardRouter.from_env() is None
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("GATEWAY_SHARDS", ", ".join(NODES))
+        monkeypatch.setenv("GATEWAY_SHARD_SELF", "http://s1:8082/")
+        router = ShardRouter.from_env()
+        assert router.local_node == "http://s1:8082"
+        assert router.nodes == NODES
+
+    def test_from_env_requires_self(self, monkeypatch):
+        monkeypatch.setenv("GATEWAY_SHARDS", ",".join(NODES))
+        monkeypatch.delenv("GATEWAY_SHARD_SELF", raising=False)
+        with pytest.raises(ValueError):
+            ShardRouter.from_env()
+
+    def test_each_shard_gets_its_own_event_journal(self, monkeypatch, tmp_path):
+        from medforce.gateway.setup import _build_event_journal
+
+        monkeypatch.setenv("EVENT_JOURNAL_DIR", str(tmp_path))
+        journals = [
+            _build_event_journal(ShardRouter(node, NODES)) for node in NODES[:2]
+        ]
+        try:
+            assert sorted(p.name for p in tmp_path.iterdir()) == ["s0_8081", "s1_8082"]
+        finally:
+            for journal in journals:
+                journal.close()
+
+    def test_unknown_local_node_rejected(self):
+        with pytest.raises(ValueError):
+            ShardRouter("http://elsewhere:1", NODES)
+
+    @pytest.mark.asyncio
+    async def test_forward_posts_envelope_to_owner(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(200, json={"success": True})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        router = ShardRouter(NODES[0], NODES, client=client)
+        pid = _pid_owned_by(router, NODES[2])
+        env = EventEnvelope.user_message(pid, "hello")
+
+        await router.forward(env)
+
+        assert str(seen[0].url) == NODES[2] + INGEST_PATH
+        body = json.loads(seen[0].content)
+        assert body["event"]["event_id"] == env.event_id
+        assert body["wait"] is False
+        assert router.get_metrics()["forwarded"] == 1
+
+    @pytest.mark.asyncio
+    async def test_forward_failure_raises(self):
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda r: httpx.Response(503))
+        )
+        router = ShardRouter(NODES[0], NODES, client=client)
+        pid = _pid_owned_by(router, NODES[1])
+        with pytest.raises(ShardForwardError):
+            await router.forward(EventEnvelope.user_message(pid, "hi"))
+        assert router.get_metrics()["forward_failures"] == 1
+
+
+# ── API Routing ──
+
+
+@pytest.fixture
+def api():
+    """Gateway router with a mock gateway/queue and a 3-shard router on s0."""
+    from medforce.routers.gateway_api import router as api_router
+
+    gateway = MagicMock()
+    gateway.process_event = AsyncMock(return_value=None)
+    queue = MagicMock(enqueue=AsyncMock())
+    shard_router = ShardRouter(NODES[0], NODES)
+    shard_router.forward = AsyncMock(return_value={"success": True, "responses": ["Hi there"]})
+
+    app = FastAPI()
+    app.include_router(api_router)
+    with patch("medforce.gateway.setup._gateway", gateway), \
+         patch("medforce.gateway.setup._queue_manager", queue), \
+         patch("medforce.gateway.setup._shard_router", shard_router):
+        yield TestClient(app), gateway, queue, shard_router
+
+
+class TestApiRouting:
+
+    def test_emit_for_remote_patient_is_forwarded(self, api):
+        client, _, queue, shard_router = api
+        pid = _pid_owned_by(shard_router, NODES[1])
+        resp = client.post("/api/gateway/emit", json={
+            "event_type": "USER_MESSAGE", "patient_id": pid, "payload": {"text": "hi"},
+        })
+        assert resp.status_code == 200
+        assert NODES[1] in resp.json()["message"]
+        forwarded = shard_router.forward.call_args.args[0]
+        assert forwarded.patient_id == pid
+        assert forwarded.event_id == resp.json()["event_id"]
+        queue.enqueue.assert_not_called()
+
+    def test_emit_for_local_patient_is_enqueued(self, api):
+        client, _, queue, shard_router = api
+        pid = _pid_owned_by(shard_router, NODES[0])
+        resp = client.post("/api/gateway/emit", json={
+            "event_type": "USER_MESSAGE", "patient_id": pid, "payload": {"text": "hi"},
+        })
+        assert resp.status_code == 200
+        queue.enqueue.assert_awaited_once()
+        shard_router.forward.assert_not_called()
+
+    def test_emit_forward_failure_is_502(self, api):
+        client, _, _, shard_router = api
+        shard_router.forward.side_effect = ShardForwardError("down")
+        pid = _pid_owned_by(shard_router, NODES[2])
+        resp = client.post("/api/gateway/emit", json={
+            "event_type": "USER_MESSAGE", "patient_id": pid,
+        })
+        assert resp.status_code == 502
+
+    def test_webhook_waits_for_owner_responses(self, api):
+        client, gateway, _, shard_router = api
+        pid = _pid_owned_by(shard_router, NODES[1])
+        envelope = EventEnvelope.user_message(pid, "hello", channel="whatsapp")
+        with patch(
+            "medforce.gateway.ingest.dialogflow_ingest.DialogflowIngest.to_envelope",
+            AsyncMock(return_value=envelope),
+        ):
+            resp = client.post("/api/gateway/dialogflow-webhook", json={})
+        assert resp.status_code == 200
+        assert "Hi there" in json.dumps(resp.json())
+        assert shard_router.forward.call_args.kwargs["wait"] is True
+        gateway.process_event.assert_not_called()
+
+    def test_shard_ingest_enqueues_with_original_event_id(self, api):
+        client, _, queue, shard_router = api
+        env = EventEnvelope.user_message(_pid_owned_by(shard_router, NODES[0]), "hi")
+        resp = client.post("/api/gateway/shard/ingest", json={
+            "event": env.model_dump(mode="json"),
+        })
+        assert resp.status_code == 200
+        enqueued = queue.enqueue.call_args.args[0]
+        assert enqueued.event_id == env.event_id
+        assert enqueued.event_type == EventType.USER_MESSAGE
+
+    def test_shard_ingest_rejects_patient_owned_elsewhere(self, api):
+        client, _, queue, shard_router = api
+        env = EventEnvelope.user_message(_pid_owned_by(shard_router, NODES[2]), "hi")
+        resp = client.post("/api/gateway/shard/ingest", json={
+            "event": env.model_dump(mode="json"),
+        })
+        assert resp.status_code == 409
+        queue.enqueue.assert_not_called()
+
+    def test_owner_lookup(self, api):
+        client, _, _, shard_router = api
+        pid = _pid_owned_by(shard_router, NODES[2])
+        body = client.get(f"/api/gateway/shard/owner/{pid}").json()
+        assert body["owner"] == NODES[2]
+        assert body["local"] is False
@@ -8,10 +8,19 @@ Endpoints:
   GET  /api/gateway/chat/{id}           Read patient chat history from GCS
   GET  /api/gateway/documents/{id}      List uploaded documents for a patient
   GET  /api/gateway/events/{id}         Read event log for a patient
+  GET  /api/gateway/patients            List patients from the index (phase/monitoring filters)
   GET  /api/gateway/status              Health + active queue info
   GET  /api/gateway/responses/{id}      Read test harness responses
   POST /api/gateway/scenario/load       Seed diary with test scenario data
   DELETE /api/gateway/reset/{id}        Clear diary + events for a patient
+  POST /api/gateway/dlq/{index}/replay  Re-enqueue a dead-lettered event from the journal
+  POST /api/gateway/shard/ingest        Accept an event forwarded by another shard
+  GET  /api/gateway/shard/owner/{id}    Which shard owns a patient
+  POST /api/gateway/admin/rescore       Diff risk levels under a candidate rule set
+
+When sharding is enabled (GATEWAY_SHARDS), /emit and the channel
+webhooks forward events for patients owned by another shard to that
+shard; see medforce/gateway/sharding.py.
 """
 
 from __future__ import annotations
@@ -28,6 +37,8 @@ from pydantic import BaseModel, Field
 
 from medforce.gateway.diary import DiaryNotFoundError
 from medforce.gateway.events import EventEnvelope, EventType, SenderRole
+from medforce.gateway.queue import QueueFullError
+from medforce.gateway.sharding import ShardForwardError
 
 logger = logging.getLogger("gateway.api")
 
@@ -60,6 +71,13 @@ class EmitEventResponse(BaseModel):
     message: str = ""
 
 
+class ShardIngestRequest(BaseModel):
+    """Request body for POST /api/gateway/shard/ingest."""
+
+    event: EventEnvelope
+    wait: bool = False  # True → process inline and return the responses
+
+
 class FileAttachment(BaseModel):
     """A single file attachment, Base64-encoded."""
 
@@ -75,6 +93,15 @@ class UploadDocumentsRequest(BaseModel):
     sender_role: str = "patient"
 
 
+class RescoreRequest(BaseModel):
+    """Request body for POST /api/gateway/admin/rescore."""
+
+    rules: dict[str, Any] = Field(default_factory=dict)  # see cohort_rescore
+    workers: int = 1
+    chunk_size: int = 500
+    sample_limit: int = 200
+
+
 class GatewayStatusResponse(BaseModel):
     """Response for GET /api/gateway/status."""
 
@@ -85,6 +112,65 @@ class GatewayStatusResponse(BaseModel):
     registered_channels: list[str] = Field(default_factory=list)
 
 
+# ── Shard Routing ──
+
+
+async def _enqueue_local(gateway, envelope: EventEnvelope) -> None:
+    """Route an event through this process's per-patient queue."""
+    from medforce.gateway.setup import get_queue_manager, get_shard_router
+
+    shard_router = get_shard_router()
+    if shard_router is not None:
+        shard_router.record_local()
+
+    queue_manager = get_queue_manager()
+    if queue_manager is not None:
+        await queue_manager.enqueue(envelope)
+        return
+
+    # Fallback: direct background processing if queue manager unavailable
+    async def _process_in_background(gw, env):
+        try:
+            t0 = time.monotonic()
+            await gw.process_event(env)
+            elapsed = time.monotonic() - t0
+            logger.info(
+                "Event %s for %s processed in %.2fs",
+                env.event_type.value, env.patient_id, elapsed,
+            )
+        except Exception as exc:
+            logger.error("Error processing event %s: %s", env.event_id, exc, exc_info=True)
+
+    task = asyncio.create_task(_process_in_background(gateway, envelope))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _too_many_requests(exc: QueueFullError) -> HTTPException:
+    """429 for an event refused by queue admission control."""
+    return HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "1"})
+
+
+async def _process_on_owner(gateway, envelope: EventEnvelope) -> list[str]:
+    """
+    Process an event inline on the shard that owns the patient.
+
+    Used by the channel webhooks, which reply synchronously.  Returns
+    the text of the responses the agents produced.
+    """
+    from medforce.gateway.setup import get_shard_router
+
+    shard_router = get_shard_router()
+    if shard_router is not None and not shard_router.is_local(envelope.patient_id):
+        result = await shard_router.forward(envelope, wait=True)
+        return list(result.get("responses", []))
+
+    if shard_router is not None:
+        shard_router.record_local()
+    result = await gateway.process_event(envelope)
+    return [r.message for r in (result.responses if result else [])]
+
+
 # ── Endpoints ──
 
 
@@ -96,7 +182,7 @@ async def emit_event(request: EmitEventRequest):
     The event is validated, wrapped in an EventEnvelope, and enqueued
     via the PatientQueueManager for serialized per-patient processing.
     """
-    from medforce.gateway.setup import get_gateway, get_queue_manager
+    from medforce.gateway.setup import get_gateway, get_shard_router
 
     gateway = get_gateway()
     if gateway is None:
@@ -133,27 +219,28 @@ async def emit_event(request: EmitEventRequest):
         correlation_id=request.correlation_id,
     )
 
-    # Route through the per-patient queue for serialized processing
-    queue_manager = get_queue_manager()
-    if queue_manager is not None:
-        await queue_manager.enqueue(envelope)
-    else:
-        # Fallback: direct background processing if queue manager unavailable
-        async def _process_in_background(gw, env):
-            try:
-                t0 = time.monotonic()
-                await gw.process_event(env)
-                elapsed = time.monotonic() - t0
-                logger.info(
-                    "Event %s for %s processed in %.2fs",
-                    env.event_type.value, env.patient_id, elapsed,
-                )
-            except Exception as exc:
-                logger.error("Error processing event %s: %s", env.event_id, exc, exc_info=True)
-
-        task = asyncio.create_task(_process_in_background(gateway, envelope))
-        _background_tasks.add(task)
-        task.add_done_callback(_background_tasks.discard)
+    # Another shard owns this patient — hand the event over
+    shard_router = get_shard_router()
+    if shard_router is not None and not shard_router.is_local(envelope.patient_id):
+        try:
+            await shard_router.forward(envelope)
+        except QueueFullError as exc:
+            raise _too_many_requests(exc)
+        except ShardForwardError as exc:
+            raise HTTPException(status_code=502, detail=str(exc))
+        return EmitEventResponse(
+            success=True,
+            event_id=envelope.event_id,
+            message=(
+                f"Event {event_type.value} forwarded to shard "
+                f"{shard_router.owner(envelope.patient_id)}"
+            ),
+        )
+
+    try:
+        await _enqueue_local(gateway, envelope)
+    except QueueFullError as exc:
+        raise _too_many_requests(exc)
 
     return EmitEventResponse(
         success=True,
@@ -461,13 +548,51 @@ async def gateway_health():
 @router.get("/metrics")
 async def gateway_metrics():
     """P2: Observability metrics — processing times, error rates, DLQ size."""
-    from medforce.gateway.setup import get_gateway
+    from medforce.gateway.setup import (
+        get_gateway,
+        get_heartbeat_scheduler,
+        get_queue_manager,
+        get_shard_router,
+    )
 
     gateway = get_gateway()
     if gateway is None:
         raise HTTPException(status_code=503, detail="Gateway not initialized")
 
-    return gateway.get_metrics()
+    metrics = gateway.get_metrics()
+    queue_manager = get_queue_manager()
+    if queue_manager is not None:
+        metrics["queues"] = queue_manager.get_metrics()
+    scheduler = get_heartbeat_scheduler()
+    if scheduler is not None:
+        metrics["heartbeat"] = scheduler.get_metrics()
+    shard_router = get_shard_router()
+    if shard_router is not None:
+        metrics["sharding"] = shard_router.get_metrics()
+    return metrics
+
+
+@router.get("/patients")
+async def list_patients(
+    phase: str | None = None,
+    monitoring_active: bool | None = None,
+    risk_level: str | None = None,
+):
+    """List patients from the secondary index — one blob read, no diary loads."""
+    from medforce.gateway.setup import get_diary_store
+
+    diary_store = get_diary_store()
+    if diary_store is None:
+        raise HTTPException(status_code=503, detail="Gateway not initialized")
+
+    entries = await asyncio.to_thread(
+        diary_store.list_index,
+        phase=phase, monitoring_active=monitoring_active, risk_level=risk_level,
+    )
+    return {
+        "count": len(entries),
+        "patients": [e.model_dump(mode="json") for e in entries],
+    }
 
 
 @router.get("/dlq")
@@ -483,6 +608,82 @@ async def gateway_dlq(limit: int = 50):
     return {"count": len(entries), "entries": entries}
 
 
+@router.post("/dlq/{index}/replay")
+async def replay_dlq(index: int):
+    """Re-enqueue a dead-lettered event (original event_id) from the event journal."""
+    from medforce.gateway.setup import get_gateway, get_queue_manager
+
+    gateway = get_gateway()
+    queue_manager = get_queue_manager()
+    if gateway is None or queue_manager is None:
+        raise HTTPException(status_code=503, detail="Gateway not initialized")
+
+    try:
+        entry = await gateway.replay_dlq_event(index, enqueue=queue_manager.enqueue)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except KeyError as exc:
+        raise HTTPException(status_code=410, detail=str(exc))
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No DLQ entry at index {index}")
+    return {"success": True, "event_id": entry["event_id"], "patient_id": entry["patient_id"]}
+
+
+# ── Shard Endpoints ──
+
+
+@router.post("/shard/ingest")
+async def shard_ingest(request: ShardIngestRequest):
+    """
+    Accept an event forwarded by another shard.
+
+    The event keeps its original event_id.  Without ``wait`` it is
+    enqueued on this shard's patient queue; with ``wait`` it is
+    processed inline and the response texts are returned.
+    """
+    from medforce.gateway.setup import get_gateway, get_shard_router
+
+    gateway = get_gateway()
+    if gateway is None:
+        raise HTTPException(status_code=503, detail="Gateway not initialized")
+
+    envelope = request.event
+    shard_router = get_shard_router()
+    if shard_router is not None and not shard_router.is_local(envelope.patient_id):
+        # Shards disagree about the ring — refuse rather than bounce it around
+        raise HTTPException(
+            status_code=409,
+            detail=f"Patient {envelope.patient_id} is owned by "
+                   f"{shard_router.owner(envelope.patient_id)}",
+        )
+
+    if request.wait:
+        responses = await _process_on_owner(gateway, envelope)
+        return {"success": True, "event_id": envelope.event_id, "responses": responses}
+
+    try:
+        await _enqueue_local(gateway, envelope)
+    except QueueFullError as exc:
+        raise _too_many_requests(exc)
+    return {"success": True, "event_id": envelope.event_id}
+
+
+@router.get("/shard/owner/{patient_id}")
+async def shard_owner(patient_id: str):
+    """Which shard owns a patient — lets load balancers route reads directly."""
+    from medforce.gateway.setup import get_shard_router
+
+    shard_router = get_shard_router()
+    if shard_router is None:
+        return {"patient_id": patient_id, "sharded": False, "owner": None, "local": True}
+    return {
+        "patient_id": patient_id,
+        "sharded": True,
+        "owner": shard_router.owner(patient_id),
+        "local": shard_router.is_local(patient_id),
+    }
+
+
 # ── Test Harness Endpoints ──
 
 
@@ -525,6 +726,7 @@ async def get_responses(patient_id: str, chat_channel: str | None = None):
         "patient_id": patient_id,
         "count": len(response_list),
         "responses": response_list,
+        "drafts": harness.get_drafts(patient_id) if hasattr(harness, "get_drafts") else [],
     }
 
 
@@ -759,17 +961,12 @@ async def reset_patient(patient_id: str):
     if diary_store is None:
         raise HTTPException(status_code=503, detail="Gateway not initialized")
 
-    deleted = await asyncio.to_thread(diary_store.delete, patient_id)
-
-    # Clear in-memory caches so stale data doesn't get served back
+    # The gateway settles pending / in-flight saves before deleting, so
+    # none can resurrect the diary, and clears its in-memory caches
     if gateway:
-        gateway._diary_cache.pop(patient_id, None)
-        gateway._processed_events.pop(patient_id, None)
-        gateway._rate_limiter.pop(patient_id, None)
-        gateway._event_log = [
-            e for e in gateway._event_log
-            if e.get("patient_id") != patient_id
-        ]
+        deleted = await gateway.reset_patient(patient_id)
+    else:
+        deleted = await asyncio.to_thread(diary_store.delete, patient_id)
 
     # Clear test harness responses for this patient
     registry = get_dispatcher_registry()
@@ -814,6 +1011,29 @@ async def reset_booking_registry():
     }
 
 
+@router.post("/admin/rescore")
+async def rescore_cohort(request: RescoreRequest):
+    """Re-score every diary under a candidate rule set and report level changes."""
+    from medforce.gateway.cohort_rescore import run_rescore
+    from medforce.gateway.setup import get_diary_store
+
+    diary_store = get_diary_store()
+    if diary_store is None:
+        raise HTTPException(status_code=503, detail="Gateway not initialized")
+
+    try:
+        return await asyncio.to_thread(
+            run_rescore,
+            request.rules,
+            store=diary_store,
+            workers=request.workers,
+            chunk_size=request.chunk_size,
+            sample_limit=request.sample_limit,
+        )
+    except (ValueError, KeyError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid rule set: {exc}")
+
+
 @router.get("/scenarios")
 async def list_scenarios():
     """List all available test scenarios."""
@@ -864,13 +1084,9 @@ async def dialogflow_webhook(request_body: dict[str, Any]):
         }])
 
     try:
-        result = await gateway.process_event(envelope)
-        # Convert AgentResponses to Dialogflow format
-        responses = [
-            {"message": r.message}
-            for r in (result or [])
-            if hasattr(r, "message")
-        ]
+        messages = await _process_on_owner(gateway, envelope)
+        # Convert response texts to Dialogflow format
+        responses = [{"message": m} for m in messages]
         if not responses:
             responses = [{"message": "Thank you, we've received your message."}]
         return ingest.build_dialogflow_response(responses)
@@ -913,7 +1129,7 @@ async def email_inbound(request_body: dict[str, Any]):
         return {"success": False, "error": "Could not resolve patient"}
 
     try:
-        await gateway.process_event(envelope)
+        await _process_on_owner(gateway, envelope)
         return {
             "success": True,
             "patient_id": envelope.patient_id,
@@ -961,7 +1177,7 @@ async def twilio_webhook(request_body: dict[str, Any]):
         return {"twiml": "<Response></Response>"}
 
     try:
-        await gateway.process_event(envelope)
+        await _process_on_owner(gateway, envelope)
         return {
             "success": True,
             "patient_id": envelope.patient_id,
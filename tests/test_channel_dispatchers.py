@@ -255,6 +255,29 @@ class TestTwilioDispatcher:
         assert d._account_sid == "AC_TEST"
         assert d._from_number == "+441234567890"
 
+    @pytest.mark.asyncio
+    async def test_sdk_call_runs_off_the_event_loop(self):
+        import threading
+        from medforce.gateway.dispatchers.twilio_dispatcher import (
+            TwilioSMSDispatcher,
+        )
+        loop_thread = threading.get_ident()
+        threads = []
+
+        def create(**kwargs):
+            threads.append(threading.get_ident())
+            return MagicMock(sid="SM123")
+
+        d = TwilioSMSDispatcher(account_sid="AC", auth_token="t", from_number="+44")
+        d._client = MagicMock()
+        d._client.messages.create = create
+        result = await d.send(AgentResponse(
+            recipient="patient", channel="sms", message="Hi",
+            metadata={"phone": "+447700900001"},
+        ))
+        assert result.success is True
+        assert threads and threads[0] != loop_thread
+
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 #  Conditional Registration
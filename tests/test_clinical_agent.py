@@ -3,11 +3,17 @@ Tests for the Clinical Agent — sub-phase management, data extraction,
 risk scoring integration, backward loops, GP responses, and document handling.
 """
 
+import asyncio
+import json
+import time
+
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 
 from medforce.gateway.agents.clinical_agent import ClinicalAgent
 from medforce.gateway.agents.risk_scorer import RiskScorer, RiskResult
+from medforce.gateway.channels import DispatcherRegistry
+from medforce.gateway.dispatchers.test_harness_dispatcher import TestHarnessDispatcher
 from medforce.gateway.diary import (
     ClinicalDocument,
     ClinicalQuestion,
@@ -1038,3 +1044,172 @@ class TestCacheReferralNarrative:
         agent._cache_referral_data(diary, extracted, "PT-202")
         # Empty string is falsy, so should not be stored
         assert diary.clinical.referral_narrative is None
+
+
+class TestParallelTurn:
+    """Extraction, follow-up evaluation and the next question run concurrently."""
+
+    DELAY = 0.05
+
+    @staticmethod
+    def _delayed_client(followup: bool, calls: list[str], extracted=None, questions=None):
+        questions = iter(questions or [])
+
+        async def generate_content(model, contents, **kwargs):
+            if "clinical data extraction" in contents:
+                kind, text = "extract", json.dumps(extracted or {})
+            elif "follow-up is warranted" in contents:
+                kind = "followup"
+                text = json.dumps(
+                    {"followup": True, "question": "When did that start?"}
+                    if followup else {"followup": False}
+                )
+            else:
+                kind = "question"
+                text = next(questions, "How has your appetite been lately?")
+            calls.append(kind)
+            await asyncio.sleep(TestParallelTurn.DELAY)
+            response = MagicMock()
+            response.text = text
+            response.usage_metadata = None
+            return response
+
+        client = MagicMock()
+        client.aio.models.generate_content = generate_content
+        return client
+
+    @staticmethod
+    def _diary():
+        diary = make_clinical_diary_with_questions(n_questions=0)
+        diary.clinical.meds_addressed = True
+        diary.clinical.allergies_addressed = True
+        diary.clinical.questions_asked.append(
+            ClinicalQuestion(question="Has the pain changed since your GP visit?")
+        )
+        diary.clinical.awaiting_followup = True
+        return diary
+
+    async def _turn(self, agent, diary):
+        event = make_user_message_event(
+            "It has been getting a bit sharper in the evenings lately"
+        )
+        t0 = time.perf_counter()
+        result = await agent.process(event, diary)
+        return result, time.perf_counter() - t0
+
+    @pytest.mark.asyncio
+    async def test_speculative_question_used_when_no_followup(self):
+        calls: list[str] = []
+        agent = ClinicalAgent(llm_client=self._delayed_client(False, calls))
+        result, elapsed = await self._turn(agent, self._diary())
+
+        assert sorted(calls) == ["extract", "followup", "question"]
+        assert result.responses[0].message == "How has your appetite been lately?"
+        assert result.updated_diary.clinical.awaiting_followup is True
+        # Three calls overlapped into roughly one call's latency
+        assert elapsed < 2 * self.DELAY
+
+    @pytest.mark.asyncio
+    async def test_followup_wins_and_speculation_is_discarded(self):
+        calls: list[str] = []
+        agent = ClinicalAgent(llm_client=self._delayed_client(True, calls))
+        diary = self._diary()
+        result, _ = await self._turn(agent, diary)
+
+        last_q = result.updated_diary.clinical.questions_asked[-1]
+        assert last_q.is_followup is True
+        assert result.responses[0].message == "When did that start?"
+        assert "How has your appetite been lately?" not in [
+            q.question for q in diary.clinical.questions_asked
+        ]
+
+    @pytest.mark.asyncio
+    async def test_speculation_discarded_when_extraction_changes_diary(self):
+        calls: list[str] = []
+        client = self._delayed_client(
+            False, calls,
+            extracted={"current_medications": ["metformin"]},
+            questions=["What medications do you take?"],
+        )
+        agent = ClinicalAgent(llm_client=client)
+        result, _ = await self._turn(agent, self._diary())
+
+        # The draft written before "metformin" was applied is not asked,
+        # and the follow-up is re-evaluated on the updated summary too
+        assert calls.count("question") == 2
+        assert calls.count("followup") == 2
+        assert "metformin" in result.updated_diary.clinical.current_medications
+        assert result.responses[0].message == "How has your appetite been lately?"
+
+    @pytest.mark.asyncio
+    async def test_speculation_kept_when_prompt_unchanged(self):
+        calls: list[str] = []
+        client = self._delayed_client(
+            False, calls, extracted={"current_medications": ["metformin"]},
+        )
+        agent = ClinicalAgent(llm_client=client)
+        diary = self._diary()
+        # With a referral narrative the prompts don't list medications
+        diary.clinical.referral_narrative = "Referred with RUQ pain and raised ALT."
+        result, elapsed = await self._turn(agent, diary)
+
+        assert sorted(calls) == ["extract", "followup", "question"]
+        assert "metformin" in result.updated_diary.clinical.current_medications
+        assert elapsed < 2 * self.DELAY
+
+    @pytest.mark.asyncio
+    async def test_no_speculation_when_plan_has_questions(self):
+        calls: list[str] = []
+        agent = ClinicalAgent(llm_client=self._delayed_client(False, calls))
+        diary = self._diary()
+        diary.clinical.generated_questions = ["Have you noticed any yellowing?"]
+        result, _ = await self._turn(agent, diary)
+
+        assert sorted(calls) == ["extract", "followup"]
+        assert result.responses[0].message == "Have you noticed any yellowing?"
+
+    @pytest.mark.asyncio
+    async def test_sequential_mode_matches(self):
+        calls: list[str] = []
+        agent = ClinicalAgent(
+            llm_client=self._delayed_client(False, calls), parallel_turn=False,
+        )
+        result, elapsed = await self._turn(agent, self._diary())
+
+        assert calls == ["extract", "followup", "question"]
+        assert result.responses[0].message == "How has your appetite been lately?"
+        assert elapsed >= 3 * self.DELAY
+
+    @pytest.mark.asyncio
+    async def test_question_streamed_only_once_chosen(self):
+        calls: list[str] = []
+        client = self._delayed_client(False, calls)
+
+        async def generate_content_stream(model, contents, **kwargs):
+            calls.append("question")
+
+            async def gen():
+                for text in ("How has your ", "appetite been lately?"):
+                    chunk = MagicMock()
+                    chunk.text = text
+                    chunk.usage_metadata = None
+                    yield chunk
+            return gen()
+
+        client.aio.models.generate_content_stream = generate_content_stream
+        registry = DispatcherRegistry()
+        th = TestHarnessDispatcher()
+        registry.register(th)
+        agent = ClinicalAgent(llm_client=client)
+
+        event = make_user_message_event("It has been getting sharper in the evenings")
+        event.payload["channel"] = "test_harness"
+        with registry.streaming() as published:
+            result = await agent.process(event, self._diary())
+        response = result.responses[0]
+
+        assert published == [response.stream]
+        assert response.stream.text == "How has your appetite been lately?"
+        await registry.dispatch(response)
+        await registry.release_streams(published)
+        assert th.get_responses("PT-100")[0].message == response.message
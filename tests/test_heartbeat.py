@@ -9,6 +9,7 @@ from unittest.mock import AsyncMock, MagicMock
 
 from medforce.gateway.heartbeat import (
     MILESTONE_DAYS,
+    RECHECK_CEILING,
     HeartbeatScheduler,
 )
 from medforce.gateway.diary import (
@@ -337,3 +338,222 @@ class TestStartStop:
         await scheduler.start()
         await scheduler.start()  # Should not crash
         await scheduler.stop()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  Due-time Scheduling
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class CountingDiaryStore(MockDiaryStore):
+    def __init__(self, diaries: dict | None = None):
+        super().__init__(diaries)
+        self.loads: list[str] = []
+
+    def load(self, patient_id):
+        self.loads.append(patient_id)
+        return super().load(patient_id)
+
+
+def _days_ago(days: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+class TestDueTimeScheduling:
+    """The loop checks only patients whose deadline has passed."""
+
+    def test_next_deadline_is_first_unfired_milestone(self):
+        scheduler = HeartbeatScheduler(processor=AsyncMock(), diary_store=MockDiaryStore())
+        booked = _days_ago(13)
+        diary = make_monitoring_diary(appointment_date=booked)
+        due = datetime.fromtimestamp(scheduler._next_deadline(diary), timezone.utc)
+        expected = datetime.strptime(booked, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        assert due == expected + timedelta(days=14)
+
+    def test_far_deadline_capped_by_recheck_ceiling(self):
+        scheduler = HeartbeatScheduler(processor=AsyncMock(), diary_store=MockDiaryStore())
+        diary = make_monitoring_diary(appointment_date=_days_ago(3))
+        wait = scheduler._next_deadline(diary) - datetime.now(timezone.utc).timestamp()
+        assert RECHECK_CEILING - 5 < wait <= RECHECK_CEILING
+
+    def test_next_deadline_includes_gp_reminder(self):
+        scheduler = HeartbeatScheduler(processor=AsyncMock(), diary_store=MockDiaryStore())
+        diary = make_monitoring_diary(appointment_date=_days_ago(3))
+        diary.gp_channel = GPChannel(queries=[GPQuery(
+            query_id="Q1", status="pending",
+            sent=datetime.now(timezone.utc) - timedelta(hours=40),
+        )])
+        due = scheduler._next_deadline(diary)
+        hours_until = (due - datetime.now(timezone.utc).timestamp()) / 3600
+        assert 7.9 < hours_until < 8.1
+
+    @pytest.mark.asyncio
+    async def test_only_due_patients_are_loaded(self):
+        diaries = {
+            f"PT-{i}": (make_monitoring_diary(f"PT-{i}", _days_ago(2)), 1)
+            for i in range(5)
+        }
+        diaries["PT-DUE"] = (make_monitoring_diary("PT-DUE", _days_ago(14)), 1)
+        store = CountingDiaryStore(diaries)
+        processor = AsyncMock()
+        scheduler = HeartbeatScheduler(processor=processor, diary_store=store)
+        for pid in diaries:
+            scheduler.register(pid)
+
+        # First pass: every newly registered patient is looked at once
+        await scheduler._check_due_patients()
+        assert sorted(store.loads) == sorted(diaries)
+        assert processor.call_count == 1
+
+        # Nothing is due now — a second pass loads nothing
+        store.loads.clear()
+        await scheduler._check_due_patients()
+        assert store.loads == []
+        assert scheduler.get_metrics()["scheduled"] == 6
+
+    @pytest.mark.asyncio
+    async def test_unrecorded_milestone_is_not_refired_immediately(self):
+        diary = make_monitoring_diary("PT-1", _days_ago(14))
+        store = CountingDiaryStore({"PT-1": (diary, 1)})
+        processor = AsyncMock()
+        scheduler = HeartbeatScheduler(
+            processor=processor, diary_store=store, check_interval=600,
+        )
+        scheduler.register("PT-1")
+        await scheduler._check_due_patients()
+        await scheduler._check_due_patients()
+        assert processor.call_count == 1
+        wait = (scheduler.next_due("PT-1") - datetime.now(timezone.utc)).total_seconds()
+        assert 590 < wait <= 600
+
+    def test_observe_diary_registers_and_unregisters(self):
+        scheduler = HeartbeatScheduler(processor=AsyncMock(), diary_store=MockDiaryStore())
+        diary = make_monitoring_diary("PT-OBS", _days_ago(1))
+        scheduler.observe_diary("PT-OBS", diary)
+        assert "PT-OBS" in scheduler.monitored_patients
+        wait = (scheduler.next_due("PT-OBS") - datetime.now(timezone.utc)).total_seconds()
+        assert wait > RECHECK_CEILING - 5  # nothing due before the safety re-check
+
+        diary.monitoring.monitoring_active = False
+        scheduler.observe_diary("PT-OBS", diary)
+        assert "PT-OBS" not in scheduler.monitored_patients
+        assert scheduler.next_due("PT-OBS") is None
+
+    @pytest.mark.asyncio
+    async def test_loop_wakes_for_new_deadline(self):
+        import asyncio
+
+        diary = make_monitoring_diary("PT-WAKE", _days_ago(14))
+        processor = AsyncMock()
+        scheduler = HeartbeatScheduler(
+            processor=processor,
+            diary_store=MockDiaryStore({"PT-WAKE": (diary, 1)}),
+            check_interval=3600,
+        )
+        await scheduler.start()
+        try:
+            await asyncio.sleep(0.05)
+            scheduler.register("PT-WAKE")  # due now — must not wait an hour
+            for _ in range(50):
+                if processor.call_count:
+                    break
+                await asyncio.sleep(0.01)
+            assert processor.call_count == 1
+        finally:
+            await scheduler.stop()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  Concurrent Fan-out
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class SlowDiaryStore(MockDiaryStore):
+    """Blocking load that records how many run at once."""
+
+    def __init__(self, diaries, delay=0.05):
+        super().__init__(diaries)
+        import threading
+        self._delay = delay
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def load(self, patient_id):
+        import time
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self._delay)
+        with self._lock:
+            self.in_flight -= 1
+        return super().load(patient_id)
+
+
+class TestConcurrentFanOut:
+
+    def _diaries(self, n, days_ago=2):
+        return {
+            f"PT-{i}": (make_monitoring_diary(f"PT-{i}", _days_ago(days_ago)), 1)
+            for i in range(n)
+        }
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        store = SlowDiaryStore(self._diaries(12))
+        scheduler = HeartbeatScheduler(
+            processor=AsyncMock(), diary_store=store, max_concurrency=4,
+        )
+        for pid in store._diaries:
+            scheduler.register(pid)
+        await scheduler._check_due_patients()
+        assert store.max_in_flight == 4
+        metrics = scheduler.get_metrics()
+        assert metrics["ticks"] == 1
+        assert metrics["last_tick_patients"] == 12
+        # 12 loads of 50ms at 4-wide ≈ 150ms, not 600ms serial
+        assert metrics["last_tick_ms"] < 450
+
+    @pytest.mark.asyncio
+    async def test_loads_do_not_block_event_loop(self):
+        import asyncio
+
+        store = SlowDiaryStore(self._diaries(4), delay=0.1)
+        scheduler = HeartbeatScheduler(
+            processor=AsyncMock(), diary_store=store, max_concurrency=1,
+        )
+        for pid in store._diaries:
+            scheduler.register(pid)
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        t = asyncio.create_task(ticker())
+        await scheduler._check_due_patients()
+        t.cancel()
+        # ~400ms of serial loads — the loop kept running meanwhile
+        assert ticks >= 10
+
+    @pytest.mark.asyncio
+    async def test_events_enqueued_through_queue_manager(self):
+        store = MockDiaryStore(self._diaries(3, days_ago=14))
+        processor = AsyncMock()
+        queue_manager = MagicMock()
+        queue_manager.enqueue = AsyncMock()
+        scheduler = HeartbeatScheduler(
+            processor=processor, diary_store=store, queue_manager=queue_manager,
+        )
+        for pid in store._diaries:
+            scheduler.register(pid)
+        await scheduler._check_due_patients()
+
+        processor.assert_not_called()
+        assert queue_manager.enqueue.call_count == 3
+        events = [c.args[0] for c in queue_manager.enqueue.call_args_list]
+        assert {e.event_type.value for e in events} == {"HEARTBEAT"}
+        assert scheduler.get_metrics()["heartbeats_fired"] == 3
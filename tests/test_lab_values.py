@@ -0,0 +1,129 @@
+"""
+Tests for the shared lab value module — registry, parsing, unit
+conversion, panel normalisation and free-text extraction.
+"""
+
+import pytest
+from medforce.gateway.agents.lab_values import (
+    CONVENTIONAL_TO_CANONICAL,
+    LAB_PARAMETERS,
+    bare_lab_units,
+    canonical_lab_param,
+    extract_lab_values,
+    normalize_lab_panel,
+    normalize_lab_value,
+    parse_lab_measurement,
+    parse_lab_value,
+    to_canonical,
+)
+
+
+class TestRegistry:
+
+    @pytest.mark.parametrize("key,expected", [
+        ("ALT", "alt"),
+        ("Alanine transaminase", "alt"),
+        ("Total Bilirubin", "bilirubin"),
+        ("serum_bilirubin", "bilirubin"),
+        ("direct_bilirubin", "direct_bilirubin"),
+        ("Platelet count x10^9", "platelets"),
+        ("Hb", "haemoglobin"),
+        ("FIB-4", "fib_4"),
+        ("exotic_marker", "exotic_marker"),
+    ])
+    def test_canonical_param(self, key, expected):
+        assert canonical_lab_param(key) == expected
+
+    def test_conventional_factors(self):
+        assert CONVENTIONAL_TO_CANONICAL == {
+            "bilirubin": 17.1, "creatinine": 88.4, "albumin": 10.0,
+        }
+        assert LAB_PARAMETERS["albumin"].unit == "g/L"
+
+
+class TestParsing:
+
+    @pytest.mark.parametrize("raw,expected", [
+        (28, (28.0, "")),
+        ("28 µmol/L", (28.0, "µmol/l")),
+        ("28 μmol/L", (28.0, "µmol/l")),
+        (">500", (500.0, "")),
+        ("1.4 × 10^6", (1400000.0, "")),
+        ("pending", (None, "")),
+        ("", (None, "")),
+        (None, (None, "")),
+        (True, (None, "")),
+    ])
+    def test_parse_measurement(self, raw, expected):
+        assert parse_lab_measurement(raw) == expected
+
+    def test_parse_value(self):
+        assert parse_lab_value("485 kU/L") == 485.0
+
+    def test_to_canonical(self):
+        assert to_canonical("bilirubin", 3, "mg/dl") == 51.3
+        assert to_canonical("bilirubin", 3, default_units="conventional") == 51.3
+        assert to_canonical("bilirubin", 28, "µmol/l", default_units="conventional") == 28
+        assert to_canonical("alt", 600, default_units="conventional") == 600
+
+
+class TestNormalization:
+
+    def test_explicit_unit_converted(self):
+        assert normalize_lab_value("bilirubin", "51.3 µmol/L", units="conventional") == 3.0
+        assert normalize_lab_value("albumin", "3.2 g/dL") == 32.0
+
+    def test_bare_number_assumed_in_requested_units(self):
+        assert normalize_lab_value("bilirubin", 3, units="conventional") == 3.0
+        assert normalize_lab_value("bilirubin", 28) == 28.0
+
+    def test_bare_units_inferred_from_size(self):
+        assert bare_lab_units("albumin", 2.8) == "conventional"
+        assert bare_lab_units("albumin", 28) == "canonical"
+        assert bare_lab_units("alt", 5000) == "conventional"
+        panel = {"albumin": 28, "bilirubin": 3.0, "creatinine": "1.1 mg/dL", "ALT": 60}
+        assert normalize_lab_panel(panel, units="conventional", bare_units="infer") == {
+            "albumin": 2.8, "bilirubin": 3.0, "creatinine": 1.1, "ALT": 60.0,
+        }
+
+    def test_panel_drops_non_numeric(self):
+        panel = {"Bilirubin": "34.2 umol/L", "ALT": 485, "note": "pending", "flag": True}
+        assert normalize_lab_panel(panel, units="conventional") == {
+            "Bilirubin": 2.0, "ALT": 485.0,
+        }
+
+    def test_panel_with_unhashable_values(self):
+        assert normalize_lab_panel({"ALT": "60", "history": [1, 2]}) == {"ALT": 60.0}
+
+    def test_panel_result_is_a_copy(self):
+        first = normalize_lab_panel({"ALT": 60})
+        first["ALT"] = 0
+        assert normalize_lab_panel({"ALT": 60}) == {"ALT": 60.0}
+
+    def test_unknown_unit_system(self):
+        with pytest.raises(ValueError):
+            normalize_lab_panel({"ALT": 60}, units="imperial")
+
+
+class TestTextExtraction:
+
+    def test_multiple_params(self):
+        assert extract_lab_values("my bilirubin was 8 and ALT 600") == {
+            "bilirubin": 8.0, "ALT": 600.0,
+        }
+
+    def test_aliases_and_labels(self):
+        assert extract_lab_values("Hb 11.5, white blood cell 14, plt: 90") == {
+            "haemoglobin": 11.5, "WBC": 14.0, "platelets": 90.0,
+        }
+
+    def test_first_mention_wins(self):
+        assert extract_lab_values("bili 4, bilirubin 9") == {"bilirubin": 4.0}
+
+    def test_stated_unit_converted(self):
+        assert extract_lab_values("creatinine 176.8 umol/L", units="conventional") == {
+            "creatinine": 2.0,
+        }
+
+    def test_word_boundaries(self):
+        assert extract_lab_values("I had salt 5 times and a basting 3") == {}
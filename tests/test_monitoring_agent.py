@@ -334,6 +334,60 @@ class TestLabComparison:
         assert len(comparison["changes"]) == 1
         assert comparison["changes"][0]["change_pct"] == 100.0
 
+    def test_params_matched_by_canonical_name(self):
+        agent = MonitoringAgent()
+        comparison = agent._compare_values({"alt": 200}, {"ALT": 450})
+
+        assert comparison["deteriorating"][0]["param"] == "ALT"
+        assert comparison["deteriorating"][0]["baseline"] == 200.0
+
+    def test_mixed_units_compared_like_for_like(self):
+        agent = MonitoringAgent()
+        baseline = {"bilirubin": "51.3 µmol/L"}  # 3.0 mg/dL
+        new_values = {"bilirubin": "3.3 mg/dL"}
+
+        comparison = agent._compare_values(baseline, new_values)
+
+        assert comparison["changes"][0]["baseline"] == 3.0
+        assert comparison["changes"][0]["change_pct"] == 10.0
+        assert comparison["deteriorating"] == []
+
+    def test_uk_unit_albumin_drop_on_both_sides(self):
+        agent = MonitoringAgent()
+        # Bare g/L on both sides: 28 → 20 is a 28.6% drop
+        comparison = agent._compare_values({"albumin": 28}, {"albumin": 20})
+
+        change = comparison["deteriorating"][0]
+        assert change["baseline"] == 2.8
+        assert change["new"] == 2.0
+        assert change["change_pct"] == -28.6
+
+    def test_uk_unit_bilirubin_rise_on_both_sides(self):
+        agent = MonitoringAgent()
+        comparison = agent._compare_values({"bilirubin": 28}, {"bilirubin": 40})
+
+        assert comparison["changes"][0]["change_pct"] == pytest.approx(42.9, abs=0.1)
+        assert comparison["deteriorating"] == []
+
+    def test_bare_units_inferred_per_value(self):
+        agent = MonitoringAgent()
+        # µmol/L baseline against a mg/dL upload: 28 µmol/L = 1.64 mg/dL
+        comparison = agent._compare_values({"Total Bilirubin": 28}, {"bilirubin": 3.0})
+
+        change = comparison["deteriorating"][0]
+        assert change["baseline"] == pytest.approx(1.637, abs=1e-3)
+        assert change["change_pct"] == pytest.approx(83.2, abs=0.1)
+
+        comparison = agent._compare_values({"creatinine": 88.4}, {"creatinine": 1.1})
+        assert comparison["changes"][0]["baseline"] == 1.0
+        assert comparison["changes"][0]["change_pct"] == 10.0
+
+    def test_uk_unit_albumin_upload_passes_validation(self):
+        agent = MonitoringAgent()
+        validated, warnings = agent._validate_lab_values({"albumin": 20, "bilirubin": 400})
+        assert validated == {"albumin": 20, "bilirubin": 400}
+        assert warnings == []
+
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 #  Document Upload (Monitoring Phase)
@@ -316,7 +316,8 @@ class TestLabValueValidation:
         assert len(warnings) == 0
 
     def test_out_of_range_excluded(self, agent):
-        values = {"bilirubin": 500.0, "ALT": 45}  # bilirubin > 50 is implausible
+        # implausible in either unit: 1000 µmol/L is 58.5 mg/dL (> 50)
+        values = {"bilirubin": 1000.0, "ALT": 45}
         validated, warnings = agent._validate_lab_values(values)
         assert "bilirubin" not in validated
         assert "ALT" in validated
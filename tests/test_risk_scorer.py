@@ -7,12 +7,14 @@ Covers:
   - LLM fallback heuristics
   - Risk rank ordering
   - Edge cases (missing data, mixed signals)
+  - Compiled rule engine (aliases, keyword automaton, batch scoring)
 """
 
 import pytest
 from medforce.gateway.agents.risk_scorer import (
     HARD_RULES,
     KEYWORD_RULES,
+    RULE_ENGINE,
     RiskResult,
     RiskScorer,
 )
@@ -409,3 +411,89 @@ class TestPatientScenarios:
         clinical = make_clinical(questions_asked=[q])
         result = scorer.score(clinical, {})
         assert result.risk_level == RiskLevel.HIGH
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  Compiled Rule Engine Tests
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+class TestRuleEngine:
+    """Canonical lab keys, keyword automaton and the shared rule set."""
+
+    def test_lab_aliases_share_rules(self):
+        for key in ("ALT", "alt", "Alanine Transaminase", "alanine-aminotransferase"):
+            hits = RULE_ENGINE.evaluate_labs({key: "600 U/L"})
+            assert [h.description for h in hits] == ["ALT > 500 U/L", "ALT > 200 U/L"]
+            assert hits[0].param == key
+
+    def test_duplicate_keys_evaluated_once(self):
+        hits = RULE_ENGINE.evaluate_labs({"ALT": 600, "alt": 600})
+        assert len(hits) == 2
+
+    def test_duplicate_keys_judged_by_worst_value(self):
+        scorer = RiskScorer()
+        for labs in (
+            {"bilirubin": 15, "total_bilirubin": 60},
+            {"total_bilirubin": 60, "bilirubin": 15},
+        ):
+            result = scorer.score(make_clinical(), labs)
+            assert result.risk_level == RiskLevel.HIGH, labs
+            assert "Bilirubin > 50 µmol/L (severe)" in result.triggered_rules, labs
+        hits = RULE_ENGINE.evaluate_labs({"platelets": 200, "plt": 40})
+        assert hits and all(h.param == "plt" for h in hits)
+
+    def test_keyword_word_boundaries(self):
+        scorer = RiskScorer()
+        # "mass" inside "biomass" / "massage" is not a suspicious mass
+        result = scorer.score(make_clinical(chief_complaint="I had a massage at the biomass plant"), {})
+        assert "keyword" not in result.method
+        # Simple inflections still match
+        result = scorer.score(make_clinical(chief_complaint="my eyes look jaundiced"), {})
+        assert result.risk_level == RiskLevel.HIGH
+
+    def test_negated_keyword_does_not_fire(self):
+        scorer = RiskScorer()
+        for text in ("no jaundice", "denies confusion", "I haven't had any melena"):
+            result = scorer.score(make_clinical(chief_complaint=text), {})
+            assert "keyword" not in result.method, text
+
+    def test_negation_scoped_to_clause(self):
+        scorer = RiskScorer()
+        result = scorer.score(make_clinical(chief_complaint="no pain, but I have jaundice"), {})
+        assert result.risk_level == RiskLevel.HIGH
+        # A negation in one field doesn't suppress a keyword in another
+        result = scorer.score(
+            make_clinical(chief_complaint="none, no", red_flags=["ascites"]), {},
+        )
+        assert result.risk_level == RiskLevel.HIGH
+
+    def test_overlapping_keywords_all_found(self):
+        hits = RULE_ENGINE.match_keywords(["liver failure with gi bleeding"])
+        assert {h.description for h in hits} == {"Liver failure", "GI bleeding"}
+
+    def test_monitoring_scope_uses_conventional_units(self):
+        # 6 mg/dL bilirubin ≈ 103 µmol/L — above the 5 mg/dL critical bar
+        hits = RULE_ENGINE.evaluate_labs(
+            {"bilirubin": 6.0}, scope="monitoring", units="conventional",
+        )
+        assert [h.description for h in hits] == ["Bilirubin > 85.5 µmol/L (5 mg/dL)"]
+        # Exactly at the threshold does not fire
+        assert RULE_ENGINE.evaluate_labs(
+            {"creatinine": 3.0}, scope="monitoring", units="conventional",
+        ) == []
+        # Risk-only bands are not monitoring alerts
+        assert RULE_ENGINE.evaluate_labs({"alt": 300}, scope="monitoring") == []
+
+    def test_score_batch_matches_score(self):
+        scorer = RiskScorer()
+        cases = [
+            (make_clinical(), {"bilirubin": 90}),
+            (make_clinical(chief_complaint="I have nausea"), {"ALT": 250}),
+            (make_clinical(red_flags=["jaundice"]), None),
+            (make_clinical(chief_complaint="routine checkup", medical_history=["none"]), {}),
+            (make_clinical(), {"platelet count": 40, "INR": "2.5"}),
+        ]
+        batch = scorer.score_batch(cases)
+        single = [scorer.score(clinical, labs) for clinical, labs in cases]
+        assert batch == single